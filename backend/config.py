@@ -22,6 +22,20 @@ class Settings(BaseSettings):
     ATTENDANCE_API_URL: str = "http://192.168.20.56:8000/api"
     ATTENDANCE_API_TIMEOUT: int = 30
     
+    # Jobs en arrière-plan (bulletins, sauvegarde batch)
+    JOBS_MAX_WORKERS: int = 2
+    JOBS_RETENTION_HEURES: int = 24
+    
+    # Cache disque des PDF générés
+    PDF_CACHE_MAX_MO: int = 200
+    
+    # Sessions de preview d'import de pointage
+    PREVIEW_SESSION_TTL_MINUTES: int = 60
+    PREVIEW_SESSIONS_MAX_MO: int = 200
+    
+    # Taille maximale des fichiers importés (pointages, barème IRG)
+    UPLOAD_MAX_MO: int = 50
+    
     @property
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
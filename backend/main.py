@@ -5,7 +5,7 @@ from contextlib import asynccontextmanager
 from config import settings
 from database import init_db
 import models
-from database import engine
+from database import engine, SessionLocal
 
 # Import des routers
 from routers import (
@@ -30,8 +30,10 @@ from routers import (
     logistics_types,
     parametres_salaires,
     edition_salaires,  # Ancien système (deprecated)
-    traitement_salaires  # Nouveau système v3.0
+    traitement_salaires,  # Nouveau système v3.0
+    jobs  # Jobs en arrière-plan (bulletins, sauvegarde batch)
 )
+from services.job_queue import job_queue
 
 # Lifespan event handler moderne
 @asynccontextmanager
@@ -39,8 +41,16 @@ async def lifespan(app: FastAPI):
     # Startup
     init_db()
     print("Base de donnees initialisee")
+    db = SessionLocal()
+    try:
+        job_queue.reprendre_jobs(db)
+    except Exception as e:
+        print(f"Reprise des jobs impossible: {e}")
+    finally:
+        db.close()
     yield
-    # Shutdown (rien à faire pour l'instant)
+    # Shutdown: les jobs non démarrés restent en attente en base
+    job_queue.arreter()
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -90,6 +100,7 @@ app.include_router(attendance_integration.router, prefix="/api")
 app.include_router(incomplete_logs.router, prefix="/api")
 app.include_router(logistics_types.router, prefix="/api")
 app.include_router(parametres_salaires.router, prefix="/api")
+app.include_router(jobs.router, prefix="/api")
 
 @app.get("/")
 def root():
@@ -10,6 +10,7 @@ from .attendance_mapping import (
     AttendanceEmployeeMapping,
     AttendanceSyncLog,
     AttendanceImportConflict,
+    AttendanceSyncState,
     SyncMethod,
     ConflictStatus,
     LogType
@@ -22,10 +23,12 @@ from .logging import Logging, ActionType
 from .salaire import Salaire
 from .logistics_type import LogisticsType
 from .mission_client_detail import MissionClientDetail, MissionLogisticsMovement
+from .client_logistics_balance import ClientLogisticsBalance
 from .parametres_salaire import ParametresSalaire
 from .irg_bareme import IRGBareme
 from .report_avance_credit import ReportAvanceCredit
 from .camion import Camion
+from .job import Job, StatutJob
 
 __all__ = [
     "Employe",
@@ -51,6 +54,7 @@ __all__ = [
     "AttendanceEmployeeMapping",
     "AttendanceSyncLog",
     "AttendanceImportConflict",
+    "AttendanceSyncState",
     "SyncMethod",
     "ConflictStatus",
     "LogType",
@@ -58,8 +62,11 @@ __all__ = [
     "LogisticsType",
     "MissionClientDetail",
     "MissionLogisticsMovement",
+    "ClientLogisticsBalance",
     "ParametresSalaire",
     "IRGBareme",
     "ReportAvanceCredit",
     "Camion",
+    "Job",
+    "StatutJob",
 ]
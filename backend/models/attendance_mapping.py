@@ -71,3 +71,15 @@ class AttendanceImportConflict(Base):
     
     def __repr__(self):
         return f"<AttendanceConflict {self.conflict_date} - {self.status}>"
+
+class AttendanceSyncState(Base):
+    """High-water mark of the pull sync (last Attendance log imported), per scope"""
+    __tablename__ = "attendance_sync_state"
+    
+    scope = Column(String(50), primary_key=True)  # "logs" or "logs:employee:<attendance id>"
+    last_log_id = Column(Integer, nullable=True)
+    last_log_timestamp = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<AttendanceSyncState {self.scope} - {self.last_log_id}>"
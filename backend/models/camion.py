@@ -29,8 +29,13 @@ class Camion(Base):
         return f"<Camion(id={self.id}, marque={self.marque}, modele={self.modele}, " \
                f"immatriculation={self.immatriculation})>"
     
-    def to_dict(self):
-        """Convertir en dictionnaire pour API"""
+    def to_dict(self, nombre_missions: int = 0):
+        """
+        Convertir en dictionnaire pour API
+        
+        nombre_missions est fourni par l'appelant (requête groupée), pour ne
+        pas charger toutes les missions du camion.
+        """
         return {
             "id": self.id,
             "marque": self.marque,
@@ -42,5 +47,5 @@ class Camion(Base):
             "date_acquisition": str(self.date_acquisition) if self.date_acquisition else None,
             "date_revision": str(self.date_revision) if self.date_revision else None,
             "notes": self.notes,
-            "nombre_missions": len(self.missions) if self.missions else 0
+            "nombre_missions": nombre_missions
         }
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy.orm import relationship
+from database import Base
+
+class ClientLogisticsBalance(Base):
+    """
+    Solde logistique matérialisé par client et type d'emballage
+    
+    Somme des mouvements (quantity_out / quantity_in) de toutes les missions,
+    tenue à jour par MissionService à chaque création / modification /
+    suppression de mission (services/soldes_logistiques.py).
+    """
+    __tablename__ = "client_logistics_balance"
+
+    client_id = Column(Integer, ForeignKey("clients.id", ondelete="CASCADE"), primary_key=True)
+    logistics_type_id = Column(Integer, ForeignKey("logistics_types.id", ondelete="CASCADE"), primary_key=True)
+    total_out = Column(Integer, nullable=False, default=0)  # Total livré (prises)
+    total_in = Column(Integer, nullable=False, default=0)   # Total récupéré (retournées)
+
+    # Relationships
+    client = relationship("Client")
+    logistics_type = relationship("LogisticsType")
+
+    @property
+    def solde(self) -> int:
+        return self.total_out - self.total_in
@@ -0,0 +1,81 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Enum as SQLEnum, JSON
+from database import Base
+from datetime import datetime
+import enum
+
+
+class StatutJob(enum.Enum):
+    EN_ATTENTE = "en_attente"
+    EN_COURS = "en_cours"
+    TERMINE = "termine"
+    ERREUR = "erreur"
+    ANNULE = "annule"
+
+
+STATUTS_FINAUX = (StatutJob.TERMINE, StatutJob.ERREUR, StatutJob.ANNULE)
+
+
+class Job(Base):
+    """
+    Traitement long exécuté en arrière-plan (bulletins, sauvegarde batch...)
+
+    Le fichier résultat est écrit sur disque (data/jobs/<id>/), seul son
+    chemin est conservé en base.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = {'extend_existing': True}
+
+    id = Column(String(36), primary_key=True)
+    type_job = Column(String(100), nullable=False, index=True)
+    statut = Column(SQLEnum(StatutJob), nullable=False, default=StatutJob.EN_ATTENTE, index=True)
+    parametres = Column(JSON, nullable=True)
+
+    # Progression (nombre d'employés traités / total)
+    progression = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=False, default=0)
+    message = Column(String(255), nullable=True)
+    erreur = Column(Text, nullable=True)
+    annulation_demandee = Column(Boolean, nullable=False, default=False)
+
+    # Résultat
+    fichier_resultat = Column(String(500), nullable=True)
+    nom_fichier = Column(String(255), nullable=True)
+    media_type = Column(String(100), nullable=True)
+
+    # Suivi
+    worker = Column(String(100), nullable=True, comment="hôte:pid du processus qui exécute le job")
+    user_id = Column(Integer, nullable=True, index=True)
+    created_at = Column(DateTime, default=datetime.now, nullable=False, index=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    @property
+    def pourcentage(self) -> int:
+        if self.statut == StatutJob.TERMINE:
+            return 100
+        if not self.total:
+            return 0
+        return min(100, int(self.progression * 100 / self.total))
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'type_job': self.type_job,
+            'statut': self.statut.value if self.statut else None,
+            'parametres': self.parametres,
+            'progression': self.progression,
+            'total': self.total,
+            'pourcentage': self.pourcentage,
+            'message': self.message,
+            'erreur': self.erreur,
+            'annulation_demandee': self.annulation_demandee,
+            'nom_fichier': self.nom_fichier,
+            'resultat_disponible': self.statut == StatutJob.TERMINE and self.fichier_resultat is not None,
+            'user_id': self.user_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.type_job} {self.statut}>"
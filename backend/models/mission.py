@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Index
 from sqlalchemy.types import Numeric
 from sqlalchemy.orm import relationship
 from database import Base
@@ -21,6 +21,11 @@ class Mission(Base):
     camion = relationship("Camion", back_populates="missions")  # ⭐ v3.6.0: Relation camion
     client_details = relationship("MissionClientDetail", back_populates="mission", cascade="all, delete-orphan")
     
+    # Index couvrant: primes d'un chauffeur sur une période lues dans l'index seul
+    __table_args__ = (
+        Index('idx_missions_chauffeur_date_prime', 'chauffeur_id', 'date_mission', 'prime_calculee'),
+    )
+    
     def __repr__(self):
         return f"<Mission {self.id}: Chauffeur {self.chauffeur_id} - {self.date_mission}>"
 
@@ -21,6 +21,10 @@ class MissionClientDetail(Base):
     client = relationship("Client")
     logistics_movements = relationship("MissionLogisticsMovement", back_populates="client_detail", cascade="all, delete-orphan")
 
+    @property
+    def client_name(self):
+        return f"{self.client.nom} {self.client.prenom}" if self.client else None
+
 class MissionLogisticsMovement(Base):
     __tablename__ = "mission_logistics_movements"
 
@@ -34,3 +38,7 @@ class MissionLogisticsMovement(Base):
     # Relationships
     client_detail = relationship("MissionClientDetail", back_populates="logistics_movements")
     logistics_type = relationship("LogisticsType")
+
+    @property
+    def logistics_type_name(self):
+        return self.logistics_type.name if self.logistics_type else None
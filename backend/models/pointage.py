@@ -2,6 +2,9 @@ from sqlalchemy import Column, Integer, String, Date, ForeignKey, UniqueConstrai
 from sqlalchemy.orm import relationship
 from database import Base
 
+# Noms des colonnes jour_01 .. jour_31
+JOURS_COLONNES = tuple(f"jour_{jour:02d}" for jour in range(1, 32))
+
 class Pointage(Base):
     __tablename__ = "pointages"
     
@@ -54,6 +57,11 @@ class Pointage(Base):
     employe = relationship("Employe", back_populates="pointages")
     
     
+    @classmethod
+    def colonnes_jours(cls):
+        """Colonnes jour_01 .. jour_31 (pour les requêtes en masse sans objets ORM)"""
+        return [getattr(cls, nom) for nom in JOURS_COLONNES]
+    
     def get_jour(self, numero_jour: int):
         """Obtenir la valeur d'un jour spécifique (0 ou 1)"""
         return getattr(self, f"jour_{numero_jour:02d}")
@@ -80,8 +88,8 @@ class Pointage(Base):
         }
         
         # Compter les jours
-        for jour in range(1, 32):
-            valeur = self.get_jour(jour)
+        for nom in JOURS_COLONNES:
+            valeur = getattr(self, nom)
             if valeur == 1:  # Travaillé ou Férié
                 totaux["jours_travailles"] += 1
             elif valeur == 0:  # Absence (toutes catégories confondues dans la DB)
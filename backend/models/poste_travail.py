@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, TIMESTAMP
+from sqlalchemy import Column, Integer, String, Boolean, TIMESTAMP, Time
 from sqlalchemy.sql import func
 from database import Base
 
@@ -11,6 +11,12 @@ class PosteTravail(Base):
     modifiable = Column(Boolean, default=True, nullable=False)
     actif = Column(Boolean, default=True, nullable=False, index=True)
     
+    # Horaire type du poste (imports de pointeuse); fin <= début = poste de nuit.
+    # Sans horaire: 08:00 - 17:00, journée de 8h
+    heure_debut = Column(Time, nullable=True)
+    heure_fin = Column(Time, nullable=True)
+    heures_journee = Column(Integer, nullable=True)
+    
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
     updated_at = Column(TIMESTAMP, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
     
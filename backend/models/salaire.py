@@ -52,6 +52,7 @@ class Salaire(Base):
     # IRG
     irg = Column(Numeric(10, 2), default=0)
     irg_base_30j = Column(Numeric(10, 2), nullable=True, comment="IRG calculé sur base 30j (avant proratisation)")
+    irg_bareme_version = Column(String(64), nullable=True, comment="Version du barème IRG utilisé pour le calcul")
     
     # Autres déductions
     total_avances = Column(Numeric(10, 2), default=0)
@@ -78,6 +79,11 @@ class Salaire(Base):
     date_validation = Column(DateTime, nullable=True)
     date_paiement_effective = Column(DateTime, nullable=True)
     
+    # ⭐ Provenance: empreinte des entrées du calcul (pointage, congés, missions,
+    # avances, crédits, paramètres) et horodatage précis du calcul persisté
+    empreinte_entrees = Column(String(64), nullable=True, comment="SHA-256 des entrées du calcul")
+    calcule_le = Column(DateTime, nullable=True, comment="Date/heure du calcul enregistré")
+    
     created_at = Column(Date, default=datetime.now)
     updated_at = Column(Date, default=datetime.now, onupdate=datetime.now)
     
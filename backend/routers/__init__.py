@@ -1,4 +1,4 @@
-from . import employes, pointages, clients, missions, avances, credits, salaires, rapports, parametres, utilisateurs, database_config, logs, postes_travail, conges, attendance_integration, incomplete_logs, logistics_types, parametres_salaires, edition_salaires, traitement_salaires
+from . import employes, pointages, clients, missions, avances, credits, salaires, rapports, parametres, utilisateurs, database_config, logs, postes_travail, conges, attendance_integration, incomplete_logs, logistics_types, parametres_salaires, edition_salaires, traitement_salaires, jobs
 
 __all__ = [
     "employes",
@@ -21,4 +21,5 @@ __all__ = [
     "parametres_salaires",
     "edition_salaires",
     "traitement_salaires",
+    "jobs",
 ]
@@ -4,7 +4,7 @@ Endpoints for syncing employees and importing attendance logs
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from datetime import date
 
@@ -19,16 +19,20 @@ from schemas import (
     AttendanceEmployeeMappingResponse,
     AttendanceImportConflictResponse,
     ConflictResolution,
+    ConflictBatchResolution,
     AttendanceImportRequest,
     AttendanceImportSummary,
     EmployeeSyncRequest,
     EmployeeSyncResponse,
     ImportPreviewResponse,
+    ImportPreviewPage,
     ImportConfirmRequest,
+    LogPreviewStatus,
 )
 from services.attendance_service import AttendanceService
 from services.import_service import ImportService
-from services.preview_service import preview_import_endpoint, confirm_import_endpoint
+from services.preview_service import preview_import_endpoint, preview_page_endpoint, confirm_import_endpoint
+from services.uploads import fichier_upload
 
 router = APIRouter(prefix="/attendance-integration", tags=["Attendance Integration"])
 
@@ -131,7 +135,8 @@ def import_attendance_logs(
     summary = service.import_attendance_logs(
         start_date=request.start_date,
         end_date=request.end_date,
-        employee_id=request.employee_id
+        employee_id=request.employee_id,
+        full_resync=request.full_resync
     )
     
     return AttendanceImportSummary(**summary)
@@ -141,19 +146,17 @@ async def import_attendance_file(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
-    """Import attendance logs from Excel/CSV file"""
-    if not file.filename.endswith(('.xlsx', '.xls', '.csv')):
-        raise HTTPException(400, "Format de fichier non supporté. Utilisez .xlsx, .xls ou .csv")
-    
-    content = await file.read()
+    """Import attendance logs from Excel/CSV file (streamed chunk by chunk)"""
+    source = fichier_upload(file, ('.xlsx', '.xls', '.csv'), "Format de fichier non supporté. Utilisez .xlsx, .xls ou .csv")
     
     import_service = ImportService()
     attendance_service = AttendanceService(db)
     
     try:
-        logs = import_service.parse_excel(content)
-        summary = attendance_service.process_attendance_logs(logs)
-        return summary
+        # Fichier lu et importé par blocs de lignes (mémoire constante)
+        return attendance_service.process_attendance_log_chunks(
+            import_service.iter_log_dicts(source, file.filename)
+        )
     except ValueError as e:
         raise HTTPException(400, str(e))
     except Exception as e:
@@ -162,10 +165,21 @@ async def import_attendance_file(
 @router.post("/import-preview", response_model=ImportPreviewResponse)
 async def import_preview(
     file: UploadFile = File(...),
+    limit: Optional[int] = Query(None, ge=1, description="Return only the first items (others via /import-preview/{session_id})"),
     db: Session = Depends(get_db)
 ):
     """Preview attendance import before applying changes"""
-    return await preview_import_endpoint(file, db)
+    return await preview_import_endpoint(file, db, limit)
+
+@router.get("/import-preview/{session_id}", response_model=ImportPreviewPage)
+def import_preview_page(
+    session_id: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=5000),
+    status: Optional[LogPreviewStatus] = Query(None, description="Filter by status: ok, warning, error"),
+):
+    """Read a stored preview page by page"""
+    return preview_page_endpoint(session_id, skip, limit, status)
 
 @router.post("/import-confirm", response_model=AttendanceImportSummary)
 async def import_confirm(
@@ -185,7 +199,7 @@ def list_conflicts(
     db: Session = Depends(get_db)
 ):
     """List attendance import conflicts"""
-    query = db.query(AttendanceImportConflict)
+    query = db.query(AttendanceImportConflict).options(joinedload(AttendanceImportConflict.employe))
     
     if status:
         try:
@@ -210,6 +224,34 @@ def list_conflicts(
     
     return result
 
+@router.post("/conflicts/detect")
+def detect_conflicts(
+    year: int = Query(..., ge=2000, le=2100),
+    month: int = Query(..., ge=1, le=12),
+    employee_id: Optional[int] = Query(None, description="HR employee ID"),
+    db: Session = Depends(get_db)
+):
+    """Compare the pointage grid of a month with the imported attendance logs and record the mismatches"""
+    return AttendanceService(db).detect_conflicts(year, month, employee_id)
+
+@router.post("/conflicts/resolve-batch")
+def resolve_conflicts_batch(
+    request: ConflictBatchResolution,
+    db: Session = Depends(get_db)
+):
+    """Resolve all pending conflicts matching the filters in one transaction"""
+    try:
+        return AttendanceService(db).resolve_conflicts(
+            resolution=request.resolution,
+            resolved_by=request.resolved_by,
+            conflict_ids=request.conflict_ids,
+            employee_id=request.employee_id,
+            start_date=request.start_date,
+            end_date=request.end_date
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/conflicts/{conflict_id}/resolve")
 def resolve_conflict(
     conflict_id: int,
@@ -219,11 +261,14 @@ def resolve_conflict(
     """Resolve an attendance import conflict"""
     service = AttendanceService(db)
     
-    success = service.resolve_conflict(
-        conflict_id=conflict_id,
-        resolution=resolution.resolution,
-        resolved_by=resolution.resolved_by
-    )
+    try:
+        success = service.resolve_conflict(
+            conflict_id=conflict_id,
+            resolution=resolution.resolution,
+            resolved_by=resolution.resolved_by
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     if not success:
         raise HTTPException(status_code=404, detail="Conflit non trouvé")
@@ -18,6 +18,7 @@ from schemas import (
 from services.pdf_generator import PDFGenerator
 from services.logging_service import log_action, clean_data_for_logging, ActionType
 from middleware.auth import require_gestionnaire  # ⭐ v3.6.0: Permissions
+from utils.periodes import filtre_periode
 
 router = APIRouter(prefix="/avances", tags=["Avances"])
 
@@ -262,8 +263,7 @@ def generer_rapport_avances_mensuel(
     
     # Récupérer les avances du mois
     avances = db.query(Avance).join(Employe).filter(
-        func.extract('year', Avance.date_avance) == annee,
-        func.extract('month', Avance.date_avance) == mois
+        filtre_periode(Avance.date_avance, annee, mois)
     ).all()
     
     if not avances:
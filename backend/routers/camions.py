@@ -2,7 +2,8 @@
 Router API pour la gestion des camions
 """
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import extract, func, select
 from typing import List, Optional
 from datetime import date
 
@@ -13,10 +14,38 @@ from schemas import (
 )
 from services.logging_service import log_action
 from middleware import require_auth, require_admin
+from utils.periodes import filtre_periode
 
 router = APIRouter(prefix="/camions", tags=["Camions"])
 
 
+def _statistiques_missions():
+    """Sous-requête groupée par camion: nombre de missions, dernière mission, km parcourus"""
+    return select(
+        Mission.camion_id,
+        func.count(Mission.id).label("nombre_missions"),
+        func.max(Mission.date_mission).label("derniere_mission"),
+        func.sum(Mission.distance).label("km_total")
+    ).where(Mission.camion_id.isnot(None)).group_by(Mission.camion_id).subquery()
+
+
+def _statistiques_camion(db: Session, camion_id: int):
+    """(nombre de missions, dernière mission, km parcourus) d'un camion, en une requête"""
+    return db.query(
+        func.count(Mission.id),
+        func.max(Mission.date_mission),
+        func.sum(Mission.distance)
+    ).filter(Mission.camion_id == camion_id).one()
+
+
+def _camion_response(camion: Camion, nombre_missions, derniere_mission, km_total) -> CamionResponse:
+    return CamionResponse(
+        **camion.to_dict(nombre_missions or 0),
+        derniere_mission=derniere_mission,
+        km_total=float(km_total or 0)
+    )
+
+
 @router.get("", response_model=CamionList)
 def get_camions(
     actif: Optional[bool] = Query(None, description="Filtrer par statut actif/inactif"),
@@ -26,7 +55,10 @@ def get_camions(
 ):
     """Récupérer la liste des camions avec filtres optionnels"""
     
-    query = db.query(Camion)
+    stats = _statistiques_missions()
+    query = db.query(
+        Camion, stats.c.nombre_missions, stats.c.derniere_mission, stats.c.km_total
+    ).outerjoin(stats, stats.c.camion_id == Camion.id)
     
     # Filtre par statut
     if actif is not None:
@@ -35,24 +67,14 @@ def get_camions(
     # Ordre alphabétique
     query = query.order_by(Camion.marque, Camion.modele)
     
-    # Total avant pagination
-    total = query.count()
+    # Pagination (statistiques de missions jointes, une seule requête)
+    camions_response = [_camion_response(*ligne) for ligne in query.offset(skip).limit(limit).all()]
     
-    # Pagination
-    camions = query.offset(skip).limit(limit).all()
-    
-    # Statistiques
-    actifs_count = db.query(Camion).filter(Camion.actif == True).count()
-    inactifs_count = db.query(Camion).filter(Camion.actif == False).count()
-    
-    # Convertir en réponses avec nombre de missions
-    camions_response = []
-    for camion in camions:
-        camion_dict = camion.to_dict()
-        # Compter missions
-        nb_missions = db.query(Mission).filter(Mission.camion_id == camion.id).count()
-        camion_dict['nombre_missions'] = nb_missions
-        camions_response.append(CamionResponse(**camion_dict))
+    # Statistiques actifs / inactifs (et total) en une requête groupée
+    repartition = dict(db.query(Camion.actif, func.count(Camion.id)).group_by(Camion.actif).all())
+    actifs_count = repartition.get(True, 0)
+    inactifs_count = repartition.get(False, 0)
+    total = actifs_count + inactifs_count if actif is None else repartition.get(actif, 0)
     
     return CamionList(
         total=total,
@@ -74,12 +96,7 @@ def get_camion(
     if not camion:
         raise HTTPException(status_code=404, detail="Camion non trouvé")
     
-    # Ajouter nombre de missions
-    camion_dict = camion.to_dict()
-    nb_missions = db.query(Mission).filter(Mission.camion_id == camion.id).count()
-    camion_dict['nombre_missions'] = nb_missions
-    
-    return CamionResponse(**camion_dict)
+    return _camion_response(camion, *_statistiques_camion(db, camion.id))
 
 
 @router.post("", response_model=CamionResponse, status_code=201)
@@ -130,10 +147,7 @@ def create_camion(
         request=request
     )
     
-    camion_dict = db_camion.to_dict()
-    camion_dict['nombre_missions'] = 0
-    
-    return CamionResponse(**camion_dict)
+    return CamionResponse(**db_camion.to_dict())
 
 
 @router.put("/{camion_id}", response_model=CamionResponse)
@@ -188,11 +202,7 @@ def update_camion(
         request=request
     )
     
-    camion_dict = db_camion.to_dict()
-    nb_missions = db.query(Mission).filter(Mission.camion_id == camion_id).count()
-    camion_dict['nombre_missions'] = nb_missions
-    
-    return CamionResponse(**camion_dict)
+    return _camion_response(db_camion, *_statistiques_camion(db, camion_id))
 
 
 @router.delete("/{camion_id}", status_code=204)
@@ -269,29 +279,23 @@ def get_camion_missions(
     if not camion:
         raise HTTPException(status_code=404, detail="Camion non trouvé")
     
-    # Query missions
-    query = db.query(Mission).filter(Mission.camion_id == camion_id)
+    # Query missions (chauffeur et client chargés avec la page)
+    query = db.query(Mission).options(
+        joinedload(Mission.chauffeur), joinedload(Mission.client)
+    ).filter(Mission.camion_id == camion_id)
     
     # Filtres
     if annee and mois:
-        from datetime import date as dt_date
-        from calendar import monthrange
-        start_date = dt_date(annee, mois, 1)
-        _, last_day = monthrange(annee, mois)
-        end_date = dt_date(annee, mois, last_day)
-        query = query.filter(
-            Mission.date_mission >= start_date,
-            Mission.date_mission <= end_date
-        )
+        query = query.filter(filtre_periode(Mission.date_mission, annee, mois))
     
     # Ordre chronologique inversé
     query = query.order_by(Mission.date_mission.desc())
     
-    total = query.count()
+    total = query.with_entities(func.count(Mission.id)).order_by(None).scalar()
     missions = query.offset(skip).limit(limit).all()
     
     return {
-        "camion": camion.to_dict(),
+        "camion": camion.to_dict(_statistiques_camion(db, camion_id)[0]),
         "total_missions": total,
         "missions": [
             {
@@ -307,3 +311,65 @@ def get_camion_missions(
             for m in missions
         ]
     }
+
+
+@router.get("/{camion_id}/utilisation")
+def get_camion_utilisation(
+    camion_id: int,
+    date_debut: date = Query(..., description="Début de la période (inclus)"),
+    date_fin: date = Query(..., description="Fin de la période (incluse)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Utilisation mensuelle d'un camion sur une période
+    
+    Missions, km et primes agrégés par mois en SQL; les mois sans mission
+    de la période figurent avec des totaux à zéro.
+    """
+    if date_fin < date_debut:
+        raise HTTPException(status_code=400, detail="La date de fin doit être postérieure à la date de début")
+    
+    camion = db.query(Camion).filter(Camion.id == camion_id).first()
+    if not camion:
+        raise HTTPException(status_code=404, detail="Camion non trouvé")
+    
+    annee = extract('year', Mission.date_mission)
+    mois = extract('month', Mission.date_mission)
+    lignes = db.query(
+        annee,
+        mois,
+        func.count(Mission.id),
+        func.sum(Mission.distance),
+        func.sum(Mission.prime_calculee)
+    ).filter(
+        Mission.camion_id == camion_id,
+        Mission.date_mission >= date_debut,
+        Mission.date_mission <= date_fin
+    ).group_by(annee, mois).all()
+    par_mois = {(int(a), int(m)): (nombre, km, primes) for a, m, nombre, km, primes in lignes}
+    
+    utilisation = []
+    a, m = date_debut.year, date_debut.month
+    while (a, m) <= (date_fin.year, date_fin.month):
+        nombre, km, primes = par_mois.get((a, m), (0, 0, 0))
+        utilisation.append({
+            "annee": a,
+            "mois": m,
+            "nombre_missions": nombre,
+            "km": float(km or 0),
+            "primes": float(primes or 0)
+        })
+        a, m = (a + 1, 1) if m == 12 else (a, m + 1)
+    
+    return {
+        "camion_id": camion.id,
+        "immatriculation": camion.immatriculation,
+        "date_debut": str(date_debut),
+        "date_fin": str(date_fin),
+        "utilisation": utilisation,
+        "totaux": {
+            "nombre_missions": sum(u["nombre_missions"] for u in utilisation),
+            "km": sum(u["km"] for u in utilisation),
+            "primes": sum(u["primes"] for u in utilisation)
+        }
+    }
@@ -3,6 +3,7 @@ from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import date
+from itertools import groupby
 
 from database import get_db
 from models import Client, User
@@ -16,6 +17,7 @@ from services.pdf_generator import PDFGenerator
 from models import Parametres
 from services.logging_service import log_action, clean_data_for_logging, ActionType
 from middleware.auth import require_gestionnaire  # ⭐ v3.6.0: Permissions
+from services.soldes_logistiques import lire_soldes
 
 router = APIRouter(prefix="/clients", tags=["Clients"])
 
@@ -194,105 +196,45 @@ def generer_rapport_clients(db: Session = Depends(get_db)):
     )
 
 
+def _balance(lignes) -> list:
+    return [
+        {
+            'type_id': ligne.type_id,
+            'type_name': ligne.type_name,
+            'total_prises': ligne.total_out,
+            'total_retournees': ligne.total_in,
+            'solde': ligne.total_out - ligne.total_in
+        }
+        for ligne in lignes
+    ]
+
+
 @router.get("/{client_id}/logistics-balance")
 def get_client_logistics_balance(client_id: int, db: Session = Depends(get_db)):
-    """Récupérer le solde logistique pour un client"""
-    from models.mission_client_detail import MissionClientDetail, MissionLogisticsMovement
-    from models.logistics_type import LogisticsType
-    from sqlalchemy import func
-    
+    """Récupérer le solde logistique pour un client (table des soldes matérialisés)"""
     client = db.query(Client).filter(Client.id == client_id).first()
     if not client:
         raise HTTPException(status_code=404, detail="Client non trouvé")
     
-    query = db.query(
-        LogisticsType.id.label('type_id'),
-        LogisticsType.name.label('type_name'),
-        func.sum(MissionLogisticsMovement.quantity_out).label('total_out'),
-        func.sum(MissionLogisticsMovement.quantity_in).label('total_in')
-    ).join(
-        MissionLogisticsMovement, 
-        MissionLogisticsMovement.logistics_type_id == LogisticsType.id
-    ).join(
-        MissionClientDetail,
-        MissionClientDetail.id == MissionLogisticsMovement.mission_client_detail_id
-    ).filter(
-        MissionClientDetail.client_id == client_id,
-        LogisticsType.is_active == True
-    ).group_by(
-        LogisticsType.id,
-        LogisticsType.name
-    ).all()
-    
-    balance = []
-    for row in query:
-        total_out = row.total_out or 0
-        total_in = row.total_in or 0
-        solde = total_out - total_in
-        
-        balance.append({
-            'type_id': row.type_id,
-            'type_name': row.type_name,
-            'total_prises': total_out,
-            'total_retournees': total_in,
-            'solde': solde
-        })
-    
     return {
         'client_id': client_id,
         'client_nom': f"{client.prenom} {client.nom}",
-        'logistics_balance': balance
+        'logistics_balance': _balance(lire_soldes(db, client_id))
     }
 
 
 @router.get("/{client_id}/logistics-balance/pdf")
 def get_client_logistics_pdf(client_id: int, db: Session = Depends(get_db)):
     """Générer PDF du solde logistique pour un client"""
-    from models.mission_client_detail import MissionClientDetail, MissionLogisticsMovement
-    from models.logistics_type import LogisticsType
-    from sqlalchemy import func
-    
     client = db.query(Client).filter(Client.id == client_id).first()
     if not client:
         raise HTTPException(status_code=404, detail="Client non trouvé")
     
-    # Récupérer les soldes
-    query = db.query(
-        LogisticsType.id.label('type_id'),
-        LogisticsType.name.label('type_name'),
-        func.sum(MissionLogisticsMovement.quantity_out).label('total_out'),
-        func.sum(MissionLogisticsMovement.quantity_in).label('total_in')
-    ).join(
-        MissionLogisticsMovement, 
-        MissionLogisticsMovement.logistics_type_id == LogisticsType.id
-    ).join(
-        MissionClientDetail,
-        MissionClientDetail.id == MissionLogisticsMovement.mission_client_detail_id
-    ).filter(
-        MissionClientDetail.client_id == client_id,
-        LogisticsType.is_active == True
-    ).group_by(
-        LogisticsType.id,
-        LogisticsType.name
-    ).all()
-    
-    balance = []
-    for row in query:
-        total_out = row.total_out or 0
-        total_in = row.total_in or 0
-        solde = total_out - total_in
-        balance.append({
-            'type_name': row.type_name,
-            'total_prises': total_out,
-            'total_retournees': total_in,
-            'solde': solde
-        })
-    
     # Générer PDF
     pdf_generator = PDFGenerator()
     client_data = {
         'client_nom': f"{client.prenom} {client.nom}",
-        'balance': balance
+        'balance': _balance(lire_soldes(db, client_id))
     }
     pdf_buffer = pdf_generator.generate_client_logistics_balance(client_data)
     
@@ -306,52 +248,15 @@ def get_client_logistics_pdf(client_id: int, db: Session = Depends(get_db)):
 
 @router.get("/logistics-balance/all/pdf")
 def get_all_clients_logistics_pdf(db: Session = Depends(get_db)):
-    """Générer PDF global des soldes logistiques de tous les clients"""
-    from models.mission_client_detail import MissionClientDetail, MissionLogisticsMovement
-    from models.logistics_type import LogisticsType
-    from sqlalchemy import func
-    
-    # Récupérer tous les clients avec mouvements logistiques
-    clients_data = []
-    clients = db.query(Client).all()
-    
-    for client in clients:
-        query = db.query(
-            LogisticsType.id.label('type_id'),
-            LogisticsType.name.label('type_name'),
-            func.sum(MissionLogisticsMovement.quantity_out).label('total_out'),
-            func.sum(MissionLogisticsMovement.quantity_in).label('total_in')
-        ).join(
-            MissionLogisticsMovement, 
-            MissionLogisticsMovement.logistics_type_id == LogisticsType.id
-        ).join(
-            MissionClientDetail,
-            MissionClientDetail.id == MissionLogisticsMovement.mission_client_detail_id
-        ).filter(
-            MissionClientDetail.client_id == client.id,
-            LogisticsType.is_active == True
-        ).group_by(
-            LogisticsType.id,
-            LogisticsType.name
-        ).all()
-        
-        if query:  # Seulement les clients avec mouvements
-            balance = []
-            for row in query:
-                total_out = row.total_out or 0
-                total_in = row.total_in or 0
-                solde = total_out - total_in
-                balance.append({
-                    'type_name': row.type_name,
-                    'total_prises': total_out,
-                    'total_retournees': total_in,
-                    'solde': solde
-                })
-            
-            clients_data.append({
-                'client_nom': f"{client.prenom} {client.nom}",
-                'balance': balance
-            })
+    """Générer PDF global des soldes logistiques de tous les clients (une seule requête)"""
+    # Seulement les clients avec mouvements, regroupés par client
+    clients_data = [
+        {
+            'client_nom': f"{lignes[0].client_prenom} {lignes[0].client_nom}",
+            'balance': _balance(lignes)
+        }
+        for lignes in (list(groupe) for _, groupe in groupby(lire_soldes(db), key=lambda ligne: ligne.client_id))
+    ]
     
     # Générer PDF
     pdf_generator = PDFGenerator()
@@ -10,91 +10,24 @@ from models import Conge, Employe, Pointage, ActionType, User
 from pydantic import BaseModel
 from datetime import date, datetime, timedelta
 from services.logging_service import log_action
+from services.conges_allocation import AllocateurConges, SoldeInsuffisant
 from middleware.auth import get_current_user
 
 router = APIRouter(prefix="/conges", tags=["Congés"])
 
-def repartir_conges_intelligemment(
-    db: Session,
-    employe_id: int,
-    jours_a_prendre: float,
-    mois_deduction: int,
-    annee_deduction: int
-) -> List[dict]:
-    """
-    Répartir intelligemment les jours de congé à prendre sur les périodes disponibles.
-    
-    Logique:
-    1. Récupère toutes les périodes avec solde disponible (acquis > pris)
-    2. Trie par ancienneté (année, mois croissant)
-    3. Déduit d'abord des mois les plus anciens
-    4. Ne dépasse jamais les jours acquis de chaque période
-    
-    Args:
-        db: Session SQLAlchemy
-        employe_id: ID de l'employé
-        jours_a_prendre: Nombre total de jours à prendre
-        mois_deduction: Mois de déduction sur bulletin
-        annee_deduction: Année de déduction sur bulletin
-        
-    Returns:
-        Liste de dicts: [{'conge_id': int, 'jours_a_deduire': float, 'periode': str}, ...]
-        
-    Raises:
-        HTTPException: Si solde insuffisant
-    """
-    # Récupérer toutes les périodes avec leurs soldes disponibles
-    periodes = db.query(Conge).filter(
-        Conge.employe_id == employe_id
-    ).order_by(Conge.annee.asc(), Conge.mois.asc()).all()
-    
-    repartition = []
-    reste_a_prendre = jours_a_prendre
-    
-    for periode in periodes:
-        if reste_a_prendre <= 0:
-            break
-            
-        # Calcul du disponible pour cette période
-        acquis = float(periode.jours_conges_acquis or 0)
-        pris = float(periode.jours_conges_pris or 0)
-        disponible = acquis - pris
-        
-        if disponible <= 0:
-            continue  # Période déjà consommée
-        
-        # Prendre le minimum entre ce qui reste à prendre et ce qui est disponible
-        a_deduire = min(reste_a_prendre, disponible)
-        
-        repartition.append({
-            'conge_id': periode.id,
-            'periode': f"{periode.mois}/{periode.annee}",
-            'acquis': acquis,
-            'pris_avant': pris,
-            'jours_a_deduire': a_deduire,
-            'nouveau_pris': pris + a_deduire,
-            'mois_deduction': mois_deduction,
-            'annee_deduction': annee_deduction
-        })
-        
-        reste_a_prendre -= a_deduire
-    
-    # Vérifier si on a pu tout répartir
-    if reste_a_prendre > 0.01:  # Tolérance 0.01j pour erreurs d'arrondi
-        total_disponible = sum(r['jours_a_deduire'] for r in repartition)
-        raise HTTPException(
-            status_code=400,
-            detail=f"Solde insuffisant! Demande: {jours_a_prendre:.2f}j, Disponible: {total_disponible:.2f}j, Manque: {reste_a_prendre:.2f}j"
-        )
-    
-    return repartition
-
 # Schemas locaux pour éviter les dépendances circulaires ou complexes
 class CongeUpdate(BaseModel):
     jours_pris: float  # v3.5.3: Décimales supportées
     mois_deduction: Optional[int] = None  # Mois où déduire du bulletin de paie (1-12)
     annee_deduction: Optional[int] = None  # Année où déduire du bulletin de paie
 
+class CongeRepartitionLot(BaseModel):
+    employe_ids: List[int]
+    jours: float  # Jours pris (ou annulés) par employé
+    mois_deduction: int
+    annee_deduction: int
+    annuler: bool = False  # True: libérer les jours au lieu de les répartir
+
 class CongeCreateFromDates(BaseModel):
     employe_id: int
     date_debut: date
@@ -203,60 +136,24 @@ def update_consommation(
         raise HTTPException(status_code=400, detail="Année de déduction invalide")
     
     # ⭐ CORRECTION v3.6.1 hotfix7: Répartition intelligente TOTALE
-    # jours_pris = TOTAL global voulu (pas un ajout!)
-    # Sauvegarder le total actuel pour information
-    periodes_employe = db.query(Conge).filter(
-        Conge.employe_id == conge.employe_id
-    ).all()
-    
-    total_actuel = sum(float(p.jours_conges_pris or 0) for p in periodes_employe)
-    
-    # Réinitialiser toutes les périodes à 0 (nouvelle répartition complète)
-    for p in periodes_employe:
-        p.jours_conges_pris = 0.0
-    
-    # Appliquer la répartition intelligente
+    # jours_pris = TOTAL global voulu (pas un ajout!): les périodes sont
+    # remises à zéro puis réparties du plus ancien au plus récent
+    allocateur = AllocateurConges(db)
+    total_actuel = float(allocateur.total_pris(conge.employe_id))
     try:
-        repartition = repartir_conges_intelligemment(
-            db=db,
-            employe_id=conge.employe_id,
-            jours_a_prendre=jours_pris,
-            mois_deduction=mois_deduction,
-            annee_deduction=annee_deduction
+        repartition = allocateur.repartir(
+            conge.employe_id, update.jours_pris, mois_deduction, annee_deduction, remplacer=True
         )
-    except HTTPException as e:
-        # Restaurer les anciennes valeurs en cas d'erreur
-        for p in periodes_employe:
-            db.refresh(p)
-        raise e
-    
-    # Appliquer la répartition calculée
-    messages_repartition = []
-    for item in repartition:
-        periode_conge = db.query(Conge).filter(Conge.id == item['conge_id']).first()
-        if periode_conge:
-            periode_conge.jours_conges_pris = item['nouveau_pris']
-            periode_conge.mois_deduction = item['mois_deduction']
-            periode_conge.annee_deduction = item['annee_deduction']
-            messages_repartition.append(
-                f"  • {item['periode']}: {item['jours_a_deduire']:.2f}j (acquis {item['acquis']:.2f}j)"
-            )
+    except SoldeInsuffisant as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Recalculer les soldes cumulés pour toutes les périodes
-    periodes_triees = sorted(periodes_employe, key=lambda p: (p.annee, p.mois))
-    for periode in periodes_triees:
-        stats_cumul = db.query(
-            func.sum(Conge.jours_conges_acquis).label("total_acquis"),
-            func.sum(Conge.jours_conges_pris).label("total_pris")
-        ).filter(
-            Conge.employe_id == conge.employe_id,
-            (Conge.annee < periode.annee) | ((Conge.annee == periode.annee) & (Conge.mois <= periode.mois))
-        ).first()
-        
-        total_acquis_cumul = float(stats_cumul.total_acquis or 0)
-        total_pris_cumul = float(stats_cumul.total_pris or 0)
-        periode.jours_conges_restants = total_acquis_cumul - total_pris_cumul
+    messages_repartition = [
+        f"  • {item['periode']}: {item['jours_a_deduire']:.2f}j (acquis {item['acquis']:.2f}j)"
+        for item in repartition
+    ]
     
+    # UPDATE groupé des périodes + soldes cumulés en une passe
+    allocateur.ecrire()
     db.commit()
     db.refresh(conge)
     
@@ -300,7 +197,6 @@ def get_synthese_conges(employe_id: int, db: Session = Depends(get_db)):
     - Périodes: Liste détaillée avec solde cumulé
     """
     from models import DeductionConge
-    from sqlalchemy import or_, and_
     
     employe = db.query(Employe).filter(Employe.id == employe_id).first()
     if not employe:
@@ -323,30 +219,18 @@ def get_synthese_conges(employe_id: int, db: Session = Depends(get_db)):
         Conge.employe_id == employe_id
     ).order_by(Conge.annee.asc(), Conge.mois.asc()).all()
     
+    # Déductions: total global, identique pour toutes les périodes
+    nb_deductions = db.query(func.count(DeductionConge.id)).filter(
+        DeductionConge.employe_id == employe_id
+    ).scalar() or 0
+    
     periodes_detail = []
-    solde_cumule = 0
+    acquis_jusque = Decimal("0")
     
     for periode in periodes:
-        # Acquis jusqu'à cette période
-        acquis_jusque = db.query(func.sum(Conge.jours_conges_acquis)).filter(
-            Conge.employe_id == employe_id,
-            or_(
-                Conge.annee < periode.annee,
-                and_(Conge.annee == periode.annee, Conge.mois <= periode.mois)
-            )
-        ).scalar() or 0
-        
-        # Déduit jusqu'à cette période (TOTAL global, pas par période)
-        deduit_jusque = db.query(func.sum(DeductionConge.jours_deduits)).filter(
-            DeductionConge.employe_id == employe_id
-        ).scalar() or 0
-        
-        solde_cumule = float(acquis_jusque) - float(deduit_jusque)
-        
-        # Déductions liées à cette période d'acquisition
-        deductions = db.query(DeductionConge).filter(
-            DeductionConge.employe_id == employe_id
-        ).all()
+        # Acquis jusqu'à cette période (somme préfixe) - total déduit
+        acquis_jusque += Decimal(periode.jours_conges_acquis or 0)
+        solde_cumule = float(acquis_jusque) - float(total_deduit)
         
         periodes_detail.append({
             "mois": periode.mois,
@@ -354,7 +238,7 @@ def get_synthese_conges(employe_id: int, db: Session = Depends(get_db)):
             "jours_travailles": periode.jours_travailles,
             "jours_acquis": float(periode.jours_conges_acquis or 0),
             "solde_cumule": round(solde_cumule, 2),
-            "nb_deductions": len(deductions)
+            "nb_deductions": nb_deductions
         })
     
     return {
@@ -493,8 +377,11 @@ def creer_conge_depuis_dates(
         conge.date_fin = conge_data.date_fin
         conge.type_conge = conge_data.type_conge
         conge.commentaire = conge_data.commentaire
-        conge.jours_conges_restants = float(conge.jours_conges_acquis or 0) - float(conge.jours_conges_pris or 0)
     
+    # Soldes cumulés de l'employé (mois modifiés/créés et tous les mois suivants)
+    from services.conges_calculator import reconstruire_soldes
+    db.flush()
+    reconstruire_soldes(db, [conge_data.employe_id])
     db.commit()
     
     return {
@@ -503,6 +390,37 @@ def creer_conge_depuis_dates(
         "mois_impactes": len(jours_par_mois)
     }
 
+@router.post("/reconstruire-soldes")
+def reconstruire_soldes_conges(
+    request: Request,
+    employe_id: Optional[int] = Query(None, description="Limiter à un employé"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Reconstruire les soldes cumulés de congés (jours_conges_restants)
+    
+    Une passe ordonnée par employé sur tout l'historique, à utiliser après
+    une régénération ou des corrections manuelles de la table conges.
+    """
+    from services.conges_calculator import reconstruire_soldes
+    
+    corriges = reconstruire_soldes(db, [employe_id] if employe_id else None)
+    db.commit()
+    
+    log_action(
+        db=db,
+        module_name="conges",
+        action_type=ActionType.UPDATE,
+        record_id=employe_id or 0,
+        new_data={"soldes_corriges": corriges},
+        description=f"Reconstruction soldes congés - {corriges} soldes corrigés",
+        user=current_user,
+        request=request
+    )
+    
+    return {"message": "Soldes reconstruits", "soldes_corriges": corriges}
+
 @router.post("/recalculer-periode")
 def recalculer_conges_periode(
     annee: int,
@@ -542,8 +460,67 @@ def recalculer_conges_periode(
         "details": results["details"]
     }
 
+@router.post("/repartition-lot")
+def repartir_conges_lot(
+    data: CongeRepartitionLot,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Répartir (ou annuler) les mêmes jours de congé pour plusieurs employés
+    
+    Exemple: congé annuel collectif. Chaque employé est réparti du plus ancien
+    au plus récent comme pour la consommation individuelle; les employés au
+    solde insuffisant sont ignorés et listés dans "erreurs".
+    """
+    if not (1 <= data.mois_deduction <= 12):
+        raise HTTPException(status_code=400, detail="Mois de déduction invalide (doit être entre 1 et 12)")
+    if data.annee_deduction < 2000 or data.annee_deduction > 2100:
+        raise HTTPException(status_code=400, detail="Année de déduction invalide")
+    if data.jours <= 0:
+        raise HTTPException(status_code=400, detail="Le nombre de jours doit être > 0")
+    
+    allocateur = AllocateurConges(db)
+    demandes = dict.fromkeys(data.employe_ids, data.jours)
+    if data.annuler:
+        resultat = allocateur.liberer_lot(demandes)
+    else:
+        resultat = allocateur.repartir_lot(demandes, data.mois_deduction, data.annee_deduction)
+    
+    periodes_modifiees = allocateur.ecrire()
+    db.commit()
+    
+    operation = "Annulation" if data.annuler else "Répartition"
+    log_action(
+        db=db,
+        module_name="conges",
+        action_type=ActionType.UPDATE,
+        record_id=0,
+        new_data={
+            "jours": data.jours,
+            "mois_deduction": data.mois_deduction,
+            "annee_deduction": data.annee_deduction,
+            "employes": sorted(resultat["repartitions"]),
+            "erreurs": sorted(resultat["erreurs"])
+        },
+        description=f"{operation} congés en lot: {data.jours:.2f}j pour {len(resultat['repartitions'])} employé(s)"
+                    f" - Bulletin {data.mois_deduction}/{data.annee_deduction}",
+        user=current_user,
+        request=request
+    )
+    
+    return {
+        "message": f"{operation} terminée",
+        "employes_traites": len(resultat["repartitions"]),
+        "periodes_modifiees": periodes_modifiees,
+        "soldes": {employe_id: float(allocateur.solde(employe_id)) for employe_id in resultat["repartitions"]},
+        "repartitions": resultat["repartitions"],
+        "erreurs": [{"employe_id": employe_id, "erreur": message} for employe_id, message in resultat["erreurs"].items()]
+    }
+
 @router.get("/{conge_id}/titre-conge")
-def generer_titre_conge(conge_id: int, db: Session = Depends(get_db)):
+def generer_titre_conge(conge_id: int, request: Request, db: Session = Depends(get_db)):
     """Générer un titre de congé (PDF) pour un employé"""
     conge = db.query(Conge).filter(Conge.id == conge_id).first()
     if not conge:
@@ -568,12 +545,13 @@ def generer_titre_conge(conge_id: int, db: Session = Depends(get_db)):
         "commentaire": conge.commentaire or ""
     }
     
-    pdf_bytes = pdf_gen.generate_titre_conge(titre_data)
-    
-    return StreamingResponse(
-        pdf_bytes,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename=titre_conge_{employe.nom}_{employe.prenom}_{conge.annee}_{conge.mois}.pdf"
-        }
+    # Servi depuis le cache si le congé et l'employé n'ont pas changé
+    from services.pdf_cache import reponse_pdf, colonnes
+    return reponse_pdf(
+        request,
+        "titre_conge",
+        {**titre_data, "employe": colonnes(employe), "conge": colonnes(conge)},
+        lambda: pdf_gen.generate_titre_conge(titre_data),
+        f"titre_conge_{employe.nom}_{employe.prenom}_{conge.annee}_{conge.mois}.pdf",
+        tags=[f"conge:{conge.id}", f"employe:{employe.id}"]
     )
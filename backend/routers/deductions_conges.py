@@ -4,7 +4,7 @@ Architecture: Séparation acquisition (table conges) et consommation (table dedu
 """
 from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, update
 from typing import List, Optional
 from decimal import Decimal
 from datetime import date
@@ -210,30 +210,18 @@ def calculer_solde_conges(employe_id: int, db: Session = Depends(get_db)):
     ).order_by(Conge.annee, Conge.mois).all()
     
     periodes = []
-    solde_cumule = 0
+    acquis_jusque = Decimal("0")
     
     for periode in periodes_query:
-        # Calculer solde cumulé jusqu'à cette période
-        acquis_jusque = db.query(func.sum(Conge.jours_conges_acquis)).filter(
-            Conge.employe_id == employe_id,
-            or_(
-                Conge.annee < periode.annee,
-                and_(Conge.annee == periode.annee, Conge.mois <= periode.mois)
-            )
-        ).scalar() or 0
-        
-        deduit_jusque = db.query(func.sum(DeductionConge.jours_deduits)).filter(
-            DeductionConge.employe_id == employe_id
-        ).scalar() or 0
-        
-        solde_cumule = float(acquis_jusque) - float(deduit_jusque)
+        # Solde cumulé jusqu'à cette période (déductions: total global)
+        acquis_jusque += Decimal(periode.jours_conges_acquis or 0)
         
         periodes.append({
             "mois": periode.mois,
             "annee": periode.annee,
             "jours_travailles": periode.jours_travailles,
             "jours_acquis": float(periode.jours_conges_acquis or 0),
-            "solde_cumule": solde_cumule
+            "solde_cumule": float(acquis_jusque) - float(total_deduit)
         })
     
     return {
@@ -290,28 +278,26 @@ def recalculer_soldes_employe(db: Session, employe_id: int):
     Recalculer les soldes cumulés de toutes les périodes d'un employé
     
     Cette fonction met à jour jours_conges_restants dans la table conges
-    pour affichage cohérent (même si on utilise les déductions)
+    pour affichage cohérent (même si on utilise les déductions):
+    solde d'une période = acquis cumulé jusqu'à elle - total déduit.
+    Une lecture ordonnée, somme préfixe en mémoire, UPDATE groupé.
     """
-    periodes = db.query(Conge).filter(
-        Conge.employe_id == employe_id
-    ).order_by(Conge.annee, Conge.mois).all()
-    
-    # Total déduit global
-    total_deduit = db.query(func.sum(DeductionConge.jours_deduits)).filter(
+    total_deduit = Decimal(db.query(func.sum(DeductionConge.jours_deduits)).filter(
         DeductionConge.employe_id == employe_id
-    ).scalar() or 0
-    
-    for periode in periodes:
-        # Acquis jusqu'à cette période
-        acquis_jusque = db.query(func.sum(Conge.jours_conges_acquis)).filter(
-            Conge.employe_id == employe_id,
-            or_(
-                Conge.annee < periode.annee,
-                and_(Conge.annee == periode.annee, Conge.mois <= periode.mois)
-            )
-        ).scalar() or 0
-        
-        # Solde cumulé
-        periode.jours_conges_restants = float(acquis_jusque) - float(total_deduit)
+    ).scalar() or 0)
     
+    periodes = db.query(Conge.id, Conge.jours_conges_acquis, Conge.jours_conges_restants).filter(
+        Conge.employe_id == employe_id
+    ).order_by(Conge.annee, Conge.mois, Conge.id)
+    
+    corrections = []
+    acquis_jusque = Decimal("0")
+    for conge_id, acquis, restants in periodes:
+        acquis_jusque += Decimal(acquis or 0)
+        solde = acquis_jusque - total_deduit
+        if restants is None or Decimal(restants) != solde:
+            corrections.append({"id": conge_id, "jours_conges_restants": solde})
+    
+    if corrections:
+        db.execute(update(Conge), corrections)
     db.commit()
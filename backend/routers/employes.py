@@ -13,6 +13,7 @@ from schemas import (
     EmployeListResponse,
 )
 from services.pdf_generator import PDFGenerator
+from services.pdf_cache import reponse_pdf, entreprise
 from services.logging_service import log_action, clean_data_for_logging
 from services.employe_service import verifier_contrats_expires, mettre_a_jour_dates_fin_contrat
 from middleware import require_admin, require_auth
@@ -528,6 +529,7 @@ def generer_rapport_employes_actifs(
 @router.get("/{employe_id}/attestation-travail")
 def generate_attestation_travail(
     employe_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_auth)
 ):
@@ -558,20 +560,17 @@ def generate_attestation_travail(
         'salaire_base': employe.salaire_base
     }
     
-    # Générer le PDF
-    pdf_generator = PDFGenerator(db=db)
-    pdf_buffer = pdf_generator.generate_attestation_travail(employe_data)
-    
     # Nom du fichier
     filename = f"attestation_travail_{employe.nom}_{employe.prenom}_{date.today().strftime('%d%m%Y')}.pdf"
     
-    # Retourner le PDF
-    return StreamingResponse(
-        pdf_buffer,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename={filename}"
-        }
+    # Retourner le PDF (depuis le cache si les données n'ont pas changé)
+    return reponse_pdf(
+        request,
+        "attestation_travail",
+        {"employe": employe_data, "entreprise": entreprise(db)},
+        lambda: PDFGenerator(db=db).generate_attestation_travail(employe_data),
+        filename,
+        tags=[f"employe:{employe.id}"]
     )
 
 @router.get("/{employe_id}/certificat-travail")
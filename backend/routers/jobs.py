@@ -0,0 +1,95 @@
+"""
+API Router pour le suivi des jobs en arrière-plan
+(statut / progression, téléchargement du résultat, annulation)
+
+Les résultats (bulletins de paie...) sont confidentiels: chaque utilisateur
+ne voit et ne télécharge que les jobs qu'il a soumis.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from database import get_db
+from models import Job, StatutJob, User
+from services.job_queue import job_queue
+from middleware.auth import get_current_user
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+def _get_job(db: Session, job_id: str, user: User) -> Job:
+    """Job de l'utilisateur (404 aussi pour le job d'un autre utilisateur)"""
+    job = db.query(Job).filter(Job.id == job_id, Job.user_id == user.id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job non trouvé")
+    return job
+
+
+@router.get("/")
+def lister_jobs(
+    type_job: Optional[str] = None,
+    statut: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Lister les jobs récents de l'utilisateur"""
+    query = db.query(Job).filter(Job.user_id == current_user.id)
+    if type_job:
+        query = query.filter(Job.type_job == type_job)
+    if statut:
+        try:
+            query = query.filter(Job.statut == StatutJob(statut))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Statut invalide: {statut}")
+
+    jobs = query.order_by(Job.created_at.desc()).limit(limit).all()
+    return [job.to_dict() for job in jobs]
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """Statut et progression d'un job"""
+    return _get_job(db, job_id, current_user).to_dict()
+
+
+@router.get("/{job_id}/telecharger")
+def telecharger_resultat_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Télécharger le fichier produit par un job terminé"""
+    job = _get_job(db, job_id, current_user)
+
+    if job.statut != StatutJob.TERMINE:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job non terminé (statut: {job.statut.value})"
+        )
+
+    chemin = job_queue.chemin_resultat(job)
+    if not chemin:
+        raise HTTPException(status_code=410, detail="Fichier résultat expiré ou introuvable")
+
+    return FileResponse(
+        chemin,
+        media_type=job.media_type or "application/octet-stream",
+        filename=job.nom_fichier
+    )
+
+
+@router.post("/{job_id}/annuler")
+def annuler_job(job_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """Annuler un job en attente ou en cours"""
+    job = _get_job(db, job_id, current_user)
+
+    if job.statut in (StatutJob.TERMINE, StatutJob.ERREUR, StatutJob.ANNULE):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job déjà terminé (statut: {job.statut.value})"
+        )
+
+    return job_queue.annuler(db, job).to_dict()
@@ -1,25 +1,30 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, func, or_
 from typing import Optional, List
+from datetime import date
 from decimal import Decimal
 from io import BytesIO
 
 from database import get_db
-from models import Mission, Employe, Client, Parametre, User
+from models import Mission, MissionClientDetail, MissionLogisticsMovement, Employe, Client, Parametre, User
 from schemas import (
     MissionCreate,
     MissionResponse,
     MissionListResponse,
     MissionPrimeMensuelle,
+    MissionRecalculPrimes,
     ParametreCreate,
     ParametreUpdate,
     ParametreResponse,
 )
 from services.pdf_generator import PDFGenerator
+from services.pdf_cache import reponse_pdf
 from services.logging_service import log_action, clean_data_for_logging, ActionType
+from services.mission_km_calculator import recalculer_primes_missions
 from middleware.auth import require_gestionnaire, require_admin  # ⭐ v3.6.0: Permissions
+from utils.periodes import filtre_periode
 
 router = APIRouter(prefix="/missions", tags=["Missions"])
 pdf_generator = PDFGenerator()
@@ -114,8 +119,7 @@ def delete_mission(
         request=request
     )
     
-    db.delete(db_mission)
-    db.commit()
+    MissionService(db).delete_mission(mission_id)
     
     return None
 
@@ -285,10 +289,21 @@ def generate_all_ordres_mission_pdf(
         }
     )
 
+def _curseur(mission: Mission) -> str:
+    return f"{mission.date_mission.isoformat()}_{mission.id}"
+
+def _lire_curseur(curseur: str):
+    try:
+        jour, mission_id = curseur.split("_")
+        return date.fromisoformat(jour), int(mission_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Curseur invalide")
+
 @router.get("/", response_model=MissionListResponse)
 def list_missions(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    curseur: Optional[str] = Query(None, description="curseur_suivant de la page précédente (remplace skip)"),
     chauffeur_id: Optional[int] = None,
     client_id: Optional[int] = None,
     date_debut: Optional[str] = None,
@@ -297,8 +312,13 @@ def list_missions(
     mois: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
-    """Lister toutes les missions avec filtres"""
+    """
+    Lister toutes les missions avec filtres (les plus récentes d'abord)
     
+    Pagination par curseur sur (date_mission, id): passer curseur_suivant
+    de la réponse pour obtenir la page suivante. Le total n'est calculé que
+    sans curseur (première page ou pagination par skip).
+    """
     query = db.query(Mission)
     
     if chauffeur_id:
@@ -313,18 +333,35 @@ def list_missions(
     if date_fin:
         query = query.filter(Mission.date_mission <= date_fin)
     
-    if annee and mois:
-        query = query.filter(
-            func.year(Mission.date_mission) == annee,
-            func.month(Mission.date_mission) == mois
-        )
-    elif annee:
-        query = query.filter(func.year(Mission.date_mission) == annee)
+    if annee:
+        query = query.filter(filtre_periode(Mission.date_mission, annee, mois))
     
-    total = query.count()
-    missions = query.offset(skip).limit(limit).all()
+    query = query.order_by(Mission.date_mission.desc(), Mission.id.desc())
     
-    return MissionListResponse(total=total, missions=missions)
+    total = None
+    if curseur:
+        jour, mission_id = _lire_curseur(curseur)
+        query = query.filter(or_(
+            Mission.date_mission < jour,
+            and_(Mission.date_mission == jour, Mission.id < mission_id)
+        ))
+    else:
+        # COUNT sur l'index, sans sous-requête ni relecture des colonnes
+        total = query.with_entities(func.count(Mission.id)).order_by(None).scalar()
+        query = query.offset(skip)
+    
+    # Détails, mouvements, clients et types logistiques: une requête par niveau
+    details = selectinload(Mission.client_details)
+    missions = query.options(
+        details.joinedload(MissionClientDetail.client),
+        details.selectinload(MissionClientDetail.logistics_movements).joinedload(MissionLogisticsMovement.logistics_type)
+    ).limit(limit).all()
+    
+    return MissionListResponse(
+        total=total,
+        missions=missions,
+        curseur_suivant=_curseur(missions[-1]) if len(missions) == limit else None
+    )
 
 @router.get("/totaux-chauffeur")
 def get_totaux_chauffeur(
@@ -378,28 +415,27 @@ def get_primes_mensuelles(
 ):
     """Obtenir le total des primes de déplacement par chauffeur pour un mois"""
     
-    # Grouper les missions par chauffeur
+    # Grouper les missions par chauffeur (avec nom et prénom, une seule requête)
     results = db.query(
         Mission.chauffeur_id,
+        Employe.nom,
+        Employe.prenom,
         func.sum(Mission.prime_calculee).label("total_prime"),
         func.count(Mission.id).label("nombre_missions")
-    ).filter(
-        func.year(Mission.date_mission) == annee,
-        func.month(Mission.date_mission) == mois
-    ).group_by(Mission.chauffeur_id).all()
-    
-    # Enrichir avec les informations du chauffeur
-    primes = []
-    for result in results:
-        chauffeur = db.query(Employe).filter(Employe.id == result.chauffeur_id).first()
-        if chauffeur:
-            primes.append(MissionPrimeMensuelle(
-                chauffeur_id=chauffeur.id,
-                chauffeur_nom=chauffeur.nom,
-                chauffeur_prenom=chauffeur.prenom,
-                total_prime=result.total_prime or Decimal(0),
-                nombre_missions=result.nombre_missions
-            ))
+    ).join(Employe, Mission.chauffeur_id == Employe.id).filter(
+        filtre_periode(Mission.date_mission, annee, mois)
+    ).group_by(Mission.chauffeur_id, Employe.nom, Employe.prenom).all()
+    
+    primes = [
+        MissionPrimeMensuelle(
+            chauffeur_id=result.chauffeur_id,
+            chauffeur_nom=result.nom,
+            chauffeur_prenom=result.prenom,
+            total_prime=result.total_prime or Decimal(0),
+            nombre_missions=result.nombre_missions
+        )
+        for result in results
+    ]
     
     return {
         "annee": annee,
@@ -407,6 +443,51 @@ def get_primes_mensuelles(
         "primes": primes
     }
 
+@router.post("/recalcul-primes")
+def recalculer_primes(
+    data: MissionRecalculPrimes,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_gestionnaire)
+):
+    """
+    Recalculer distance et prime des missions d'une période et/ou d'un chauffeur
+    
+    À lancer après un changement de tarif/km client ou de km supplémentaires
+    par client, avant la paie du mois. Avec "simulation", seul l'écart est
+    retourné.
+    """
+    if not (data.date_debut or data.date_fin or data.chauffeur_id):
+        raise HTTPException(status_code=400, detail="Indiquer une période et/ou un chauffeur")
+    if data.date_debut and data.date_fin and data.date_debut > data.date_fin:
+        raise HTTPException(status_code=400, detail="La date de début doit précéder la date de fin")
+    
+    resultat = recalculer_primes_missions(
+        db,
+        date_debut=data.date_debut,
+        date_fin=data.date_fin,
+        chauffeur_id=data.chauffeur_id,
+        simulation=data.simulation
+    )
+    if data.simulation:
+        return resultat
+    
+    db.commit()
+    log_action(
+        db=db,
+        module_name="missions",
+        action_type=ActionType.UPDATE,
+        record_id=0,
+        description=(
+            f"Recalcul des primes: {resultat['missions_modifiees']}/{resultat['missions_analysees']} "
+            f"mission(s) modifiée(s), écart {resultat['ecart']:.2f} DA"
+        ),
+        new_data=clean_data_for_logging(data.model_dump()),
+        user=current_user,
+        request=request
+    )
+    return resultat
+
 @router.get("/{mission_id}", response_model=MissionResponse)
 def get_mission(mission_id: int, db: Session = Depends(get_db)):
     """Obtenir une mission par son ID"""
@@ -422,13 +503,7 @@ def get_mission(mission_id: int, db: Session = Depends(get_db)):
 def delete_mission(mission_id: int, db: Session = Depends(get_db), _: None = Depends(require_gestionnaire)):
     """Supprimer une mission"""
     
-    mission = db.query(Mission).filter(Mission.id == mission_id).first()
-    
-    if not mission:
-        raise HTTPException(status_code=404, detail="Mission non trouvée")
-    
-    db.delete(mission)
-    db.commit()
+    MissionService(db).delete_mission(mission_id)
     
     return None
 
@@ -481,6 +556,7 @@ def update_tarif_km(
 @router.get("/{mission_id}/ordre-mission/pdf")
 def generate_ordre_mission_pdf(
     mission_id: int,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """Générer un ordre de mission PDF pour un chauffeur"""
@@ -588,17 +664,19 @@ def generate_ordre_mission_pdf(
         print(f"DEBUG: Mission data camion - marque: {mission_data['camion_marque']}, modele: {mission_data['camion_modele']}, immat: {mission_data['camion_immatriculation']}")
         print("DEBUG: Calling PDF generator")
         
-        # 6. Générer le PDF
-        pdf_buffer = pdf_generator.generate_ordre_mission_enhanced(mission_data)
-        
-        print("DEBUG: PDF generated successfully")
+        # 6. Générer le PDF (ou le servir depuis le cache)
+        tags = [f"mission:{mission.id}", f"employe:{chauffeur.id}", f"client:{client.id}"]
+        tags += [f"mission_client_detail:{detail.id}" for detail in client_details]
+        if camion:
+            tags.append(f"camion:{camion.id}")
         
-        return StreamingResponse(
-            pdf_buffer,
-            media_type='application/pdf',
-            headers={
-                'Content-Disposition': f'attachment; filename="ordre_mission_{mission_id:05d}.pdf"'
-            }
+        return reponse_pdf(
+            request,
+            "ordre_mission",
+            mission_data,
+            lambda: pdf_generator.generate_ordre_mission_enhanced(mission_data),
+            f'"ordre_mission_{mission_id:05d}.pdf"',
+            tags=tags
         )
         
     except HTTPException as e:
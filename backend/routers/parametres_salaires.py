@@ -9,6 +9,7 @@ from decimal import Decimal
 
 from database import get_db
 from models import ParametresSalaire, IRGBareme, ReportAvanceCredit
+from services.uploads import fichier_upload
 from schemas import (
     ParametresSalaireResponse,
     ParametresSalaireUpdate,
@@ -110,12 +111,11 @@ async def importer_bareme_irg(
     db: Session = Depends(get_db)
 ):
     """Importer barème IRG depuis Excel (2 colonnes: MONTANT, IRG)"""
-    if not file.filename.endswith(('.xlsx', '.xls')):
-        raise HTTPException(400, "Format de fichier non supporté (Excel requis)")
+    source = fichier_upload(file, ('.xlsx', '.xls'), "Format de fichier non supporté (Excel requis)")
         
     try:
-        # Lire fichier Excel
-        wb = openpyxl.load_workbook(file.file, data_only=True)
+        # Lire fichier Excel en flux (mode lecture seule, lignes parcourues une à une)
+        wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
         sheet = wb.active
         
         # Désactiver ancien barème
@@ -126,7 +126,7 @@ async def importer_bareme_irg(
         
         # Importer nouveau (colonnes: MONTANT, IRG)
         for idx, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
-            if row[0] is not None and row[1] is not None:
+            if len(row) > 1 and row[0] is not None and row[1] is not None:
                 try:
                     bareme = IRGBareme(
                         salaire=Decimal(str(row[0])),      # Colonne MONTANT
@@ -138,13 +138,14 @@ async def importer_bareme_irg(
                 except Exception as e:
                     errors.append(f"Ligne {idx}: {str(e)}")
                     continue
+        wb.close()
         
         db.commit()
         
         # Invalider cache IRG
         from services.irg_calculator import get_irg_calculator
         calc = get_irg_calculator(db)
-        calc.recharger_bareme()
+        calc.recharger_bareme(db)
         
         message = f"Barème importé avec succès ({count} tranches)"
         if errors:
@@ -171,7 +172,7 @@ def desactiver_bareme_actif(db: Session = Depends(get_db)):
         # Invalider cache aussi - CORRECTION: passer db
         from services.irg_calculator import get_irg_calculator
         calc = get_irg_calculator(db)
-        calc.recharger_bareme()
+        calc.recharger_bareme(db)
         
         return {"message": "Barème désactivé"}
     except Exception as e:
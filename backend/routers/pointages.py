@@ -15,6 +15,7 @@ from schemas import (
     PointageTotaux,
 )
 from services.pdf_generator import PDFGenerator
+from services.pointage_grille import GrillePointages
 from services.logging_service import log_action
 from middleware.auth import get_current_user
 
@@ -522,46 +523,46 @@ def generer_rapport_pointages_mensuel(
 ):
     """Générer un rapport PDF des pointages du mois"""
     
-    # Récupérer les pointages du mois
-    pointages = db.query(Pointage).join(Employe).filter(
-        Pointage.annee == annee,
-        Pointage.mois == mois,
-        Employe.statut_contrat == StatutContrat.ACTIF
-    ).all()
+    # Récupérer les pointages du mois (grille NumPy, sans objets ORM Pointage)
+    grille = GrillePointages.charger(db, annee, mois)
+    employes = {
+        e.id: e for e in db.query(Employe).filter(
+            Employe.id.in_(grille.employe_ids),
+            Employe.statut_contrat == StatutContrat.ACTIF
+        ).all()
+    }
+    lignes = [ligne for ligne in grille if ligne.employe_id in employes]
     
-    if not pointages:
+    if not lignes:
         raise HTTPException(
             status_code=404, 
             detail=f"Aucun pointage trouvé pour {mois}/{annee}"
         )
     
-    # Préparer les données - regrouper par employé
-    employes_pointages = {}
-    for p in pointages:
-        emp_id = p.employe_id
-        if emp_id not in employes_pointages:
-            employes_pointages[emp_id] = {
-                'employe': p.employe,
-                'pointage': p
-            }
-    
     # Construire les données du rapport avec calcul des congés
     from models.conge import Conge
     from datetime import datetime
     
+    totaux_par_employe = grille.totaux_par_employe()
+    
+    # Congés existants de la période (une seule requête)
+    conges_existants = {
+        c.employe_id: c for c in db.query(Conge).filter(
+            Conge.employe_id.in_(list(employes)),
+            Conge.annee == annee,
+            Conge.mois == mois
+        ).all()
+    }
+    
     pointages_data = []
-    for idx, (emp_id, data) in enumerate(employes_pointages.items(), 1):
-        emp = data['employe']
-        p = data['pointage']
-        totaux = p.calculer_totaux()
+    for idx, p in enumerate(lignes, 1):
+        emp_id = p.employe_id
+        emp = employes[emp_id]
+        totaux = totaux_par_employe[emp_id]
         jours_travailles_brut = totaux.get('jours_travailles', 0)
         
         # RÈGLE 4 v3.5.1: Récupérer les jours de congés PRIS ce mois pour les EXCLURE
-        conge_existant = db.query(Conge).filter(
-            Conge.employe_id == emp_id,
-            Conge.annee == annee,
-            Conge.mois == mois
-        ).first()
+        conge_existant = conges_existants.get(emp_id)
         
         jours_conges_pris = int(conge_existant.jours_conges_pris) if conge_existant else 0
         
@@ -581,18 +582,11 @@ def generer_rapport_pointages_mensuel(
         jours_conges_acquis = Conge.calculer_jours_conges(jours_reellement_travailles, est_nouveau_recrue)
         
         # Enregistrer ou mettre à jour dans la table conges
-        conge_record = db.query(Conge).filter(
-            Conge.employe_id == emp_id,
-            Conge.annee == annee,
-            Conge.mois == mois
-        ).first()
-        
         if conge_existant:
             # Mettre à jour l'enregistrement existant
             conge_existant.jours_travailles = jours_reellement_travailles
             conge_existant.jours_conges_acquis = jours_conges_acquis
             # jours_conges_pris reste inchangé (saisi manuellement)
-            conge_existant.jours_conges_restants = int(conge_existant.jours_conges_acquis) - int(conge_existant.jours_conges_pris)
         else:
             # Créer un nouvel enregistrement
             conge_record = Conge(
@@ -601,13 +595,10 @@ def generer_rapport_pointages_mensuel(
                 mois=mois,
                 jours_travailles=jours_reellement_travailles,
                 jours_conges_acquis=jours_conges_acquis,
-                jours_conges_pris=0,
-                jours_conges_restants=jours_conges_acquis
+                jours_conges_pris=0
             )
             db.add(conge_record)
         
-        db.commit()
-        
         pointages_data.append({
             'numero': idx,
             'matricule': str(emp.id) if emp else '-',
@@ -619,6 +610,12 @@ def generer_rapport_pointages_mensuel(
             'statut': 'Verrouillé' if p.verrouille else 'En cours'
         })
     
+    # Soldes cumulés des employés du rapport (une passe ordonnée), un seul commit pour tout le mois
+    from services.conges_calculator import reconstruire_soldes
+    db.flush()
+    reconstruire_soldes(db, list(employes))
+    db.commit()
+    
     # Récupérer les paramètres de l'entreprise
     company = db.query(Parametres).first()
     company_info = company.to_dict() if company else None
@@ -5,41 +5,53 @@ from typing import Optional
 from decimal import Decimal
 
 from database import get_db
-from models import Employe, Pointage, StatutContrat
-from models.salaire import Salaire
+from models import Employe, StatutContrat
 from schemas.salaire import G29Response, G29DataRecap, G29DataEmploye
 from services import SalaireCalculator, RapportGenerator, ExcelGenerator
 from services.pdf_generator import PDFGenerator
+from services.pointage_grille import GrillePointages
+from services.g29 import AgregatG29
 from middleware.auth import require_auth
 
 router = APIRouter(prefix="/rapports", tags=["Rapports"])
 
-@router.get("/pointages/pdf")
-def generer_rapport_pointages_pdf(
-    annee: int = Query(..., ge=2000, le=2100),
-    mois: int = Query(..., ge=1, le=12),
-    db: Session = Depends(get_db)
-):
-    """Générer un rapport PDF des pointages pour un mois"""
+
+def _donnees_pointages_mois(db: Session, annee: int, mois: int) -> list:
+    """
+    Totaux des pointages du mois pour les rapports
+    Grille NumPy (1 requête) + noms des employés (1 requête)
+    """
+    grille = GrillePointages.charger(db, annee, mois)
+    totaux = grille.totaux_par_employe()
     
-    # Récupérer les pointages du mois
-    pointages = db.query(Pointage).filter(
-        Pointage.annee == annee,
-        Pointage.mois == mois
-    ).all()
+    employes = {
+        e.id: e for e in db.query(Employe.id, Employe.nom, Employe.prenom).filter(
+            Employe.id.in_(grille.employe_ids)
+        ).all()
+    }
     
-    # Préparer les données
     donnees_pointages = []
-    for p in pointages:
-        employe = db.query(Employe).filter(Employe.id == p.employe_id).first()
+    for employe_id in grille.employe_ids:
+        employe = employes.get(employe_id)
         if employe:
-            totaux = p.calculer_totaux()
             donnees_pointages.append({
                 "employe_id": employe.id,
                 "employe_nom": employe.nom,
                 "employe_prenom": employe.prenom,
-                "totaux": totaux
+                "totaux": totaux[employe_id]
             })
+    return donnees_pointages
+
+
+@router.get("/pointages/pdf")
+def generer_rapport_pointages_pdf(
+    annee: int = Query(..., ge=2000, le=2100),
+    mois: int = Query(..., ge=1, le=12),
+    db: Session = Depends(get_db)
+):
+    """Générer un rapport PDF des pointages pour un mois"""
+    
+    donnees_pointages = _donnees_pointages_mois(db, annee, mois)
     
     # Générer le PDF
     generator = RapportGenerator()
@@ -61,24 +73,7 @@ def generer_rapport_pointages_excel(
 ):
     """Générer un rapport Excel des pointages pour un mois"""
     
-    # Récupérer les pointages du mois
-    pointages = db.query(Pointage).filter(
-        Pointage.annee == annee,
-        Pointage.mois == mois
-    ).all()
-    
-    # Préparer les données
-    donnees_pointages = []
-    for p in pointages:
-        employe = db.query(Employe).filter(Employe.id == p.employe_id).first()
-        if employe:
-            totaux = p.calculer_totaux()
-            donnees_pointages.append({
-                "employe_id": employe.id,
-                "employe_nom": employe.nom,
-                "employe_prenom": employe.prenom,
-                "totaux": totaux
-            })
+    donnees_pointages = _donnees_pointages_mois(db, annee, mois)
     
     # Générer l'Excel
     generator = ExcelGenerator()
@@ -227,86 +222,14 @@ async def get_g29_data(
         if annee < 2020 or annee > 2100:
             raise HTTPException(status_code=400, detail="Année invalide")
         
-        # Récupérer tous les employés actifs
-        employes = db.query(Employe).filter(Employe.actif == True).all()
+        # Salaires de l'année: une requête groupée par employé et par mois
+        agregat = AgregatG29.charger(db, annee)
         
-        if not employes:
+        if not agregat.lignes:
             raise HTTPException(status_code=404, detail="Aucun employé trouvé")
         
-        # Initialiser les données récapitulatives
-        recap_data = {
-            "annee": annee,
-            "janvier_brut": Decimal(0), "janvier_irg": Decimal(0),
-            "fevrier_brut": Decimal(0), "fevrier_irg": Decimal(0),
-            "mars_brut": Decimal(0), "mars_irg": Decimal(0),
-            "avril_brut": Decimal(0), "avril_irg": Decimal(0),
-            "mai_brut": Decimal(0), "mai_irg": Decimal(0),
-            "juin_brut": Decimal(0), "juin_irg": Decimal(0),
-            "juillet_brut": Decimal(0), "juillet_irg": Decimal(0),
-            "aout_brut": Decimal(0), "aout_irg": Decimal(0),
-            "septembre_brut": Decimal(0), "septembre_irg": Decimal(0),
-            "octobre_brut": Decimal(0), "octobre_irg": Decimal(0),
-            "novembre_brut": Decimal(0), "novembre_irg": Decimal(0),
-            "decembre_brut": Decimal(0), "decembre_irg": Decimal(0),
-            "total_brut": Decimal(0),
-            "total_irg": Decimal(0)
-        }
-        
-        employes_data = []
-        
-        # Pour chaque employé, récupérer ses salaires de l'année
-        for employe in employes:
-            salaires = db.query(Salaire).filter(
-                Salaire.employe_id == employe.id,
-                Salaire.annee == annee
-            ).all()
-            
-            # Initialiser les données de l'employé
-            employe_data = {
-                "id": employe.id,
-                "nom": employe.nom,
-                "prenom": employe.prenom,
-                "situation_familiale": employe.situation_familiale or "C",
-                "janvier_net": Decimal(0), "janvier_irg": Decimal(0),
-                "fevrier_net": Decimal(0), "fevrier_irg": Decimal(0),
-                "mars_net": Decimal(0), "mars_irg": Decimal(0),
-                "avril_net": Decimal(0), "avril_irg": Decimal(0),
-                "mai_net": Decimal(0), "mai_irg": Decimal(0),
-                "juin_net": Decimal(0), "juin_irg": Decimal(0),
-                "juillet_net": Decimal(0), "juillet_irg": Decimal(0),
-                "aout_net": Decimal(0), "aout_irg": Decimal(0),
-                "septembre_net": Decimal(0), "septembre_irg": Decimal(0),
-                "octobre_net": Decimal(0), "octobre_irg": Decimal(0),
-                "novembre_net": Decimal(0), "novembre_irg": Decimal(0),
-                "decembre_net": Decimal(0), "decembre_irg": Decimal(0),
-                "total_imposable": Decimal(0),
-                "total_irg": Decimal(0)
-            }
-            
-            # Mapper les mois aux noms de champs
-            mois_map = {
-                1: "janvier", 2: "fevrier", 3: "mars", 4: "avril",
-                5: "mai", 6: "juin", 7: "juillet", 8: "aout",
-                9: "septembre", 10: "octobre", 11: "novembre", 12: "decembre"
-            }
-            
-            # Remplir les données mensuelles
-            for salaire in salaires:
-                mois_nom = mois_map.get(salaire.mois)
-                if mois_nom:
-                    # Données employé - utiliser salaire_imposable au lieu de salaire_net
-                    employe_data[f"{mois_nom}_net"] = salaire.salaire_imposable or Decimal(0)
-                    employe_data[f"{mois_nom}_irg"] = salaire.irg or Decimal(0)
-                    employe_data["total_imposable"] += salaire.salaire_imposable or Decimal(0)
-                    employe_data["total_irg"] += salaire.irg or Decimal(0)
-                    
-                    # Données récapitulatives - utiliser salaire_cotisable comme brut
-                    recap_data[f"{mois_nom}_brut"] += salaire.salaire_cotisable or Decimal(0)
-                    recap_data[f"{mois_nom}_irg"] += salaire.irg or Decimal(0)
-                    recap_data["total_brut"] += salaire.salaire_cotisable or Decimal(0)
-                    recap_data["total_irg"] += salaire.irg or Decimal(0)
-            
-            employes_data.append(employe_data)
+        recap_data = agregat.recap_dict()
+        employes_data = [ligne.to_dict() for ligne in agregat]
         
         # Créer les objets de réponse
         recap = G29DataRecap(**recap_data)
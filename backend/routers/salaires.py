@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, Callable
 from decimal import Decimal
 from datetime import date
 from io import BytesIO
+import json
 import zipfile
 
 from database import get_db
@@ -16,8 +17,10 @@ from schemas import (
     SalaireStatutUpdate
 )
 from services import SalaireCalculator
+from services.salary_processor import SalaireProcessor, entete_provenance, resume_provenance
 from services.pdf_generator import PDFGenerator
 from services.logging_service import log_action
+from services.job_queue import job_queue, traitement_job
 from middleware.auth import get_current_user
 
 router = APIRouter(prefix="/salaires", tags=["Salaires"])
@@ -155,14 +158,12 @@ def calculer_tous_salaires(
         "totaux": totaux_str
     }
 
-@router.post("/bulletins-paie/generer")
-def generer_bulletins_paie(
+def _generer_bulletins_zip(
+    db: Session,
     params: SalaireCalculTousCreate,
-    request: Request,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Générer tous les bulletins de paie en PDF (ZIP)"""
+    progression: Optional[Callable] = None
+) -> BytesIO:
+    """Calculer et générer les bulletins de tous les employés actifs dans un ZIP"""
     
     # Récupérer tous les employés actifs
     employes = db.query(Employe).filter(
@@ -194,7 +195,7 @@ def generer_bulletins_paie(
     zip_buffer = BytesIO()
     
     with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for employe in employes:
+        for index, employe in enumerate(employes, 1):
             try:
                 # Calculer le salaire
                 salaire_data = calculator.calculer_salaire(
@@ -236,9 +237,25 @@ def generer_bulletins_paie(
                 
             except ValueError as e:
                 # Ignorer les employés sans pointage
-                continue
+                pass
+            
+            if progression:
+                progression(index, len(employes))
     
     zip_buffer.seek(0)
+    return zip_buffer
+
+
+@router.post("/bulletins-paie/generer")
+def generer_bulletins_paie(
+    params: SalaireCalculTousCreate,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Générer tous les bulletins de paie en PDF (ZIP)"""
+    
+    zip_buffer = _generer_bulletins_zip(db, params)
     
     # Log l'action
     log_action(
@@ -259,12 +276,48 @@ def generer_bulletins_paie(
         }
     )
 
-@router.post("/bulletins-paie/generer-combines")
-def generer_bulletins_combines(
+
+@traitement_job("salaires.bulletins_zip")
+def _job_bulletins_zip(db: Session, parametres: dict, contexte):
+    params = SalaireCalculTousCreate(**parametres)
+    zip_buffer = _generer_bulletins_zip(db, params, contexte.progression)
+    return {
+        "contenu": zip_buffer.getvalue(),
+        "nom_fichier": f"bulletins_paie_{params.mois:02d}_{params.annee}.zip",
+        "media_type": "application/zip"
+    }
+
+
+@router.post("/bulletins-paie/generer/job", status_code=202)
+def soumettre_bulletins_paie(
     params: SalaireCalculTousCreate,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
 ):
-    """Générer un PDF unique contenant tous les bulletins de paie"""
+    """
+    Générer tous les bulletins de paie (ZIP) en arrière-plan
+    Suivi: GET /api/jobs/{id}, résultat: GET /api/jobs/{id}/telecharger
+    """
+    job = job_queue.soumettre(db, "salaires.bulletins_zip", params.model_dump(), user_id=current_user.id)
+    
+    log_action(
+        db=db,
+        module_name="salaires",
+        action_type=ActionType.CREATE,
+        description=f"Génération bulletins paie (ZIP) {params.mois}/{params.annee} en arrière-plan (job {job.id})",
+        user=current_user,
+        request=request
+    )
+    
+    return job.to_dict()
+
+def _generer_bulletins_combines_pdf(
+    db: Session,
+    params: SalaireCalculTousCreate,
+    progression: Optional[Callable] = None
+) -> BytesIO:
+    """Calculer les salaires des employés actifs et générer le PDF combiné"""
     
     # Récupérer tous les employés actifs
     employes = db.query(Employe).filter(
@@ -279,7 +332,10 @@ def generer_bulletins_combines(
     
     employes_data = []
     
-    for employe in employes:
+    # Progression: calcul de chaque employé puis rendu de chaque bulletin
+    # (total estimé à 2 étapes par employé jusqu'à connaître les bulletins à rendre)
+    nombre = len(employes)
+    for index, employe in enumerate(employes, 1):
         try:
             # Calculer le salaire
             salaire_data = calculator.calculer_salaire(
@@ -315,16 +371,37 @@ def generer_bulletins_combines(
             
         except ValueError:
             # Ignorer les employés sans pointage
-            continue
+            pass
+        
+        if progression:
+            progression(index, 2 * nombre)
             
     if not employes_data:
         raise HTTPException(status_code=404, detail="Aucune donnée de salaire disponible pour cette période")
 
-    # Générer le PDF combiné
+    rendu = None
+    if progression:
+        total = nombre + len(employes_data)
+        progression(nombre, total)
+        rendu = lambda rendus, _: progression(nombre + rendus, total)
+
+    # Générer le PDF combiné (progression et annulation entre les lots de rendu)
     pdf_buffer = pdf_generator.generate_tous_bulletins_combines(
         employes_data=employes_data,
-        periode={'mois': params.mois, 'annee': params.annee}
+        periode={'mois': params.mois, 'annee': params.annee},
+        progression=rendu
     )
+    return pdf_buffer
+
+
+@router.post("/bulletins-paie/generer-combines")
+def generer_bulletins_combines(
+    params: SalaireCalculTousCreate,
+    db: Session = Depends(get_db)
+):
+    """Générer un PDF unique contenant tous les bulletins de paie"""
+    
+    pdf_buffer = _generer_bulletins_combines_pdf(db, params)
     
     # Retourner le PDF
     return StreamingResponse(
@@ -335,6 +412,28 @@ def generer_bulletins_combines(
         }
     )
 
+
+@traitement_job("salaires.bulletins_combines")
+def _job_bulletins_combines(db: Session, parametres: dict, contexte):
+    params = SalaireCalculTousCreate(**parametres)
+    pdf_buffer = _generer_bulletins_combines_pdf(db, params, contexte.progression)
+    return {
+        "contenu": pdf_buffer.getvalue(),
+        "nom_fichier": f"bulletins_combines_{params.mois:02d}_{params.annee}.pdf",
+        "media_type": "application/pdf"
+    }
+
+
+@router.post("/bulletins-paie/generer-combines/job", status_code=202)
+def soumettre_bulletins_combines(
+    params: SalaireCalculTousCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Générer le PDF combiné des bulletins en arrière-plan (suivi via /api/jobs/{id})"""
+    job = job_queue.soumettre(db, "salaires.bulletins_combines", params.model_dump(), user_id=current_user.id)
+    return job.to_dict()
+
 @router.get("/employe/{employe_id}")
 def get_historique_salaires(
     employe_id: int,
@@ -364,31 +463,19 @@ def generer_rapport_salaires(
     mois: int,
     db: Session = Depends(get_db)
 ):
-    """Générer un rapport complet des salaires pour un mois"""
-    
-    # Récupérer tous les employés actifs
-    employes = db.query(Employe).filter(
-        Employe.statut_contrat == StatutContrat.ACTIF
-    ).all()
-    
-    calculator = SalaireCalculator(db)
-    rapport = []
+    """
+    Générer un rapport complet des salaires pour un mois
+    Mois validé: lignes de la table salaires (recalcul des seules entrées modifiées)
+    """
+    resultats = SalaireProcessor(db).resultats_mois(annee, mois)
     
-    for employe in employes:
-        try:
-            resultat = calculator.calculer_salaire(
-                employe_id=employe.id,
-                annee=annee,
-                mois=mois
-            )
-            rapport.append(resultat)
-        except ValueError:
-            # Ignorer les employés sans pointage
-            pass
+    # Ignorer les employés sans pointage
+    rapport = [r for r in resultats if r.get("status") == "OK"]
     
     return {
         "annee": annee,
         "mois": mois,
+        "provenance": resume_provenance(rapport),
         "rapport": rapport
     }
 
@@ -399,65 +486,19 @@ def generer_rapport_pdf_salaires(
 ):
     """Générer un rapport PDF complet des salaires de tous les employés"""
     
-    # Récupérer tous les employés actifs
-    employes = db.query(Employe).filter(
-        Employe.statut_contrat == StatutContrat.ACTIF
-    ).all()
+    resultats = SalaireProcessor(db).resultats_mois(params.annee, params.mois)
     
-    if not employes:
-        raise HTTPException(status_code=404, detail="Aucun employé actif trouvé")
-    
-    calculator = SalaireCalculator(db)
-    salaires_data = []
-    
-    # Calculer les salaires
-    for employe in employes:
-        try:
-            resultat = calculator.calculer_salaire(
-                employe_id=employe.id,
-                annee=params.annee,
-                mois=params.mois
-            )
-            salaires_data.append(resultat)
-        except ValueError:
-            # Ignorer les employés sans pointage
-            pass
+    # Ignorer les employés sans pointage
+    salaires_data = [r for r in resultats if r.get("status") == "OK"]
     
     if not salaires_data:
         raise HTTPException(status_code=404, detail="Aucune donnée de salaire disponible pour cette période")
     
-    # Calculer TOUS les totaux nécessaires
-    totaux = {
-        'total_base': sum(Decimal(str(s.get('salaire_base_proratis', 0))) for s in salaires_data),
-        'total_heures_supp': sum(Decimal(str(s.get('heures_supplementaires', 0))) for s in salaires_data),
-        'total_in': sum(Decimal(str(s.get('indemnite_nuisance', 0))) for s in salaires_data),
-        'total_ifsp': sum(Decimal(str(s.get('ifsp', 0))) for s in salaires_data),
-        'total_iep': sum(Decimal(str(s.get('iep', 0))) for s in salaires_data),
-        'total_encouragement': sum(Decimal(str(s.get('prime_encouragement', 0))) for s in salaires_data),
-        'total_chauffeur': sum(Decimal(str(s.get('prime_chauffeur', 0))) for s in salaires_data),
-        'total_nuit': sum(Decimal(str(s.get('prime_nuit_agent_securite', 0))) for s in salaires_data),
-        'total_deplacement': sum(Decimal(str(s.get('prime_deplacement', 0))) for s in salaires_data),
-        'total_panier': sum(Decimal(str(s.get('panier', 0))) for s in salaires_data),
-        'total_transport': sum(Decimal(str(s.get('prime_transport', 0))) for s in salaires_data),
-        'total_cotisable': sum(Decimal(str(s.get('salaire_cotisable', 0))) for s in salaires_data),
-        'total_ss': sum(Decimal(str(s.get('retenue_securite_sociale', 0))) for s in salaires_data),
-        'total_imposable': sum(Decimal(str(s.get('salaire_imposable', 0))) for s in salaires_data),
-        'total_irg': sum(Decimal(str(s.get('irg', 0))) for s in salaires_data),
-        'total_femme_foyer': sum(Decimal(str(s.get('prime_femme_foyer', 0))) for s in salaires_data),
-        'total_avances': sum(Decimal(str(s.get('total_avances', 0))) for s in salaires_data),
-        'total_credits': sum(Decimal(str(s.get('retenue_credit', 0))) for s in salaires_data),
-        'total_net': sum(Decimal(str(s.get('salaire_net', 0))) for s in salaires_data),
-    }
-    
     # Générer le PDF
     pdf_generator = PDFGenerator(db=db)
     periode = {'mois': params.mois, 'annee': params.annee}
     
-    pdf_buffer = pdf_generator.generate_rapport_salaires(
-        salaires_data=salaires_data,
-        periode=periode,
-        totaux=totaux
-    )
+    pdf_buffer = pdf_generator.generate_rapport_salaires(salaires_data, periode)
     
     # Préparer le nom du fichier
     filename = f"rapport_salaires_{params.mois:02d}_{params.annee}.pdf"
@@ -467,7 +508,8 @@ def generer_rapport_pdf_salaires(
         pdf_buffer,
         media_type="application/pdf",
         headers={
-            "Content-Disposition": f"attachment; filename={filename}"
+            "Content-Disposition": f"attachment; filename={filename}",
+            "X-Provenance-Salaires": entete_provenance(salaires_data)
         }
     )
 
@@ -493,6 +535,11 @@ async def sauvegarder_salaire(
         calculator = SalaireCalculator(db)
         resultat = calculator.calculer_salaire(employe_id, annee, mois)
         
+        # Retenues de crédit du mois (écrites avec le salaire au commit)
+        calculator.registre_credits(annee, mois).enregistrer_retenues(
+            employe_id, respecter_prorogations=True, plafonner=True
+        )
+        
         # Vérifier si le salaire existe déjà
         salaire_existant = db.query(Salaire).filter(
             Salaire.employe_id == employe_id,
@@ -585,6 +632,137 @@ async def sauvegarder_salaire(
         raise HTTPException(status_code=500, detail=f"Erreur lors de la sauvegarde: {str(e)}")
 
 
+def _sauvegarder_salaires_batch(
+    db: Session,
+    annee: int,
+    mois: int,
+    employe_ids: Optional[List[int]] = None,
+    statut: str = "validé",
+    progression: Optional[Callable] = None
+) -> dict:
+    """Calculer et enregistrer (création ou mise à jour) les salaires du mois, un seul commit final"""
+    from models.salaire import Salaire
+    
+    # Si aucune liste fournie, prendre tous les employés actifs
+    if employe_ids is None:
+        employes = db.query(Employe).filter(Employe.actif == True).all()
+        employe_ids = [e.id for e in employes]
+    
+    resultats = {
+        "total": len(employe_ids),
+        "succes": 0,
+        "erreurs": 0,
+        "details": []
+    }
+    
+    calculator = SalaireCalculator(db)
+    
+    for index, employe_id in enumerate(employe_ids, 1):
+        try:
+            # Calculer le salaire
+            resultat = calculator.calculer_salaire(employe_id, annee, mois)
+            calculator.registre_credits(annee, mois).enregistrer_retenues(
+                employe_id, respecter_prorogations=True, plafonner=True
+            )
+            
+            # Vérifier si le salaire existe déjà
+            salaire_existant = db.query(Salaire).filter(
+                Salaire.employe_id == employe_id,
+                Salaire.annee == annee,
+                Salaire.mois == mois
+            ).first()
+            
+            if salaire_existant:
+                # Mise à jour
+                salaire_existant.jours_travailles = resultat["jours_travailles"]
+                salaire_existant.jours_ouvrables = resultat["jours_ouvrables"]
+                salaire_existant.salaire_base_proratis = resultat["salaire_base_proratis"]
+                salaire_existant.heures_supplementaires = resultat["heures_supplementaires"]
+                salaire_existant.indemnite_nuisance = resultat["indemnite_nuisance"]
+                salaire_existant.ifsp = resultat["ifsp"]
+                salaire_existant.iep = resultat["iep"]
+                salaire_existant.prime_encouragement = resultat["prime_encouragement"]
+                salaire_existant.prime_chauffeur = resultat["prime_chauffeur"]
+                salaire_existant.prime_nuit_agent_securite = resultat["prime_nuit_agent_securite"]
+                salaire_existant.prime_deplacement = resultat["prime_deplacement"]
+                salaire_existant.prime_objectif = resultat["prime_objectif"]
+                salaire_existant.prime_variable = resultat["prime_variable"]
+                salaire_existant.salaire_cotisable = resultat["salaire_cotisable"]
+                salaire_existant.retenue_securite_sociale = resultat["retenue_securite_sociale"]
+                salaire_existant.panier = resultat["panier"]
+                salaire_existant.prime_transport = resultat["prime_transport"]
+                salaire_existant.salaire_imposable = resultat["salaire_imposable"]
+                salaire_existant.irg = resultat["irg"]
+                salaire_existant.total_avances = resultat["total_avances"]
+                salaire_existant.retenue_credit = resultat["retenue_credit"]
+                salaire_existant.prime_femme_foyer = resultat["prime_femme_foyer"]
+                salaire_existant.salaire_net = resultat["salaire_net"]
+                salaire_existant.statut = statut
+                
+                action = "update"
+                salaire_id = salaire_existant.id
+                salaire_net = float(salaire_existant.salaire_net)
+            else:
+                # Création
+                nouveau_salaire = Salaire(
+                    employe_id=employe_id,
+                    annee=annee,
+                    mois=mois,
+                    jours_travailles=resultat["jours_travailles"],
+                    jours_ouvrables=resultat["jours_ouvrables"],
+                    salaire_base_proratis=resultat["salaire_base_proratis"],
+                    heures_supplementaires=resultat["heures_supplementaires"],
+                    indemnite_nuisance=resultat["indemnite_nuisance"],
+                    ifsp=resultat["ifsp"],
+                    iep=resultat["iep"],
+                    prime_encouragement=resultat["prime_encouragement"],
+                    prime_chauffeur=resultat["prime_chauffeur"],
+                    prime_nuit_agent_securite=resultat["prime_nuit_agent_securite"],
+                    prime_deplacement=resultat["prime_deplacement"],
+                    prime_objectif=resultat["prime_objectif"],
+                    prime_variable=resultat["prime_variable"],
+                    salaire_cotisable=resultat["salaire_cotisable"],
+                    retenue_securite_sociale=resultat["retenue_securite_sociale"],
+                    panier=resultat["panier"],
+                    prime_transport=resultat["prime_transport"],
+                    salaire_imposable=resultat["salaire_imposable"],
+                    irg=resultat["irg"],
+                    total_avances=resultat["total_avances"],
+                    retenue_credit=resultat["retenue_credit"],
+                    prime_femme_foyer=resultat["prime_femme_foyer"],
+                    salaire_net=resultat["salaire_net"],
+                    statut=statut
+                )
+                db.add(nouveau_salaire)
+                action = "create"
+                salaire_id = None
+                salaire_net = float(resultat["salaire_net"])
+            
+            resultats["succes"] += 1
+            resultats["details"].append({
+                "employe_id": employe_id,
+                "status": "ok",
+                "action": action,
+                "salaire_net": salaire_net
+            })
+            
+        except Exception as e:
+            resultats["erreurs"] += 1
+            resultats["details"].append({
+                "employe_id": employe_id,
+                "status": "erreur",
+                "message": str(e)
+            })
+        
+        if progression:
+            progression(index, len(employe_ids))
+    
+    # COMMIT FINAL pour toutes les opérations
+    db.commit()
+    
+    return resultats
+
+
 @router.post("/sauvegarder-batch/{annee}/{mois}")
 async def sauvegarder_salaires_mois(
     annee: int,
@@ -596,127 +774,54 @@ async def sauvegarder_salaires_mois(
     """
     Calcule et sauvegarde les salaires de tous les employés (ou une liste spécifique) pour un mois donné
     """
-    from models.salaire import Salaire
-    
     try:
-        # Si aucune liste fournie, prendre tous les employés actifs
-        if employe_ids is None:
-            employes = db.query(Employe).filter(Employe.actif == True).all()
-            employe_ids = [e.id for e in employes]
-        
-        resultats = {
-            "total": len(employe_ids),
-            "succes": 0,
-            "erreurs": 0,
-            "details": []
-        }
-        
-        calculator = SalaireCalculator(db)
-        
-        for employe_id in employe_ids:
-            try:
-                # Calculer le salaire
-                resultat = calculator.calculer_salaire(employe_id, annee, mois)
-                
-                # Vérifier si le salaire existe déjà
-                salaire_existant = db.query(Salaire).filter(
-                    Salaire.employe_id == employe_id,
-                    Salaire.annee == annee,
-                    Salaire.mois == mois
-                ).first()
-                
-                if salaire_existant:
-                    # Mise à jour
-                    salaire_existant.jours_travailles = resultat["jours_travailles"]
-                    salaire_existant.jours_ouvrables = resultat["jours_ouvrables"]
-                    salaire_existant.salaire_base_proratis = resultat["salaire_base_proratis"]
-                    salaire_existant.heures_supplementaires = resultat["heures_supplementaires"]
-                    salaire_existant.indemnite_nuisance = resultat["indemnite_nuisance"]
-                    salaire_existant.ifsp = resultat["ifsp"]
-                    salaire_existant.iep = resultat["iep"]
-                    salaire_existant.prime_encouragement = resultat["prime_encouragement"]
-                    salaire_existant.prime_chauffeur = resultat["prime_chauffeur"]
-                    salaire_existant.prime_nuit_agent_securite = resultat["prime_nuit_agent_securite"]
-                    salaire_existant.prime_deplacement = resultat["prime_deplacement"]
-                    salaire_existant.prime_objectif = resultat["prime_objectif"]
-                    salaire_existant.prime_variable = resultat["prime_variable"]
-                    salaire_existant.salaire_cotisable = resultat["salaire_cotisable"]
-                    salaire_existant.retenue_securite_sociale = resultat["retenue_securite_sociale"]
-                    salaire_existant.panier = resultat["panier"]
-                    salaire_existant.prime_transport = resultat["prime_transport"]
-                    salaire_existant.salaire_imposable = resultat["salaire_imposable"]
-                    salaire_existant.irg = resultat["irg"]
-                    salaire_existant.total_avances = resultat["total_avances"]
-                    salaire_existant.retenue_credit = resultat["retenue_credit"]
-                    salaire_existant.prime_femme_foyer = resultat["prime_femme_foyer"]
-                    salaire_existant.salaire_net = resultat["salaire_net"]
-                    salaire_existant.statut = statut
-                    
-                    action = "update"
-                    salaire_id = salaire_existant.id
-                    salaire_net = float(salaire_existant.salaire_net)
-                else:
-                    # Création
-                    nouveau_salaire = Salaire(
-                        employe_id=employe_id,
-                        annee=annee,
-                        mois=mois,
-                        jours_travailles=resultat["jours_travailles"],
-                        jours_ouvrables=resultat["jours_ouvrables"],
-                        salaire_base_proratis=resultat["salaire_base_proratis"],
-                        heures_supplementaires=resultat["heures_supplementaires"],
-                        indemnite_nuisance=resultat["indemnite_nuisance"],
-                        ifsp=resultat["ifsp"],
-                        iep=resultat["iep"],
-                        prime_encouragement=resultat["prime_encouragement"],
-                        prime_chauffeur=resultat["prime_chauffeur"],
-                        prime_nuit_agent_securite=resultat["prime_nuit_agent_securite"],
-                        prime_deplacement=resultat["prime_deplacement"],
-                        prime_objectif=resultat["prime_objectif"],
-                        prime_variable=resultat["prime_variable"],
-                        salaire_cotisable=resultat["salaire_cotisable"],
-                        retenue_securite_sociale=resultat["retenue_securite_sociale"],
-                        panier=resultat["panier"],
-                        prime_transport=resultat["prime_transport"],
-                        salaire_imposable=resultat["salaire_imposable"],
-                        irg=resultat["irg"],
-                        total_avances=resultat["total_avances"],
-                        retenue_credit=resultat["retenue_credit"],
-                        prime_femme_foyer=resultat["prime_femme_foyer"],
-                        salaire_net=resultat["salaire_net"],
-                        statut=statut
-                    )
-                    db.add(nouveau_salaire)
-                    action = "create"
-                    salaire_id = None
-                    salaire_net = float(resultat["salaire_net"])
-                
-                resultats["succes"] += 1
-                resultats["details"].append({
-                    "employe_id": employe_id,
-                    "status": "ok",
-                    "action": action,
-                    "salaire_net": salaire_net
-                })
-                
-            except Exception as e:
-                resultats["erreurs"] += 1
-                resultats["details"].append({
-                    "employe_id": employe_id,
-                    "status": "erreur",
-                    "message": str(e)
-                })
-        
-        # COMMIT FINAL pour toutes les opérations
-        db.commit()
-        
-        return resultats
+        return _sauvegarder_salaires_batch(db, annee, mois, employe_ids, statut)
         
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erreur batch: {str(e)}")
 
 
+@traitement_job("salaires.sauvegarde_batch")
+def _job_sauvegarde_batch(db: Session, parametres: dict, contexte):
+    resultats = _sauvegarder_salaires_batch(
+        db,
+        parametres["annee"],
+        parametres["mois"],
+        parametres.get("employe_ids"),
+        parametres.get("statut", "validé"),
+        contexte.progression
+    )
+    return {
+        "contenu": json.dumps(resultats, ensure_ascii=False, default=str).encode("utf-8"),
+        "nom_fichier": f"sauvegarde_salaires_{parametres['mois']:02d}_{parametres['annee']}.json",
+        "media_type": "application/json",
+        "message": f"{resultats['succes']} salaire(s) enregistré(s), {resultats['erreurs']} erreur(s)"
+    }
+
+
+@router.post("/sauvegarder-batch/{annee}/{mois}/job", status_code=202)
+def soumettre_sauvegarde_batch(
+    annee: int,
+    mois: int,
+    employe_ids: Optional[List[int]] = None,
+    statut: str = "validé",
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Sauvegarde batch des salaires en arrière-plan (suivi via /api/jobs/{id})
+    Annulation: aucun salaire n'est enregistré (commit unique en fin de job)
+    """
+    job = job_queue.soumettre(
+        db,
+        "salaires.sauvegarde_batch",
+        {"annee": annee, "mois": mois, "employe_ids": employe_ids, "statut": statut},
+        user_id=current_user.id
+    )
+    return job.to_dict()
+
+
 @router.put("/{salaire_id}/statut")
 def update_statut_salaire(
     salaire_id: int,
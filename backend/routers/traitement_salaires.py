@@ -3,10 +3,10 @@ API Router pour le nouveau module Traitement Salaires v3.0
 Remplace edition_salaires.py (ancien système)
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Callable, List, Optional
 from datetime import date, datetime
 from decimal import Decimal
 from io import BytesIO
@@ -14,9 +14,13 @@ import openpyxl
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 
 from database import get_db
-from services.salary_processor import SalaireProcessor
+from services.salary_processor import SalaireProcessor, entete_provenance
+from services.registre_credits import RegistreCredits
 from services.pdf_generator import PDFGenerator
-from models import Salaire, Employe, Avance, Credit, StatutCredit, RetenueCredit
+from services.job_queue import job_queue, traitement_job
+from services.pdf_cache import reponse_pdf
+from models import Salaire, Employe, Avance, User
+from middleware.auth import get_current_user
 from sqlalchemy import inspect
 
 router = APIRouter(prefix="/traitement-salaires", tags=["Traitement Salaires v3.0"])
@@ -27,56 +31,57 @@ SALAIRE_COLUMNS = {c.key for c in inspect(Salaire).mapper.column_attrs}
 
 # ⭐ v3.6.1: Fonctions helper pour suivi des déductions
 
-def _enregistrer_retenues_credits(db: Session, employe_id: int, annee: int, mois: int, resultat: dict):
+def _enregistrer_retenues_credits(
+    db: Session,
+    employe_id: int,
+    annee: int,
+    mois: int,
+    resultat: dict,
+    registre: Optional[RegistreCredits] = None
+):
     """
     Enregistrer les retenues de crédits dans la table retenues_credit
-    Met à jour montant_retenu et statut du crédit
+    Met à jour montant_retenu et statut du crédit (écritures au prochain flush)
+    
+    registre: registre du mois préchargé (validation de tout le mois)
     """
-    # Récupérer tous les crédits EN_COURS de l'employé
-    credits_actifs = db.query(Credit).filter(
-        Credit.employe_id == employe_id,
-        Credit.statut == StatutCredit.EN_COURS
-    ).all()
-    
-    for credit in credits_actifs:
-        # Vérifier si une retenue existe déjà pour ce mois
-        retenue_existante = db.query(RetenueCredit).filter(
-            RetenueCredit.credit_id == credit.id,
-            RetenueCredit.mois == mois,
-            RetenueCredit.annee == annee
-        ).first()
-        
-        if not retenue_existante:
-            # Créer la retenue
-            retenue = RetenueCredit(
-                credit_id=credit.id,
-                mois=mois,
-                annee=annee,
-                montant=credit.montant_mensualite,
-                date_retenue=date.today()
-            )
-            db.add(retenue)
-            
-            # Mettre à jour le cumul
-            credit.montant_retenu = Decimal(str(credit.montant_retenu or 0)) + Decimal(str(credit.montant_mensualite))
-            
-            # Vérifier si le crédit est soldé
-            if credit.montant_retenu >= credit.montant_total:
-                credit.statut = StatutCredit.SOLDE
+    if registre is None:
+        registre = RegistreCredits.charger(db, annee, mois, [employe_id])
+    registre.enregistrer_retenues(employe_id)
 
 
-def _marquer_avances_deduites(db: Session, employe_id: int, annee: int, mois: int):
-    """
-    Marquer les avances comme déduites pour le mois donné
-    """
-    avances = db.query(Avance).filter(
-        Avance.employe_id == employe_id,
+def _avances_a_deduire(db: Session, annee: int, mois: int, employe_ids: Optional[List[int]] = None) -> dict:
+    """Avances du mois non encore déduites, indexées par employé (une requête)"""
+    query = db.query(Avance).filter(
         Avance.annee_deduction == annee,
         Avance.mois_deduction == mois,
         Avance.deduit == False
-    ).all()
+    )
+    if employe_ids is not None:
+        query = query.filter(Avance.employe_id.in_(employe_ids))
+    
+    avances = {}
+    for avance in query.all():
+        avances.setdefault(avance.employe_id, []).append(avance)
+    return avances
+
+
+def _marquer_avances_deduites(
+    db: Session,
+    employe_id: int,
+    annee: int,
+    mois: int,
+    avances_mois: Optional[dict] = None
+):
+    """
+    Marquer les avances comme déduites pour le mois donné
+    
+    avances_mois: avances du mois préchargées par _avances_a_deduire
+    """
+    if avances_mois is None:
+        avances_mois = _avances_a_deduire(db, annee, mois, [employe_id])
     
-    for avance in avances:
+    for avance in avances_mois.get(employe_id, []):
         avance.deduit = True
         avance.date_deduction = date.today()
 
@@ -191,6 +196,7 @@ def valider_salaire_employe(
         
         salaire_existant.statut = "valide"
         salaire_existant.date_paiement = date.today()
+        salaire_existant.calcule_le = datetime.now()
         
     else:
         # Créer nouveau salaire - ne garder que les colonnes valides
@@ -199,6 +205,7 @@ def valider_salaire_employe(
         salaire_existant = Salaire(**salaire_data)
         salaire_existant.statut = "valide"
         salaire_existant.date_paiement = date.today()
+        salaire_existant.calcule_le = datetime.now()
         db.add(salaire_existant)
     
     # 3. Commit
@@ -237,6 +244,19 @@ def valider_tous_salaires(
     error_count = 0
     errors = []
     
+    # Salaires déjà enregistrés pour le mois (une seule requête)
+    salaires_existants = {
+        s.employe_id: s for s in db.query(Salaire).filter(
+            Salaire.annee == annee,
+            Salaire.mois == mois
+        ).all()
+    }
+    
+    # Crédits (prorogations, retenues) et avances du mois préchargés:
+    # nombre de requêtes constant, écritures envoyées au commit final
+    registre_credits = RegistreCredits.charger(db, annee, mois)
+    avances_mois = _avances_a_deduire(db, annee, mois)
+    
     for resultat in resultats:
         if resultat.get("status") == "ERROR":
             error_count += 1
@@ -251,11 +271,7 @@ def valider_tous_salaires(
             employe_id = resultat["employe_id"]
             
             # Vérifier existence
-            salaire_existant = db.query(Salaire).filter(
-                Salaire.employe_id == employe_id,
-                Salaire.annee == annee,
-                Salaire.mois == mois
-            ).first()
+            salaire_existant = salaires_existants.get(employe_id)
             
             if salaire_existant:
                 # Mettre à jour avec colonnes valides uniquement
@@ -264,19 +280,21 @@ def valider_tous_salaires(
                         setattr(salaire_existant, key, value)
                 salaire_existant.statut = "valide"
                 salaire_existant.date_paiement = date.today()
+                salaire_existant.calcule_le = datetime.now()
             else:
                 # Créer avec colonnes valides uniquement
                 salaire_data = {k: v for k, v in resultat.items() if k in SALAIRE_COLUMNS}
                 salaire_existant = Salaire(**salaire_data)
                 salaire_existant.statut = "valide"
                 salaire_existant.date_paiement = date.today()
+                salaire_existant.calcule_le = datetime.now()
                 db.add(salaire_existant)
             
             # ⭐ v3.6.1: Enregistrer les retenues de crédits
-            _enregistrer_retenues_credits(db, employe_id, annee, mois, resultat)
+            _enregistrer_retenues_credits(db, employe_id, annee, mois, resultat, registre_credits)
             
             # ⭐ v3.6.1: Marquer les avances comme déduites
-            _marquer_avances_deduites(db, employe_id, annee, mois)
+            _marquer_avances_deduites(db, employe_id, annee, mois, avances_mois)
             
             success_count += 1
             
@@ -477,13 +495,15 @@ def get_statistiques(
 
 @router.get("/rapport-pdf")
 def generer_rapport_pdf(
+    request: Request,
     annee: int = Query(..., ge=2000, le=2100),
     mois: int = Query(..., ge=1, le=12),
     db: Session = Depends(get_db)
 ):
     """Générer rapport récapitulatif PDF des salaires du mois"""
+    # Lignes validées servies depuis la table salaires, recalcul des seules entrées modifiées
     processor = SalaireProcessor(db)
-    resultats = processor.calculer_tous_salaires(annee, mois)
+    resultats = processor.resultats_mois(annee, mois)
     
     # Filtrer uniquement les succès
     resultats_ok = [r for r in resultats if r.get("status") == "OK"]
@@ -491,15 +511,18 @@ def generer_rapport_pdf(
     if not resultats_ok:
         raise HTTPException(status_code=404, detail="Aucun salaire calculé pour cette période")
     
-    # Générer PDF
-    pdf_gen = PDFGenerator(db)
-    pdf_buffer = pdf_gen.generate_rapport_salaires(resultats_ok, {"annee": annee, "mois": mois})
-    
-    return StreamingResponse(
-        BytesIO(pdf_buffer.getvalue()),
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=rapport_salaires_{mois}_{annee}.pdf"}
+    # Générer PDF (servi depuis le cache si les salaires calculés n'ont pas changé)
+    periode = {"annee": annee, "mois": mois}
+    reponse = reponse_pdf(
+        request,
+        "rapport_salaires",
+        {"resultats": resultats_ok, "periode": periode},
+        lambda: PDFGenerator(db).generate_rapport_salaires(resultats_ok, periode),
+        f"rapport_salaires_{mois}_{annee}.pdf",
+        tags=[f"periode:{annee}:{mois}", "employes", "credits", "parametres_salaire"]
     )
+    reponse.headers["X-Provenance-Salaires"] = entete_provenance(resultats_ok)
+    return reponse
 
 
 @router.get("/rapport-excel")
@@ -509,8 +532,9 @@ def generer_rapport_excel(
     db: Session = Depends(get_db)
 ):
     """Générer rapport récapitulatif Excel des salaires du mois"""
+    # Lignes validées servies depuis la table salaires, recalcul des seules entrées modifiées
     processor = SalaireProcessor(db)
-    resultats = processor.calculer_tous_salaires(annee, mois)
+    resultats = processor.resultats_mois(annee, mois)
     
     # Filtrer uniquement les succès
     resultats_ok = [r for r in resultats if r.get("status") == "OK"]
@@ -577,37 +601,48 @@ def generer_rapport_excel(
     return StreamingResponse(
         buffer,
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename=rapport_salaires_{mois}_{annee}.xlsx"}
+        headers={
+            "Content-Disposition": f"attachment; filename=rapport_salaires_{mois}_{annee}.xlsx",
+            "X-Provenance-Salaires": entete_provenance(resultats_ok)
+        }
     )
 
 
-@router.post("/bulletins")
-def generer_bulletins_paie(
-    data: dict,
-    db: Session = Depends(get_db)
-):
-    """Générer les bulletins de paie pour les employés sélectionnés"""
-    annee = data.get("annee")
-    mois = data.get("mois")
-    employe_ids = data.get("employe_ids", [])
-    
+def _generer_bulletins_pdf(
+    db: Session,
+    annee: int,
+    mois: int,
+    employe_ids: List[int],
+    progression: Optional[Callable] = None
+) -> BytesIO:
+    """Calculer les salaires des employés sélectionnés et générer le PDF combiné"""
     if not employe_ids:
         raise HTTPException(status_code=400, detail="Aucun employé sélectionné")
     
     processor = SalaireProcessor(db)
     pdf_gen = PDFGenerator(db)
     
+    # Infos employés en une requête
+    employes = {
+        e.id: e for e in db.query(Employe).filter(Employe.id.in_(employe_ids)).all()
+    }
+    
     bulletins_data = []
     
-    for employe_id in employe_ids:
+    # Progression: calcul de chaque employé puis rendu de chaque bulletin
+    # (total estimé à 2 étapes par employé jusqu'à connaître les bulletins à rendre)
+    nombre = len(employe_ids)
+    for index, employe_id in enumerate(employe_ids, 1):
+        if progression:
+            progression(index - 1, 2 * nombre)
+        
         # Calculer salaire
         resultat = processor.calculer_salaire_employe(employe_id, annee, mois)
         
         if resultat.get("status") != "OK":
             continue
         
-        # Récupérer infos employé
-        employe = db.query(Employe).filter(Employe.id == employe_id).first()
+        employe = employes.get(employe_id)
         if not employe:
             continue
         
@@ -629,11 +664,30 @@ def generer_bulletins_paie(
     if not bulletins_data:
         raise HTTPException(status_code=404, detail="Aucun bulletin généré")
     
-    # Générer PDF combiné
-    pdf_buffer = pdf_gen.generate_tous_bulletins_combines(
+    rendu = None
+    if progression:
+        total = nombre + len(bulletins_data)
+        progression(nombre, total)
+        rendu = lambda rendus, _: progression(nombre + rendus, total)
+    
+    # Générer PDF combiné (progression et annulation entre les lots de rendu)
+    return pdf_gen.generate_tous_bulletins_combines(
         bulletins_data,
-        {"annee": annee, "mois": mois}
+        {"annee": annee, "mois": mois},
+        progression=rendu
     )
+
+
+@router.post("/bulletins")
+def generer_bulletins_paie(
+    data: dict,
+    db: Session = Depends(get_db)
+):
+    """Générer les bulletins de paie pour les employés sélectionnés"""
+    annee = data.get("annee")
+    mois = data.get("mois")
+    
+    pdf_buffer = _generer_bulletins_pdf(db, annee, mois, data.get("employe_ids", []))
     
     return StreamingResponse(
         BytesIO(pdf_buffer.getvalue()),
@@ -642,15 +696,56 @@ def generer_bulletins_paie(
     )
 
 
+@traitement_job("traitement_salaires.bulletins")
+def _job_bulletins(db: Session, parametres: dict, contexte):
+    annee = parametres.get("annee")
+    mois = parametres.get("mois")
+    pdf_buffer = _generer_bulletins_pdf(db, annee, mois, parametres.get("employe_ids", []), contexte.progression)
+    return {
+        "contenu": pdf_buffer.getvalue(),
+        "nom_fichier": f"bulletins_paie_{mois}_{annee}.pdf",
+        "media_type": "application/pdf"
+    }
+
+
+@router.post("/bulletins/job", status_code=202)
+def soumettre_bulletins_paie(
+    data: dict,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Générer les bulletins des employés sélectionnés en arrière-plan
+    Suivi: GET /api/jobs/{id}, résultat: GET /api/jobs/{id}/telecharger
+    """
+    if not data.get("employe_ids"):
+        raise HTTPException(status_code=400, detail="Aucun employé sélectionné")
+    
+    job = job_queue.soumettre(db, "traitement_salaires.bulletins", {
+        "annee": data.get("annee"),
+        "mois": data.get("mois"),
+        "employe_ids": data.get("employe_ids")
+    }, user_id=current_user.id)
+    return job.to_dict()
+
+
 @router.get("/g29")
 def generer_g29(
     annee: int = Query(..., ge=2000, le=2100),
     mois: int = Query(..., ge=1, le=12),
     db: Session = Depends(get_db)
 ):
-    """Générer fichier G29 (CNAS) format Excel"""
+    """
+    Générer fichier G29 (CNAS) format Excel
+    
+    Une ligne par employé du mois, comme les autres rapports: salaire validé
+    s'il est à jour, recalculé si ses entrées ont changé depuis, calculé pour
+    les employés sans salaire validé. Les numéros de sécurité sociale sont
+    lus en une requête sur les employés du rapport (pas d'AgregatG29: ses
+    sommes ne couvrent que les salaires enregistrés).
+    """
     processor = SalaireProcessor(db)
-    resultats = processor.calculer_tous_salaires(annee, mois)
+    resultats = processor.resultats_mois(annee, mois)
     
     # Filtrer uniquement les succès
     resultats_ok = [r for r in resultats if r.get("status") == "OK"]
@@ -658,6 +753,10 @@ def generer_g29(
     if not resultats_ok:
         raise HTTPException(status_code=404, detail="Aucun salaire calculé pour cette période")
     
+    numeros_secu = dict(db.query(Employe.id, Employe.numero_secu_sociale).filter(
+        Employe.id.in_([r["employe_id"] for r in resultats_ok])
+    ))
+    
     # Créer workbook Excel format G29
     wb = openpyxl.Workbook()
     ws = wb.active
@@ -670,11 +769,8 @@ def generer_g29(
     
     # Données
     for idx, r in enumerate(resultats_ok, 1):
-        # Récupérer employé
-        employe = db.query(Employe).filter(Employe.id == r["employe_id"]).first()
-        
         ws.cell(row=idx+1, column=1, value=idx)
-        ws.cell(row=idx+1, column=2, value=employe.numero_secu_sociale if employe else "")
+        ws.cell(row=idx+1, column=2, value=numeros_secu.get(r["employe_id"]) or "")
         ws.cell(row=idx+1, column=3, value=r["employe_nom"])
         ws.cell(row=idx+1, column=4, value=r["employe_prenom"])
         ws.cell(row=idx+1, column=5, value=float(r["salaire_cotisable"])).number_format = '#,##0.00'
@@ -702,5 +798,8 @@ def generer_g29(
     return StreamingResponse(
         buffer,
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename=G29_{mois}_{annee}.xlsx"}
+        headers={
+            "Content-Disposition": f"attachment; filename=G29_{mois}_{annee}.xlsx",
+            "X-Provenance-Salaires": entete_provenance(resultats_ok)
+        }
     )
@@ -35,6 +35,7 @@ from .mission import (
     MissionResponse,
     MissionListResponse,
     MissionPrimeMensuelle,
+    MissionRecalculPrimes,
     ParametreBase,
     ParametreCreate,
     ParametreUpdate,
@@ -74,6 +75,7 @@ from .attendance_schemas import (
     AttendanceSyncLogResponse,
     AttendanceImportConflictResponse,
     ConflictResolution,
+    ConflictBatchResolution,
     AttendanceImportRequest,
     AttendanceImportSummary,
     EmployeeSyncRequest,
@@ -90,6 +92,7 @@ from .import_preview import (
     MatchMethod,
     ImportPreviewStats,
     ImportPreviewResponse,
+    ImportPreviewPage,
     ImportConfirmRequest,
 )
 from .parametres_salaire import (
@@ -134,6 +137,7 @@ __all__ = [
     "MissionResponse",
     "MissionListResponse",
     "MissionPrimeMensuelle",
+    "MissionRecalculPrimes",
     "ParametreBase",
     "ParametreCreate",
     "ParametreUpdate",
@@ -165,6 +169,7 @@ __all__ = [
     "AttendanceSyncLogResponse",
     "AttendanceImportConflictResponse",
     "ConflictResolution",
+    "ConflictBatchResolution",
     "AttendanceImportRequest",
     "AttendanceImportSummary",
     "EmployeeSyncRequest",
@@ -177,6 +182,7 @@ __all__ = [
     "MatchMethod",
     "ImportPreviewStats",
     "ImportPreviewResponse",
+    "ImportPreviewPage",
     "ImportConfirmRequest",
     "ParametresSalaireBase",
     "ParametresSalaireCreate",
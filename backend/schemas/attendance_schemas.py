@@ -80,11 +80,19 @@ class ConflictResolution(BaseModel):
     resolution: str = Field(..., description="'keep_hr' or 'use_attendance'")
     resolved_by: str = Field(..., description="Username of resolver")
 
+class ConflictBatchResolution(ConflictResolution):
+    """Resolve all pending conflicts matching the filters (all pending conflicts without filter)"""
+    conflict_ids: Optional[List[int]] = None
+    employee_id: Optional[int] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
 # Import Request/Response
 class AttendanceImportRequest(BaseModel):
     start_date: date
     end_date: date
     employee_id: Optional[int] = None
+    full_resync: bool = False  # Ignore the high-water mark and fetch the whole range
 
 class AttendanceImportSummary(BaseModel):
     total_logs: int
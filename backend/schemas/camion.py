@@ -69,6 +69,8 @@ class CamionResponse(CamionBase):
     """Schéma de réponse pour un camion"""
     id: int
     nombre_missions: int = Field(0, description="Nombre de missions effectuées avec ce camion")
+    derniere_mission: Optional[date] = Field(None, description="Date de la dernière mission")
+    km_total: float = Field(0, description="Distance totale parcourue en missions (km)")
     
     class Config:
         from_attributes = True
@@ -79,6 +79,16 @@ class ImportPreviewResponse(BaseModel):
     session_id: str
     items: List[LogPreviewItem]
     stats: ImportPreviewStats
+    total_items: Optional[int] = None  # All items of the session (items may be the first page only)
+
+class ImportPreviewPage(BaseModel):
+    """One page of a stored preview session"""
+    session_id: str
+    skip: int
+    limit: Optional[int] = None
+    total: int  # Items matching the status filter
+    items: List[LogPreviewItem]
+    stats: ImportPreviewStats
     
 class ImportConfirmRequest(BaseModel):
     """Request to confirm and execute import"""
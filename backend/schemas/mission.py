@@ -62,8 +62,9 @@ class MissionResponse(MissionBase):
         from_attributes = True
 
 class MissionListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None  # Absent des pages demandées par curseur
     missions: list[MissionResponse]
+    curseur_suivant: Optional[str] = None  # None: dernière page
 
 class MissionPrimeMensuelle(BaseModel):
     chauffeur_id: int
@@ -72,6 +73,12 @@ class MissionPrimeMensuelle(BaseModel):
     total_prime: Decimal
     nombre_missions: int
 
+class MissionRecalculPrimes(BaseModel):
+    date_debut: Optional[date] = None
+    date_fin: Optional[date] = None
+    chauffeur_id: Optional[int] = None
+    simulation: bool = False  # Écart calculé sans rien écrire
+
 class ParametreBase(BaseModel):
     cle: str
     valeur: str
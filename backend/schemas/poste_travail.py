@@ -1,12 +1,15 @@
 from pydantic import BaseModel, Field
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, time
 
 class PosteTravailBase(BaseModel):
     libelle: str = Field(..., min_length=1, max_length=100, description="Nom du poste")
     est_chauffeur: bool = Field(False, description="Indique si le poste est chauffeur")
     modifiable: bool = Field(True, description="Indique si le poste peut être modifié/supprimé")
     actif: bool = Field(True, description="Statut actif/inactif (soft delete)")
+    heure_debut: Optional[time] = Field(None, description="Début de l'horaire type (défaut 08:00)")
+    heure_fin: Optional[time] = Field(None, description="Fin de l'horaire type (défaut 17:00, avant le début = poste de nuit)")
+    heures_journee: Optional[int] = Field(None, ge=1, le=24, description="Heures d'une journée complète (défaut 8)")
 
 class PosteTravailCreate(PosteTravailBase):
     pass
@@ -16,6 +19,9 @@ class PosteTravailUpdate(BaseModel):
     est_chauffeur: Optional[bool] = None
     modifiable: Optional[bool] = None
     actif: Optional[bool] = None
+    heure_debut: Optional[time] = None
+    heure_fin: Optional[time] = None
+    heures_journee: Optional[int] = Field(None, ge=1, le=24)
 
 class PosteTravailResponse(PosteTravailBase):
     id: int
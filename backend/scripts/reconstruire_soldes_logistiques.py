@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Reconstruction des soldes logistiques matérialisés (table client_logistics_balance)
+
+A lancer une fois après la migration add_client_logistics_balance.sql, puis
+seulement si des mouvements ont été modifiés hors de l'application.
+"""
+
+import sys
+sys.path.insert(0, '/opt/ay-hr/backend')
+
+from database import SessionLocal
+from services.soldes_logistiques import reconstruire_soldes_logistiques
+
+def main():
+    print("🔄 Reconstruction des soldes logistiques clients")
+    print("="*60)
+    
+    db = SessionLocal()
+    
+    try:
+        soldes = reconstruire_soldes_logistiques(db)
+        db.commit()
+        
+        print(f"✅ TERMINÉ! {soldes} soldes (client, type) écrits")
+        
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ import sys
 sys.path.insert(0, '/opt/ay-hr/backend')
 
 from database import SessionLocal
-from services.conges_calculator import recalculer_conges_periode
+from services.conges_calculator import recalculer_conges_periode, reconstruire_soldes
 
 def main():
     print("🔄 Régénération de TOUS les congés pour 2025")
@@ -23,7 +23,8 @@ def main():
         for mois in range(1, 13):  # Janvier à Décembre
             print(f"\n📅 Mois {mois:02d}/2025...")
             
-            result = recalculer_conges_periode(db, 2025, mois)
+            # Soldes cumulés reconstruits une seule fois à la fin
+            result = recalculer_conges_periode(db, 2025, mois, reconstruire=False)
             
             total_recalcules += result.get('recalcules', 0)
             total_erreurs += result.get('erreurs', 0)
@@ -36,10 +37,14 @@ def main():
                     if detail.get('status') == 'erreur':
                         print(f"      ⚠️  Employé {detail['employe_id']}: {detail.get('message')}")
         
+        soldes_corriges = reconstruire_soldes(db)
+        db.commit()
+        
         print("\n" + "="*60)
         print(f"✅ TERMINÉ!")
         print(f"   Total congés régénérés: {total_recalcules}")
         print(f"   Total erreurs: {total_erreurs}")
+        print(f"   Soldes cumulés corrigés: {soldes_corriges}")
         
     finally:
         db.close()
@@ -0,0 +1,142 @@
+"""
+Attendance System HTTP client
+
+- One pooled requests.Session shared by all clients (keep-alive, retries on
+  gateway errors for idempotent calls)
+- The attendance employee directory is downloaded once per client and
+  indexed by name: one client per sync run
+- Logs are fetched page by page (skip/limit) and can be restricted to those
+  after a high-water mark (last imported log ID / timestamp)
+"""
+
+import logging
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+ATTENDANCE_PAGE_SIZE = 1000
+POOL_SIZE = 10
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def shared_session() -> requests.Session:
+    """Process-wide pooled HTTP session (created on first use)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            retries = Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=("GET", "PUT")
+            )
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retries)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+class AttendanceClient:
+    """Client for the Attendance System API (one instance per sync run)"""
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        timeout: Optional[int] = None,
+        session: Optional[requests.Session] = None,
+        page_size: int = ATTENDANCE_PAGE_SIZE
+    ):
+        self.base_url = (base_url or settings.ATTENDANCE_API_URL).rstrip("/")
+        self.timeout = timeout or settings.ATTENDANCE_API_TIMEOUT
+        self.session = session or shared_session()
+        self.page_size = page_size
+        self._directory: Optional[List[Dict]] = None
+        self._ids_by_name: Dict[str, int] = {}
+
+    def _get(self, path: str, params: Optional[Dict] = None):
+        response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    # ============ Employees ============
+
+    def employees(self) -> List[Dict]:
+        """Attendance employee directory (downloaded once per client)"""
+        if self._directory is None:
+            self._directory = self._get("/employees/")
+            self._ids_by_name = {}
+            for employee in self._directory:
+                self._ids_by_name.setdefault(employee.get("name", "").upper(), employee["id"])
+        return self._directory
+
+    def find_employee_id(self, full_name: str) -> Optional[int]:
+        """Attendance employee ID by exact (case-insensitive) name"""
+        self.employees()
+        return self._ids_by_name.get(full_name.upper())
+
+    def update_employee(self, attendance_employee_id: int, data: Dict):
+        response = self.session.put(
+            f"{self.base_url}/employees/{attendance_employee_id}",
+            data=data,
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+    # ============ Logs ============
+
+    def iter_log_pages(
+        self,
+        start_date: date,
+        end_date: date,
+        employee_id: Optional[int] = None,
+        after_log_id: Optional[int] = None,
+        after_timestamp: Optional[datetime] = None
+    ) -> Iterator[List[Dict]]:
+        """
+        Attendance logs page by page
+
+        With a high-water mark, the requested range starts at the day of the
+        last imported log (server-side filter) and logs up to that mark are
+        dropped from each page. A range that ends before the mark's day is
+        fetched in full (earlier period, late device uploads): the sync-log
+        dedup skips what was already imported.
+        """
+        if after_timestamp is not None and after_timestamp.date() > end_date:
+            after_log_id = after_timestamp = None
+        if after_timestamp is not None and after_timestamp.date() > start_date:
+            start_date = after_timestamp.date()
+        if start_date > end_date:
+            return
+
+        skip = 0
+        while True:
+            params = {
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "skip": skip,
+                "limit": self.page_size
+            }
+            if employee_id:
+                params["employee_id"] = employee_id
+
+            page = self._get("/attendance/", params)
+            if after_log_id is not None:
+                yield [log for log in page if not isinstance(log.get("id"), int) or log["id"] > after_log_id]
+            else:
+                yield page
+
+            if len(page) < self.page_size:
+                break
+            skip += len(page)
@@ -3,47 +3,79 @@ Attendance Integration Service
 Handles synchronization between AY HR and Attendance System
 """
 
-import requests
 import logging
 from datetime import datetime, date
-from typing import List, Dict, Optional, Tuple
+from typing import Iterable, List, Dict, Optional, Set, Tuple
+from sqlalchemy import func, insert, update
 from sqlalchemy.orm import Session
 from models import (
     Employe,
-    Pointage,
     AttendanceEmployeeMapping,
     AttendanceSyncLog,
     AttendanceImportConflict,
+    AttendanceSyncState,
     SyncMethod,
     ConflictStatus,
     ConflictStatus,
     LogType,
     IncompleteAttendanceLog
 )
+from services.attendance_client import AttendanceClient
+from services.pointage_bulk import LotPointages
+from services.shift_calendar import DEFAULT_SHIFT, ShiftCalendar, ShiftTemplate
 
 logger = logging.getLogger(__name__)
 
-# Configuration
-ATTENDANCE_API_URL = "http://192.168.20.56:8000/api"
-ATTENDANCE_API_TIMEOUT = 30
-
 # Constants
 STANDARD_DAY_MINUTES = 480  # 8 hours
 MINIMUM_WORK_MINUTES = 240  # 4 hours to count as worked day
+IN_BATCH_SIZE = 500  # IDs per IN (...) clause
+
+
+def _parse_log_timestamp(value) -> datetime:
+    """Log timestamp from a datetime/date, ISO string or common Excel formats"""
+    try:
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, date):
+            return datetime.combine(value, datetime.min.time())
+        # Try ISO format first
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            # Try common Excel formats
+            try:
+                return datetime.strptime(value, "%d/%m/%Y %H:%M:%S")
+            except ValueError:
+                return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    except Exception as e:
+        raise ValueError(f"Format timestamp invalide: {value} - {str(e)}")
+
+
+def _attendance_log_id(value) -> Optional[int]:
+    """Numeric Attendance log ID, None for missing or file-generated IDs ("excel_...")"""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
 
 class AttendanceService:
     """Service for Attendance System integration"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, client: Optional[AttendanceClient] = None):
         self.db = db
-        self.api_url = ATTENDANCE_API_URL
+        # One client per service: pooled HTTP session + employee directory cached for the run
+        self.client = client or AttendanceClient()
+        self.api_url = self.client.base_url
     
     # ============ Smart Calculation ============
     
     def calculate_worked_minutes_smart(
         self, 
         log: Dict, 
-        log_date: date
+        log_date: date,
+        shift: ShiftTemplate = DEFAULT_SHIFT
     ) -> Tuple[int, str, str]:
         """
         Calcul intelligent des minutes travaillées pour logs incomplets
@@ -51,19 +83,16 @@ class AttendanceService:
         Returns:
             (worked_minutes, estimation_rule, status)
             
-        Règles:
-        - ENTRY seul: Assume EXIT à 17:00
-        - EXIT seul: Assume ENTRY à 08:00
+        Règles (horaire type du poste, défaut 08:00 - 17:00, journée de 8h):
+        - ENTRY seul: Assume EXIT à la fin du poste
+        - EXIT seul: Assume ENTRY au début du poste
         - Complet: Utilise worked_minutes de l'API
+        
+        `log_date` est la journée de travail (veille pour la sortie d'un poste de nuit).
         """
         log_type = log.get("type", "EXIT")
         worked_minutes = log.get("worked_minutes")
-        timestamp = datetime.fromisoformat(log["timestamp"])
-        
-        # Horaires par défaut (configurables)
-        DEFAULT_START_HOUR = 8  # 08:00
-        DEFAULT_END_HOUR = 17   # 17:00
-        DEFAULT_WORK_HOURS = 8  # 8 heures
+        timestamp = _parse_log_timestamp(log["timestamp"])
         
         # Cas 1: Log complet (ENTRY + EXIT)
         if worked_minutes is not None and worked_minutes > 0:
@@ -71,31 +100,31 @@ class AttendanceService:
         
         # Cas 2: ENTRY seul (pas encore d'EXIT)
         if log_type == "ENTRY":
-            assumed_exit = timestamp.replace(hour=DEFAULT_END_HOUR, minute=0, second=0)
+            assumed_exit = shift.end_on(log_date)
             
-            if timestamp.hour >= DEFAULT_END_HOUR:
-                # ENTRY après 17h → assume 8h de travail
-                minutes = DEFAULT_WORK_HOURS * 60
-                rule = f"entry_late_assume_{DEFAULT_WORK_HOURS}h"
+            if timestamp >= assumed_exit:
+                # ENTRY après la fin du poste → assume une journée complète
+                minutes = shift.day_hours * 60
+                rule = f"entry_late_assume_{shift.day_hours}h"
             else:
-                # ENTRY avant 17h → calcule jusqu'à 17h
+                # ENTRY avant la fin du poste → calcule jusqu'à la fin
                 minutes = int((assumed_exit - timestamp).total_seconds() / 60)
-                rule = f"entry_assume_exit_{DEFAULT_END_HOUR}h"
+                rule = f"entry_assume_exit_{shift.label(shift.end)}"
             
             return max(0, minutes), rule, "incomplete_entry"
         
         # Cas 3: EXIT seul (pas d'ENTRY)
         if log_type == "EXIT":
-            assumed_entry = timestamp.replace(hour=DEFAULT_START_HOUR, minute=0, second=0)
+            assumed_entry = shift.start_on(log_date)
             
-            if timestamp.hour <= DEFAULT_START_HOUR:
-                # EXIT avant 8h → assume 8h de travail
-                minutes = DEFAULT_WORK_HOURS * 60
-                rule = f"exit_early_assume_{DEFAULT_WORK_HOURS}h"
+            if timestamp <= assumed_entry:
+                # EXIT avant le début du poste → assume une journée complète
+                minutes = shift.day_hours * 60
+                rule = f"exit_early_assume_{shift.day_hours}h"
             else:
-                # EXIT après 8h → calcule depuis 8h
+                # EXIT après le début du poste → calcule depuis le début
                 minutes = int((timestamp - assumed_entry).total_seconds() / 60)
-                rule = f"exit_assume_entry_{DEFAULT_START_HOUR}h"
+                rule = f"exit_assume_entry_{shift.label(shift.start)}"
             
             return max(0, minutes), rule, "incomplete_exit"
         
@@ -119,21 +148,8 @@ class AttendanceService:
     def find_employee_in_attendance(self, employee: Employe) -> Optional[int]:
         """Find employee in Attendance system by name"""
         try:
-            response = requests.get(
-                f"{self.api_url}/employees/",
-                timeout=ATTENDANCE_API_TIMEOUT
-            )
-            response.raise_for_status()
-            attendance_employees = response.json()
-            
-            # Search by name match
-            full_name = f"{employee.nom} {employee.prenom}".upper()
-            for att_emp in attendance_employees:
-                att_name = att_emp.get("name", "").upper()
-                if att_name == full_name:
-                    return att_emp["id"]
-            
-            return None
+            # Search by name match (directory downloaded once per client)
+            return self.client.find_employee_id(f"{employee.nom} {employee.prenom}")
         except Exception as e:
             logger.error(f"Error finding employee in Attendance: {e}")
             return None
@@ -164,12 +180,7 @@ class AttendanceService:
                     "pin": pin
                 }
                 
-                response = requests.put(
-                    f"{self.api_url}/employees/{attendance_emp_id}",
-                    data=data,
-                    timeout=ATTENDANCE_API_TIMEOUT
-                )
-                response.raise_for_status()
+                self.client.update_employee(attendance_emp_id, data)
                 logger.info(f"Updated employee {employee.nom} in Attendance (ID: {attendance_emp_id})")
             except Exception as e:
                 logger.error(f"Error updating employee in Attendance: {e}")
@@ -227,30 +238,55 @@ class AttendanceService:
         self,
         start_date: date,
         end_date: date,
-        employee_id: Optional[int] = None
+        employee_id: Optional[int] = None,
+        sync_state: Optional[AttendanceSyncState] = None
     ) -> List[Dict]:
-        """Fetch attendance logs from Attendance system"""
+        """
+        Fetch attendance logs from Attendance system (all pages)
+
+        With a sync state, only logs after its high-water mark are returned.
+        """
         try:
-            params = {
-                "start_date": start_date.isoformat(),
-                "end_date": end_date.isoformat(),
-                "limit": 1000
-            }
-            
-            if employee_id:
-                params["employee_id"] = employee_id
-            
-            response = requests.get(
-                f"{self.api_url}/attendance/",
-                params=params,
-                timeout=ATTENDANCE_API_TIMEOUT
-            )
-            response.raise_for_status()
-            return response.json()
+            logs = []
+            for page in self.client.iter_log_pages(
+                start_date,
+                end_date,
+                employee_id,
+                after_log_id=sync_state.last_log_id if sync_state else None,
+                after_timestamp=sync_state.last_log_timestamp if sync_state else None
+            ):
+                logs.extend(page)
+            return logs
         except Exception as e:
             logger.error(f"Error fetching attendance logs: {e}")
             return []
     
+    def get_sync_state(self, employee_id: Optional[int] = None) -> AttendanceSyncState:
+        """High-water mark of the pull sync (all employees, or one Attendance employee)"""
+        scope = f"logs:employee:{employee_id}" if employee_id else "logs"
+        state = self.db.query(AttendanceSyncState).filter(AttendanceSyncState.scope == scope).first()
+        if not state:
+            state = AttendanceSyncState(scope=scope)
+            self.db.add(state)
+        return state
+    
+    def advance_sync_state(self, state: AttendanceSyncState, logs: List[Dict]):
+        """Move the high-water mark to the newest numeric log ID fetched"""
+        for log in logs:
+            log_id = _attendance_log_id(log.get("id"))
+            if log_id is None or (state.last_log_id is not None and log_id <= state.last_log_id):
+                continue
+            state.last_log_id = log_id
+            try:
+                state.last_log_timestamp = _parse_log_timestamp(log.get("timestamp"))
+            except ValueError:
+                pass
+    
+    @staticmethod
+    def _range_reaches_mark(state: AttendanceSyncState, end_date: date) -> bool:
+        """Whether a range ending on end_date reaches the high-water mark (or there is none yet)"""
+        return state.last_log_timestamp is None or state.last_log_timestamp.date() <= end_date
+    
     def convert_minutes_to_pointage(self, worked_minutes: int) -> Tuple[int, float]:
         """
         Convert worked minutes to pointage status and overtime hours
@@ -270,19 +306,69 @@ class AttendanceService:
         self,
         start_date: date,
         end_date: date,
-        employee_id: Optional[int] = None
+        employee_id: Optional[int] = None,
+        full_resync: bool = False
     ) -> Dict:
         """
         Import attendance logs and update pointage grid
         Returns summary: {imported, skipped, conflicts}
+
+        Incremental: when the range reaches the persisted high-water mark,
+        only logs after it are fetched, and the mark moves forward once they
+        are processed. A range ending before the mark's day (earlier period,
+        late device uploads) is fetched in full like full_resync and does
+        not move the mark; the sync-log dedup skips logs already imported.
+        full_resync fetches the whole range again (e.g. after adding
+        mappings for logs that were skipped).
+        """
+        state = self.get_sync_state(employee_id)
+        reaches_mark = self._range_reaches_mark(state, end_date)
+        logs = self.fetch_attendance_logs(
+            start_date, end_date, employee_id,
+            sync_state=state if reaches_mark and not full_resync else None
+        )
+        summary, written = self._process_attendance_batch(logs)
+        
+        # A batch whose write failed is fetched again next time
+        if reaches_mark and written:
+            self.advance_sync_state(state, logs)
+        self.db.commit()
+        return summary
+
+    def process_attendance_log_chunks(self, chunks: Iterable[List[Dict]]) -> Dict:
+        """
+        Process logs chunk by chunk (streamed file import) into one summary
+
+        Each chunk goes through process_attendance_logs() and is committed
+        before the next one is read, so duplicates across chunks are caught
+        by the sync-log dedup.
         """
-        logs = self.fetch_attendance_logs(start_date, end_date, employee_id)
-        return self.process_attendance_logs(logs)
+        summary = None
+        for logs in chunks:
+            chunk_summary = self.process_attendance_logs(logs)
+            if summary is None:
+                summary = chunk_summary
+            else:
+                for key, value in chunk_summary.items():
+                    summary[key] += value
+        return summary if summary is not None else self.process_attendance_logs([])
 
     def process_attendance_logs(self, logs: List[Dict]) -> Dict:
         """
         Process a list of attendance logs (from API or File)
+
+        Bulk path: sync-log dedup, mappings and employees are prefetched with
+        one query each, day updates are grouped per (employee, year, month)
+        and written with one upsert, then congés are recalculated once per
+        affected employee-month. The batch is committed as a whole: if the
+        write fails (e.g. a sync log inserted meanwhile by another import),
+        it is rolled back and reported in summary["errors"].
         """
+        summary, _ = self._process_attendance_batch(logs)
+        return summary
+    
+    def _process_attendance_batch(self, logs: List[Dict]) -> Tuple[Dict, bool]:
+        """process_attendance_logs() body, also telling whether the batch was written"""
         summary = {
             "total_logs": len(logs),
             "imported": 0,
@@ -294,88 +380,77 @@ class AttendanceService:
             "details": []
         }
         
+        # ===== 1. Parse timestamps (no query) =====
+        parsed = []
         for log in logs:
-            log_id = log.get("id", "unknown")
-            emp_name = "Inconnu"
-            
             try:
                 # Validate log structure
                 if "timestamp" not in log:
                     raise ValueError("Log manque le champ 'timestamp'")
-                
-                attendance_log_id = log.get("id")
-                attendance_emp_id = log.get("employee_id")
+                parsed.append((log, _parse_log_timestamp(log["timestamp"])))
+            except ValueError as e:
+                parsed.append((log, e))
+        
+        # ===== 2. Prefetch sync logs, mappings and employees =====
+        valid = [(log, ts) for log, ts in parsed if isinstance(ts, datetime)]
+        synced_ids = set(self._sync_log_ids_by_attendance_id(
+            {_attendance_log_id(log.get("id")) or int(ts.timestamp()) for log, ts in valid}
+        ))
+        mappings = self._mappings_by_attendance_id(
+            {log.get("employee_id") for log, _ in valid if log.get("employee_id")}
+        )
+        employees, employees_by_name = self._employee_index()
+        shifts = ShiftCalendar.load(self.db)
+        
+        # ===== 3. Resolve employees, load affected pointages =====
+        resolved = []
+        for log, log_timestamp in parsed:
+            if not isinstance(log_timestamp, datetime):
+                resolved.append((log, log_timestamp, None))
+                continue
+            
+            # 1. Try by Attendance ID mapping, 2. by Name (for Excel import)
+            hr_emp_id = mappings.get(log.get("employee_id")) if log.get("employee_id") else None
+            if hr_emp_id not in employees:
                 emp_name_from_log = log.get("employee_name")
-                
-                # Parse timestamp
-                try:
-                    if isinstance(log["timestamp"], (datetime, date)):
-                        log_timestamp = log["timestamp"]
-                        if isinstance(log_timestamp, date) and not isinstance(log_timestamp, datetime):
-                             log_timestamp = datetime.combine(log_timestamp, datetime.min.time())
-                    else:
-                        # Try ISO format first
-                        try:
-                            log_timestamp = datetime.fromisoformat(log["timestamp"])
-                        except ValueError:
-                            # Try common Excel formats
-                            try:
-                                log_timestamp = datetime.strptime(log["timestamp"], "%d/%m/%Y %H:%M:%S")
-                            except ValueError:
-                                log_timestamp = datetime.strptime(log["timestamp"], "%Y-%m-%d %H:%M:%S")
-                except Exception as e:
-                    raise ValueError(f"Format timestamp invalide: {log.get('timestamp')} - {str(e)}")
-                
-                log_date = log_timestamp.date()
-                log_type = log.get("type", "EXIT")
+                hr_emp_id = employees_by_name.get(emp_name_from_log.upper().strip()) if emp_name_from_log else None
+            resolved.append((log, log_timestamp, hr_emp_id))
+        
+        # Work day of each log (night shifts: early-morning punches go to the day before)
+        work_dates = [
+            shifts.for_employee(hr_emp_id).work_date(ts) if hr_emp_id else None
+            for _, ts, hr_emp_id in resolved
+        ]
+        
+        lot = LotPointages(self.db)
+        lot.charger(
+            (hr_emp_id, d.year, d.month) for (_, _, hr_emp_id), d in zip(resolved, work_dates) if hr_emp_id
+        )
+        
+        # ===== 4. Apply logs in order (in memory) =====
+        sync_rows = []
+        conflict_rows = []
+        incomplete_rows = []
+        for (log, log_timestamp, hr_emp_id), work_date in zip(resolved, work_dates):
+            log_id = log.get("id", "unknown")
+            emp_name = "Inconnu"
+            
+            try:
+                if isinstance(log_timestamp, Exception):
+                    raise log_timestamp
                 
                 # Check if already imported (only if ID is present)
-                if attendance_log_id:
-                    existing_sync = self.db.query(AttendanceSyncLog).filter(
-                        AttendanceSyncLog.attendance_log_id == attendance_log_id
-                    ).first()
-                    
-                    if existing_sync:
-                        summary["skipped_duplicate"] += 1
-                        continue
-                
-                # Find HR employee
-                mapping = None
-                employee = None
-                
-                # 1. Try by Attendance ID mapping
-                if attendance_emp_id:
-                    mapping = self.db.query(AttendanceEmployeeMapping).filter(
-                        AttendanceEmployeeMapping.attendance_employee_id == attendance_emp_id
-                    ).first()
-                
-                if mapping:
-                    hr_emp_id = mapping.hr_employee_id
-                    employee = self.db.query(Employe).filter(Employe.id == hr_emp_id).first()
+                attendance_log_id = _attendance_log_id(log.get("id"))
+                if attendance_log_id and attendance_log_id in synced_ids:
+                    summary["skipped_duplicate"] += 1
+                    continue
                 
-                # 2. If no mapping/employee found, try by Name (for Excel import)
-                if not employee and emp_name_from_log:
-                    # Normalize name for search (uppercase, simple spaces)
-                    search_name = emp_name_from_log.upper().strip()
-                    
-                    # Try exact match on "Nom Prenom"
-                    from sqlalchemy import func
-                    employee = self.db.query(Employe).filter(
-                        func.upper(func.concat(Employe.nom, ' ', Employe.prenom)) == search_name
-                    ).first()
-                    
-                    # Try reverse "Prenom Nom"
-                    if not employee:
-                        employee = self.db.query(Employe).filter(
-                            func.upper(func.concat(Employe.prenom, ' ', Employe.nom)) == search_name
-                        ).first()
-                        
-                    if employee:
-                        hr_emp_id = employee.id
-                        # Optional: Auto-create mapping?
-                        # For now, just use the employee found
+                attendance_emp_id = log.get("employee_id")
+                emp_name_from_log = log.get("employee_name")
+                log_date = work_date
+                log_type = log.get("type", "EXIT")
                 
-                if not employee:
+                if not hr_emp_id:
                     summary["skipped_no_mapping"] += 1
                     summary["details"].append({
                         "log_id": log_id,
@@ -385,12 +460,12 @@ class AttendanceService:
                     })
                     continue
                 
-                emp_name = f"{employee.nom} {employee.prenom}"
+                emp_name = employees[hr_emp_id]
                 
                 # ===== Smart Calculation =====
                 try:
                     worked_minutes, estimation_rule, status = self.calculate_worked_minutes_smart(
-                        log, log_date
+                        log, log_date, shifts.for_employee(hr_emp_id)
                     )
                 except Exception as calc_error:
                     raise ValueError(f"Erreur calcul minutes: {str(calc_error)}")
@@ -399,43 +474,21 @@ class AttendanceService:
                 month = log_date.month
                 day = log_date.day
                 
-                # Get or create pointage for this month
-                pointage = self.db.query(Pointage).filter(
-                    Pointage.employe_id == hr_emp_id,
-                    Pointage.annee == year,
-                    Pointage.mois == month
-                ).first()
-                
-                if not pointage:
-                    pointage = Pointage(
-                        employe_id=hr_emp_id,
-                        annee=year,
-                        mois=month,
-                        verrouille=0,
-                        heures_supplementaires=0
-                    )
-                    self.db.add(pointage)
-                    self.db.flush()
+                # Check for conflict (day already set in HR, or by a previous log of this batch)
+                existing_value = lot.get_jour(hr_emp_id, year, month, day)
                 
-                # Check for conflict (day already manually set)
-                existing_value = pointage.get_jour(day)
+                # Logs without an Attendance ID get a fake ID for tracking
+                tracking_log_id = attendance_log_id if attendance_log_id else int(log_timestamp.timestamp())
                 
                 if existing_value is not None:
-                    # Conflict: day already set in HR
-                    # Only create conflict if we have a valid attendance_log_id (from API)
-                    # For Excel import without ID, we might skip conflict tracking or generate a fake ID?
-                    # Let's generate a fake ID if missing for conflict tracking
-                    conflict_log_id = attendance_log_id if attendance_log_id else int(log_timestamp.timestamp())
-                    
-                    conflict = AttendanceImportConflict(
+                    conflict_rows.append(dict(
                         hr_employee_id=hr_emp_id,
-                        attendance_log_id=conflict_log_id,
+                        attendance_log_id=tracking_log_id,
                         conflict_date=log_date,
                         hr_existing_value=existing_value,
                         attendance_worked_minutes=worked_minutes,
                         status=ConflictStatus.PENDING
-                    )
-                    self.db.add(conflict)
+                    ))
                     summary["conflicts"] += 1
                     summary["details"].append({
                         "log_id": log_id,
@@ -443,62 +496,46 @@ class AttendanceService:
                         "message": f"Conflit: Jour {day} déjà rempli ({existing_value})",
                         "employee_name": emp_name
                     })
-                else:
-                    # No conflict, import
-                    day_status, overtime_hours = self.convert_minutes_to_pointage(worked_minutes)
-                    pointage.set_jour(day, day_status)
-                    
-                    # Add overtime to monthly total
-                    current_overtime = float(pointage.heures_supplementaires or 0)
-                    pointage.heures_supplementaires = round(current_overtime + overtime_hours, 2)
-                    
-                    # Log the import
-                    # Use fake ID if missing
-                    sync_log_id = attendance_log_id if attendance_log_id else int(log_timestamp.timestamp())
-                    
-                    # Check if sync log already exists (for Excel re-import)
-                    existing_sync_log = self.db.query(AttendanceSyncLog).filter(
-                        AttendanceSyncLog.attendance_log_id == sync_log_id
-                    ).first()
+                    continue
+                
+                # No conflict, import
+                day_status, _ = self.convert_minutes_to_pointage(worked_minutes)
+                lot.set_jour(hr_emp_id, year, month, day, day_status)
+                
+                # Log the import (once per sync log ID, e.g. Excel re-import)
+                if tracking_log_id not in synced_ids:
+                    synced_ids.add(tracking_log_id)
+                    sync_rows.append(dict(
+                        attendance_log_id=tracking_log_id,
+                        hr_employee_id=hr_emp_id,
+                        sync_date=log_date,
+                        worked_minutes=worked_minutes,
+                        overtime_minutes=max(0, worked_minutes - STANDARD_DAY_MINUTES),
+                        log_type=LogType(log_type) if log_type in ["ENTRY", "EXIT"] else LogType.EXIT
+                    ))
                     
-                    if not existing_sync_log:
-                        sync_log = AttendanceSyncLog(
-                            attendance_log_id=sync_log_id,
+                    # ===== Incomplete Log Tracking =====
+                    if status in ["incomplete_entry", "incomplete_exit"]:
+                        incomplete_rows.append(dict(
+                            attendance_log_id=tracking_log_id,
                             hr_employee_id=hr_emp_id,
-                            sync_date=log_date,
-                            worked_minutes=worked_minutes,
-                            overtime_minutes=max(0, worked_minutes - STANDARD_DAY_MINUTES),
-                            log_type=LogType(log_type) if log_type in ["ENTRY", "EXIT"] else LogType.EXIT
-                        )
-                        self.db.add(sync_log)
-                        self.db.flush()
-                        
-                        # ===== Incomplete Log Tracking =====
-                        if status in ["incomplete_entry", "incomplete_exit"]:
-                            incomplete_log = IncompleteAttendanceLog(
-                                attendance_log_id=sync_log_id,
-                                attendance_sync_log_id=sync_log.id,
-                                hr_employee_id=hr_emp_id,
-                                employee_name=emp_name,
-                                log_date=log_date,
-                                log_type=log_type,
-                                log_timestamp=log_timestamp,
-                                estimated_minutes=worked_minutes,
-                                estimation_rule=estimation_rule,
-                                status='pending'
-                            )
-                            self.db.add(incomplete_log)
-                            summary["incomplete_pending_validation"] += 1
-                            summary["details"].append({
-                                "log_id": log_id,
-                                "status": "incomplete",
-                                "message": f"Log incomplet ({log_type}) - Estimé: {worked_minutes}m - Règle: {estimation_rule}",
-                                "employee_name": emp_name
-                            })
-                        
-                    summary["imported"] += 1
+                            employee_name=emp_name,
+                            log_date=log_date,
+                            log_type=log_type,
+                            log_timestamp=log_timestamp,
+                            estimated_minutes=worked_minutes,
+                            estimation_rule=estimation_rule,
+                            status='pending'
+                        ))
+                        summary["incomplete_pending_validation"] += 1
+                        summary["details"].append({
+                            "log_id": log_id,
+                            "status": "incomplete",
+                            "message": f"Log incomplet ({log_type}) - Estimé: {worked_minutes}m - Règle: {estimation_rule}",
+                            "employee_name": emp_name
+                        })
                 
-                self.db.commit()
+                summary["imported"] += 1
                 
             except Exception as e:
                 error_msg = str(e)
@@ -510,9 +547,89 @@ class AttendanceService:
                     "message": error_msg,
                     "employee_name": emp_name
                 })
-                self.db.rollback()
         
-        return summary
+        # ===== 5. Write everything in one transaction (multi-row inserts) =====
+        try:
+            if sync_rows:
+                self.db.execute(insert(AttendanceSyncLog), sync_rows)
+            if incomplete_rows:
+                # Link incomplete logs to their sync log (unique attendance_log_id)
+                sync_log_ids = self._sync_log_ids_by_attendance_id({row["attendance_log_id"] for row in incomplete_rows})
+                for row in incomplete_rows:
+                    row["attendance_sync_log_id"] = sync_log_ids.get(row["attendance_log_id"])
+                self.db.execute(insert(IncompleteAttendanceLog), incomplete_rows)
+            if conflict_rows:
+                self.db.execute(insert(AttendanceImportConflict), conflict_rows)
+            lot.ecrire()
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error writing attendance batch ({len(logs)} logs): {e}")
+            self._report_batch_failure(summary, e)
+            return summary, False
+        
+        # Congés recalculated once per affected employee-month
+        lot.recalculer_conges()
+        
+        return summary, True
+    
+    @staticmethod
+    def _report_batch_failure(summary: Dict, error: Exception):
+        """Logs counted as imported or in conflict were rolled back: count them as errors"""
+        failed = summary["imported"] + summary["conflicts"]
+        summary["errors"] += failed
+        summary["imported"] = 0
+        summary["conflicts"] = 0
+        summary["incomplete_pending_validation"] = 0
+        summary["details"] = [
+            detail for detail in summary["details"] if detail["status"] not in ("conflict", "incomplete")
+        ]
+        summary["details"].append({
+            "log_id": None,
+            "status": "error",
+            "message": f"Écriture du lot annulée ({failed} logs non importés): {error}",
+            "employee_name": None
+        })
+    
+    def _sync_log_ids_by_attendance_id(self, attendance_log_ids: Set[int]) -> Dict[int, int]:
+        """{attendance log ID: sync log ID} for the already imported IDs (one IN query per batch of 500)"""
+        attendance_log_ids = sorted(attendance_log_ids)
+        sync_log_ids = {}
+        for start in range(0, len(attendance_log_ids), IN_BATCH_SIZE):
+            sync_log_ids.update(self.db.query(AttendanceSyncLog.attendance_log_id, AttendanceSyncLog.id).filter(
+                AttendanceSyncLog.attendance_log_id.in_(attendance_log_ids[start:start + IN_BATCH_SIZE])
+            ).all())
+        return sync_log_ids
+    
+    def _mappings_by_attendance_id(self, attendance_emp_ids: Set[int]) -> Dict[int, int]:
+        """{attendance employee ID: HR employee ID} for the given IDs (first mapping wins)"""
+        if not attendance_emp_ids:
+            return {}
+        mappings = {}
+        for attendance_emp_id, hr_emp_id in self.db.query(
+            AttendanceEmployeeMapping.attendance_employee_id,
+            AttendanceEmployeeMapping.hr_employee_id
+        ).filter(
+            AttendanceEmployeeMapping.attendance_employee_id.in_(list(attendance_emp_ids))
+        ).order_by(AttendanceEmployeeMapping.id):
+            mappings.setdefault(attendance_emp_id, hr_emp_id)
+        return mappings
+    
+    def _employee_index(self) -> Tuple[Dict[int, str], Dict[str, int]]:
+        """
+        ({HR employee ID: "Nom Prenom"}, {"NOM PRENOM" / "PRENOM NOM": HR employee ID})
+        from one query
+        """
+        names = {}
+        by_nom_prenom = {}
+        by_prenom_nom = {}
+        for emp_id, nom, prenom in self.db.query(Employe.id, Employe.nom, Employe.prenom).order_by(Employe.id):
+            names[emp_id] = f"{nom} {prenom}"
+            by_nom_prenom.setdefault(f"{nom} {prenom}".upper(), emp_id)
+            by_prenom_nom.setdefault(f"{prenom} {nom}".upper(), emp_id)
+        # "Nom Prenom" is tried before "Prenom Nom"
+        by_name = {**by_prenom_nom, **by_nom_prenom}
+        return names, by_name
     
     # ============ Conflict Resolution ============
     
@@ -526,42 +643,152 @@ class AttendanceService:
         Resolve an import conflict
         resolution: 'keep_hr' or 'use_attendance'
         """
-        conflict = self.db.query(AttendanceImportConflict).filter(
+        exists = self.db.query(AttendanceImportConflict.id).filter(
             AttendanceImportConflict.id == conflict_id
         ).first()
         
-        if not conflict:
+        if not exists:
             return False
         
+        self.resolve_conflicts(resolution, resolved_by, conflict_ids=[conflict_id], pending_only=False)
+        return True
+    
+    def resolve_conflicts(
+        self,
+        resolution: str,
+        resolved_by: str,
+        conflict_ids: Optional[List[int]] = None,
+        employee_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        pending_only: bool = True
+    ) -> Dict:
+        """
+        Resolve every conflict matching the filters in one transaction
+        resolution: 'keep_hr' or 'use_attendance'
+        
+        use_attendance writes the attendance values to the pointage grid with
+        one upsert (LotPointages), then congés are recalculated once per
+        affected employee-month. Conflicts are closed with one UPDATE.
+        """
+        if resolution not in ("keep_hr", "use_attendance"):
+            raise ValueError(f"Résolution invalide: {resolution}")
+        
+        query = self.db.query(
+            AttendanceImportConflict.id,
+            AttendanceImportConflict.hr_employee_id,
+            AttendanceImportConflict.conflict_date,
+            AttendanceImportConflict.attendance_worked_minutes
+        )
+        if pending_only:
+            query = query.filter(AttendanceImportConflict.status == ConflictStatus.PENDING)
+        if conflict_ids is not None:
+            query = query.filter(AttendanceImportConflict.id.in_(conflict_ids))
+        if employee_id:
+            query = query.filter(AttendanceImportConflict.hr_employee_id == employee_id)
+        if start_date:
+            query = query.filter(AttendanceImportConflict.conflict_date >= start_date)
+        if end_date:
+            query = query.filter(AttendanceImportConflict.conflict_date <= end_date)
+        conflicts = query.order_by(AttendanceImportConflict.id).all()
+        
+        lot = LotPointages(self.db)
         if resolution == "use_attendance":
-            # Apply attendance data to pointage
-            year = conflict.conflict_date.year
-            month = conflict.conflict_date.month
-            day = conflict.conflict_date.day
-            
-            pointage = self.db.query(Pointage).filter(
-                Pointage.employe_id == conflict.hr_employee_id,
-                Pointage.annee == year,
-                Pointage.mois == month
-            ).first()
-            
-            if pointage:
-                day_status, overtime_hours = self.convert_minutes_to_pointage(
-                    conflict.attendance_worked_minutes
-                )
-                pointage.set_jour(day, day_status)
-                
-                # Add overtime
-                current_overtime = float(pointage.heures_supplementaires or 0)
-                pointage.heures_supplementaires = round(current_overtime + overtime_hours, 2)
-            
-            conflict.status = ConflictStatus.RESOLVED_USE_ATTENDANCE
+            lot.charger({(emp_id, d.year, d.month) for _, emp_id, d, _ in conflicts})
+            # Several conflicts on one day: the most recent one wins
+            for _, emp_id, conflict_date, worked_minutes in conflicts:
+                day_status, _ = self.convert_minutes_to_pointage(worked_minutes or 0)
+                lot.set_jour(emp_id, conflict_date.year, conflict_date.month, conflict_date.day, day_status)
+            lot.ecrire()
+            status = ConflictStatus.RESOLVED_USE_ATTENDANCE
         else:
             # Keep HR data (do nothing to pointage)
-            conflict.status = ConflictStatus.RESOLVED_KEEP_HR
+            status = ConflictStatus.RESOLVED_KEEP_HR
+        
+        ids = [conflict_id for conflict_id, *_ in conflicts]
+        resolved_at = datetime.now()
+        for start in range(0, len(ids), IN_BATCH_SIZE):
+            self.db.execute(
+                update(AttendanceImportConflict)
+                .where(AttendanceImportConflict.id.in_(ids[start:start + IN_BATCH_SIZE]))
+                .values(status=status, resolved_at=resolved_at, resolved_by=resolved_by)
+                .execution_options(synchronize_session=False)
+            )
+        
+        self.db.commit()
+        lot.recalculer_conges()
+        
+        return {
+            "resolved": len(ids),
+            "resolution": resolution,
+            "pointages_updated": len(lot.modifiees)
+        }
+    
+    def detect_conflicts(self, year: int, month: int, employee_id: Optional[int] = None) -> Dict:
+        """
+        Set-based conflict pass for one month
         
-        conflict.resolved_at = datetime.now()
-        conflict.resolved_by = resolved_by
+        Diff between the pointage grid and the imported attendance logs
+        aggregated per employee-day (longest worked time of the day): each
+        day whose HR value differs from the attendance value becomes a pending
+        conflict, unless one is already pending for that day. Three queries,
+        one multi-row insert and one commit whatever the number of days.
+        """
+        start = date(year, month, 1)
+        end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
         
+        query = self.db.query(
+            AttendanceSyncLog.hr_employee_id,
+            AttendanceSyncLog.sync_date,
+            func.max(AttendanceSyncLog.worked_minutes),
+            func.max(AttendanceSyncLog.attendance_log_id)
+        ).filter(
+            AttendanceSyncLog.sync_date >= start,
+            AttendanceSyncLog.sync_date < end
+        )
+        if employee_id:
+            query = query.filter(AttendanceSyncLog.hr_employee_id == employee_id)
+        attendance_days = query.group_by(AttendanceSyncLog.hr_employee_id, AttendanceSyncLog.sync_date).all()
+        
+        lot = LotPointages(self.db)
+        lot.charger({(emp_id, year, month) for emp_id, *_ in attendance_days})
+        
+        pending = set(self.db.query(
+            AttendanceImportConflict.hr_employee_id,
+            AttendanceImportConflict.conflict_date
+        ).filter(
+            AttendanceImportConflict.status == ConflictStatus.PENDING,
+            AttendanceImportConflict.conflict_date >= start,
+            AttendanceImportConflict.conflict_date < end
+        ).all())
+        
+        mismatches = 0
+        conflict_rows = []
+        for emp_id, sync_date, worked_minutes, log_id in attendance_days:
+            hr_value = lot.get_jour(emp_id, year, month, sync_date.day)
+            attendance_value, _ = self.convert_minutes_to_pointage(worked_minutes or 0)
+            if hr_value == attendance_value:
+                continue
+            mismatches += 1
+            if (emp_id, sync_date) in pending:
+                continue
+            conflict_rows.append(dict(
+                hr_employee_id=emp_id,
+                attendance_log_id=log_id,
+                conflict_date=sync_date,
+                hr_existing_value=hr_value,
+                attendance_worked_minutes=worked_minutes,
+                status=ConflictStatus.PENDING
+            ))
+        
+        if conflict_rows:
+            self.db.execute(insert(AttendanceImportConflict), conflict_rows)
         self.db.commit()
-        return True
+        
+        return {
+            "year": year,
+            "month": month,
+            "days_compared": len(attendance_days),
+            "mismatches": mismatches,
+            "conflicts_created": len(conflict_rows)
+        }
@@ -3,10 +3,12 @@ Attendance Calculation Service
 Implements business rules for daily attendance calculation
 """
 
-from typing import List, Dict, Tuple, Optional
+from typing import Iterable, List, Dict, Tuple, Optional
 from datetime import datetime, date, time, timedelta
 from sqlalchemy.orm import Session
-from models import Pointage
+from services.pointage_bulk import LotPointages
+from services.shift_calendar import ShiftCalendar, ShiftTemplate, resolve_punches
+import pandas as pd
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,21 +25,53 @@ NORMAL_MONTHLY_HOURS = 173.33   # G: Heures normales/mois
 MAX_OVERTIME_MONTHLY = 34.67    # H: Heures sup max/mois
 
 class AttendanceCalculationService:
-    """Service for calculating daily attendance from logs"""
+    """
+    Service for calculating daily attendance from logs
     
-    def __init__(self, db: Session):
+    One instance per import: shift templates are loaded once (ShiftCalendar)
+    and existing pointage values are read from a month map filled by
+    prefetch_existing_pointages(), so no query is made per employee-day.
+    """
+    
+    def __init__(self, db: Session, shifts: Optional[ShiftCalendar] = None):
         self.db = db
+        self._shifts = shifts
+        self._pointages = LotPointages(db)
+    
+    @property
+    def shifts(self) -> ShiftCalendar:
+        if self._shifts is None:
+            self._shifts = ShiftCalendar.load(self.db)
+        return self._shifts
+    
+    def prefetch_existing_pointages(self, days: Iterable[Tuple[int, date]]):
+        """Load the pointages of all (employee_id, work_date) of an import (one query per month)"""
+        self._pointages.charger({(employee_id, d.year, d.month) for employee_id, d in days})
+    
+    def calculate_day(self, employee_id: int, work_date: date, day: Dict) -> Dict:
+        """Daily attendance of one aggregated day (see aggregate_daily_logs)"""
+        entry_time, exit_time, worked_minutes, unpaired = resolve_punches(day['punches'])
+        return self.calculate_daily_attendance(
+            entry_time, exit_time, work_date, employee_id,
+            worked_minutes=worked_minutes, unpaired=unpaired
+        )
     
     def calculate_daily_attendance(
         self,
         entry_time: Optional[datetime],
         exit_time: Optional[datetime],
         work_date: date,
-        employee_id: int
+        employee_id: int,
+        worked_minutes: Optional[int] = None,
+        unpaired: int = 0
     ) -> Dict:
         """
         Calculate daily attendance according to business rules A-J
         
+        `worked_minutes` is the sum of the paired punch periods when a day
+        has several entries/exits (default: exit - entry); missing entry or
+        exit is estimated from the employee's shift template.
+        
         Returns:
             {
                 'worked_minutes': int,
@@ -57,6 +91,7 @@ class AttendanceCalculationService:
         warnings = []
         errors = []
         was_estimated = False
+        shift = self.shifts.for_employee(employee_id)
         
         # 1. Vérifier présence entrée ET sortie
         if not entry_time and not exit_time:
@@ -76,17 +111,20 @@ class AttendanceCalculationService:
         
         # 2. Estimer entrée ou sortie si manquante
         if not entry_time and exit_time:
-            entry_time = self._estimate_entry(exit_time)
-            warnings.append('⚠️ JOUR INCOMPLET - Seulement SORTIE (Entrée estimée à 08:00)')
+            entry_time = self._estimate_entry(exit_time, work_date, shift)
+            warnings.append(f'⚠️ JOUR INCOMPLET - Seulement SORTIE (Entrée estimée à {shift.start:%H:%M})')
             was_estimated = True
         elif entry_time and not exit_time:
-            exit_time = self._estimate_exit(entry_time)
-            warnings.append('⚠️ JOUR INCOMPLET - Seulement ENTRÉE (Sortie estimée à 17:00)')
+            exit_time = self._estimate_exit(entry_time, work_date, shift)
+            warnings.append(f'⚠️ JOUR INCOMPLET - Seulement ENTRÉE (Sortie estimée à {shift.end:%H:%M})')
             was_estimated = True
         
-        # 3. Calculer durée brute
-        duration = exit_time - entry_time
-        worked_minutes = int(duration.total_seconds() / 60)
+        # 3. Calculer durée brute (périodes appariées si plusieurs pointages)
+        if was_estimated or worked_minutes is None:
+            duration = exit_time - entry_time
+            worked_minutes = int(duration.total_seconds() / 60)
+        elif unpaired:
+            warnings.append(f'Pointages non appariés ignorés: {unpaired}')
         worked_hours = round(worked_minutes / 60, 2)
         
         # 4. Vérifier cohérence (sortie après entrée)
@@ -232,31 +270,87 @@ class AttendanceCalculationService:
         
         return entry, exit
     
-    def _estimate_entry(self, exit_time: datetime) -> datetime:
-        """Estimate entry time at 08:00 if missing"""
-        return datetime.combine(exit_time.date(), time(8, 0))
+    def aggregate_daily_logs(
+        self,
+        logs: pd.DataFrame,
+        employee_ids: pd.Series,
+        days: Dict[Tuple[int, date], Dict]
+    ) -> Dict[Tuple[int, date], Dict]:
+        """
+        Fold a chunk of parsed logs (ImportService.iter_chunks) into `days`
+        
+        Streaming counterpart of group_logs_by_employee_date(): logs are
+        grouped per (employee_id, work date), the work date following the
+        employee's shift template (early-morning punches of a night shift
+        belong to the previous day). Each day keeps its first employee name,
+        its punches (timestamp, type) for calculate_day() and its photo status
+        ('Verifier' if any log has it, else the first non-empty value), so
+        chunks are folded one after the other. Logs without a matched
+        employee are skipped.
+        
+        Returns:
+            days: {(employee_id, date): {'employee_name', 'punches', 'photo'}}
+        """
+        matched = employee_ids.notna()
+        logs = logs[matched]
+        if logs.empty:
+            return days
+        
+        ids = employee_ids[matched].astype(int)
+        timestamps = logs['timestamp']
+        cutoffs = ids.map({
+            employee_id: self.shifts.for_employee(employee_id).night_cutoff
+            for employee_id in ids.unique()
+        }).astype(float)
+        minutes = timestamps.dt.hour * 60 + timestamps.dt.minute
+        previous_day = pd.to_timedelta((minutes < cutoffs).astype(int), unit='D')
+        
+        photo = logs['has_photo'].where(logs['has_photo'] != '')
+        frame = pd.DataFrame({
+            'employee_id': ids,
+            'work_date': timestamps.dt.normalize() - previous_day,
+            'employee_name': logs['employee_name'],
+            'timestamp': timestamps,
+            'type': logs['type'],
+            'photo': photo,
+            'verifier': photo == 'Verifier'
+        })
+        grouped = frame.groupby(['employee_id', 'work_date'], sort=False).agg(
+            employee_name=('employee_name', 'first'),
+            timestamps=('timestamp', list),
+            types=('type', list),
+            photo=('photo', 'first'),
+            verifier=('verifier', 'any')
+        )
+        
+        for (employee_id, work_date), row in zip(grouped.index, grouped.itertuples(index=False)):
+            punches = [(ts.to_pydatetime(), punch_type) for ts, punch_type in zip(row.timestamps, row.types)]
+            photo = 'Verifier' if row.verifier else (None if pd.isna(row.photo) else row.photo)
+            
+            key = (int(employee_id), work_date.date())
+            day = days.get(key)
+            if day is None:
+                days[key] = {'employee_name': row.employee_name, 'punches': punches, 'photo': photo}
+                continue
+            day['punches'].extend(punches)
+            if day['photo'] != 'Verifier' and (photo == 'Verifier' or not day['photo']):
+                day['photo'] = photo
+        
+        return days
+    
+    def _estimate_entry(self, exit_time: datetime, work_date: date, shift: ShiftTemplate) -> datetime:
+        """Estimate entry time at the shift start if missing"""
+        return shift.start_on(work_date)
     
-    def _estimate_exit(self, entry_time: datetime) -> datetime:
-        """Estimate exit time at 17:00 if missing"""
-        return datetime.combine(entry_time.date(), time(17, 0))
+    def _estimate_exit(self, entry_time: datetime, work_date: date, shift: ShiftTemplate) -> datetime:
+        """Estimate exit time at the shift end if missing (next day for night shifts)"""
+        return shift.end_on(work_date)
     
     def _check_existing_pointage(self, employee_id: int, work_date: date) -> Optional[int]:
         """
         Check if pointage already exists for this employee and date
         Returns the existing value if found, None otherwise
-        """
-        year = work_date.year
-        month = work_date.month
-        day = work_date.day
-        
-        pointage = self.db.query(Pointage).filter(
-            Pointage.employe_id == employee_id,
-            Pointage.annee == year,
-            Pointage.mois == month
-        ).first()
         
-        if pointage:
-            existing_value = pointage.get_jour(day)
-            return existing_value
-        
-        return None
+        Read from the prefetched month map (loaded on demand otherwise).
+        """
+        return self._pointages.get_jour(employee_id, work_date.year, work_date.month, work_date.day)
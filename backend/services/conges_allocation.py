@@ -0,0 +1,277 @@
+"""
+Répartition FIFO des congés pris sur les périodes d'acquisition
+
+Les périodes (table conges) de tous les employés concernés sont chargées en
+une requête par lot d'employés, sous forme de segments (acquis, pris) en
+Decimal:
+
+- repartir(): consomme d'abord les périodes les plus anciennes, sans jamais
+  dépasser l'acquis d'une période
+- liberer(): annule des jours pris, en commençant par les périodes les plus
+  récentes
+- repartir_lot() / liberer_lot(): la même opération pour de nombreux
+  employés (congé annuel collectif), les refus étant rapportés par employé
+- solde(): solde disponible tenu en cache, sans relire la table
+- ecrire(): UPDATE groupé des seules périodes modifiées, puis reconstruction
+  des soldes cumulés des employés touchés (sans commit)
+"""
+
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple, Union
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from models import Conge
+from services.conges_calculator import TAILLE_LOT, reconstruire_soldes
+
+# Écart toléré entre demande et solde (arrondis de saisie)
+TOLERANCE = Decimal("0.01")
+
+Jours = Union[Decimal, float, int, str]
+
+
+def _jours(valeur: Jours) -> Decimal:
+    return valeur if isinstance(valeur, Decimal) else Decimal(str(valeur))
+
+
+class SoldeInsuffisant(ValueError):
+    """Demande supérieure au solde disponible de l'employé"""
+
+    def __init__(self, employe_id: int, demande: Decimal, disponible: Decimal):
+        self.employe_id = employe_id
+        self.demande = demande
+        self.disponible = disponible
+        super().__init__(
+            f"Solde insuffisant! Demande: {demande:.2f}j, Disponible: {disponible:.2f}j, "
+            f"Manque: {demande - disponible:.2f}j"
+        )
+
+
+class Segment:
+    """Période d'acquisition d'un employé"""
+
+    __slots__ = ("conge_id", "annee", "mois", "acquis", "pris", "mois_deduction", "annee_deduction")
+
+    def __init__(self, conge_id, annee, mois, acquis, pris, mois_deduction=None, annee_deduction=None):
+        self.conge_id = conge_id
+        self.annee = annee
+        self.mois = mois
+        self.acquis = Decimal(acquis or 0)
+        self.pris = Decimal(pris or 0)
+        self.mois_deduction = mois_deduction
+        self.annee_deduction = annee_deduction
+
+    @property
+    def disponible(self) -> Decimal:
+        return self.acquis - self.pris
+
+    @property
+    def periode(self) -> str:
+        return f"{self.mois}/{self.annee}"
+
+
+class AllocateurConges:
+    """Répartition et annulation des congés pris de plusieurs employés, écrites en UPDATE groupés"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.segments: Dict[int, List[Segment]] = {}
+        self._soldes: Dict[int, Decimal] = {}
+        self._modifies: Dict[int, Tuple[int, Segment]] = {}
+
+    def charger(self, employe_ids: Iterable[int]) -> "AllocateurConges":
+        """Charger les périodes des employés pas encore chargés (une requête par lot de TAILLE_LOT)"""
+        employe_ids = sorted(set(employe_ids) - set(self.segments))
+        for debut in range(0, len(employe_ids), TAILLE_LOT):
+            lot = employe_ids[debut:debut + TAILLE_LOT]
+            for employe_id in lot:
+                self.segments[employe_id] = []
+            lignes = self.db.query(
+                Conge.id, Conge.employe_id, Conge.annee, Conge.mois,
+                Conge.jours_conges_acquis, Conge.jours_conges_pris,
+                Conge.mois_deduction, Conge.annee_deduction
+            ).filter(
+                Conge.employe_id.in_(lot)
+            ).order_by(Conge.employe_id, Conge.annee, Conge.mois, Conge.id)
+            for conge_id, employe_id, *valeurs in lignes:
+                self.segments[employe_id].append(Segment(conge_id, *valeurs))
+
+        for employe_id in employe_ids:
+            self._soldes[employe_id] = sum((s.disponible for s in self.segments[employe_id]), Decimal("0"))
+        return self
+
+    def _segments(self, employe_id: int) -> List[Segment]:
+        if employe_id not in self.segments:
+            self.charger([employe_id])
+        return self.segments[employe_id]
+
+    def solde(self, employe_id: int) -> Decimal:
+        """Solde disponible (acquis - pris) de l'employé"""
+        self._segments(employe_id)
+        return self._soldes[employe_id]
+
+    def total_pris(self, employe_id: int) -> Decimal:
+        return sum((s.pris for s in self._segments(employe_id)), Decimal("0"))
+
+    def _modifier(self, employe_id: int, segment: Segment, pris: Decimal):
+        self._soldes[employe_id] += segment.pris - pris
+        segment.pris = pris
+        self._modifies[segment.conge_id] = (employe_id, segment)
+
+    def repartir(
+        self,
+        employe_id: int,
+        jours: Jours,
+        mois_deduction: int,
+        annee_deduction: int,
+        remplacer: bool = False
+    ) -> List[dict]:
+        """
+        Répartir des jours pris sur les périodes disponibles, des plus anciennes aux plus récentes
+
+        Args:
+            remplacer: jours est le nouveau TOTAL pris de l'employé (toutes les
+                       périodes sont remises à zéro avant la répartition)
+
+        Returns:
+            Liste de dicts: [{'conge_id', 'periode', 'acquis', 'pris_avant',
+            'jours_a_deduire', 'nouveau_pris', 'mois_deduction', 'annee_deduction'}, ...]
+
+        Raises:
+            SoldeInsuffisant: rien n'est modifié
+        """
+        jours = _jours(jours)
+        segments = self._segments(employe_id)
+        disponibles = [s.acquis if remplacer else s.disponible for s in segments]
+        total_disponible = sum((d for d in disponibles if d > 0), Decimal("0"))
+        if jours - total_disponible > TOLERANCE:
+            raise SoldeInsuffisant(employe_id, jours, total_disponible)
+
+        if remplacer:
+            for segment in segments:
+                if segment.pris:
+                    self._modifier(employe_id, segment, Decimal("0"))
+
+        repartition = []
+        reste = jours
+        for segment, disponible in zip(segments, disponibles):
+            if reste <= 0:
+                break
+            if disponible <= 0:
+                continue  # Période déjà consommée
+            a_deduire = min(reste, disponible)
+            pris_avant = segment.pris
+            self._modifier(employe_id, segment, pris_avant + a_deduire)
+            segment.mois_deduction, segment.annee_deduction = mois_deduction, annee_deduction
+            repartition.append({
+                'conge_id': segment.conge_id,
+                'periode': segment.periode,
+                'acquis': float(segment.acquis),
+                'pris_avant': float(pris_avant),
+                'jours_a_deduire': float(a_deduire),
+                'nouveau_pris': float(segment.pris),
+                'mois_deduction': mois_deduction,
+                'annee_deduction': annee_deduction
+            })
+            reste -= a_deduire
+        return repartition
+
+    def liberer(self, employe_id: int, jours: Jours) -> List[dict]:
+        """
+        Annuler des jours pris, des périodes les plus récentes aux plus anciennes
+
+        Raises:
+            ValueError: plus de jours à annuler que de jours pris (rien n'est modifié)
+        """
+        jours = _jours(jours)
+        segments = self._segments(employe_id)
+        total_pris = self.total_pris(employe_id)
+        if jours - total_pris > TOLERANCE:
+            raise ValueError(f"Annulation impossible! Demande: {jours:.2f}j, Jours pris: {total_pris:.2f}j")
+
+        liberation = []
+        reste = jours
+        for segment in reversed(segments):
+            if reste <= 0:
+                break
+            if segment.pris <= 0:
+                continue
+            a_liberer = min(reste, segment.pris)
+            pris_avant = segment.pris
+            self._modifier(employe_id, segment, pris_avant - a_liberer)
+            if not segment.pris:
+                segment.mois_deduction = segment.annee_deduction = None
+            liberation.append({
+                'conge_id': segment.conge_id,
+                'periode': segment.periode,
+                'pris_avant': float(pris_avant),
+                'jours_liberes': float(a_liberer),
+                'nouveau_pris': float(segment.pris)
+            })
+            reste -= a_liberer
+        return liberation
+
+    def repartir_lot(
+        self,
+        demandes: Dict[int, Jours],
+        mois_deduction: int,
+        annee_deduction: int,
+        remplacer: bool = False
+    ) -> Dict:
+        """
+        Répartir les jours pris de nombreux employés (ex: congé annuel collectif)
+
+        Les employés dont le solde est insuffisant sont ignorés et rapportés
+        dans 'erreurs'; les autres sont répartis normalement.
+
+        Returns:
+            {'repartitions': {employe_id: [...]}, 'erreurs': {employe_id: message}}
+        """
+        self.charger(demandes)
+        repartitions, erreurs = {}, {}
+        for employe_id, jours in demandes.items():
+            try:
+                repartitions[employe_id] = self.repartir(
+                    employe_id, jours, mois_deduction, annee_deduction, remplacer=remplacer
+                )
+            except ValueError as e:
+                erreurs[employe_id] = str(e)
+        return {'repartitions': repartitions, 'erreurs': erreurs}
+
+    def liberer_lot(self, demandes: Dict[int, Jours]) -> Dict:
+        """Annuler des jours pris pour de nombreux employés (mêmes retours que repartir_lot)"""
+        self.charger(demandes)
+        liberations, erreurs = {}, {}
+        for employe_id, jours in demandes.items():
+            try:
+                liberations[employe_id] = self.liberer(employe_id, jours)
+            except ValueError as e:
+                erreurs[employe_id] = str(e)
+        return {'repartitions': liberations, 'erreurs': erreurs}
+
+    def ecrire(self) -> int:
+        """
+        Écrire les périodes modifiées (UPDATE groupé) et reconstruire les soldes
+        cumulés des employés touchés. Sans commit.
+
+        Returns:
+            Nombre de périodes écrites
+        """
+        lignes = [
+            {
+                "id": segment.conge_id,
+                "jours_conges_pris": segment.pris,
+                "mois_deduction": segment.mois_deduction,
+                "annee_deduction": segment.annee_deduction
+            }
+            for _, segment in self._modifies.values()
+        ]
+        for debut in range(0, len(lignes), TAILLE_LOT):
+            self.db.execute(update(Conge), lignes[debut:debut + TAILLE_LOT])
+
+        employe_ids = {employe_id for employe_id, _ in self._modifies.values()}
+        if employe_ids:
+            reconstruire_soldes(self.db, employe_ids)
+        self._modifies.clear()
+        return len(lignes)
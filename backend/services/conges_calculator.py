@@ -1,20 +1,123 @@
 """
 Service de calcul automatique des congés
 Permet de calculer et enregistrer les congés dès qu'un pointage est créé/modifié
+
+Solde cumulé (jours_conges_restants) tenu comme un registre:
+- à chaque enregistrement, solde du mois = solde du mois précédent + acquis - pris,
+  et l'écart d'acquis est reporté sur les mois suivants (un seul UPDATE)
+- reconstruire_soldes(): une passe ordonnée par employé (somme préfixe en
+  mémoire) pour tout recalculer, sans requête par mois
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import update
 from models import Conge, Pointage, Employe
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+from services.pointage_grille import GrillePointages
+
+# Lignes par UPDATE groupé
+TAILLE_LOT = 500
+
+
+def _jours_acquis(
+    jours_travailles_brut: int,
+    jours_conges_pris: float,
+    date_recrutement: Optional[date]
+) -> Tuple[int, float, bool]:
+    """(jours réellement travaillés, jours acquis, nouveau recruté) d'un mois"""
+    # RÈGLE 4 v3.5.1/v3.5.3: Les congés PRIS ne comptent PAS pour les droits
+    jours_reellement_travailles = max(0, jours_travailles_brut - int(jours_conges_pris))
+    
+    # Nouveau recruté: moins de 3 mois d'ancienneté
+    est_nouveau_recrue = False
+    if date_recrutement:
+        mois_anciennete = (datetime.now().year - date_recrutement.year) * 12 + \
+                         (datetime.now().month - date_recrutement.month)
+        est_nouveau_recrue = mois_anciennete < 3
+    
+    jours_conges_acquis = Conge.calculer_jours_conges(jours_reellement_travailles, est_nouveau_recrue)
+    return jours_reellement_travailles, jours_conges_acquis, est_nouveau_recrue
+
+
+def _avant(annee: int, mois: int):
+    return (Conge.annee < annee) | ((Conge.annee == annee) & (Conge.mois < mois))
+
+
+def _apres(annee: int, mois: int):
+    return (Conge.annee > annee) | ((Conge.annee == annee) & (Conge.mois > mois))
+
+
+def solde_precedent(db: Session, employe_id: int, annee: int, mois: int) -> Decimal:
+    """Solde cumulé du dernier mois enregistré avant (annee, mois)"""
+    precedent = db.query(Conge.jours_conges_restants).filter(
+        Conge.employe_id == employe_id,
+        _avant(annee, mois)
+    ).order_by(Conge.annee.desc(), Conge.mois.desc()).first()
+    return Decimal(precedent[0] or 0) if precedent else Decimal("0")
+
+
+def reporter_ecart_solde(db: Session, employe_id: int, annee: int, mois: int, ecart: Decimal):
+    """Reporter un écart (acquis - pris) du mois sur les soldes des mois suivants (un UPDATE, sans commit)"""
+    if not ecart:
+        return
+    db.query(Conge).filter(
+        Conge.employe_id == employe_id,
+        _apres(annee, mois)
+    ).update(
+        {Conge.jours_conges_restants: Conge.jours_conges_restants + ecart},
+        synchronize_session=False
+    )
+
+
+def reconstruire_soldes(db: Session, employe_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Reconstruire les soldes cumulés en une passe ordonnée par employé
+    
+    Une requête triée (employé, année, mois), somme préfixe en mémoire, puis
+    UPDATE groupé des seules lignes dont le solde change. Sans commit.
+    
+    Returns:
+        Nombre de lignes dont le solde a été corrigé
+    """
+    query = db.query(
+        Conge.id,
+        Conge.employe_id,
+        Conge.jours_conges_acquis,
+        Conge.jours_conges_pris,
+        Conge.jours_conges_restants
+    )
+    if employe_ids is not None:
+        employe_ids = sorted(set(employe_ids))
+        if not employe_ids:
+            return 0
+        query = query.filter(Conge.employe_id.in_(employe_ids))
+    
+    corrections = []
+    employe_courant = None
+    solde = Decimal("0")
+    for conge_id, employe_id, acquis, pris, restants in query.order_by(
+        Conge.employe_id, Conge.annee, Conge.mois, Conge.id
+    ):
+        if employe_id != employe_courant:
+            employe_courant, solde = employe_id, Decimal("0")
+        solde += Decimal(acquis or 0) - Decimal(pris or 0)
+        if restants is None or Decimal(restants) != solde:
+            corrections.append({"id": conge_id, "jours_conges_restants": solde})
+    
+    for debut in range(0, len(corrections), TAILLE_LOT):
+        db.execute(update(Conge), corrections[debut:debut + TAILLE_LOT])
+    
+    return len(corrections)
 
 
 def calculer_et_enregistrer_conges(
     db: Session,
     employe_id: int,
     annee: int,
-    mois: int
+    mois: int,
+    totaux: Optional[Dict] = None
 ) -> Optional[Conge]:
     """
     Calculer et enregistrer/mettre à jour les congés pour un employé/période
@@ -26,6 +129,8 @@ def calculer_et_enregistrer_conges(
         employe_id: ID de l'employé
         annee: Année concernée
         mois: Mois concerné (1-12)
+        totaux: Totaux du pointage déjà calculés (recalcul en masse via GrillePointages);
+                si absent, le pointage est relu en base
     
     Returns:
         L'enregistrement Conge créé/mis à jour, ou None si pas de pointage
@@ -37,23 +142,25 @@ def calculer_et_enregistrer_conges(
         4. Calcule jours_reellement_travailles (RÈGLE 4: exclut congés pris)
         5. Détermine si employé nouveau recruté (<3 mois)
         6. Calcule jours_conges_acquis avec formule v3.5.3
-        7. Enregistre/Met à jour dans table conges
+        7. Enregistre/Met à jour dans table conges (solde = solde précédent + acquis - pris,
+           écart d'acquis reporté sur les mois suivants)
     """
     
     # 1. Récupérer le pointage
-    pointage = db.query(Pointage).filter(
-        Pointage.employe_id == employe_id,
-        Pointage.annee == annee,
-        Pointage.mois == mois
-    ).first()
-    
-    if not pointage:
-        # Pas de pointage = pas de congés à calculer
-        print(f"[CONGES] Aucun pointage trouvé pour employé {employe_id}, {mois}/{annee}")
-        return None
-    
-    # 2. Calculer totaux depuis pointage
-    totaux = pointage.calculer_totaux()
+    if totaux is None:
+        pointage = db.query(Pointage).filter(
+            Pointage.employe_id == employe_id,
+            Pointage.annee == annee,
+            Pointage.mois == mois
+        ).first()
+        
+        if not pointage:
+            # Pas de pointage = pas de congés à calculer
+            print(f"[CONGES] Aucun pointage trouvé pour employé {employe_id}, {mois}/{annee}")
+            return None
+        
+        # 2. Calculer totaux depuis pointage
+        totaux = pointage.calculer_totaux()
     jours_travailles_brut = totaux.get('jours_travailles', 0)
     
     print(f"[CONGES] Employé {employe_id}, {mois}/{annee}: jours_travailles_brut = {jours_travailles_brut}")
@@ -67,93 +174,56 @@ def calculer_et_enregistrer_conges(
     
     jours_conges_pris = float(conge_existant.jours_conges_pris or 0) if conge_existant else 0.0
     
-    # 4. RÈGLE 4 v3.5.1/v3.5.3: Exclure congés pris du calcul
-    # Les congés PRIS ne doivent PAS compter pour les droits
-    jours_reellement_travailles = max(0, jours_travailles_brut - int(jours_conges_pris))
-    
-    print(f"[CONGES] jours_conges_pris = {jours_conges_pris}, jours_reellement_travailles = {jours_reellement_travailles}")
-    
-    # 5. Vérifier si nouveau recruté (<3 mois d'ancienneté)
+    # 4-6. Jours réellement travaillés (hors congés pris), ancienneté, acquis (formule v3.5.3)
     employe = db.query(Employe).filter(Employe.id == employe_id).first()
-    est_nouveau_recrue = False
-    
-    if employe and employe.date_recrutement:
-        mois_anciennete = (datetime.now().year - employe.date_recrutement.year) * 12 + \
-                         (datetime.now().month - employe.date_recrutement.month)
-        est_nouveau_recrue = mois_anciennete < 3
-        print(f"[CONGES] Ancienneté: {mois_anciennete} mois, nouveau_recrue = {est_nouveau_recrue}")
+    jours_reellement_travailles, jours_conges_acquis, est_nouveau_recrue = _jours_acquis(
+        jours_travailles_brut, jours_conges_pris, employe.date_recrutement if employe else None
+    )
     
-    # 6. Calculer congés acquis avec la formule du modèle (v3.5.3 ou v3.5.1 selon version)
-    jours_conges_acquis = Conge.calculer_jours_conges(jours_reellement_travailles, est_nouveau_recrue)
-    
-    print(f"[CONGES] jours_conges_acquis calculés = {jours_conges_acquis}")
+    print(f"[CONGES] jours_conges_pris = {jours_conges_pris}, jours_reellement_travailles = {jours_reellement_travailles}")
+    print(f"[CONGES] nouveau_recrue = {est_nouveau_recrue}, jours_conges_acquis calculés = {jours_conges_acquis}")
     
     # 7. Enregistrer ou mettre à jour
+    acquis = Decimal(str(jours_conges_acquis))
     if conge_existant:
-        # Mise à jour (préserver jours_conges_pris)
-        conge_existant.jours_travailles = jours_reellement_travailles
-        conge_existant.jours_conges_acquis = jours_conges_acquis
-        # jours_conges_pris reste inchangé (saisi manuellement par utilisateur)
-        
-        # ⭐ CORRECTION v3.6.1: Calculer le SOLDE CUMULÉ (pas le solde de période)
-        # Solde = (Total acquis depuis début) - (Total pris depuis début)
-        stats = db.query(
-            func.sum(Conge.jours_conges_acquis).label("total_acquis"),
-            func.sum(Conge.jours_conges_pris).label("total_pris")
-        ).filter(
-            Conge.employe_id == employe_id,
-            (Conge.annee < annee) | ((Conge.annee == annee) & (Conge.mois <= mois))
-        ).first()
-        
-        total_acquis = float(stats.total_acquis or 0)
-        total_pris = float(stats.total_pris or 0)
-        conge_existant.jours_conges_restants = total_acquis - total_pris
-        
-        print(f"[CONGES] Mise à jour conge #{conge_existant.id}")
-        
-        db.commit()
-        db.refresh(conge_existant)
-        return conge_existant
+        # Mise à jour (préserver jours_conges_pris, saisi manuellement par utilisateur)
+        ecart = acquis - Decimal(conge_existant.jours_conges_acquis or 0)
+        conge = conge_existant
+        conge.jours_travailles = jours_reellement_travailles
+        conge.jours_conges_acquis = jours_conges_acquis
+        print(f"[CONGES] Mise à jour conge #{conge.id}")
     else:
-        # Création: Calculer le solde cumulé incluant cette période
-        # Solde = (Total acquis jusqu'à ce mois) - (Total pris jusqu'à ce mois)
-        stats_creation = db.query(
-            func.sum(Conge.jours_conges_acquis).label("total_acquis"),
-            func.sum(Conge.jours_conges_pris).label("total_pris")
-        ).filter(
-            Conge.employe_id == employe_id,
-            (Conge.annee < annee) | ((Conge.annee == annee) & (Conge.mois < mois))
-        ).first()
-        
-        total_acquis_avant = float(stats_creation.total_acquis or 0)
-        total_pris_avant = float(stats_creation.total_pris or 0)
-        
-        # Solde cumulé = solde précédent + acquis ce mois - pris ce mois (0 à la création)
-        solde_cumule = total_acquis_avant + jours_conges_acquis - total_pris_avant
-        
-        nouveau_conge = Conge(
+        # Création: les mois suivants éventuels n'incluaient pas ce mois
+        ecart = acquis
+        conge = Conge(
             employe_id=employe_id,
             annee=annee,
             mois=mois,
             jours_travailles=jours_reellement_travailles,
             jours_conges_acquis=jours_conges_acquis,
-            jours_conges_pris=0.0,  # Initialisé à 0, sera saisi manuellement
-            jours_conges_restants=solde_cumule
+            jours_conges_pris=0.0  # Initialisé à 0, sera saisi manuellement
         )
-        
-        db.add(nouveau_conge)
-        db.commit()
-        db.refresh(nouveau_conge)
-        
-        print(f"[CONGES] Création nouveau conge #{nouveau_conge.id}")
-        
-        return nouveau_conge
+        db.add(conge)
+    
+    # ⭐ Solde cumulé = solde du mois précédent + acquis ce mois - pris ce mois,
+    # écart reporté sur les mois suivants (pas de SUM sur tout l'historique)
+    conge.jours_conges_restants = solde_precedent(db, employe_id, annee, mois) + acquis - Decimal(str(jours_conges_pris))
+    reporter_ecart_solde(db, employe_id, annee, mois, ecart)
+    
+    db.commit()
+    db.refresh(conge)
+    
+    if not conge_existant:
+        print(f"[CONGES] Création nouveau conge #{conge.id}")
+    
+    return conge
 
 
 def recalculer_conges_periode(
     db: Session,
     annee: int,
-    mois: int
+    mois: int,
+    reconstruire: bool = True
 ) -> dict:
     """
     Recalculer tous les congés pour une période donnée
@@ -167,6 +237,9 @@ def recalculer_conges_periode(
         db: Session SQLAlchemy
         annee: Année à recalculer
         mois: Mois à recalculer (1-12)
+        reconstruire: Reconstruire les soldes cumulés des employés recalculés
+                      (False pour enchaîner plusieurs mois puis appeler
+                      reconstruire_soldes() une seule fois)
     
     Returns:
         Dictionnaire avec statistiques du recalcul
@@ -174,13 +247,11 @@ def recalculer_conges_periode(
     
     print(f"[CONGES] Début recalcul période {mois}/{annee}")
     
-    # Récupérer tous les pointages de la période
-    pointages = db.query(Pointage).filter(
-        Pointage.annee == annee,
-        Pointage.mois == mois
-    ).all()
+    # Récupérer tous les pointages de la période (grille NumPy, totaux vectorisés)
+    grille = GrillePointages.charger(db, annee, mois)
+    totaux_par_employe = grille.totaux_par_employe()
     
-    print(f"[CONGES] {len(pointages)} pointages trouvés")
+    print(f"[CONGES] {len(grille)} pointages trouvés")
     
     results = {
         "recalcules": 0,
@@ -188,31 +259,59 @@ def recalculer_conges_periode(
         "details": []
     }
     
-    for p in pointages:
+    # Congés de la période et dates de recrutement: une requête chacun
+    employe_ids = list(totaux_par_employe)
+    conges = {}
+    recrutements = {}
+    for debut in range(0, len(employe_ids), TAILLE_LOT):
+        lot = employe_ids[debut:debut + TAILLE_LOT]
+        conges.update((c.employe_id, c) for c in db.query(Conge).filter(
+            Conge.annee == annee,
+            Conge.mois == mois,
+            Conge.employe_id.in_(lot)
+        ))
+        recrutements.update(db.query(Employe.id, Employe.date_recrutement).filter(Employe.id.in_(lot)))
+    
+    for employe_id, totaux in totaux_par_employe.items():
         try:
-            conge = calculer_et_enregistrer_conges(
-                db=db,
-                employe_id=p.employe_id,
-                annee=annee,
-                mois=mois
+            conge = conges.get(employe_id)
+            jours_conges_pris = float(conge.jours_conges_pris or 0) if conge else 0.0
+            jours_reellement_travailles, jours_conges_acquis, _ = _jours_acquis(
+                totaux.get('jours_travailles', 0), jours_conges_pris, recrutements.get(employe_id)
             )
             
-            if conge:
-                results["recalcules"] += 1
-                results["details"].append({
-                    "employe_id": p.employe_id,
-                    "jours_acquis": float(conge.jours_conges_acquis),
-                    "jours_pris": float(conge.jours_conges_pris),
-                    "status": "recalculé"
-                })
+            if conge is None:
+                conge = Conge(
+                    employe_id=employe_id,
+                    annee=annee,
+                    mois=mois,
+                    jours_conges_pris=0.0
+                )
+                db.add(conge)
+            conge.jours_travailles = jours_reellement_travailles
+            conge.jours_conges_acquis = jours_conges_acquis
+            
+            results["recalcules"] += 1
+            results["details"].append({
+                "employe_id": employe_id,
+                "jours_acquis": float(jours_conges_acquis),
+                "jours_pris": jours_conges_pris,
+                "status": "recalculé"
+            })
         except Exception as e:
             results["erreurs"] += 1
             results["details"].append({
-                "employe_id": p.employe_id,
+                "employe_id": employe_id,
                 "status": "erreur",
                 "message": str(e)
             })
-            print(f"[CONGES] Erreur employé {p.employe_id}: {e}")
+            print(f"[CONGES] Erreur employé {employe_id}: {e}")
+    
+    # Soldes cumulés: une passe ordonnée par employé recalculé
+    db.flush()
+    if reconstruire:
+        reconstruire_soldes(db, employe_ids)
+    db.commit()
     
     print(f"[CONGES] Recalcul terminé: {results['recalcules']} réussis, {results['erreurs']} erreurs")
     
@@ -0,0 +1,141 @@
+"""
+Agrégat annuel G29 (déclaration des salaires) depuis la table salaires
+
+Une requête groupée SUM(...) GROUP BY employe_id, mois et une requête pour
+les employés (actifs, ou payés sur la période): les montants sont ensuite
+pivotés en mémoire dans 12 cases par employé (indice = mois - 1).
+
+Alimente /rapports/g29/{annee} (et son PDF); l'Excel G29 mensuel de
+/traitement-salaires/g29 y lit les numéros de sécurité sociale.
+"""
+
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from models import Employe
+from models.salaire import Salaire
+
+MOIS_G29 = (
+    "janvier", "fevrier", "mars", "avril", "mai", "juin",
+    "juillet", "aout", "septembre", "octobre", "novembre", "decembre"
+)
+
+# Montants agrégés par mois (attribut de LigneG29 -> colonne salaires)
+MONTANTS_G29 = {
+    "cotisable": Salaire.salaire_cotisable,
+    "imposable": Salaire.salaire_imposable,
+    "irg": Salaire.irg,
+    "securite_sociale": Salaire.retenue_securite_sociale,
+}
+
+
+class LigneG29:
+    """Un employé: identité + 12 cases par montant"""
+    __slots__ = ("employe_id", "nom", "prenom", "situation_familiale", "numero_secu_sociale",
+                 "mois_presents") + tuple(MONTANTS_G29)
+
+    def __init__(self, employe_id: int, nom: str, prenom: str, situation_familiale, numero_secu_sociale: str):
+        self.employe_id = employe_id
+        self.nom = nom
+        self.prenom = prenom
+        self.situation_familiale = situation_familiale
+        self.numero_secu_sociale = numero_secu_sociale
+        self.mois_presents = [False] * 12
+        for montant in MONTANTS_G29:
+            setattr(self, montant, [Decimal(0)] * 12)
+
+    def total(self, montant: str) -> Decimal:
+        return sum(getattr(self, montant), Decimal(0))
+
+    def to_dict(self) -> Dict:
+        """Format G29DataEmploye (<mois>_net = salaire imposable)"""
+        donnees = {
+            "id": self.employe_id,
+            "nom": self.nom,
+            "prenom": self.prenom,
+            "situation_familiale": self.situation_familiale or "C",
+        }
+        for i, nom_mois in enumerate(MOIS_G29):
+            donnees[f"{nom_mois}_net"] = self.imposable[i]
+            donnees[f"{nom_mois}_irg"] = self.irg[i]
+        donnees["total_imposable"] = self.total("imposable")
+        donnees["total_irg"] = self.total("irg")
+        return donnees
+
+
+class AgregatG29:
+    """Salaires d'une année agrégés par employé et par mois"""
+
+    def __init__(self, annee: int, lignes: List[LigneG29]):
+        self.annee = annee
+        self.lignes = lignes
+        self._indices = {ligne.employe_id: ligne for ligne in lignes}
+
+    @classmethod
+    def charger(
+        cls,
+        db: Session,
+        annee: int,
+        mois: Optional[int] = None,
+        statuts: Optional[Iterable[str]] = None
+    ) -> "AgregatG29":
+        """
+        Charger l'agrégat (2 requêtes)
+
+        mois: limiter les sommes à un mois (G29 mensuel)
+        statuts: ne retenir que les salaires de ces statuts (tous par défaut)
+        """
+        query = db.query(
+            Salaire.employe_id,
+            Salaire.mois,
+            *[func.sum(colonne) for colonne in MONTANTS_G29.values()]
+        ).filter(Salaire.annee == annee)
+        if mois is not None:
+            query = query.filter(Salaire.mois == mois)
+        if statuts is not None:
+            query = query.filter(Salaire.statut.in_(list(statuts)))
+        sommes_par_mois = query.group_by(Salaire.employe_id, Salaire.mois).all()
+
+        # Employés actifs + employés partis depuis mais payés sur la période
+        employe_ids = {ligne[0] for ligne in sommes_par_mois}
+        employes = db.query(
+            Employe.id, Employe.nom, Employe.prenom, Employe.situation_familiale, Employe.numero_secu_sociale
+        ).filter(
+            or_(Employe.actif == True, Employe.id.in_(employe_ids))
+        ).order_by(Employe.id).all()
+
+        agregat = cls(annee, [LigneG29(*employe) for employe in employes])
+
+        for employe_id, mois_salaire, *sommes in sommes_par_mois:
+            ligne = agregat._indices.get(employe_id)
+            if ligne is None or not 1 <= mois_salaire <= 12:
+                continue
+            indice = mois_salaire - 1
+            ligne.mois_presents[indice] = True
+            for montant, somme in zip(MONTANTS_G29, sommes):
+                getattr(ligne, montant)[indice] = Decimal(str(somme or 0))
+
+        return agregat
+
+    def __iter__(self) -> Iterator[LigneG29]:
+        return iter(self.lignes)
+
+    def ligne(self, employe_id: int) -> Optional[LigneG29]:
+        return self._indices.get(employe_id)
+
+    def lignes_mois(self, mois: int) -> List[LigneG29]:
+        """Employés ayant un salaire enregistré pour le mois"""
+        return [ligne for ligne in self.lignes if ligne.mois_presents[mois - 1]]
+
+    def recap_dict(self) -> Dict:
+        """Format G29DataRecap (<mois>_brut = salaire cotisable)"""
+        recap = {"annee": self.annee}
+        for i, nom_mois in enumerate(MOIS_G29):
+            recap[f"{nom_mois}_brut"] = sum((ligne.cotisable[i] for ligne in self.lignes), Decimal(0))
+            recap[f"{nom_mois}_irg"] = sum((ligne.irg[i] for ligne in self.lignes), Decimal(0))
+        recap["total_brut"] = sum((ligne.total("cotisable") for ligne in self.lignes), Decimal(0))
+        recap["total_irg"] = sum((ligne.total("irg") for ligne in self.lignes), Decimal(0))
+        return recap
@@ -1,113 +1,236 @@
 
 import pandas as pd
+import numpy as np
+import openpyxl
 from io import BytesIO
-from typing import List, Dict
-from datetime import datetime
+from itertools import islice
+from typing import BinaryIO, Iterator, List, Dict, NamedTuple, Optional, Sequence, Union
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Formats tried for string cells, in default priority order (re-ranked per column on a sample)
+DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d")
+TIME_FORMATS = ("%H:%M:%S", "%H:%M")
+
+# CSV and .xlsx files are streamed in chunks of this many rows
+CSV_CHUNK_SIZE = 50_000
+
+# Column holding the presence photo when no named column exists (column F)
+PHOTO_COLUMN_INDEX = 5
+
+ENTRY_PATTERN = "ENTRY|ENTRÉE|IN"
+
+
+class ParsedLogs(NamedTuple):
+    """Columnar parse result"""
+    logs: pd.DataFrame    # id, employee_name, timestamp (datetime64), type, source, has_photo
+    errors: pd.DataFrame  # row, error
+
+
+def _parse_with_formats(texts: pd.Series, formats: Sequence[str]) -> pd.Series:
+    """
+    Vectorised strptime over a string column
+
+    Formats are ranked by how many cells of a sample they parse, then each
+    format is only applied to the cells still unparsed by the previous ones.
+    """
+    result = pd.Series(pd.NaT, index=texts.index, dtype="datetime64[ns]")
+    remaining = texts.notna()
+    if not remaining.any():
+        return result
+
+    sample = texts[remaining].head(200)
+    ranked = sorted(
+        formats,
+        key=lambda fmt: -pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum()
+    )
+    for fmt in ranked:
+        parsed = pd.to_datetime(texts[remaining], format=fmt, errors="coerce")
+        parsed = parsed[parsed.notna()]
+        result.loc[parsed.index] = parsed
+        remaining &= result.isna()
+        if not remaining.any():
+            break
+    return result
+
+
+def _token(column: pd.Series, last: bool) -> pd.Series:
+    """First (or last) whitespace-separated token of each cell, NaN kept"""
+    texts = column.astype(str).str.strip()
+    if texts.str.contains(" ", regex=False).any():
+        texts = texts.str.rsplit(n=1).str[-1] if last else texts.str.split(n=1).str[0]
+    return texts.where(column.notna())
+
+
+def _parse_dates(column: pd.Series) -> pd.Series:
+    """Date part of each cell (datetime cells or DD/MM/YYYY / YYYY-MM-DD strings)"""
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return column.dt.normalize()
+    # str(datetime) is "YYYY-MM-DD HH:MM:SS": the first token covers both cases
+    return _parse_with_formats(_token(column, last=False), DATE_FORMATS)
+
+
+def _parse_times(column: pd.Series) -> pd.Series:
+    """Time of day of each cell as a timedelta (datetime/time cells or HH:MM[:SS] strings)"""
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return column - column.dt.normalize()
+    # Last token: "08:00", "08:00:00" (time cells) or "... 08:00:00" (datetime cells)
+    parsed = _parse_with_formats(_token(column, last=True), TIME_FORMATS)
+    return parsed - parsed.dt.normalize()
+
+
+def _xlsx_frames(source: BinaryIO, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Active sheet of an .xlsx workbook as DataFrames of chunk_size rows
+
+    openpyxl read-only mode parses the sheet XML lazily: only one chunk of
+    rows is held in memory. Index and header naming match pd.read_excel.
+    """
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [
+            f"Unnamed: {i}" if name is None else str(name)
+            for i, name in enumerate(header)
+        ]
+        width = len(columns)
+        offset = 0
+        while True:
+            batch = [row[:width] for row in islice(rows, chunk_size)]
+            if not batch:
+                break
+            yield pd.DataFrame(batch, columns=columns, index=pd.RangeIndex(offset, offset + len(batch)))
+            offset += len(batch)
+    finally:
+        workbook.close()
+
+
 class ImportService:
     """Service for importing attendance logs from files"""
-    
-    def parse_excel(self, file_content: bytes) -> List[Dict]:
+
+    def parse_excel(self, file_content: Union[bytes, BinaryIO], filename: Optional[str] = None) -> List[Dict]:
         """
-        Parse Excel file and return list of log dicts
+        Parse Excel/CSV file and return list of log dicts
         Expected columns: Date, Time, Employee, Type
+
+        Thin wrapper over iter_log_dicts() for callers working on one list.
         """
+        return [log for logs in self.iter_log_dicts(file_content, filename) for log in logs]
+
+    def iter_log_dicts(self, file_content: Union[bytes, BinaryIO], filename: Optional[str] = None) -> Iterator[List[Dict]]:
+        """Log dicts chunk by chunk (see iter_chunks)"""
+        for parsed in self.iter_chunks(file_content, filename):
+            logs = parsed.logs.assign(
+                timestamp=parsed.logs["timestamp"].dt.strftime("%Y-%m-%dT%H:%M:%S")
+            )
+            yield logs.to_dict("records")
+
+    def parse_frame(self, file_content: Union[bytes, BinaryIO], filename: Optional[str] = None) -> ParsedLogs:
+        """
+        Parse Excel/CSV file into a typed DataFrame (no per-row Python loop)
+
+        Rows without Date or Employee are skipped; rows whose date/time cannot
+        be parsed are reported in `errors`.
+        """
+        results = list(self.iter_chunks(file_content, filename))
+
+        if not results:
+            return self._parse_chunk(pd.DataFrame(columns=["Date", "Time", "Employee"]))
+
+        parsed = ParsedLogs(
+            logs=pd.concat([r.logs for r in results], ignore_index=True),
+            errors=pd.concat([r.errors for r in results], ignore_index=True)
+        )
+        if len(parsed.errors):
+            logger.warning(
+                f"Skipped {len(parsed.errors)} rows with invalid date/time "
+                f"(first: row {parsed.errors['row'].iloc[0]})"
+            )
+        return parsed
+
+    def iter_chunks(self, file_content: Union[bytes, BinaryIO], filename: Optional[str] = None) -> Iterator[ParsedLogs]:
+        """
+        Parse Excel/CSV file chunk by chunk (generator)
+
+        `file_content` is the raw content or a binary file object (e.g. the
+        spooled upload). CSV files (by extension) and .xlsx workbooks are
+        read in chunks of CSV_CHUNK_SIZE rows so memory stays flat whatever
+        the file size; legacy .xls workbooks are read at once.
+        """
+        source = BytesIO(file_content) if isinstance(file_content, bytes) else file_content
+        name = (filename or "").lower()
+
         try:
-            df = pd.read_excel(BytesIO(file_content))
-            logs = []
-            
-            # Normalize column names
-            df.columns = [c.strip() for c in df.columns]
-            
-            required_cols = ['Date', 'Time', 'Employee']
-            missing_cols = [c for c in required_cols if c not in df.columns]
-            
-            if missing_cols:
-                raise ValueError(f"Colonnes manquantes: {', '.join(missing_cols)}")
-            
-            for index, row in df.iterrows():
-                try:
-                    # Skip empty rows
-                    if pd.isna(row['Date']) or pd.isna(row['Employee']):
-                        continue
-                        
-                    # Parse Date and Time
-                    date_str = str(row['Date'])
-                    time_str = str(row['Time'])
-                    
-                    # Handle various date formats
-                    # Excel might return datetime objects or strings
-                    if isinstance(row['Date'], datetime):
-                        date_obj = row['Date'].date()
-                    else:
-                        # Try parsing DD/MM/YYYY
-                        try:
-                            date_obj = datetime.strptime(date_str.split()[0], "%d/%m/%Y").date()
-                        except ValueError:
-                            # Try YYYY-MM-DD
-                            date_obj = datetime.strptime(date_str.split()[0], "%Y-%m-%d").date()
-                            
-                    # Handle time
-                    if isinstance(row['Time'], datetime):
-                        time_obj = row['Time'].time()
-                    else:
-                        # Try HH:MM:SS
-                        try:
-                            time_obj = datetime.strptime(str(time_str), "%H:%M:%S").time()
-                        except ValueError:
-                            # Try HH:MM
-                            time_obj = datetime.strptime(str(time_str), "%H:%M").time()
-                            
-                    timestamp = datetime.combine(date_obj, time_obj)
-                    
-                    # Parse Type
-                    log_type = "EXIT" # Default
-                    if 'Type' in row and not pd.isna(row['Type']):
-                        type_val = str(row['Type']).upper()
-                        if "ENTRY" in type_val or "ENTRÉE" in type_val or "IN" in type_val:
-                            log_type = "ENTRY"
-                        elif "EXIT" in type_val or "SORTIE" in type_val or "OUT" in type_val:
-                            log_type = "EXIT"
-                        # If just "Face", maybe assume based on time? 
-                        # For now default to EXIT if unknown, but maybe "Face" means check time?
-                        # The user sample had "Type" column.
-                    
-                    # Parse Photo (Column F / Index 5)
-                    has_photo = None
-                    # Try by name first
-                    if 'Photo' in row:
-                        has_photo = str(row['Photo']) if not pd.isna(row['Photo']) else None
-                    elif 'Presence Photo' in row:
-                        has_photo = str(row['Presence Photo']) if not pd.isna(row['Presence Photo']) else None
-                    else:
-                        # Try by index (F is 5th index, 0-based is 5)
-                        try:
-                            val = df.iloc[index, 5]
-                            has_photo = str(val) if not pd.isna(val) else None
-                        except IndexError:
-                            pass
-
-                    # Generate ID
-                    log_id = f"excel_{timestamp.strftime('%Y%m%d%H%M%S')}_{index}"
-                    
-                    logs.append({
-                        "id": log_id,
-                        "employee_name": str(row['Employee']).strip(),
-                        "timestamp": timestamp.isoformat(),
-                        "type": log_type,
-                        "source": "excel",
-                        "has_photo": has_photo
-                    })
-                    
-                except Exception as e:
-                    logger.warning(f"Skipping row {index}: {e}")
-                    continue
-            
-            return logs
-            
+            if name.endswith(".csv"):
+                frames = pd.read_csv(source, chunksize=CSV_CHUNK_SIZE, dtype=str)
+            elif name.endswith(".xls"):
+                frames = iter([pd.read_excel(source)])
+            else:
+                frames = _xlsx_frames(source, CSV_CHUNK_SIZE)
+
+            for frame in frames:
+                yield self._parse_chunk(frame)
         except Exception as e:
             logger.error(f"Error parsing Excel: {e}")
             raise ValueError(f"Erreur lors de la lecture du fichier Excel: {str(e)}")
+
+    def _parse_chunk(self, df: pd.DataFrame) -> ParsedLogs:
+        """Parse one frame (whole Excel sheet or CSV chunk); keeps the file row index"""
+        # Normalize column names
+        df.columns = [str(c).strip() for c in df.columns]
+
+        required_cols = ['Date', 'Time', 'Employee']
+        missing_cols = [c for c in required_cols if c not in df.columns]
+
+        if missing_cols:
+            raise ValueError(f"Colonnes manquantes: {', '.join(missing_cols)}")
+
+        # Skip empty rows
+        df = df[df['Date'].notna() & df['Employee'].notna()]
+
+        timestamps = _parse_dates(df['Date']) + _parse_times(df['Time'])
+        valid = timestamps.notna()
+
+        errors = pd.DataFrame({
+            "row": df.index[~valid],
+            "error": "Date ou heure invalide"
+        })
+
+        df = df[valid]
+        timestamps = timestamps[valid]
+
+        # Type: ENTRY if the label mentions an entry, EXIT otherwise (default)
+        if 'Type' in df.columns:
+            labels = df['Type'].astype(str).str.upper().where(df['Type'].notna(), "")
+            log_type = np.where(labels.str.contains(ENTRY_PATTERN, regex=True), "ENTRY", "EXIT")
+        else:
+            log_type = "EXIT"
+
+        # Photo: named column first, then column F
+        if 'Photo' in df.columns:
+            photo = df['Photo']
+        elif 'Presence Photo' in df.columns:
+            photo = df['Presence Photo']
+        elif df.shape[1] > PHOTO_COLUMN_INDEX:
+            photo = df.iloc[:, PHOTO_COLUMN_INDEX]
+        else:
+            photo = pd.Series(None, index=df.index, dtype=object)
+        has_photo = photo.astype(str).astype(object).where(photo.notna(), None)
+
+        # Generate ID
+        ids = "excel_" + timestamps.dt.strftime("%Y%m%d%H%M%S") + "_" + df.index.astype(str)
+
+        logs = pd.DataFrame({
+            "id": ids,
+            "employee_name": df['Employee'].astype(str).str.strip(),
+            "timestamp": timestamps,
+            "type": log_type,
+            "source": "excel",
+            "has_photo": has_photo
+        }, index=df.index)
+
+        return ParsedLogs(logs=logs, errors=errors)
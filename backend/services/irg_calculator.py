@@ -1,99 +1,333 @@
-from decimal import Decimal
+from decimal import Decimal, ROUND_FLOOR, ROUND_HALF_UP
+from bisect import bisect_right
+import hashlib
+import numpy as np
 import openpyxl
 import os
 import logging
-from typing import List, Tuple, Optional
+import threading
+import time
+from typing import Iterable, List, Tuple, Optional
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 # Configuration du logging
 logger = logging.getLogger(__name__)
 
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+FICHIER_IRG = os.path.join(DATA_DIR, 'irg.xlsx')
+# Copie pré-parsée du fichier Excel (évite le parse openpyxl au démarrage de chaque worker)
+FICHIER_CACHE_IRG = os.path.join(DATA_DIR, 'irg_bareme.cache.npz')
+# Incrémenté quand la conversion en centimes change (invalide les copies existantes)
+FORMAT_CACHE_IRG = 2
+
+VERSION_VIDE = "vide"
+
+
+def _en_centimes(montant, arrondi=ROUND_FLOOR) -> int:
+    """
+    Convertir un montant en centimes entiers
+
+    Salaires: arrondi inférieur (comparaison exacte avec des seuils au centime).
+    Seuils et montants du barème: arrondi au plus proche (ROUND_HALF_UP, comme
+    l'arrondi au centime de l'IRG), pour qu'un seuil non rond ne bascule pas
+    un salaire dans la tranche voisine.
+    """
+    return int((Decimal(str(montant)) * 100).to_integral_value(arrondi))
+
+
+class BaremeIndex:
+    """
+    Barème IRG indexé: tableaux parallèles triés (seuils / montants en centimes)
+
+    Immuable une fois construit: un rechargement crée un nouvel index puis
+    remplace la référence en une seule affectation (les calculs en cours
+    continuent sur l'ancien index).
+    """
+
+    def __init__(self, seuils_centimes, montants_centimes, version: str = VERSION_VIDE, source: str = "aucune"):
+        self.seuils_array = np.asarray(seuils_centimes, dtype=np.int64)
+        self.montants_array = np.asarray(montants_centimes, dtype=np.int64)
+        self.seuils_centimes: List[int] = self.seuils_array.tolist()
+        self.montants_centimes: List[int] = self.montants_array.tolist()
+        self.version = version
+        self.source = source
+
+        # Si tous les seuils sont espacés d'un pas constant (cas du fichier
+        # irg.xlsx: pas de 10 DA), la recherche se fait par calcul direct de
+        # l'indice; sinon par dichotomie.
+        self.pas_centimes: Optional[int] = None
+        if len(self.seuils_centimes) >= 2:
+            ecarts = np.diff(self.seuils_array)
+            if ecarts[0] > 0 and np.all(ecarts == ecarts[0]):
+                self.pas_centimes = int(ecarts[0])
+
+    @classmethod
+    def depuis_bareme(cls, bareme: List[Tuple[Decimal, Decimal]], version: str = VERSION_VIDE, source: str = "aucune"):
+        """Construire l'index depuis une liste de tuples (seuil, montant)"""
+        bareme = sorted(bareme, key=lambda x: x[0])
+        return cls(
+            [_en_centimes(seuil, ROUND_HALF_UP) for seuil, _ in bareme],
+            [_en_centimes(montant, ROUND_HALF_UP) for _, montant in bareme],
+            version,
+            source
+        )
+
+    def __len__(self):
+        return len(self.seuils_centimes)
+
+    def indice_tranche(self, salaire_centimes: int) -> int:
+        """
+        Indice de la dernière tranche dont le seuil est <= salaire
+        -1 si le salaire est inférieur au premier seuil
+        """
+        if self.pas_centimes:
+            if salaire_centimes < self.seuils_centimes[0]:
+                return -1
+            indice = (salaire_centimes - self.seuils_centimes[0]) // self.pas_centimes
+            return min(indice, len(self.seuils_centimes) - 1)
+        return bisect_right(self.seuils_centimes, salaire_centimes) - 1
+
+
 class IRGCalculator:
     """
-    Calculateur IRG basé sur un fichier Excel (Legacy Mode v2.4.2)
-    Bypasse la base de données pour une stabilité maximale.
+    Calculateur IRG avec barème versionné et rechargement à chaud
+
+    Source du barème:
+    - table irg_bareme (lignes actives), si un barème y a été importé
+    - sinon fichier data/irg.xlsx (Legacy Mode v2.4.2)
+
+    La version active (révision de la table ou empreinte du fichier) est
+    vérifiée au plus toutes les INTERVALLE_VERIFICATION secondes; le barème
+    est rechargé paresseusement dès qu'elle change.
     """
     _instance = None
-    _bareme_cache = []
-    _last_load_time = None
+    _index = BaremeIndex([], [])
+    _lock = threading.Lock()
+    _derniere_verification = 0.0
+    _empreinte_fichier: Tuple = (None, None)  # ((mtime_ns, taille), version)
+
+    INTERVALLE_VERIFICATION = 5  # secondes
 
     def __new__(cls, db: Optional[Session] = None):
         if cls._instance is None:
             cls._instance = super(IRGCalculator, cls).__new__(cls)
-            cls._instance._charger_bareme()
         return cls._instance
 
     def __init__(self, db: Optional[Session] = None):
-        # On ignore la DB ici, on utilise uniquement le fichier Excel
-        if not self._bareme_cache:
-            self._charger_bareme()
+        self.verifier_version(db)
+
+    @property
+    def version_bareme(self) -> str:
+        """Version du barème actuellement utilisé pour les calculs"""
+        return self._index.version
+
+    def verifier_version(self, db: Optional[Session] = None, forcer: bool = False):
+        """Recharger le barème si sa version a changé depuis le dernier chargement"""
+        maintenant = time.monotonic()
+        if (
+            not forcer
+            and self._index.version != VERSION_VIDE
+            and maintenant - self._derniere_verification < self.INTERVALLE_VERIFICATION
+        ):
+            return
+
+        version, source = self._version_courante(db)
+        if forcer or version != self._index.version:
+            with self._lock:
+                if forcer or version != self._index.version:
+                    self._charger_bareme(db, version, source)
+        IRGCalculator._derniere_verification = maintenant
+
+    def _version_courante(self, db: Optional[Session]) -> Tuple[str, str]:
+        """
+        Déterminer la source active du barème et sa version
+
+        Priorité: lignes actives de irg_bareme, sinon fichier irg.xlsx.
+        """
+        if db is not None:
+            try:
+                version_db = self._version_db(db)
+            except Exception as e:
+                if self._index.source == "db":
+                    logger.warning(
+                        f"Lecture révision irg_bareme impossible, barème de la base conservé "
+                        f"(version {self._index.version}): {e}"
+                    )
+                    return self._index.version, "db"
+                logger.warning(f"Lecture révision irg_bareme impossible, repli sur {FICHIER_IRG}: {e}")
+                version_db = None
+            if version_db:
+                return version_db, "db"
+        elif self._index.source == "db":
+            # Sans session on ne peut pas vérifier la table: garder le barème chargé
+            return self._index.version, "db"
+
+        return self._version_fichier(), "fichier"
 
-    def _charger_bareme(self):
-        """Charge le barème depuis le fichier Excel"""
+    def _version_db(self, db: Session) -> Optional[str]:
+        """Révision de la table irg_bareme (None si aucune ligne active)"""
+        from models import IRGBareme
+        nombre, max_id, somme = db.query(
+            func.count(IRGBareme.id),
+            func.max(IRGBareme.id),
+            func.sum(IRGBareme.montant_irg)
+        ).filter(IRGBareme.actif == True).one()
+
+        if not nombre:
+            return None
+        return f"db:{nombre}:{max_id}:{somme}"
+
+    def _version_fichier(self) -> str:
+        """Empreinte du fichier irg.xlsx (hash recalculé seulement si mtime/taille changent)"""
+        try:
+            stat = os.stat(FICHIER_IRG)
+        except OSError:
+            return VERSION_VIDE
+
+        cle = (stat.st_mtime_ns, stat.st_size)
+        cle_connue, version = IRGCalculator._empreinte_fichier
+        if cle_connue != cle:
+            with open(FICHIER_IRG, 'rb') as f:
+                version = f"xlsx:{hashlib.sha1(f.read()).hexdigest()[:16]}"
+            IRGCalculator._empreinte_fichier = (cle, version)
+        return version
+
+    def _charger_bareme(self, db: Optional[Session] = None, version: Optional[str] = None, source: Optional[str] = None):
+        """Charger le barème de la source active et remplacer l'index"""
+        if version is None:
+            version, source = self._version_courante(db)
+
+        index = None
+        if source == "db":
+            try:
+                index = self._charger_depuis_db(db, version)
+            except Exception as e:
+                logger.warning(f"Chargement irg_bareme impossible, repli sur {FICHIER_IRG}: {e}")
+                version = self._version_fichier()
+
+        if index is None:
+            index = self._charger_fichier_ou_vide(version)
+
+        IRGCalculator._index = index
+        logger.info(f"Barème IRG chargé: {len(index)} entrées (source {index.source}, version {index.version})")
+
+    def _charger_fichier_ou_vide(self, version: str) -> BaremeIndex:
+        """Charger irg.xlsx (ou sa copie binaire), barème vide si indisponible"""
         try:
-            file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'irg.xlsx')
-            
-            if not os.path.exists(file_path):
-                logger.error(f"Fichier IRG introuvable: {file_path}")
+            if version == VERSION_VIDE:
+                logger.error(f"Fichier IRG introuvable: {FICHIER_IRG}")
                 # Fallback sur un barème vide (évite le crash)
-                self._bareme_cache = []
-                return
-
-            wb = openpyxl.load_workbook(file_path, data_only=True)
-            sheet = wb.active
-            
-            nouveau_bareme = []
-            # Supposons que le fichier a: Col A = Salaire Min, Col B = Montant IRG
-            # On saute l'en-tête
-            for row in sheet.iter_rows(min_row=2, values_only=True):
-                if row[0] is not None and row[1] is not None:
-                    try:
-                        salaire = Decimal(str(row[0]))
-                        montant = Decimal(str(row[1]))
-                        nouveau_bareme.append((salaire, montant))
-                    except Exception:
-                        continue
-
-            self._bareme_cache = sorted(nouveau_bareme, key=lambda x: x[0])
-            logger.info(f"Barème IRG chargé: {len(self._bareme_cache)} entrées")
+                return BaremeIndex([], [])
+            return self._charger_cache_binaire(version) or self._charger_depuis_fichier(version)
         except Exception as e:
             logger.error(f"Erreur chargement IRG: {e}")
-            self._bareme_cache = []
+            return BaremeIndex([], [])
+
+    def _charger_depuis_db(self, db: Session, version: str) -> BaremeIndex:
+        """Charger les tranches actives de la table irg_bareme"""
+        from models import IRGBareme
+        lignes = db.query(IRGBareme.salaire, IRGBareme.montant_irg).filter(
+            IRGBareme.actif == True
+        ).order_by(IRGBareme.salaire, IRGBareme.id).all()
+
+        return BaremeIndex.depuis_bareme(
+            [(Decimal(str(salaire)), Decimal(str(montant))) for salaire, montant in lignes],
+            version,
+            "db"
+        )
+
+    def _charger_depuis_fichier(self, version: str) -> BaremeIndex:
+        """Parser irg.xlsx avec openpyxl puis écrire la copie binaire"""
+        wb = openpyxl.load_workbook(FICHIER_IRG, data_only=True, read_only=True)
+        sheet = wb.active
+
+        nouveau_bareme = []
+        # Supposons que le fichier a: Col A = Salaire Min, Col B = Montant IRG
+        # On saute l'en-tête
+        for row in sheet.iter_rows(min_row=2, values_only=True):
+            if len(row) >= 2 and row[0] is not None and row[1] is not None:
+                try:
+                    salaire = Decimal(str(row[0]))
+                    montant = Decimal(str(row[1]))
+                    nouveau_bareme.append((salaire, montant))
+                except Exception:
+                    continue
+        wb.close()
+
+        index = BaremeIndex.depuis_bareme(nouveau_bareme, version, "fichier")
+        self._ecrire_cache_binaire(index)
+        return index
+
+    def _charger_cache_binaire(self, version: str) -> Optional[BaremeIndex]:
+        """Charger la copie pré-parsée si elle correspond à la version du fichier"""
+        if not os.path.exists(FICHIER_CACHE_IRG):
+            return None
+        try:
+            with np.load(FICHIER_CACHE_IRG) as cache:
+                if "format" not in cache.files or int(cache["format"]) != FORMAT_CACHE_IRG:
+                    return None
+                if str(cache["version"]) != version:
+                    return None
+                return BaremeIndex(cache["seuils"], cache["montants"], version, "fichier")
+        except Exception as e:
+            logger.warning(f"Cache IRG illisible, relecture du fichier Excel: {e}")
+            return None
+
+    def _ecrire_cache_binaire(self, index: BaremeIndex):
+        """Écrire la copie binaire de façon atomique (fichier temporaire + rename)"""
+        tmp_path = f"{FICHIER_CACHE_IRG}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(
+                    f,
+                    seuils=index.seuils_array,
+                    montants=index.montants_array,
+                    version=np.array(index.version),
+                    format=np.array(FORMAT_CACHE_IRG)
+                )
+            os.replace(tmp_path, FICHIER_CACHE_IRG)
+        except Exception as e:
+            logger.warning(f"Impossible d'écrire le cache IRG: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
     def calculer_irg(self, salaire_imposable):
-        if not self._bareme_cache:
+        index = self._index
+        if not len(index):
             return Decimal(0)
 
-        salaire = Decimal(salaire_imposable)
-        
-        # Le barème est une liste de tuples (seuil_salaire, montant_irg)
+        # Le barème est indexé en tableaux parallèles (seuil_salaire, montant_irg)
         # Ex: (30000, 0), (30010, 10), ..., (40000, 2500)
-        # On cherche la ligne où notre salaire est >= seuil
-        # En général dans le fichier irg.xlsx algérien "simplifié" (2 colonnes):
-        # Col A = Salaire, Col B = Retenue
-        # C'est une correspondance directe ou par palier.
-        # Si c'est un barème par tranche (barème 2020+), le fichier contient souvent le MONTANT EXACT de la retenue pour chaque salaire (par pas de 10 DA).
-        
-        # Recherche dichotomique ou linéaire optimisée
-        # Puisque le fichier contient des milliers de lignes (pas de 10 DA), on cherche la valeur la plus proche inférieure ou égale.
-        
-        # Optimisation: parcourir
-        # Si le fichier est un barème "complet" (tous les salaires listés), on prend la correspondance exacte ou la plus proche inférieure.
-        
-        tranche_trouvee = (Decimal(0), Decimal(0))
-        
-        # On parcourt pour trouver le palier immediately infra ou égal
-        # Comme c'est trié, on peut s'arrêter quand on dépasse
-        for seuil, montant in self._bareme_cache:
-            if seuil <= salaire:
-                tranche_trouvee = (seuil, montant)
-            else:
-                break
-                
-        return tranche_trouvee[1]
-
-    def recharger_bareme(self):
-        self._charger_bareme()
+        # On cherche le palier immédiatement inférieur ou égal au salaire
+        indice = index.indice_tranche(_en_centimes(salaire_imposable))
+        if indice < 0:
+            return Decimal(0)
+
+        return Decimal(index.montants_centimes[indice]).scaleb(-2)
+
+    def calculer_irg_batch(self, salaires: Iterable) -> List[Decimal]:
+        """
+        Calculer l'IRG d'une liste de salaires imposables en une seule passe
+        (recherche vectorisée sur le barème). Même résultat que calculer_irg
+        appliqué à chaque salaire; utilisé par le calcul des salaires en masse.
+        """
+        index = self._index
+        salaires_centimes = np.array(
+            [_en_centimes(salaire) for salaire in salaires],
+            dtype=np.int64
+        )
+
+        if not len(index) or salaires_centimes.size == 0:
+            return [Decimal(0)] * int(salaires_centimes.size)
+
+        indices = np.searchsorted(index.seuils_array, salaires_centimes, side="right") - 1
+        montants = np.where(indices >= 0, index.montants_array[np.maximum(indices, 0)], 0)
+
+        return [Decimal(int(montant)).scaleb(-2) for montant in montants]
+
+    def recharger_bareme(self, db: Optional[Session] = None):
+        self.verifier_version(db, forcer=True)
 
 def get_irg_calculator(db: Session = None) -> IRGCalculator:
     return IRGCalculator(db)
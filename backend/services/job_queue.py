@@ -0,0 +1,328 @@
+"""
+File de jobs en arrière-plan
+
+Les traitements longs (bulletins de paie, sauvegarde batch des salaires) sont
+exécutés hors de la requête HTTP par un pool de threads:
+
+- soumettre() crée la ligne jobs (statut en_attente) et retourne son id
+- un thread du pool prend le job en charge (UPDATE atomique en_attente ->
+  en_cours: un seul worker uvicorn l'exécute), ouvre sa propre session et
+  appelle le traitement enregistré pour ce type de job
+- le traitement signale sa progression employé par employé; l'annulation
+  est vérifiée à chaque signalement
+- le fichier résultat est écrit dans data/jobs/<id>/ et téléchargé ensuite
+  via /api/jobs/<id>/telecharger
+
+Les traitements s'enregistrent avec le décorateur @traitement_job("type").
+"""
+
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+import database
+from config import settings
+from models import Job, StatutJob
+from models.job import STATUTS_FINAUX
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'jobs')
+
+# type_job -> traitement(db, parametres, contexte) -> {"contenu", "nom_fichier", "media_type"}
+_TRAITEMENTS: Dict[str, Callable] = {}
+
+
+class JobAnnule(Exception):
+    """Levée dans un traitement quand l'annulation du job a été demandée"""
+
+
+def traitement_job(type_job: str):
+    """Décorateur: enregistrer le traitement exécuté pour un type de job"""
+    def decorateur(fonction: Callable) -> Callable:
+        _TRAITEMENTS[type_job] = fonction
+        return fonction
+    return decorateur
+
+
+def _identifiant_worker() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _processus_actif(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class ContexteJob:
+    """
+    Passé au traitement: signalement de la progression et de l'annulation
+
+    La progression est écrite dans une session dédiée (la session du
+    traitement peut contenir des modifications non encore validées), au plus
+    une fois par INTERVALLE_ECRITURE secondes.
+    """
+    INTERVALLE_ECRITURE = 1.0  # secondes
+
+    def __init__(self, job_id: str, annulation: threading.Event, session_factory: Callable[[], Session]):
+        self.job_id = job_id
+        self._annulation = annulation
+        self._session_factory = session_factory
+        self._derniere_ecriture = 0.0
+
+    def progression(self, fait: int, total: int, message: Optional[str] = None):
+        """Signaler l'avancement (employés traités / total); lève JobAnnule si annulé"""
+        self.verifier_annulation()
+
+        maintenant = time.monotonic()
+        if fait < total and maintenant - self._derniere_ecriture < self.INTERVALLE_ECRITURE:
+            return
+        self._derniere_ecriture = maintenant
+
+        db = self._session_factory()
+        try:
+            job = db.get(Job, self.job_id)
+            if job is None:
+                return
+            # Annulation demandée depuis un autre processus
+            if job.annulation_demandee:
+                self._annulation.set()
+            job.progression = fait
+            job.total = total
+            if message:
+                job.message = message[:255]
+            db.commit()
+        finally:
+            db.close()
+
+        self.verifier_annulation()
+
+    def verifier_annulation(self):
+        if self._annulation.is_set():
+            raise JobAnnule()
+
+
+class JobQueue:
+    """Pool de workers et cycle de vie des jobs"""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        session_factory: Optional[Callable[[], Session]] = None,
+        dossier: Optional[str] = None
+    ):
+        self.max_workers = max_workers or settings.JOBS_MAX_WORKERS
+        self.dossier = dossier or JOBS_DIR
+        self._session_factory = session_factory
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._annulations: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def _nouvelle_session(self) -> Session:
+        factory = self._session_factory or database.SessionLocal
+        return factory()
+
+    # ------------------------------------------------------------------
+    # API publique
+    # ------------------------------------------------------------------
+
+    def soumettre(self, db: Session, type_job: str, parametres: Dict, user_id: Optional[int] = None) -> Job:
+        """Créer un job et le confier au pool; retourne immédiatement"""
+        if type_job not in _TRAITEMENTS:
+            raise ValueError(f"Type de job inconnu: {type_job}")
+
+        job = Job(
+            id=str(uuid.uuid4()),
+            type_job=type_job,
+            statut=StatutJob.EN_ATTENTE,
+            parametres=parametres,
+            progression=0,
+            total=0,
+            annulation_demandee=False,
+            user_id=user_id,
+            created_at=datetime.now()
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        self.purger_anciens_jobs(db)
+        self._planifier(job.id)
+        return job
+
+    def annuler(self, db: Session, job: Job) -> Job:
+        """
+        Demander l'annulation d'un job
+        - en attente: annulé immédiatement
+        - en cours: le traitement s'arrête au prochain signalement de progression
+        """
+        if job.statut in STATUTS_FINAUX:
+            return job
+
+        if job.statut == StatutJob.EN_ATTENTE:
+            job.statut = StatutJob.ANNULE
+            job.message = "Annulé avant exécution"
+            job.finished_at = datetime.now()
+        job.annulation_demandee = True
+        db.commit()
+        db.refresh(job)
+
+        evenement = self._annulations.get(job.id)
+        if evenement is not None:
+            evenement.set()
+        return job
+
+    def chemin_resultat(self, job: Job) -> Optional[str]:
+        """Chemin du fichier résultat s'il est disponible"""
+        if job.statut != StatutJob.TERMINE or not job.fichier_resultat:
+            return None
+        if not os.path.exists(job.fichier_resultat):
+            return None
+        return job.fichier_resultat
+
+    def purger_anciens_jobs(self, db: Session):
+        """Supprimer les jobs terminés (et leurs fichiers) au-delà de la durée de rétention"""
+        limite = datetime.now() - timedelta(hours=settings.JOBS_RETENTION_HEURES)
+        anciens = db.query(Job).filter(
+            Job.statut.in_(STATUTS_FINAUX),
+            Job.finished_at < limite
+        ).all()
+        if not anciens:
+            return
+
+        for job in anciens:
+            shutil.rmtree(os.path.join(self.dossier, job.id), ignore_errors=True)
+            db.delete(job)
+        db.commit()
+
+    def reprendre_jobs(self, db: Session):
+        """
+        Au démarrage: replanifier les jobs en attente et marquer en erreur les
+        jobs en cours dont le processus (sur cette machine) n'existe plus
+        """
+        hote = socket.gethostname()
+        for job in db.query(Job).filter(Job.statut == StatutJob.EN_COURS).all():
+            hote_job, _, pid = (job.worker or "").rpartition(":")
+            if hote_job == hote and pid.isdigit() and not _processus_actif(int(pid)):
+                job.statut = StatutJob.ERREUR
+                job.erreur = "Interrompu (redémarrage du serveur)"
+                job.finished_at = datetime.now()
+        db.commit()
+
+        for (job_id,) in db.query(Job.id).filter(Job.statut == StatutJob.EN_ATTENTE).all():
+            self._planifier(job_id)
+
+    def arreter(self):
+        """Arrêter le pool (les jobs non démarrés restent en attente en base)"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    # ------------------------------------------------------------------
+    # Exécution
+    # ------------------------------------------------------------------
+
+    def _planifier(self, job_id: str):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="job"
+                )
+            self._annulations.setdefault(job_id, threading.Event())
+            self._executor.submit(self.executer, job_id)
+
+    def executer(self, job_id: str):
+        """Exécuter un job (appelé dans un thread du pool)"""
+        annulation = self._annulations.setdefault(job_id, threading.Event())
+        db = self._nouvelle_session()
+        try:
+            # Prise en charge atomique: un seul worker passe le job en cours
+            pris = db.query(Job).filter(
+                Job.id == job_id,
+                Job.statut == StatutJob.EN_ATTENTE
+            ).update({
+                Job.statut: StatutJob.EN_COURS,
+                Job.started_at: datetime.now(),
+                Job.worker: _identifiant_worker()
+            }, synchronize_session=False)
+            db.commit()
+            if not pris:
+                return
+
+            job = db.get(Job, job_id)
+            traitement = _TRAITEMENTS.get(job.type_job)
+            parametres = dict(job.parametres or {})
+            contexte = ContexteJob(job_id, annulation, self._nouvelle_session)
+
+            try:
+                if traitement is None:
+                    raise ValueError(f"Type de job inconnu: {job.type_job}")
+                contexte.verifier_annulation()
+                resultat = traitement(db, parametres, contexte)
+                chemin = self._ecrire_resultat(job_id, resultat)
+            except JobAnnule:
+                db.rollback()
+                self._terminer(db, job_id, StatutJob.ANNULE, message="Annulé")
+            except HTTPException as e:
+                db.rollback()
+                self._terminer(db, job_id, StatutJob.ERREUR, erreur=str(e.detail))
+            except Exception as e:
+                logger.exception(f"Erreur job {job_id}")
+                db.rollback()
+                self._terminer(db, job_id, StatutJob.ERREUR, erreur=str(e))
+            else:
+                self._terminer(
+                    db,
+                    job_id,
+                    StatutJob.TERMINE,
+                    message=resultat.get("message") or "Terminé",
+                    fichier_resultat=chemin,
+                    nom_fichier=resultat["nom_fichier"],
+                    media_type=resultat.get("media_type", "application/octet-stream")
+                )
+        finally:
+            db.close()
+            self._annulations.pop(job_id, None)
+
+    def _ecrire_resultat(self, job_id: str, resultat: Dict) -> str:
+        """Écrire le fichier résultat (fichier temporaire + rename)"""
+        dossier_job = os.path.join(self.dossier, job_id)
+        os.makedirs(dossier_job, exist_ok=True)
+        chemin = os.path.join(dossier_job, os.path.basename(resultat["nom_fichier"]))
+        tmp_path = f"{chemin}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(resultat["contenu"])
+        os.replace(tmp_path, chemin)
+        return chemin
+
+    def _terminer(self, db: Session, job_id: str, statut: StatutJob, **valeurs):
+        job = db.get(Job, job_id)
+        job.statut = statut
+        job.finished_at = datetime.now()
+        if statut == StatutJob.TERMINE:
+            job.progression = job.total
+        if valeurs.get("message"):
+            valeurs["message"] = valeurs["message"][:255]
+        for cle, valeur in valeurs.items():
+            setattr(job, cle, valeur)
+        db.commit()
+
+
+job_queue = JobQueue()
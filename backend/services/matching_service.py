@@ -1,80 +1,180 @@
 """
 Employee Matching Service
 Provides intelligent employee matching for attendance imports
+
+One service instance per import session: employees and mappings are loaded
+once into an in-memory index on first use, and every raw name is resolved
+only once (memo). Fuzzy scoring only runs on candidates that pass a length
+window and a character-count bound, both of which can never reject a name
+that would reach the similarity threshold.
 """
 
-from typing import Tuple, List, Optional
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Tuple, List, Optional
+import unicodedata
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from models import Employe, AttendanceEmployeeMapping
 import logging
 
 logger = logging.getLogger(__name__)
 
+MatchResult = Tuple[Optional[int], str, int, List[dict]]
+
+AUTO_MATCH_CONFIDENCE = 85
+FUZZY_THRESHOLD = 70
+MAX_ALTERNATIVES = 5
+
+
+@lru_cache(maxsize=65536)
+def normalize_name(name: str) -> str:
+    """Upper-case, accent-stripped, single-spaced name ("Hélène  Ben-Ali" -> "HELENE BEN-ALI")"""
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.upper().split())
+
+
+@lru_cache(maxsize=65536)
+def name_key(name: str) -> str:
+    """Token-sorted normalized name: same key for "Nom Prenom" and "Prenom Nom" """
+    return " ".join(sorted(normalize_name(name).split()))
+
+
+class _IndexedEmployee:
+    """Employee row with its precomputed normalized names"""
+    __slots__ = ("id", "nom", "prenom", "poste", "actif", "names", "counts")
+
+    def __init__(self, id: int, nom: str, prenom: str, poste: str, actif: bool):
+        self.id = id
+        self.nom = nom
+        self.prenom = prenom
+        self.poste = poste
+        self.actif = actif
+        # Both name orders, as compared by the fuzzy matcher
+        self.names = (
+            normalize_name(f"{nom} {prenom}"),
+            normalize_name(f"{prenom} {nom}"),
+        )
+        self.counts = Counter(self.names[0])
+
+
 class EmployeeMatchingService:
     """Service for matching attendance logs to HR employees"""
-    
+
     def __init__(self, db: Session):
         self.db = db
-    
+        self._employees: Optional[Dict[int, _IndexedEmployee]] = None
+        self._exact: Dict[str, int] = {}
+        self._mappings: Dict[int, int] = {}
+        self._by_length: List[Tuple[int, int]] = []   # (normalized length, employee id), sorted
+        self._lengths: List[int] = []
+        self._memo: Dict[Tuple[str, Optional[int]], MatchResult] = {}
+
+    def _build_index(self):
+        """Load employees and mappings once (2 queries) and build the lookup structures"""
+        rows = self.db.query(
+            Employe.id, Employe.nom, Employe.prenom, Employe.poste_travail, Employe.actif
+        ).order_by(Employe.id).all()
+
+        self._employees = {}
+        for row in rows:
+            employee = _IndexedEmployee(*row)
+            self._employees[employee.id] = employee
+            # First employee wins on homonyms (lowest id)
+            self._exact.setdefault(name_key(employee.names[0]), employee.id)
+            if employee.actif:
+                self._by_length.append((len(employee.names[0]), employee.id))
+
+        self._by_length.sort()
+        self._lengths = [length for length, _ in self._by_length]
+
+        self._mappings = {
+            attendance_id: hr_id
+            for attendance_id, hr_id in self.db.query(
+                AttendanceEmployeeMapping.attendance_employee_id,
+                AttendanceEmployeeMapping.hr_employee_id
+            ).order_by(AttendanceEmployeeMapping.id.desc()).all()
+        }
+
     def match_employee(
-        self, 
-        employee_name: str, 
+        self,
+        employee_name: str,
         attendance_employee_id: Optional[int] = None
-    ) -> Tuple[Optional[int], str, int, List[dict]]:
+    ) -> MatchResult:
         """
         Match employee using cascade strategy
-        
+
         Returns:
             (employee_id, match_method, confidence, alternatives)
         """
-        
+        if self._employees is None:
+            self._build_index()
+
+        memo_key = (employee_name, attendance_employee_id)
+        result = self._memo.get(memo_key)
+        if result is None:
+            result = self._match(employee_name, attendance_employee_id)
+            self._memo[memo_key] = result
+
+        employee_id, method, confidence, alternatives = result
+        return employee_id, method, confidence, list(alternatives)
+
+    def _match(self, employee_name: str, attendance_employee_id: Optional[int]) -> MatchResult:
         # Strategy 1: By existing mapping
         if attendance_employee_id:
-            mapping = self.db.query(AttendanceEmployeeMapping).filter(
-                AttendanceEmployeeMapping.attendance_employee_id == attendance_employee_id
-            ).first()
-            
-            if mapping:
-                return mapping.hr_employee_id, "mapping", 100, []
-        
-        # Strategy 2: Exact name match
-        search_name = employee_name.upper().strip()
-        
-        # Try "Nom Prenom"
-        employee = self.db.query(Employe).filter(
-            func.upper(func.concat(Employe.nom, ' ', Employe.prenom)) == search_name
-        ).first()
-        
-        if employee:
-            return employee.id, "exact_name", 95, []
-        
-        # Try "Prenom Nom"
-        employee = self.db.query(Employe).filter(
-            func.upper(func.concat(Employe.prenom, ' ', Employe.nom)) == search_name
-        ).first()
-        
-        if employee:
-            return employee.id, "exact_name", 95, []
-        
+            hr_employee_id = self._mappings.get(attendance_employee_id)
+            if hr_employee_id:
+                return hr_employee_id, "mapping", 100, []
+
+        # Strategy 2: Exact name match ("Nom Prenom" or "Prenom Nom")
+        employee_id = self._exact.get(name_key(employee_name or ""))
+        if employee_id:
+            return employee_id, "exact_name", 95, []
+
         # Strategy 3: Fuzzy matching
-        alternatives = self._fuzzy_match(employee_name)
-        
-        if alternatives and alternatives[0]['confidence'] >= 85:
+        alternatives = self._fuzzy_match(employee_name or "")
+
+        if alternatives and alternatives[0]['confidence'] >= AUTO_MATCH_CONFIDENCE:
             # Auto-match if confidence >= 85%
             best_match = alternatives[0]
             return best_match['id'], "fuzzy", best_match['confidence'], alternatives[1:]
         elif alternatives:
             # Return alternatives for manual selection
             return None, "none", 0, alternatives
-        
+
         # No match found
         return None, "none", 0, []
-    
-    def _fuzzy_match(self, name: str, threshold: int = 70) -> List[dict]:
+
+    def _candidates(self, search_name: str, threshold: int) -> List[_IndexedEmployee]:
+        """
+        Active employees that can reach the threshold
+
+        Levenshtein ratio = 2·M / (la + lb) where M <= min(la, lb) and M <= the
+        number of characters both names share, so candidates outside the length
+        window or with too few common characters are skipped without scoring.
+        """
+        t = threshold / 100
+        length = len(search_name)
+        if length == 0:
+            return []
+
+        low = bisect_left(self._lengths, length * t / (2 - t))
+        high = bisect_right(self._lengths, length * (2 - t) / t)
+
+        search_counts = Counter(search_name)
+        candidates = []
+        for other_length, employee_id in self._by_length[low:high]:
+            employee = self._employees[employee_id]
+            common = sum((search_counts & employee.counts).values())
+            if 2 * common >= t * (length + other_length):
+                candidates.append(employee)
+        return candidates
+
+    def _fuzzy_match(self, name: str, threshold: int = FUZZY_THRESHOLD) -> List[dict]:
         """
         Find similar employee names using Levenshtein distance
-        
+
         Returns list of {id, name, poste, confidence} sorted by confidence
         """
         try:
@@ -82,45 +182,43 @@ class EmployeeMatchingService:
         except ImportError:
             logger.warning("python-Levenshtein not installed, fuzzy matching disabled")
             return []
-        
-        employees = self.db.query(Employe).filter(Employe.actif == True).all()
+
+        if self._employees is None:
+            self._build_index()
+
+        search_name = normalize_name(name)
         matches = []
-        
-        search_name = name.upper().strip()
-        
-        for emp in employees:
-            emp_name_1 = f"{emp.nom} {emp.prenom}".upper()
-            emp_name_2 = f"{emp.prenom} {emp.nom}".upper()
-            
+
+        for emp in self._candidates(search_name, threshold):
             # Calculate similarity for both name orders
-            similarity_1 = ratio(search_name, emp_name_1) * 100
-            similarity_2 = ratio(search_name, emp_name_2) * 100
-            
-            confidence = int(max(similarity_1, similarity_2))
-            
+            confidence = int(max(ratio(search_name, emp.names[0]), ratio(search_name, emp.names[1])) * 100)
+
             if confidence >= threshold:
                 matches.append({
                     'id': emp.id,
                     'name': f"{emp.nom} {emp.prenom}",
-                    'poste': emp.poste_travail,
+                    'poste': emp.poste,
                     'confidence': confidence
                 })
-        
+
         # Sort by confidence descending
         matches.sort(key=lambda x: x['confidence'], reverse=True)
-        
-        return matches[:5]  # Return top 5 matches
-    
+
+        return matches[:MAX_ALTERNATIVES]  # Return top 5 matches
+
     def get_employee_details(self, employee_id: int) -> Optional[dict]:
         """Get employee details for display"""
-        employee = self.db.query(Employe).filter(Employe.id == employee_id).first()
-        
+        if self._employees is None:
+            self._build_index()
+
+        employee = self._employees.get(employee_id)
+
         if not employee:
             return None
-        
+
         return {
             'id': employee.id,
             'name': f"{employee.nom} {employee.prenom}",
-            'poste': employee.poste_travail,
+            'poste': employee.poste,
             'actif': employee.actif
         }
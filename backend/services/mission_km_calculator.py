@@ -1,17 +1,33 @@
 """
 Service de calcul des primes kilométriques pour missions multi-clients
 """
+from collections import defaultdict
+from datetime import date
 from decimal import Decimal
-from typing import List, Dict
+from typing import List, Dict, Optional
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
-from models import Mission, MissionClientDetail, ParametresSalaire
+from models import Client, Mission, MissionClientDetail, ParametresSalaire
+
+# Missions par requête UPDATE du recalcul en lot
+TAILLE_LOT = 500
+
+
+def lire_km_supplementaire(db: Session) -> int:
+    """Km supplémentaires par client additionnel (parametres_salaire, 10 par défaut)"""
+    params = db.query(ParametresSalaire).first()
+    if not params:
+        # Valeur par défaut si pas de paramètres
+        return 10
+    return params.km_supplementaire_par_client
 
 
 def calculer_km_mission_multi_clients(
     clients_km: List[Dict[str, any]],
     tarif_km: Decimal,
-    db: Session
+    db: Session,
+    km_supplementaire: Optional[int] = None
 ) -> Dict[str, any]:
     """
     Calcule la prime kilométrique pour une mission multi-clients.
@@ -25,6 +41,7 @@ def calculer_km_mission_multi_clients(
         clients_km: Liste de dicts avec {client_id, distance_km}
         tarif_km: Tarif kilométrique en DA/km
         db: Session SQLAlchemy
+        km_supplementaire: Km par client additionnel déjà lu (sinon lu dans parametres_salaire)
     
     Returns:
         Dict avec {
@@ -54,12 +71,8 @@ def calculer_km_mission_multi_clients(
     """
     
     # Récupérer km_supplementaire depuis parametres_salaire
-    params = db.query(ParametresSalaire).first()
-    if not params:
-        # Valeur par défaut si pas de paramètres
-        km_supplementaire = 10
-    else:
-        km_supplementaire = params.km_supplementaire_par_client
+    if km_supplementaire is None:
+        km_supplementaire = lire_km_supplementaire(db)
     
     # Validation
     if not clients_km or len(clients_km) == 0:
@@ -156,3 +169,125 @@ def recalculer_prime_mission(mission_id: int, db: Session) -> Mission:
     db.refresh(mission)
     
     return mission
+
+
+def recalculer_primes_missions(
+    db: Session,
+    date_debut: Optional[date] = None,
+    date_fin: Optional[date] = None,
+    chauffeur_id: Optional[int] = None,
+    simulation: bool = False
+) -> Dict[str, any]:
+    """
+    Recalcule en lot distance et prime des missions d'une période et/ou d'un chauffeur.
+    
+    Même règle que recalculer_prime_mission, avec le tarif/km actuel du client
+    principal et le km_supplementaire_par_client actuel: à lancer après un
+    changement de tarif ou de paramètres, avant la paie du mois.
+    
+    Paramètres, missions (+ tarif client) et distances des clients sont lus en
+    trois requêtes quel que soit le nombre de missions; seules les missions
+    modifiées sont réécrites, par UPDATE groupés (sans commit).
+    
+    Args:
+        db: Session SQLAlchemy
+        date_debut: Première date de mission incluse
+        date_fin: Dernière date de mission incluse
+        chauffeur_id: Limiter aux missions de ce chauffeur
+        simulation: Calculer l'écart sans rien écrire
+    
+    Returns:
+        Dict avec {
+            missions_analysees: int,
+            missions_modifiees: int,
+            total_avant: float,
+            total_apres: float,
+            ecart: float,
+            modifications: [{mission_id, date_mission, chauffeur_id,
+                             distance_avant, distance_apres, tarif_km_avant, tarif_km_apres,
+                             prime_avant, prime_apres}]
+        }
+    """
+    filtres = []
+    if date_debut:
+        filtres.append(Mission.date_mission >= date_debut)
+    if date_fin:
+        filtres.append(Mission.date_mission <= date_fin)
+    if chauffeur_id:
+        filtres.append(Mission.chauffeur_id == chauffeur_id)
+    
+    km_supplementaire = lire_km_supplementaire(db)
+    
+    missions = db.query(
+        Mission.id,
+        Mission.date_mission,
+        Mission.chauffeur_id,
+        Mission.distance,
+        Mission.tarif_km,
+        Mission.prime_calculee,
+        Client.tarif_km.label("tarif_client")
+    ).outerjoin(
+        Client, Client.id == Mission.client_id
+    ).filter(*filtres).order_by(Mission.date_mission, Mission.id).all()
+    
+    # Distances des clients (entrées sans distance ignorées), dans l'ordre de saisie
+    clients_km = defaultdict(list)
+    details = db.query(
+        MissionClientDetail.mission_id,
+        MissionClientDetail.client_id,
+        MissionClientDetail.distance_km
+    ).join(
+        Mission, Mission.id == MissionClientDetail.mission_id
+    ).filter(
+        *filtres, MissionClientDetail.distance_km > 0
+    ).order_by(MissionClientDetail.id)
+    for mission_id, client_id, distance_km in details:
+        clients_km[mission_id].append({"client_id": client_id, "distance_km": float(distance_km)})
+    
+    centime = Decimal("0.01")
+    modifications, lignes = [], []
+    total_avant = total_apres = Decimal("0")
+    for mission in missions:
+        tarif_km = mission.tarif_client if mission.tarif_client is not None else mission.tarif_km
+        distance = mission.distance
+        if clients_km[mission.id]:
+            resultat = calculer_km_mission_multi_clients(
+                clients_km=clients_km[mission.id],
+                tarif_km=tarif_km,
+                db=db,
+                km_supplementaire=km_supplementaire
+            )
+            distance = Decimal(str(resultat["distance_calculee"]))
+        # Sinon ancien système: distance de la mission conservée
+        prime = (distance * tarif_km).quantize(centime)
+        
+        prime_avant = mission.prime_calculee or Decimal("0")
+        total_avant += prime_avant
+        total_apres += prime
+        if (distance, tarif_km, prime) == (mission.distance, mission.tarif_km, prime_avant):
+            continue
+        lignes.append({"id": mission.id, "distance": distance, "tarif_km": tarif_km, "prime_calculee": prime})
+        modifications.append({
+            "mission_id": mission.id,
+            "date_mission": mission.date_mission,
+            "chauffeur_id": mission.chauffeur_id,
+            "distance_avant": float(mission.distance),
+            "distance_apres": float(distance),
+            "tarif_km_avant": float(mission.tarif_km),
+            "tarif_km_apres": float(tarif_km),
+            "prime_avant": float(prime_avant),
+            "prime_apres": float(prime)
+        })
+    
+    if not simulation:
+        for debut in range(0, len(lignes), TAILLE_LOT):
+            db.execute(update(Mission), lignes[debut:debut + TAILLE_LOT])
+    
+    return {
+        "missions_analysees": len(missions),
+        "missions_modifiees": len(modifications),
+        "total_avant": float(total_avant),
+        "total_apres": float(total_apres),
+        "ecart": float(total_apres - total_avant),
+        "modifications": modifications
+    }
@@ -4,6 +4,7 @@ from models import Mission, MissionClientDetail, MissionLogisticsMovement, Clien
 from schemas.mission import MissionCreate, MissionClientDetailCreate
 from decimal import Decimal
 from services.mission_km_calculator import calculer_km_mission_multi_clients
+from services.soldes_logistiques import EcartsLogistiques
 
 class MissionService:
     def __init__(self, db: Session):
@@ -88,6 +89,11 @@ class MissionService:
             )
             self.db.add(default_detail)
 
+        # 6. Soldes logistiques des clients
+        ecarts = EcartsLogistiques(self.db)
+        ecarts.ajouter_saisie(mission_in.clients)
+        ecarts.ecrire()
+
         self.db.commit()
         self.db.refresh(db_mission)
         return db_mission
@@ -156,6 +162,11 @@ class MissionService:
                     db_mission.prime_calculee = client.distance * client.tarif_km
 
         # Update Details: Full Replace Strategy for simplicity
+        # Soldes logistiques: anciens mouvements retirés, nouveaux ajoutés
+        ecarts = EcartsLogistiques(self.db)
+        ecarts.retirer_missions([mission_id])
+        ecarts.ajouter_saisie(mission_in.clients)
+
         # Delete existing details
         self.db.query(MissionClientDetail).filter(MissionClientDetail.mission_id == mission_id).delete()
         
@@ -171,6 +182,20 @@ class MissionService:
             )
             self.db.add(default_detail)
 
+        ecarts.ecrire()
         self.db.commit()
         self.db.refresh(db_mission)
         return db_mission
+
+    def delete_mission(self, mission_id: int):
+        db_mission = self.db.get(Mission, mission_id)
+        if not db_mission:
+            raise HTTPException(status_code=404, detail="Mission non trouvée")
+
+        # Soldes logistiques: mouvements de la mission retirés
+        ecarts = EcartsLogistiques(self.db)
+        ecarts.retirer_missions([mission_id])
+        ecarts.ecrire()
+
+        self.db.delete(db_mission)
+        self.db.commit()
@@ -0,0 +1,322 @@
+"""
+Cache disque des PDF générés (attestations, titres de congé, ordres de mission, rapports)
+
+- Clé = SHA-256 des données d'entrée du PDF (dictionnaire sérialisé de façon
+  canonique) + type de document + jour de génération (les documents portent
+  la date du jour). Les mêmes données donnent donc le même fichier.
+- La clé sert aussi d'ETag: le frontend renvoie If-None-Match et reçoit un
+  304 sans téléchargement si rien n'a changé.
+- Taille totale bornée (PDF_CACHE_MAX_MO): éviction des entrées les moins
+  récemment utilisées.
+- Chaque entrée porte des tags (ex: "employe:12", "periode:2025:3"); un
+  commit qui modifie les lignes correspondantes supprime les entrées taguées
+  (libère l'espace: la fraîcheur est déjà garantie par la clé).
+
+L'index (taille, dernier accès, tags) est une base SQLite dans le dossier du
+cache: partagée entre les workers uvicorn sans configuration.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+from enum import Enum
+from io import BytesIO
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, Optional, Set, Union
+
+from fastapi import Request, Response
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+PDF_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'pdf_cache')
+
+# Invalide toutes les entrées lors d'un changement de mise en page des PDF
+VERSION_GABARITS = 1
+
+
+def _serialiser(valeur):
+    """Sérialisation JSON des types non natifs (Decimal, dates, enums, ...)"""
+    if isinstance(valeur, Decimal):
+        return str(valeur)
+    if isinstance(valeur, Enum):
+        return valeur.value
+    if isinstance(valeur, (set, frozenset)):
+        return sorted(valeur)
+    return str(valeur)
+
+
+def colonnes(objet) -> Dict:
+    """Valeurs des colonnes d'un objet ORM (pour construire une clé de cache)"""
+    if objet is None:
+        return {}
+    return {attr.key: getattr(objet, attr.key) for attr in inspect(objet).mapper.column_attrs}
+
+
+def entreprise(db: Session) -> Dict:
+    """En-tête entreprise (table parametres) utilisé par les PDF"""
+    from models import Parametres
+    return colonnes(db.query(Parametres).first())
+
+
+def cle_cache(type_document: str, donnees: Dict) -> str:
+    """Clé (et ETag) d'un PDF: empreinte des données d'entrée"""
+    contenu = json.dumps(
+        {
+            "type": type_document,
+            "gabarit": VERSION_GABARITS,
+            "jour": date.today(),
+            "donnees": donnees,
+        },
+        sort_keys=True,
+        default=_serialiser,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(contenu.encode("utf-8")).hexdigest()
+
+
+class PDFCache:
+    """Fichiers PDF sur disque + index SQLite (taille, dernier accès, tags)"""
+
+    def __init__(self, dossier: Optional[str] = None, taille_max: Optional[int] = None):
+        self.dossier = dossier or PDF_CACHE_DIR
+        self.taille_max = taille_max if taille_max is not None else settings.PDF_CACHE_MAX_MO * 1024 * 1024
+        self._lock = threading.Lock()
+        self._initialise = False
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _connexion(self) -> Iterator[sqlite3.Connection]:
+        """Connexion à l'index (transaction validée puis fermée en sortie)"""
+        if not self._initialise:
+            os.makedirs(self.dossier, exist_ok=True)
+        connexion = sqlite3.connect(os.path.join(self.dossier, "index.sqlite"), timeout=10)
+        if not self._initialise:
+            connexion.executescript("""
+                CREATE TABLE IF NOT EXISTS entrees (
+                    cle TEXT PRIMARY KEY,
+                    taille INTEGER NOT NULL,
+                    dernier_acces REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_entrees_acces ON entrees (dernier_acces);
+                CREATE TABLE IF NOT EXISTS tags (
+                    tag TEXT NOT NULL,
+                    cle TEXT NOT NULL,
+                    PRIMARY KEY (tag, cle)
+                );
+                CREATE INDEX IF NOT EXISTS idx_tags_cle ON tags (cle);
+            """)
+            self._initialise = True
+        try:
+            with connexion:
+                yield connexion
+        finally:
+            connexion.close()
+
+    def _chemin(self, cle: str) -> str:
+        return os.path.join(self.dossier, cle[:2], f"{cle}.pdf")
+
+    # ------------------------------------------------------------------
+    # API publique
+    # ------------------------------------------------------------------
+
+    def lire(self, cle: str) -> Optional[bytes]:
+        """Contenu d'une entrée (et mise à jour de son dernier accès), None si absente"""
+        try:
+            with open(self._chemin(cle), 'rb') as f:
+                contenu = f.read()
+        except FileNotFoundError:
+            return None
+
+        try:
+            with self._lock, self._connexion() as connexion:
+                connexion.execute(
+                    "UPDATE entrees SET dernier_acces = ? WHERE cle = ?",
+                    (time.time(), cle)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Index du cache PDF indisponible: {e}")
+        return contenu
+
+    def ecrire(self, cle: str, contenu: bytes, tags: Iterable[str] = ()):
+        """Enregistrer une entrée puis évincer les plus anciennes si la taille max est dépassée"""
+        chemin = self._chemin(cle)
+        try:
+            os.makedirs(os.path.dirname(chemin), exist_ok=True)
+            tmp_path = f"{chemin}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(contenu)
+            os.replace(tmp_path, chemin)
+
+            with self._lock, self._connexion() as connexion:
+                connexion.execute(
+                    "INSERT OR REPLACE INTO entrees (cle, taille, dernier_acces) VALUES (?, ?, ?)",
+                    (cle, len(contenu), time.time())
+                )
+                connexion.executemany(
+                    "INSERT OR IGNORE INTO tags (tag, cle) VALUES (?, ?)",
+                    [(tag, cle) for tag in set(tags) | {"tous"}]
+                )
+                self._evincer(connexion)
+        except (OSError, sqlite3.Error) as e:
+            # Le cache ne doit jamais empêcher la génération du PDF
+            logger.warning(f"Écriture dans le cache PDF impossible: {e}")
+
+    def invalider(self, tags: Iterable[str]):
+        """Supprimer toutes les entrées portant l'un des tags"""
+        tags = list(set(tags))
+        if not tags or not os.path.exists(self.dossier):
+            return
+        try:
+            with self._lock, self._connexion() as connexion:
+                marqueurs = ",".join("?" * len(tags))
+                cles = [ligne[0] for ligne in connexion.execute(
+                    f"SELECT DISTINCT cle FROM tags WHERE tag IN ({marqueurs})", tags
+                )]
+                self._supprimer(connexion, cles)
+        except sqlite3.Error as e:
+            logger.warning(f"Invalidation du cache PDF impossible: {e}")
+
+    def vider(self):
+        self.invalider(["tous"])
+
+    def _evincer(self, connexion: sqlite3.Connection):
+        """Éviction LRU jusqu'à repasser sous la taille max"""
+        total = connexion.execute("SELECT COALESCE(SUM(taille), 0) FROM entrees").fetchone()[0]
+        if total <= self.taille_max:
+            return
+
+        a_supprimer = []
+        for cle, taille in connexion.execute("SELECT cle, taille FROM entrees ORDER BY dernier_acces"):
+            if total <= self.taille_max:
+                break
+            a_supprimer.append(cle)
+            total -= taille
+        self._supprimer(connexion, a_supprimer)
+
+    def _supprimer(self, connexion: sqlite3.Connection, cles):
+        for cle in cles:
+            try:
+                os.remove(self._chemin(cle))
+            except FileNotFoundError:
+                pass
+        connexion.executemany("DELETE FROM entrees WHERE cle = ?", [(cle,) for cle in cles])
+        connexion.executemany("DELETE FROM tags WHERE cle = ?", [(cle,) for cle in cles])
+
+
+pdf_cache = PDFCache()
+
+
+def reponse_pdf(
+    request: Request,
+    type_document: str,
+    donnees: Dict,
+    generer: Callable[[], Union[BytesIO, bytes]],
+    nom_fichier: str,
+    tags: Iterable[str] = (),
+    cache: Optional[PDFCache] = None
+) -> Response:
+    """
+    Réponse PDF servie depuis le cache (ou générée puis mise en cache)
+
+    donnees: toutes les entrées qui déterminent le contenu du PDF
+    generer: appelé seulement si le PDF n'est pas en cache
+    """
+    cache = cache or pdf_cache
+    cle = cle_cache(type_document, donnees)
+    etag = f'"{cle}"'
+    entetes = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if etag in [valeur.strip() for valeur in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=entetes)
+
+    contenu = cache.lire(cle)
+    if contenu is None:
+        resultat = generer()
+        contenu = resultat.getvalue() if isinstance(resultat, BytesIO) else resultat
+        cache.ecrire(cle, contenu, tags)
+
+    entetes["Content-Disposition"] = f"attachment; filename={nom_fichier}"
+    return Response(content=contenu, media_type="application/pdf", headers=entetes)
+
+
+# ----------------------------------------------------------------------
+# Invalidation sur écriture (toutes les sessions SQLAlchemy)
+# ----------------------------------------------------------------------
+
+def _tags_objet(objet) -> Set[str]:
+    """Tags des entrées de cache qui dépendent d'une ligne modifiée"""
+    from models import (
+        Employe, Conge, Mission, MissionClientDetail, MissionLogisticsMovement, Client, Camion,
+        Parametres, Pointage, Salaire, Avance, Credit, DeductionConge,
+        ParametresSalaire, IRGBareme
+    )
+
+    if isinstance(objet, Parametres):
+        return {"tous"}
+    if isinstance(objet, Employe):
+        return {f"employe:{objet.id}", "employes"}
+    if isinstance(objet, Conge):
+        return {f"conge:{objet.id}", f"employe:{objet.employe_id}"}
+    if isinstance(objet, Mission):
+        tags = {f"mission:{objet.id}"}
+        if objet.date_mission:
+            tags.add(f"periode:{objet.date_mission.year}:{objet.date_mission.month}")
+        return tags
+    if isinstance(objet, MissionClientDetail):
+        return {f"mission:{objet.mission_id}"}
+    if isinstance(objet, MissionLogisticsMovement):
+        return {f"mission_client_detail:{objet.mission_client_detail_id}"}
+    if isinstance(objet, Client):
+        return {f"client:{objet.id}"}
+    if isinstance(objet, Camion):
+        return {f"camion:{objet.id}"}
+    if isinstance(objet, (Pointage, Salaire)):
+        return {f"periode:{objet.annee}:{objet.mois}"}
+    if isinstance(objet, (Avance, DeductionConge)):
+        return {f"periode:{objet.annee_deduction}:{objet.mois_deduction}"}
+    if isinstance(objet, Credit):
+        return {"credits"}
+    if isinstance(objet, (ParametresSalaire, IRGBareme)):
+        return {"parametres_salaire"}
+    return set()
+
+
+def invalider_au_commit(session: Session, tags: Iterable[str]):
+    """Invalider des tags au prochain commit (écritures en masse hors flush ORM)"""
+    session.info.setdefault("pdf_cache_tags", set()).update(tags)
+
+
+@event.listens_for(Session, "after_flush")
+def _collecter_tags(session, flush_context):
+    tags = set()
+    for objet in list(session.new) + list(session.dirty) + list(session.deleted):
+        try:
+            tags |= _tags_objet(objet)
+        except Exception as e:
+            logger.warning(f"Tags du cache PDF indéterminés pour {objet!r}: {e}")
+    invalider_au_commit(session, tags)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalider_apres_commit(session):
+    tags = session.info.pop("pdf_cache_tags", None)
+    if tags:
+        pdf_cache.invalider(tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _oublier_tags(session):
+    session.info.pop("pdf_cache_tags", None)
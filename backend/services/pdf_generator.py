@@ -12,11 +12,22 @@ from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.utils import ImageReader
 from datetime import datetime
 from io import BytesIO
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+import os
 import qrcode
+from PyPDF2 import PdfWriter
 from sqlalchemy.orm import Session
 from models import Parametres
 
+# Bulletins combinés: rendu par lots dans un pool de processus à partir de
+# SEUIL_BULLETINS_PARALLELE employés (TAILLE_LOT_BULLETINS bulletins par lot)
+SEUIL_BULLETINS_PARALLELE = 20
+TAILLE_LOT_BULLETINS = 10
+
 
 class PDFGenerator:
     """Générateur de PDFs pour les missions"""
@@ -3535,14 +3546,150 @@ class PDFGenerator:
         buffer.seek(0)
         return buffer
 
-    def generate_tous_bulletins_combines(self, employes_data: List[Dict], periode: Dict) -> BytesIO:
+    def generate_tous_bulletins_combines(
+        self,
+        employes_data: List[Dict],
+        periode: Dict,
+        parallele: Optional[bool] = None,
+        max_workers: Optional[int] = None,
+        progression: Optional[Callable] = None
+    ) -> BytesIO:
         """
         Générer un PDF combiné contenant tous les bulletins de paie COMPLETS
         Format identique aux bulletins v1.3.0 avec tous les détails
         + Page de garde
         + Bulletins individuels complets
         + Tableau récapitulatif
+        
+        parallele: None = automatique (à partir de SEUIL_BULLETINS_PARALLELE employés),
+        les bulletins sont alors rendus par lots dans un pool de processus puis
+        fusionnés dans l'ordre de employes_data.
+        
+        progression(bulletins_rendus, total): appelée après chaque lot rendu (le
+        rendu est alors fait par lots même en séquentiel); une exception levée
+        par progression (annulation d'un job) interrompt le rendu.
         """
+        entreprise = self._entreprise_bulletins()
+        
+        if parallele is None:
+            parallele = len(employes_data) >= SEUIL_BULLETINS_PARALLELE and (os.cpu_count() or 1) > 1
+        
+        if parallele and employes_data:
+            try:
+                return self._generer_bulletins_combines_par_lots(
+                    employes_data, periode, entreprise, max_workers, progression
+                )
+            except (OSError, BrokenProcessPool) as e:
+                print(f"⚠️ Rendu parallèle des bulletins impossible, rendu séquentiel: {e}")
+        
+        if progression and employes_data:
+            return self._generer_bulletins_combines_par_lots(
+                employes_data, periode, entreprise, progression=progression, parallele=False
+            )
+        
+        buffer = BytesIO(self._rendre_bulletins_pdf(
+            employes_data, periode, entreprise, page_garde=True, bulletins=True, recapitulatif=True
+        ))
+        buffer.seek(0)
+        return buffer
+    
+    def _generer_bulletins_combines_par_lots(
+        self,
+        employes_data: List[Dict],
+        periode: Dict,
+        entreprise: Dict,
+        max_workers: Optional[int] = None,
+        progression: Optional[Callable] = None,
+        parallele: bool = True
+    ) -> BytesIO:
+        """Rendre les bulletins par lots (pool de processus si parallele) et fusionner les PDF (PyPDF2)"""
+        lots = [
+            employes_data[i:i + TAILLE_LOT_BULLETINS]
+            for i in range(0, len(employes_data), TAILLE_LOT_BULLETINS)
+        ]
+        
+        writer = PdfWriter()
+        writer.append(BytesIO(self._rendre_bulletins_pdf(
+            employes_data, periode, entreprise, page_garde=True, bulletins=False
+        )))
+        
+        rendus = 0
+        
+        def fusionner(lot: List[Dict], pdf_lot: bytes):
+            nonlocal rendus
+            writer.append(BytesIO(pdf_lot))
+            rendus += len(lot)
+            if progression:
+                progression(rendus, len(employes_data))
+        
+        if parallele:
+            max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(lots)))
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                # Fenêtre glissante: au plus 2 lots en attente par processus (mémoire bornée);
+                # fusion dans l'ordre de soumission = ordre des employés
+                lots_restants = iter(lots)
+                en_cours = deque(
+                    (lot, executor.submit(_rendre_lot_bulletins, lot, periode, entreprise))
+                    for lot in islice(lots_restants, 2 * max_workers)
+                )
+                try:
+                    while en_cours:
+                        lot, futur = en_cours.popleft()
+                        fusionner(lot, futur.result())
+                        lot = next(lots_restants, None)
+                        if lot is not None:
+                            en_cours.append((lot, executor.submit(_rendre_lot_bulletins, lot, periode, entreprise)))
+                except BaseException:
+                    # Annulation ou erreur: les lots non démarrés ne sont pas rendus
+                    for _, futur in en_cours:
+                        futur.cancel()
+                    raise
+        else:
+            for lot in lots:
+                fusionner(lot, self._rendre_bulletins_pdf(lot, periode, entreprise))
+        
+        writer.append(BytesIO(self._rendre_bulletins_pdf(
+            employes_data, periode, entreprise, bulletins=False, recapitulatif=True
+        )))
+        
+        buffer = BytesIO()
+        writer.write(buffer)
+        buffer.seek(0)
+        return buffer
+    
+    def _entreprise_bulletins(self) -> Dict:
+        """Infos entreprise des bulletins (lues une fois, transmises aux processus de rendu)"""
+        params = self._get_parametres()
+        return {
+            'nom': (params.raison_sociale or params.nom_entreprise) if params else None,
+            'adresse': params.adresse if params else None,
+            'rc': params.rc if params else None,
+            'ss_employeur': params.numero_secu_employeur if params else None,
+            'nif': params.nif if params else None,
+        }
+    
+    @staticmethod
+    def _footer_bulletins_combines(canvas, doc):
+        """Footer en pied de page des bulletins combinés"""
+        canvas.saveState()
+        canvas.setFont('Helvetica', 7)
+        canvas.setFillColor(colors.grey)
+        footer_text_1 = f"Bulletin généré le {datetime.now().strftime('%d/%m/%Y à %H:%M')}"
+        footer_text_2 = "Powered by AIRBAND"
+        canvas.drawCentredString(A4[0]/2, 1.5*cm, footer_text_1)
+        canvas.drawCentredString(A4[0]/2, 1*cm, footer_text_2)
+        canvas.restoreState()
+    
+    def _rendre_bulletins_pdf(
+        self,
+        employes_data: List[Dict],
+        periode: Dict,
+        entreprise: Dict,
+        page_garde: bool = False,
+        bulletins: bool = True,
+        recapitulatif: bool = False
+    ) -> bytes:
+        """Rendre les sections demandées du PDF combiné (une page ou plus par section)"""
         buffer = BytesIO()
         doc = SimpleDocTemplate(
             buffer,
@@ -3553,43 +3700,47 @@ class PDFGenerator:
             rightMargin=0.75*cm
         )
         
-        # Fonction pour footer en pied de page
-        def add_bulletin_footer(canvas, doc):
-            canvas.saveState()
-            canvas.setFont('Helvetica', 7)
-            canvas.setFillColor(colors.grey)
-            footer_text_1 = f"Bulletin généré le {datetime.now().strftime('%d/%m/%Y à %H:%M')}"
-            footer_text_2 = "Powered by AIRBAND"
-            canvas.drawCentredString(A4[0]/2, 1.5*cm, footer_text_1)
-            canvas.drawCentredString(A4[0]/2, 1*cm, footer_text_2)
-            canvas.restoreState()
+        date_obj = datetime(periode['annee'], periode['mois'], 1)
+        mois_str = date_obj.strftime("%B %Y").capitalize()
+        
+        sections = []
+        if page_garde:
+            sections.append(self._story_page_garde_bulletins(employes_data, entreprise, mois_str))
+        if bulletins:
+            sections.extend(
+                self._story_bulletin_combine(emp, periode, entreprise, mois_str) for emp in employes_data
+            )
+        if recapitulatif:
+            sections.append(self._story_recap_bulletins(employes_data))
         
+        # Saut de page entre chaque section
         story = []
+        for i, section in enumerate(sections):
+            if i:
+                story.append(PageBreak())
+            story.extend(section)
         
-        # 1. PAGE DE RÉSUMÉ (PAGE DE GARDE)
-        # ------------------
-        params = self._get_parametres()
-        company_name = params.raison_sociale or params.nom_entreprise or "AY HR"
-        company_address = params.adresse if params and params.adresse else "Adresse non définie"
-        company_ss_employeur = params.numero_secu_employeur if params and params.numero_secu_employeur else ""
-        company_nif = params.nif if params and params.nif else ""
+        # Générer le PDF avec footer en pied de page sur toutes les pages
+        doc.build(story, onFirstPage=self._footer_bulletins_combines, onLaterPages=self._footer_bulletins_combines)
+        return buffer.getvalue()
+    
+    def _story_page_garde_bulletins(self, employes_data: List[Dict], entreprise: Dict, mois_str: str) -> List:
+        """1. PAGE DE RÉSUMÉ (PAGE DE GARDE)"""
+        story = []
         
         # EN-TÊTE ENTREPRISE (ligne par ligne)
         header_style = ParagraphStyle('CompanyHeader', parent=self.styles['Normal'], 
                                       fontSize=11, alignment=TA_CENTER, spaceAfter=5)
         story.append(Spacer(1, 0.5*cm))
-        story.append(Paragraph(f"<b>{company_name}</b>", header_style))
-        story.append(Paragraph(company_address, header_style))
-        if company_ss_employeur:
-            story.append(Paragraph(f"N° Employeur Sécurité Sociale: {company_ss_employeur}", header_style))
-        if company_nif:
-            story.append(Paragraph(f"NIF: {company_nif}", header_style))
+        story.append(Paragraph(f"<b>{entreprise['nom'] or 'AY HR'}</b>", header_style))
+        story.append(Paragraph(entreprise['adresse'] or "Adresse non définie", header_style))
+        if entreprise['ss_employeur']:
+            story.append(Paragraph(f"N° Employeur Sécurité Sociale: {entreprise['ss_employeur']}", header_style))
+        if entreprise['nif']:
+            story.append(Paragraph(f"NIF: {entreprise['nif']}", header_style))
         story.append(Spacer(1, 1*cm))
         
         # Titre
-        date_obj = datetime(periode['annee'], periode['mois'], 1)
-        mois_str = date_obj.strftime("%B %Y").capitalize()
-        
         title_style = ParagraphStyle(
             name='CoverTitle',
             parent=self.styles['Heading1'],
@@ -3641,215 +3792,194 @@ class PDFGenerator:
         story.append(Paragraph(f"<i>Généré le: {date_generation}</i>", 
                               ParagraphStyle('DateGen', parent=self.styles['Normal'], 
                                            fontSize=9, alignment=TA_CENTER, textColor=colors.grey)))
+        return story
+    
+    def _story_bulletin_combine(self, emp: Dict, periode: Dict, entreprise: Dict, mois_str: str) -> List:
+        """2. BULLETIN INDIVIDUEL COMPLET d'un employé"""
+        story = []
+        emp_info = emp['employe_data']
+        sal_data = emp['salaire_data']
+        
+        # QR Code
+        salaire_net_format = f"{float(sal_data.get('salaire_net', 0)):,.2f}".replace(',', ' ')
+        salaire_brut_format = f"{float(sal_data.get('salaire_brut', sal_data.get('salaire_cotisable', 0))):,.2f}".replace(',', ' ')
+        qr_data = f"ID: {emp_info.get('id', '')}\n" \
+                  f"Nom: {emp_info.get('prenom', '')} {emp_info.get('nom', '')}\n" \
+                  f"Poste: {emp_info.get('poste_travail', 'N/A')}\n" \
+                  f"N°SS: {emp_info.get('numero_secu_sociale', 'N/A')}\n" \
+                  f"Date Recrutement: {emp_info.get('date_recrutement', 'N/A')}\n" \
+                  f"Mois: {periode['mois']}/{periode['annee']}\n" \
+                  f"Salaire Brut: {salaire_brut_format} DA\n" \
+                  f"Salaire Net: {salaire_net_format} DA"
         
-        story.append(PageBreak())
+        qr = qrcode.QRCode(version=1, box_size=10, border=1)
+        qr.add_data(qr_data)
+        qr.make(fit=True)
+        qr_img = qr.make_image(fill_color="black", back_color="white")
         
-        # 2. BULLETINS INDIVIDUELS COMPLETS
-        # -----------------------------------
-        for i, emp in enumerate(employes_data):
-            emp_info = emp['employe_data']
-            sal_data = emp['salaire_data']
-            
-            # Générer le bulletin complet en appelant la méthode existante
-            # Créer un buffer temporaire pour chaque bulletin
-            bulletin_buffer = self.generate_bulletin_paie(
-                emp_info, 
-                {**sal_data, 'mois': periode['mois'], 'annee': periode['annee']},
-                periode
-            )
-            
-            # Lire le PDF du bulletin et l'ajouter à notre document
-            # Note: Pour combiner les PDFs, on doit extraire les éléments
-            # Ici on va recréer le bulletin directement dans story
-            
-            # QR Code
-            salaire_net_format = f"{float(sal_data.get('salaire_net', 0)):,.2f}".replace(',', ' ')
-            salaire_brut_format = f"{float(sal_data.get('salaire_brut', sal_data.get('salaire_cotisable', 0))):,.2f}".replace(',', ' ')
-            qr_data = f"ID: {emp_info.get('id', '')}\n" \
-                      f"Nom: {emp_info.get('prenom', '')} {emp_info.get('nom', '')}\n" \
-                      f"Poste: {emp_info.get('poste_travail', 'N/A')}\n" \
-                      f"N°SS: {emp_info.get('numero_secu_sociale', 'N/A')}\n" \
-                      f"Date Recrutement: {emp_info.get('date_recrutement', 'N/A')}\n" \
-                      f"Mois: {periode['mois']}/{periode['annee']}\n" \
-                      f"Salaire Brut: {salaire_brut_format} DA\n" \
-                      f"Salaire Net: {salaire_net_format} DA"
-            
-            qr = qrcode.QRCode(version=1, box_size=10, border=1)
-            qr.add_data(qr_data)
-            qr.make(fit=True)
-            qr_img = qr.make_image(fill_color="black", back_color="white")
-            
-            qr_buffer_temp = BytesIO()
-            qr_img.save(qr_buffer_temp, format='PNG')
-            qr_buffer_temp.seek(0)
-            qr_image = Image(qr_buffer_temp, width=2*cm, height=2*cm)
-            
-            # En-tête avec QR
-            header_data = [
-                [Paragraph("<b>BULLETIN DE PAIE</b>", self.styles['CustomTitle']), qr_image]
-            ]
-            header_table = Table(header_data, colWidths=[15*cm, 3*cm])
-            header_table.setStyle(TableStyle([
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('ALIGN', (0, 0), (0, 0), 'CENTER'),
-                ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
-            ]))
-            story.append(header_table)
-            story.append(Spacer(1, 0.3*cm))
-            
-            # Période
-            periode_text = Paragraph(f"<b>Période:</b> {mois_str}", self.styles['CustomBody'])
-            story.append(periode_text)
-            story.append(Spacer(1, 0.5*cm))
-            
-            # Récupérer paramètres entreprise
-            params = self._get_parametres()
-            company_name = (params.raison_sociale or params.nom_entreprise or "Entreprise") if params else "Entreprise"
-            company_address = params.adresse if params and params.adresse else "Adresse non définie"
-            company_rc = params.rc if params and params.rc else "Non défini"
-            company_ss_employeur = params.numero_secu_employeur if params and params.numero_secu_employeur else "Non défini"
-            
-            # Tableau EMPLOYEUR et EMPLOYÉ
-            info_data = [
-                [Paragraph("<b>EMPLOYEUR</b>", self.styles['CustomBody']), '', 
-                 Paragraph("<b>EMPLOYÉ</b>", self.styles['CustomBody']), ''],
-                ['Raison Sociale:', Paragraph(company_name, self.styles['CustomBody']),
-                 'Nom:', f"{emp_info.get('prenom', '')} {emp_info.get('nom', '')}"],
-                ['RC:', company_rc,
-                 'Poste:', emp_info.get('poste_travail', '')],
-                ['N° SS EMPLOYEUR:', company_ss_employeur,
-                 'N° Sécurité Sociale:', emp_info.get('numero_secu_sociale', 'N/A')],
-                ['Adresse:', Paragraph(company_address, self.styles['CustomBody']),
-                 'Date de recrutement:', str(emp_info.get('date_recrutement', 'N/A'))],
-            ]
-            
-            info_table = Table(info_data, colWidths=[3.5*cm, 5*cm, 3.5*cm, 6*cm])
-            info_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (1, 0), colors.black),
-                ('BACKGROUND', (2, 0), (3, 0), colors.black),
-                ('TEXTCOLOR', (0, 0), (1, 0), colors.white),
-                ('TEXTCOLOR', (2, 0), (3, 0), colors.white),
-                ('FONTNAME', (0, 0), (3, 0), 'Helvetica-Bold'),
-                ('ALIGN', (0, 0), (3, 0), 'CENTER'),
-                ('FONTSIZE', (0, 0), (-1, -1), 8),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 5),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-                ('TOPPADDING', (0, 0), (-1, -1), 3),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-            ]))
-            story.append(info_table)
-            story.append(Spacer(1, 0.5*cm))
-            
-            # Tableau DÉTAILLÉ du salaire (format v1.3.0)
-            salaire_detail_data = [
-                ['DÉSIGNATION', 'BASE', 'TAUX', 'GAIN', 'RETENUE'],
-                ['Salaire de base (contrat)', 
-                 f"{float(emp_info.get('salaire_base', 0)):,.2f}".replace(',', ' '),
-                 f"{sal_data.get('jours_travailles', 0)}/{sal_data.get('jours_ouvrables', 26)} j",
-                 f"{float(sal_data.get('salaire_base_proratis', 0)):,.2f}".replace(',', ' '), ''],
-                # ⭐ LIGNE CONGÉS v3.6.1 hotfix7: affichage cohérent
-                ['Congés pris ce mois',
-                 f"{float(sal_data.get('jours_conges', 0)):.2f} j",  # Colonne BASE
-                 '',  # Colonne TAUX
-                 'Payé',  # Colonne GAIN
-                 ''],  # Colonne RETENUE
-                ['Heures supplémentaires (1.33h/j × 150%)', '', '',
-                 f"{float(sal_data.get('heures_supplementaires', 0)):,.2f}".replace(',', ' '), ''],
-                ['Indemnité de Nuisance (IN)', f"{float(emp_info.get('salaire_base', 0)):,.2f}".replace(',', ' '), '5%',
-                 f"{float(sal_data.get('indemnite_nuisance', 0)):,.2f}".replace(',', ' '), ''],
-                ['Indemnité Forfaitaire Service Permanent (IFSP)', f"{float(emp_info.get('salaire_base', 0)):,.2f}".replace(',', ' '), '5%',
-                 f"{float(sal_data.get('ifsp', 0)):,.2f}".replace(',', ' '), ''],
-                ['Indemnité Expérience Professionnelle (IEP)', f"{float(emp_info.get('salaire_base', 0)):,.2f}".replace(',', ' '), 'Ancienneté',
-                 f"{float(sal_data.get('iep', 0)):,.2f}".replace(',', ' '), ''],
-                ['Prime d\'Encouragement', '', '10%',
-                 f"{float(sal_data.get('prime_encouragement', 0)):,.2f}".replace(',', ' '), ''],
-                ['Prime Chauffeur', '', '100 DA/j',
-                 f"{float(sal_data.get('prime_chauffeur', 0)):,.2f}".replace(',', ' '), ''],
-                ['Prime de Nuit Agent Sécurité', '', '750 DA/mois',
-                 f"{float(sal_data.get('prime_nuit_agent_securite', 0)):,.2f}".replace(',', ' '), ''],
-                ['Prime de Déplacement (Missions)', '', '',
-                 f"{float(sal_data.get('prime_deplacement', 0)):,.2f}".replace(',', ' '), ''],
-                ['SALAIRE COTISABLE', '', '', 
-                 f"{float(sal_data.get('salaire_cotisable', 0)):,.2f}".replace(',', ' '), ''],
-                ['Retenue Sécurité Sociale', f"{float(sal_data.get('salaire_cotisable', 0)):,.2f}".replace(',', ' '), '9%', '',
-                 f"{float(sal_data.get('retenue_securite_sociale', 0)):,.2f}".replace(',', ' ')],
-                ['Panier (imposable non cotisable)', '', '100 DA/j',
-                 f"{float(sal_data.get('panier', 0)):,.2f}".replace(',', ' '), ''],
-                ['Prime de Transport (imposable non cotisable)', '', '100 DA/j',
-                 f"{float(sal_data.get('prime_transport', 0)):,.2f}".replace(',', ' '), ''],
-                ['SALAIRE IMPOSABLE', '', '', 
-                 f"{float(sal_data.get('salaire_imposable', 0)):,.2f}".replace(',', ' '), ''],
-                ['IRG (Impôt sur le Revenu Global)', '', 'Barème', '',
-                 f"{float(sal_data.get('irg', 0)):,.2f}".replace(',', ' ')],
-                ['Avances sur salaire', '', '', '',
-                 f"{float(sal_data.get('total_avances', 0)):,.2f}".replace(',', ' ')],
-                ['Retenue Crédit', '', '', '',
-                 f"{float(sal_data.get('retenue_credit', 0)):,.2f}".replace(',', ' ')],
-                ['Prime Femme au Foyer', '', '',
-                 f"{float(sal_data.get('prime_femme_foyer', 0)):,.2f}".replace(',', ' '), ''],
-            ]
-            
-            salaire_table = Table(salaire_detail_data, colWidths=[6*cm, 3.5*cm, 2.5*cm, 3*cm, 3*cm])
-            salaire_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.black),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 8),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
-                ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-                ('BACKGROUND', (0, 11), (-1, 11), colors.lightgrey),
-                ('FONTNAME', (0, 11), (-1, 11), 'Helvetica-Bold'),
-                ('BACKGROUND', (0, 15), (-1, 15), colors.lightgrey),
-                ('FONTNAME', (0, 15), (-1, 15), 'Helvetica-Bold'),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 5),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-            ]))
-            story.append(salaire_table)
-            story.append(Spacer(1, 0.5*cm))
-            
-            # Total final NET À PAYER
-            total_data = [
-                ['SALAIRE NET À PAYER', 
-                 f"{float(sal_data.get('salaire_net', 0)):,.2f}".replace(',', ' ') + ' DA'],
-            ]
-            total_table = Table(total_data, colWidths=[12*cm, 6*cm])
-            total_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.black),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 11),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('LEFTPADDING', (0, 0), (-1, -1), 10),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-                ('TOPPADDING', (0, 0), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ]))
-            story.append(total_table)
-            
-            # Footer bulletin - Powered by AIRBAND
-            story.append(Spacer(1, 0.5*cm))
-            footer = Paragraph(
-                f"<i>Bulletin généré le {datetime.now().strftime('%d/%m/%Y à %H:%M')}</i><br/>"
-                "<i>Powered by AIRBAND</i>",
-                ParagraphStyle('FooterInfo', parent=self.styles['Normal'], fontSize=8,
-                              textColor=colors.black, alignment=TA_CENTER)
-            )
-            story.append(footer)
-            
-            # Saut de page après chaque bulletin
-            story.append(PageBreak())
-
-        # 3. TABLEAU RÉCAPITULATIF GÉNÉRAL DÉTAILLÉ
-        # -------------------------------------------
+        qr_buffer_temp = BytesIO()
+        qr_img.save(qr_buffer_temp, format='PNG')
+        qr_buffer_temp.seek(0)
+        qr_image = Image(qr_buffer_temp, width=2*cm, height=2*cm)
+        
+        # En-tête avec QR
+        header_data = [
+            [Paragraph("<b>BULLETIN DE PAIE</b>", self.styles['CustomTitle']), qr_image]
+        ]
+        header_table = Table(header_data, colWidths=[15*cm, 3*cm])
+        header_table.setStyle(TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('ALIGN', (0, 0), (0, 0), 'CENTER'),
+            ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
+        ]))
+        story.append(header_table)
+        story.append(Spacer(1, 0.3*cm))
+        
+        # Période
+        periode_text = Paragraph(f"<b>Période:</b> {mois_str}", self.styles['CustomBody'])
+        story.append(periode_text)
+        story.append(Spacer(1, 0.5*cm))
+        
+        # Tableau EMPLOYEUR et EMPLOYÉ
+        info_data = [
+            [Paragraph("<b>EMPLOYEUR</b>", self.styles['CustomBody']), '', 
+             Paragraph("<b>EMPLOYÉ</b>", self.styles['CustomBody']), ''],
+            ['Raison Sociale:', Paragraph(entreprise['nom'] or "Entreprise", self.styles['CustomBody']),
+             'Nom:', f"{emp_info.get('prenom', '')} {emp_info.get('nom', '')}"],
+            ['RC:', entreprise['rc'] or "Non défini",
+             'Poste:', emp_info.get('poste_travail', '')],
+            ['N° SS EMPLOYEUR:', entreprise['ss_employeur'] or "Non défini",
+             'N° Sécurité Sociale:', emp_info.get('numero_secu_sociale', 'N/A')],
+            ['Adresse:', Paragraph(entreprise['adresse'] or "Adresse non définie", self.styles['CustomBody']),
+             'Date de recrutement:', str(emp_info.get('date_recrutement', 'N/A'))],
+        ]
+        
+        info_table = Table(info_data, colWidths=[3.5*cm, 5*cm, 3.5*cm, 6*cm])
+        info_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (1, 0), colors.black),
+            ('BACKGROUND', (2, 0), (3, 0), colors.black),
+            ('TEXTCOLOR', (0, 0), (1, 0), colors.white),
+            ('TEXTCOLOR', (2, 0), (3, 0), colors.white),
+            ('FONTNAME', (0, 0), (3, 0), 'Helvetica-Bold'),
+            ('ALIGN', (0, 0), (3, 0), 'CENTER'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 5),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 5),
+            ('TOPPADDING', (0, 0), (-1, -1), 3),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+        ]))
+        story.append(info_table)
+        story.append(Spacer(1, 0.5*cm))
+        
+        # Tableau DÉTAILLÉ du salaire (format v1.3.0)
+        salaire_detail_data = [
+            ['DÉSIGNATION', 'BASE', 'TAUX', 'GAIN', 'RETENUE'],
+            ['Salaire de base (contrat)', 
+             f"{float(emp_info.get('salaire_base', 0)):,.2f}".replace(',', ' '),
+             f"{sal_data.get('jours_travailles', 0)}/{sal_data.get('jours_ouvrables', 26)} j",
+             f"{float(sal_data.get('salaire_base_proratis', 0)):,.2f}".replace(',', ' '), ''],
+            # ⭐ LIGNE CONGÉS v3.6.1 hotfix7: affichage cohérent
+            ['Congés pris ce mois',
+             f"{float(sal_data.get('jours_conges', 0)):.2f} j",  # Colonne BASE
+             '',  # Colonne TAUX
+             'Payé',  # Colonne GAIN
+             ''],  # Colonne RETENUE
+            ['Heures supplémentaires (1.33h/j × 150%)', '', '',
+             f"{float(sal_data.get('heures_supplementaires', 0)):,.2f}".replace(',', ' '), ''],
+            ['Indemnité de Nuisance (IN)', f"{float(emp_info.get('salaire_base', 0)):,.2f}".replace(',', ' '), '5%',
+             f"{float(sal_data.get('indemnite_nuisance', 0)):,.2f}".replace(',', ' '), ''],
+            ['Indemnité Forfaitaire Service Permanent (IFSP)', f"{float(emp_info.get('salaire_base', 0)):,.2f}".replace(',', ' '), '5%',
+             f"{float(sal_data.get('ifsp', 0)):,.2f}".replace(',', ' '), ''],
+            ['Indemnité Expérience Professionnelle (IEP)', f"{float(emp_info.get('salaire_base', 0)):,.2f}".replace(',', ' '), 'Ancienneté',
+             f"{float(sal_data.get('iep', 0)):,.2f}".replace(',', ' '), ''],
+            ['Prime d\'Encouragement', '', '10%',
+             f"{float(sal_data.get('prime_encouragement', 0)):,.2f}".replace(',', ' '), ''],
+            ['Prime Chauffeur', '', '100 DA/j',
+             f"{float(sal_data.get('prime_chauffeur', 0)):,.2f}".replace(',', ' '), ''],
+            ['Prime de Nuit Agent Sécurité', '', '750 DA/mois',
+             f"{float(sal_data.get('prime_nuit_agent_securite', 0)):,.2f}".replace(',', ' '), ''],
+            ['Prime de Déplacement (Missions)', '', '',
+             f"{float(sal_data.get('prime_deplacement', 0)):,.2f}".replace(',', ' '), ''],
+            ['SALAIRE COTISABLE', '', '', 
+             f"{float(sal_data.get('salaire_cotisable', 0)):,.2f}".replace(',', ' '), ''],
+            ['Retenue Sécurité Sociale', f"{float(sal_data.get('salaire_cotisable', 0)):,.2f}".replace(',', ' '), '9%', '',
+             f"{float(sal_data.get('retenue_securite_sociale', 0)):,.2f}".replace(',', ' ')],
+            ['Panier (imposable non cotisable)', '', '100 DA/j',
+             f"{float(sal_data.get('panier', 0)):,.2f}".replace(',', ' '), ''],
+            ['Prime de Transport (imposable non cotisable)', '', '100 DA/j',
+             f"{float(sal_data.get('prime_transport', 0)):,.2f}".replace(',', ' '), ''],
+            ['SALAIRE IMPOSABLE', '', '', 
+             f"{float(sal_data.get('salaire_imposable', 0)):,.2f}".replace(',', ' '), ''],
+            ['IRG (Impôt sur le Revenu Global)', '', 'Barème', '',
+             f"{float(sal_data.get('irg', 0)):,.2f}".replace(',', ' ')],
+            ['Avances sur salaire', '', '', '',
+             f"{float(sal_data.get('total_avances', 0)):,.2f}".replace(',', ' ')],
+            ['Retenue Crédit', '', '', '',
+             f"{float(sal_data.get('retenue_credit', 0)):,.2f}".replace(',', ' ')],
+            ['Prime Femme au Foyer', '', '',
+             f"{float(sal_data.get('prime_femme_foyer', 0)):,.2f}".replace(',', ' '), ''],
+        ]
+        
+        salaire_table = Table(salaire_detail_data, colWidths=[6*cm, 3.5*cm, 2.5*cm, 3*cm, 3*cm])
+        salaire_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.black),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
+            ('ALIGN', (0, 1), (0, -1), 'LEFT'),
+            ('BACKGROUND', (0, 11), (-1, 11), colors.lightgrey),
+            ('FONTNAME', (0, 11), (-1, 11), 'Helvetica-Bold'),
+            ('BACKGROUND', (0, 15), (-1, 15), colors.lightgrey),
+            ('FONTNAME', (0, 15), (-1, 15), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 5),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 5),
+        ]))
+        story.append(salaire_table)
+        story.append(Spacer(1, 0.5*cm))
+        
+        # Total final NET À PAYER
+        total_data = [
+            ['SALAIRE NET À PAYER', 
+             f"{float(sal_data.get('salaire_net', 0)):,.2f}".replace(',', ' ') + ' DA'],
+        ]
+        total_table = Table(total_data, colWidths=[12*cm, 6*cm])
+        total_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.black),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('LEFTPADDING', (0, 0), (-1, -1), 10),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ]))
+        story.append(total_table)
+        
+        # Footer bulletin - Powered by AIRBAND
+        story.append(Spacer(1, 0.5*cm))
+        footer = Paragraph(
+            f"<i>Bulletin généré le {datetime.now().strftime('%d/%m/%Y à %H:%M')}</i><br/>"
+            "<i>Powered by AIRBAND</i>",
+            ParagraphStyle('FooterInfo', parent=self.styles['Normal'], fontSize=8,
+                          textColor=colors.black, alignment=TA_CENTER)
+        )
+        story.append(footer)
+        return story
+    
+    def _story_recap_bulletins(self, employes_data: List[Dict]) -> List:
+        """3. TABLEAU RÉCAPITULATIF GÉNÉRAL DÉTAILLÉ"""
+        story = []
         story.append(Paragraph("RÉCAPITULATIF GÉNÉRAL", self.styles['CustomTitle']))
         story.append(Spacer(1, 0.5*cm))
         
@@ -3882,7 +4012,7 @@ class PDFGenerator:
             f"{sum(float(e['salaire_data'].get('retenue_securite_sociale', 0)) for e in employes_data):,.0f}".replace(',', ' '),
             f"{sum(float(e['salaire_data'].get('salaire_imposable', 0)) for e in employes_data):,.0f}".replace(',', ' '),
             f"{sum(float(e['salaire_data'].get('irg', 0)) for e in employes_data):,.0f}".replace(',', ' '),
-            f"{total_net:,.0f}".replace(',', ' ')
+            f"{sum(float(e['salaire_data'].get('salaire_net', 0)) for e in employes_data):,.0f}".replace(',', ' ')
         ])
         
         recap_table = Table(recap_data, colWidths=[1*cm, 1.5*cm, 5*cm, 2*cm, 2*cm, 2*cm, 2*cm, 2*cm, 2.5*cm])
@@ -3900,11 +4030,7 @@ class PDFGenerator:
             ('FONTNAME', (0,-1), (-1,-1), 'Helvetica-Bold'),
         ]))
         story.append(recap_table)
-        
-        # Générer le PDF avec footer en pied de page sur toutes les pages
-        doc.build(story, onFirstPage=add_bulletin_footer, onLaterPages=add_bulletin_footer)
-        buffer.seek(0)
-        return buffer
+        return story
 
     def generate_rapport_salaires(self, resultats: List[Dict], periode: Dict) -> BytesIO:
         """
@@ -4136,3 +4262,8 @@ class PDFGenerator:
         doc.build(story)
         buffer.seek(0)
         return buffer
+
+
+def _rendre_lot_bulletins(employes_data: List[Dict], periode: Dict, entreprise: Dict) -> bytes:
+    """Rendre un lot de bulletins (exécuté dans un processus du pool, sans session DB)"""
+    return PDFGenerator()._rendre_bulletins_pdf(employes_data, periode, entreprise)
@@ -0,0 +1,135 @@
+"""
+Écriture en masse des pointages (imports de pointeuse)
+
+Les imports (confirmation de preview, synchronisation Attendance) modifient
+des jours isolés de nombreux pointages. LotPointages regroupe toutes ces
+modifications par (employe_id, annee, mois):
+
+- charger(): les pointages existants des clés concernées, une requête par
+  période (colonnes brutes, sans objets ORM)
+- get_jour() / set_jour() / ligne(): lecture et modification en mémoire
+- ecrire(): un seul INSERT multi-lignes ... ON DUPLICATE KEY UPDATE sur
+  uq_pointage_employe_periode (ON CONFLICT DO UPDATE sous SQLite) pour
+  toutes les lignes modifiées
+- recalculer_conges(): après le commit, une fois par (employé, mois) modifié
+"""
+
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from models import Pointage
+from models.pointage import JOURS_COLONNES
+from services.pdf_cache import invalider_au_commit
+
+logger = logging.getLogger(__name__)
+
+# (employe_id, annee, mois)
+ClePointage = Tuple[int, int, int]
+
+# Lignes par requête (IN sur les employés, VALUES de l'upsert)
+TAILLE_LOT = 500
+
+
+class LotPointages:
+    """Pointages de plusieurs employés / mois modifiés en mémoire puis écrits en un upsert"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._lignes: Dict[ClePointage, List[Optional[int]]] = {}
+        self._modifiees = set()
+
+    def charger(self, cles: Iterable[ClePointage]):
+        """Charger les pointages existants (une requête par période); les absents partent vides"""
+        par_periode = defaultdict(set)
+        for employe_id, annee, mois in cles:
+            if (employe_id, annee, mois) not in self._lignes:
+                par_periode[(annee, mois)].add(employe_id)
+
+        for (annee, mois), employe_ids in par_periode.items():
+            employe_ids = sorted(employe_ids)
+            for debut in range(0, len(employe_ids), TAILLE_LOT):
+                lignes = self.db.query(Pointage.employe_id, *Pointage.colonnes_jours()).filter(
+                    Pointage.annee == annee,
+                    Pointage.mois == mois,
+                    Pointage.employe_id.in_(employe_ids[debut:debut + TAILLE_LOT])
+                ).all()
+                for employe_id, *jours in lignes:
+                    self._lignes[(employe_id, annee, mois)] = list(jours)
+            for employe_id in employe_ids:
+                self._lignes.setdefault((employe_id, annee, mois), [None] * len(JOURS_COLONNES))
+
+    def _jours(self, cle: ClePointage) -> List[Optional[int]]:
+        if cle not in self._lignes:
+            self.charger([cle])
+        return self._lignes[cle]
+
+    def get_jour(self, employe_id: int, annee: int, mois: int, numero_jour: int) -> Optional[int]:
+        return self._jours((employe_id, annee, mois))[numero_jour - 1]
+
+    def set_jour(self, employe_id: int, annee: int, mois: int, numero_jour: int, valeur: Optional[int]):
+        self.ligne(employe_id, annee, mois)[numero_jour - 1] = valeur
+
+    def ligne(self, employe_id: int, annee: int, mois: int) -> List[Optional[int]]:
+        """Les 31 jours du pointage (liste modifiable, la ligne sera écrite)"""
+        cle = (employe_id, annee, mois)
+        self._modifiees.add(cle)
+        return self._jours(cle)
+
+    @property
+    def modifiees(self) -> List[ClePointage]:
+        return sorted(self._modifiees)
+
+    def ecrire(self) -> int:
+        """Upsert de toutes les lignes modifiées (sans commit); retourne le nombre de lignes"""
+        valeurs = [
+            {"employe_id": employe_id, "annee": annee, "mois": mois, "verrouille": 0,
+             **dict(zip(JOURS_COLONNES, self._lignes[(employe_id, annee, mois)]))}
+            for employe_id, annee, mois in self.modifiees
+        ]
+        for debut in range(0, len(valeurs), TAILLE_LOT):
+            self.db.execute(self._upsert(valeurs[debut:debut + TAILLE_LOT]))
+
+        # L'upsert ne passe pas par le flush ORM: tags du cache PDF ajoutés à la main
+        invalider_au_commit(self.db, {f"periode:{annee}:{mois}" for _, annee, mois in self._modifiees})
+        return len(valeurs)
+
+    def _upsert(self, valeurs: List[Dict]):
+        table = Pointage.__table__
+        if self.db.get_bind().dialect.name == "mysql":
+            from sqlalchemy.dialects.mysql import insert
+            instruction = insert(table).values(valeurs)
+            return instruction.on_duplicate_key_update(
+                {nom: instruction.inserted[nom] for nom in JOURS_COLONNES}
+            )
+
+        from sqlalchemy.dialects.sqlite import insert
+        instruction = insert(table).values(valeurs)
+        return instruction.on_conflict_do_update(
+            index_elements=[table.c.employe_id, table.c.annee, table.c.mois],
+            set_={nom: instruction.excluded[nom] for nom in JOURS_COLONNES}
+        )
+
+    def recalculer_conges(self) -> int:
+        """Recalcul des congés une fois par (employé, mois) modifié, après le commit"""
+        from services.conges_calculator import calculer_et_enregistrer_conges
+
+        recalcules = 0
+        for employe_id, annee, mois in self.modifiees:
+            jours = self._lignes[(employe_id, annee, mois)]
+            try:
+                calculer_et_enregistrer_conges(
+                    db=self.db,
+                    employe_id=employe_id,
+                    annee=annee,
+                    mois=mois,
+                    totaux={"jours_travailles": sum(1 for valeur in jours if valeur == 1)}
+                )
+                recalcules += 1
+            except Exception as e:
+                # Ne pas faire échouer l'import si le calcul des congés échoue
+                logger.warning(f"Erreur recalcul congés employé {employe_id} {mois}/{annee}: {e}")
+                self.db.rollback()
+        return recalcules
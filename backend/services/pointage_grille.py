@@ -0,0 +1,181 @@
+"""
+Grille de pointages d'un mois en mémoire (NumPy)
+
+Charge les 31 colonnes jour_XX de tous les pointages d'une période en une
+seule requête (sans instancier d'objets ORM Pointage) et calcule les totaux
+de tous les employés en une passe vectorisée.
+
+Codage des jours: 1 = Travaillé/Férié, 0 = Absent/Congé/Maladie/Arrêt,
+NON_DEFINI (-1) = NULL en base.
+"""
+
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models import Pointage
+from models.pointage import JOURS_COLONNES
+
+NON_DEFINI = -1
+
+
+def _format_totaux(jours_travailles: int, jours_absences: int) -> Dict:
+    """Dictionnaire de totaux au format de Pointage.calculer_totaux"""
+    return {
+        "jours_travailles": jours_travailles,
+        "heures_supplementaires": 0,
+        "jours_absences": jours_absences,
+        "jours_conges": 0,
+        "jours_maladie": 0,
+        "jours_arret": 0,
+        "jours_feries": 0,
+        "total_travailles": jours_travailles,
+        "travailles": jours_travailles,
+    }
+
+
+class LignePointage:
+    """
+    Adaptateur d'une ligne de la grille avec l'interface de Pointage
+    (get_jour / set_jour / calculer_totaux) pour le code existant
+    """
+    __slots__ = ("_grille", "_indice")
+
+    def __init__(self, grille: "GrillePointages", indice: int):
+        self._grille = grille
+        self._indice = indice
+
+    @property
+    def id(self) -> int:
+        return self._grille.ids[self._indice]
+
+    @property
+    def employe_id(self) -> int:
+        return self._grille.employe_ids[self._indice]
+
+    @property
+    def annee(self) -> int:
+        return self._grille.annee
+
+    @property
+    def mois(self) -> int:
+        return self._grille.mois
+
+    @property
+    def verrouille(self) -> int:
+        return self._grille.verrouilles[self._indice]
+
+    def get_jour(self, numero_jour: int):
+        """Obtenir la valeur d'un jour spécifique (0, 1 ou None)"""
+        valeur = int(self._grille.jours[self._indice, numero_jour - 1])
+        return None if valeur == NON_DEFINI else valeur
+
+    def set_jour(self, numero_jour: int, valeur: Optional[int]):
+        """Définir la valeur d'un jour (en mémoire uniquement, pas d'écriture en base)"""
+        self._grille.jours[self._indice, numero_jour - 1] = NON_DEFINI if valeur is None else valeur
+
+    def calculer_totaux(self) -> Dict:
+        """Mêmes clés que Pointage.calculer_totaux"""
+        return self._grille.totaux_ligne(self._indice)
+
+    def __repr__(self):
+        return f"<LignePointage {self.employe_id} - {self.mois}/{self.annee}>"
+
+
+class GrillePointages:
+    """Pointages d'une période sous forme de matrice (employés × 31 jours)"""
+
+    def __init__(
+        self,
+        annee: int,
+        mois: int,
+        ids: List[int],
+        employe_ids: List[int],
+        verrouilles: List[int],
+        jours: np.ndarray
+    ):
+        self.annee = annee
+        self.mois = mois
+        self.ids = ids
+        self.employe_ids = employe_ids
+        self.verrouilles = verrouilles
+        self.jours = jours
+        self._indices = {employe_id: i for i, employe_id in enumerate(employe_ids)}
+
+    @classmethod
+    def charger(
+        cls,
+        db: Session,
+        annee: int,
+        mois: int,
+        employe_ids: Optional[List[int]] = None
+    ) -> "GrillePointages":
+        """Charger tous les pointages de la période en une requête (colonnes brutes)"""
+        query = db.query(
+            Pointage.id,
+            Pointage.employe_id,
+            Pointage.verrouille,
+            *Pointage.colonnes_jours()
+        ).filter(
+            Pointage.annee == annee,
+            Pointage.mois == mois
+        )
+        if employe_ids is not None:
+            query = query.filter(Pointage.employe_id.in_(employe_ids))
+
+        lignes = query.order_by(Pointage.employe_id).all()
+
+        jours = np.array(
+            [[NON_DEFINI if v is None else v for v in ligne[3:]] for ligne in lignes],
+            dtype=np.int16
+        ).reshape(len(lignes), len(JOURS_COLONNES))
+
+        return cls(
+            annee,
+            mois,
+            [ligne[0] for ligne in lignes],
+            [ligne[1] for ligne in lignes],
+            [ligne[2] for ligne in lignes],
+            jours
+        )
+
+    def __len__(self) -> int:
+        return len(self.employe_ids)
+
+    def __iter__(self) -> Iterator[LignePointage]:
+        for i in range(len(self)):
+            yield LignePointage(self, i)
+
+    def ligne(self, employe_id: int) -> Optional[LignePointage]:
+        """Ligne de l'employé, ou None s'il n'a pas de pointage pour la période"""
+        indice = self._indices.get(employe_id)
+        if indice is None:
+            return None
+        return LignePointage(self, indice)
+
+    def totaux_vectorises(self) -> Dict[str, np.ndarray]:
+        """Compteurs par employé (tableaux alignés sur employe_ids), en une passe"""
+        return {
+            "jours_travailles": np.count_nonzero(self.jours == 1, axis=1),
+            "jours_absences": np.count_nonzero(self.jours == 0, axis=1),
+            "jours_non_definis": np.count_nonzero(self.jours == NON_DEFINI, axis=1),
+        }
+
+    def totaux_ligne(self, indice: int) -> Dict:
+        """Totaux d'une ligne au format de Pointage.calculer_totaux"""
+        ligne = self.jours[indice]
+        return _format_totaux(
+            int(np.count_nonzero(ligne == 1)),
+            int(np.count_nonzero(ligne == 0))
+        )
+
+    def totaux_par_employe(self) -> Dict[int, Dict]:
+        """Totaux de tous les employés (format calculer_totaux), indexés par employe_id"""
+        compteurs = self.totaux_vectorises()
+        return {
+            employe_id: _format_totaux(
+                int(compteurs["jours_travailles"][i]),
+                int(compteurs["jours_absences"][i])
+            )
+            for i, employe_id in enumerate(self.employe_ids)
+        }
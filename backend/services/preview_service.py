@@ -5,13 +5,14 @@ Uses AttendanceCalculationService for proper daily calculations
 
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
 from sqlalchemy.orm import Session
-from typing import List, Dict
-from datetime import datetime
-import uuid
+from typing import List, Dict, Optional
+from datetime import datetime, date
+import calendar
 
 from database import get_db
 from schemas import (
     ImportPreviewResponse,
+    ImportPreviewPage,
     LogPreviewItem,
     LogPreviewStatus,
     MatchMethod,
@@ -22,53 +23,44 @@ from schemas import (
 from services.import_service import ImportService
 from services.matching_service import EmployeeMatchingService
 from services.calculation_service import AttendanceCalculationService
-from services.attendance_service import AttendanceService
-
-# In-memory cache for preview sessions
-preview_sessions = {}
+from services.pointage_bulk import LotPointages
+from services.preview_store import preview_store
+from services.uploads import fichier_upload
 
 async def preview_import_endpoint(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    limit: Optional[int] = None
 ) -> ImportPreviewResponse:
     """
     Preview attendance import with daily calculations
+
+    The preview is stored in preview_store (shared by all workers, TTL-bound);
+    with `limit`, only the first page of items is returned and the rest is
+    read with preview_page_endpoint.
     """
-    if not file.filename.endswith(('.xlsx', '.xls', '.csv')):
-        raise HTTPException(400, "Format de fichier non supporté")
+    source = fichier_upload(file, ('.xlsx', '.xls', '.csv'), "Format de fichier non supporté")
     
-    content = await file.read()
-    
-    # 1. Parse file
+    # 1. Initialize services
     import_service = ImportService()
+    matching_service = EmployeeMatchingService(db)
+    calculation_service = AttendanceCalculationService(db)
+    
+    # 2-4. Streamed pipeline: parse a chunk -> match its names -> fold into employee-days
+    days = {}
     try:
-        logs = import_service.parse_excel(content)
-        print(f"[DEBUG] Parsed {len(logs)} logs from Excel")
-        if logs:
-            print(f"[DEBUG] First log: {logs[0]}")
+        for chunk in import_service.iter_chunks(source, file.filename):
+            names = chunk.logs['employee_name']
+            matches = {name: matching_service.match_employee(name)[0] for name in names.unique()}
+            calculation_service.aggregate_daily_logs(chunk.logs, names.map(matches), days)
+            print(f"[DEBUG] Parsed {len(chunk.logs)} logs ({len(matches)} names)")
     except Exception as e:
         print(f"[ERROR] Parse error: {e}")
         raise HTTPException(400, f"Erreur de parsing: {str(e)}")
+    print(f"[DEBUG] Grouped into {len(days)} days")
     
-    # 2. Initialize services
-    matching_service = EmployeeMatchingService(db)
-    calculation_service = AttendanceCalculationService(db)
-    
-    # 3. Match employees for all logs first
-    for log in logs:
-        employee_id, match_method, confidence, alternatives = matching_service.match_employee(
-            log.get('employee_name', ''),
-            log.get('employee_id')
-        )
-        log['matched_employee_id'] = employee_id
-        log['match_method'] = match_method
-        log['match_confidence'] = confidence
-        log['alternative_matches'] = alternatives
-        print(f"[DEBUG] Matched '{log.get('employee_name')}' -> ID: {employee_id}, confidence: {confidence}")
-    
-    # 4. Group logs by employee + date
-    grouped_logs = calculation_service.group_logs_by_employee_date(logs)
-    print(f"[DEBUG] Grouped into {len(grouped_logs)} days")
+    # Existing pointages of all the days, one query per month
+    calculation_service.prefetch_existing_pointages(days.keys())
     
     # 5. Process each day
     preview_items = []
@@ -87,7 +79,7 @@ async def preview_import_endpoint(
     processed_employees = set()
     unmatched_names = set()  # Track unique unmatched names
     
-    for (employee_id, work_date), day_logs in grouped_logs.items():
+    for (employee_id, work_date), day in days.items():
         print(f"[DEBUG] Processing day: {work_date} for employee_id: {employee_id}")
         stats['total_logs'] += 1
         
@@ -95,25 +87,18 @@ async def preview_import_endpoint(
         if employee_id:
             processed_employees.add(employee_id)
         
-        # Get employee details
+        # Get employee details (match results are memoised per name)
         employee_details = None
-        employee_name = day_logs[0].get('employee_name', 'Inconnu')
-        match_method = day_logs[0].get('match_method', 'none')
-        match_confidence = day_logs[0].get('match_confidence', 0)
-        alternatives = day_logs[0].get('alternative_matches', [])
+        employee_name = day['employee_name']
+        _, match_method, match_confidence, alternatives = matching_service.match_employee(employee_name)
         
         if employee_id:
             employee_details = matching_service.get_employee_details(employee_id)
         
-        # Extract entry and exit
-        entry_time, exit_time = calculation_service.extract_entry_exit(day_logs)
-        print(f"[DEBUG] Entry: {entry_time}, Exit: {exit_time}")
-        
-        # Calculate daily attendance
+        # Calculate daily attendance (punches paired with the employee's shift template)
         if employee_id:
-            calculation = calculation_service.calculate_daily_attendance(
-                entry_time, exit_time, work_date, employee_id
-            )
+            calculation = calculation_service.calculate_day(employee_id, work_date, day)
+            print(f"[DEBUG] Entry: {calculation['entry_time']}, Exit: {calculation['exit_time']}")
         else:
             # Employee not matched - track name
             unmatched_names.add(employee_name)
@@ -126,8 +111,8 @@ async def preview_import_endpoint(
                 'warnings': [],
                 'errors': [f'Employé "{employee_name}" non trouvé dans le système'],
                 'day_value': 0,
-                'entry_time': entry_time,
-                'exit_time': exit_time,
+                'entry_time': None,
+                'exit_time': None,
                 'was_estimated': False
             }
         
@@ -146,16 +131,6 @@ async def preview_import_endpoint(
         if has_conflict:
             stats['conflicts_detected'] += 1
         
-        # Aggregate Photo status across ALL logs for this day (Option 2)
-        aggregated_photo = None
-        for log in day_logs:
-            log_photo = log.get('has_photo')
-            if log_photo == 'Verifier':
-                aggregated_photo = 'Verifier'
-                break  # If any log has Verifier, mark the day as Verifier
-            elif log_photo and not aggregated_photo:
-                aggregated_photo = log_photo  # Keep first non-empty value
-        
         # Create preview item
         preview_item = LogPreviewItem(
             log_id=f"{employee_id}_{work_date.isoformat()}",
@@ -175,11 +150,11 @@ async def preview_import_endpoint(
             has_conflict=has_conflict,
             existing_value=None,
             conflict_date=work_date.isoformat() if has_conflict else None,
-            has_photo=aggregated_photo
+            has_photo=day['photo']  # 'Verifier' if any log of the day has it
         )
         
         # Add custom fields for display
-        preview_item_dict = preview_item.model_dump()
+        preview_item_dict = preview_item.model_dump(mode="json")
         preview_item_dict['work_date'] = work_date.isoformat()
         preview_item_dict['entry_time'] = calculation['entry_time'].isoformat() if calculation['entry_time'] else None
         preview_item_dict['exit_time'] = calculation['exit_time'].isoformat() if calculation['exit_time'] else None
@@ -198,19 +173,37 @@ async def preview_import_endpoint(
     stats['unmatched_employees'] = stats['total_logs'] - stats['matched_employees']
     stats['unmatched_employee_names'] = list(unmatched_names)  # Convert set to list
     
-    # Generate session ID and cache
-    session_id = str(uuid.uuid4())
-    preview_sessions[session_id] = {
-        'items': preview_items,
-        'created_at': datetime.now(),
-        'original_logs': logs,
-        'grouped_logs': grouped_logs
-    }
+    # Store session (confirm may land on another worker)
+    session_id = preview_store.creer(preview_items, stats)
     
+    returned_items = preview_items[:limit] if limit else preview_items
     return ImportPreviewResponse(
         session_id=session_id,
-        items=[LogPreviewItem(**item) for item in preview_items],
-        stats=ImportPreviewStats(**stats)
+        items=[LogPreviewItem(**item) for item in returned_items],
+        stats=ImportPreviewStats(**stats),
+        total_items=len(preview_items)
+    )
+
+def preview_page_endpoint(
+    session_id: str,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    status: Optional[LogPreviewStatus] = None
+) -> ImportPreviewPage:
+    """
+    Read a stored preview page by page (optionally only one status)
+    """
+    page = preview_store.page(session_id, skip, limit, status.value if status else None)
+    if page is None:
+        raise HTTPException(404, "Session de preview expirée ou introuvable")
+    
+    return ImportPreviewPage(
+        session_id=session_id,
+        skip=skip,
+        limit=limit,
+        total=page['total'],
+        items=[LogPreviewItem(**item) for item in page['items']],
+        stats=ImportPreviewStats(**page['stats'])
     )
 
 async def confirm_import_endpoint(
@@ -220,30 +213,19 @@ async def confirm_import_endpoint(
     """
     Execute import after user confirmation
     """
-    # Retrieve session
-    session = preview_sessions.get(request.session_id)
-    if not session:
+    # Retrieve selected items of the session
+    selected_items = preview_store.items(request.session_id, request.selected_log_ids)
+    if selected_items is None:
         raise HTTPException(404, "Session de preview expirée ou introuvable")
     
-    # Get selected items
-    selected_items = [
-        item for item in session['items']
-        if item['log_id'] in request.selected_log_ids
-    ]
-    
     if not selected_items:
         raise HTTPException(400, "Aucun log sélectionné")
     
-    # Execute import using attendance service
-    attendance_service = AttendanceService(db)
-    
-    # Convert preview items to pointage updates
+    # Convert preview items to day updates, grouped by (employee, year, month)
     imported = 0
     errors = 0
+    updates = []
     
-    # Cache local pour éviter les requêtes répétitives et les doublons dans la même transaction
-    pointage_cache = {}
-
     for item in selected_items:
         try:
             employee_id = item.get('matched_employee_id')
@@ -256,102 +238,63 @@ async def confirm_import_endpoint(
                 continue
             
             work_date = datetime.fromisoformat(work_date_str).date()
-            
-            # Update pointage
-            year = work_date.year
-            month = work_date.month
-            day = work_date.day
-            
-            # Clé unique pour le cache
-            cache_key = (employee_id, year, month)
-            
-            # Vérifier dans le cache d'abord
-            if cache_key in pointage_cache:
-                pointage = pointage_cache[cache_key]
-            else:
-                # Sinon chercher en DB
-                from models import Pointage
-                pointage = db.query(Pointage).filter(
-                    Pointage.employe_id == employee_id,
-                    Pointage.annee == year,
-                    Pointage.mois == month
-                ).first()
-                
-                if not pointage:
-                    pointage = Pointage(
-                        employe_id=employee_id,
-                        annee=year,
-                        mois=month
-                    )
-                    db.add(pointage)
-                    # Important: flush pour avoir un ID si besoin, mais surtout pour que SQLAlchemy le gère
-                    db.flush() 
-                
-                # --- NOUVEAU: Remplir automatiquement les vendredis à 1 et les autres à 0 ---
-                import calendar
-                # monthrange retourne (weekday du 1er jour, nombre de jours)
-                # weekday: 0=Lundi, ... 4=Vendredi
-                _, num_days = calendar.monthrange(year, month)
-                for d in range(1, num_days + 1):
-                    current_val = pointage.get_jour(d)
-                    
-                    # Vérifier si c'est un vendredi (weekday 4)
-                    if datetime(year, month, d).weekday() == 4:
-                        # Vendredi : Force à 1 si vide ou 0
-                        if current_val is None or current_val == 0:
-                            pointage.set_jour(d, 1)
-                    else:
-                        # Autre jour : Met à 0 (Absent) si vide
-                        if current_val is None:
-                            pointage.set_jour(d, 0)
-                # ----------------------------------------------------------
-
-                # Mettre en cache
-                pointage_cache[cache_key] = pointage
-            pointage.set_jour(day, day_value)
+            updates.append((employee_id, work_date, day_value))
             imported += 1
             
         except Exception as e:
             errors += 1
             print(f"Error importing {item.get('log_id', 'unknown')}: {str(e)}")
-            import traceback
-            traceback.print_exc()
-
+    
+    # Existing pointages of all affected months (one query per month)
+    lot = LotPointages(db)
+    lot.charger((employee_id, d.year, d.month) for employee_id, d, _ in updates)
+    
+    initialized = set()
+    for employee_id, work_date, day_value in updates:
+        key = (employee_id, work_date.year, work_date.month)
+        jours = lot.ligne(*key)
+        
+        # --- Remplir automatiquement les vendredis à 1 et les autres à 0 (premier jour touché du mois) ---
+        if key not in initialized:
+            initialized.add(key)
+            _, num_days = calendar.monthrange(work_date.year, work_date.month)
+            for d in range(1, num_days + 1):
+                if date(work_date.year, work_date.month, d).weekday() == 4:
+                    # Vendredi : Force à 1 si vide ou 0
+                    if not jours[d - 1]:
+                        jours[d - 1] = 1
+                elif jours[d - 1] is None:
+                    # Autre jour : Met à 0 (Absent) si vide
+                    jours[d - 1] = 0
+        
+        jours[work_date.day - 1] = day_value
+    
     # --- Post-traitement : Règle "Vendredi entre deux absences" ---
     # Si Jeudi (J-1) = 0 ET Samedi (J+1) = 0 => Vendredi (J) = 0
-    import calendar
-    for pointage in pointage_cache.values():
-        year = pointage.annee
-        month = pointage.mois
+    for employee_id, year, month in lot.modifiees:
+        jours = lot.ligne(employee_id, year, month)
         _, num_days = calendar.monthrange(year, month)
         
-        for d in range(1, num_days + 1):
-            # Si c'est un Vendredi (4)
-            if datetime(year, month, d).weekday() == 4:
-                # Vérifier les bornes (on reste dans le mois courant pour l'instant)
-                if d - 1 >= 1 and d + 1 <= num_days:
-                    val_jeudi = pointage.get_jour(d - 1)
-                    val_samedi = pointage.get_jour(d + 1)
-                    
-                    # Si Jeudi absent (0) ET Samedi absent (0)
-                    # Note: None est considéré comme 0 (Absent) grâce à l'init précédente, mais on check explicitement
-                    is_jeudi_absent = val_jeudi == 0 or val_jeudi is None
-                    is_samedi_absent = val_samedi == 0 or val_samedi is None
-                    
-                    if is_jeudi_absent and is_samedi_absent:
-                        pointage.set_jour(d, 0)
-                        print(f"Règle appliquée: Vendredi {d}/{month} marqué absent (Jeudi et Samedi absents)")
+        # Vendredis dont Jeudi et Samedi sont dans le mois courant
+        for d in range(2, num_days):
+            if date(year, month, d).weekday() == 4 and not jours[d - 2] and not jours[d]:
+                jours[d - 1] = 0
+                print(f"Règle appliquée: Vendredi {d}/{month} marqué absent (Jeudi et Samedi absents)")
     # --------------------------------------------------------------
     
     try:
+        lot.ecrire()
         db.commit()
     except Exception as e:
         db.rollback()
         print(f"Error committing changes: {str(e)}")
         raise HTTPException(500, f"Erreur lors de l'enregistrement: {str(e)}")
     
+    # Congés recalculated once per employee-month
+    lot.recalculer_conges()
+    
     # Clean up session
-    del preview_sessions[request.session_id]
+    preview_store.supprimer(request.session_id)
     
     return AttendanceImportSummary(
     total_logs=len(selected_items),
@@ -0,0 +1,222 @@
+"""
+Stockage des sessions de preview d'import de pointage
+
+Une preview (lignes jour par jour calculées à partir du fichier importé) doit
+survivre jusqu'à la confirmation, qui peut arriver sur un autre worker
+uvicorn/PM2. Les sessions sont donc stockées dans une base SQLite du dossier
+data/preview_sessions (partagée entre les workers sans configuration):
+
+- une ligne par item, JSON compressé (zlib), avec sa position, son log_id et
+  son statut: lecture page par page et filtrage sans tout décompresser
+- durée de vie bornée (PREVIEW_SESSION_TTL_MINUTES): les sessions expirées
+  sont invisibles puis purgées à la création suivante
+- taille totale bornée (PREVIEW_SESSIONS_MAX_MO): éviction des sessions les
+  plus anciennes
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_SESSIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'preview_sessions')
+
+# Taille des lots de log_id dans les requêtes IN (limite de variables SQLite)
+TAILLE_LOT_IN = 500
+
+
+def _compresser(valeur) -> bytes:
+    return zlib.compress(json.dumps(valeur, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def _decompresser(donnees: bytes):
+    return json.loads(zlib.decompress(donnees).decode("utf-8"))
+
+
+class PreviewStore:
+    """Sessions de preview: items compressés + stats, avec TTL et taille max"""
+
+    def __init__(
+        self,
+        dossier: Optional[str] = None,
+        ttl_minutes: Optional[int] = None,
+        taille_max: Optional[int] = None
+    ):
+        self.dossier = dossier or PREVIEW_SESSIONS_DIR
+        self.ttl = (ttl_minutes if ttl_minutes is not None else settings.PREVIEW_SESSION_TTL_MINUTES) * 60
+        self.taille_max = taille_max if taille_max is not None else settings.PREVIEW_SESSIONS_MAX_MO * 1024 * 1024
+        self._lock = threading.Lock()
+        self._initialise = False
+
+    @contextmanager
+    def _connexion(self) -> Iterator[sqlite3.Connection]:
+        """Connexion à la base (transaction validée puis fermée en sortie)"""
+        if not self._initialise:
+            os.makedirs(self.dossier, exist_ok=True)
+        connexion = sqlite3.connect(os.path.join(self.dossier, "sessions.sqlite"), timeout=10)
+        if not self._initialise:
+            connexion.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    cree_le REAL NOT NULL,
+                    expire_le REAL NOT NULL,
+                    taille INTEGER NOT NULL,
+                    nombre_items INTEGER NOT NULL,
+                    stats BLOB NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_sessions_expire ON sessions (expire_le);
+                CREATE TABLE IF NOT EXISTS items (
+                    session_id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    log_id TEXT NOT NULL,
+                    statut TEXT,
+                    donnees BLOB NOT NULL,
+                    PRIMARY KEY (session_id, position)
+                );
+                CREATE INDEX IF NOT EXISTS idx_items_log ON items (session_id, log_id);
+            """)
+            self._initialise = True
+        try:
+            with connexion:
+                yield connexion
+        finally:
+            connexion.close()
+
+    def creer(self, items: List[Dict], stats: Dict) -> str:
+        """Enregistrer une preview et retourner l'identifiant de session"""
+        session_id = str(uuid.uuid4())
+        maintenant = time.time()
+        lignes = [
+            (session_id, position, str(item.get("log_id")), item.get("status"), _compresser(item))
+            for position, item in enumerate(items)
+        ]
+        stats_compressees = _compresser(stats)
+        taille = sum(len(ligne[4]) for ligne in lignes) + len(stats_compressees)
+
+        with self._lock, self._connexion() as connexion:
+            self._purger(connexion, maintenant)
+            connexion.execute(
+                "INSERT INTO sessions (id, cree_le, expire_le, taille, nombre_items, stats) VALUES (?, ?, ?, ?, ?, ?)",
+                (session_id, maintenant, maintenant + self.ttl, taille, len(lignes), stats_compressees)
+            )
+            connexion.executemany(
+                "INSERT INTO items (session_id, position, log_id, statut, donnees) VALUES (?, ?, ?, ?, ?)",
+                lignes
+            )
+            self._evincer(connexion, session_id)
+        return session_id
+
+    def _session(self, connexion: sqlite3.Connection, session_id: str) -> Optional[tuple]:
+        """(nombre_items, stats compressées) d'une session non expirée"""
+        return connexion.execute(
+            "SELECT nombre_items, stats FROM sessions WHERE id = ? AND expire_le > ?",
+            (session_id, time.time())
+        ).fetchone()
+
+    def stats(self, session_id: str) -> Optional[Dict]:
+        with self._connexion() as connexion:
+            session = self._session(connexion, session_id)
+        return _decompresser(session[1]) if session else None
+
+    def page(
+        self,
+        session_id: str,
+        skip: int = 0,
+        limit: Optional[int] = None,
+        statut: Optional[str] = None
+    ) -> Optional[Dict]:
+        """
+        Une page d'items dans l'ordre de la preview
+
+        Retourne {"total", "stats", "items"} (total = nombre d'items après
+        filtre sur le statut) ou None si la session est expirée ou inconnue.
+        """
+        with self._connexion() as connexion:
+            session = self._session(connexion, session_id)
+            if session is None:
+                return None
+
+            filtre, parametres = "session_id = ?", [session_id]
+            if statut is not None:
+                filtre += " AND statut = ?"
+                parametres.append(statut)
+                total = connexion.execute(f"SELECT COUNT(*) FROM items WHERE {filtre}", parametres).fetchone()[0]
+            else:
+                total = session[0]
+
+            lignes = connexion.execute(
+                f"SELECT donnees FROM items WHERE {filtre} ORDER BY position LIMIT ? OFFSET ?",
+                parametres + [limit if limit is not None else -1, skip]
+            ).fetchall()
+
+        return {
+            "total": total,
+            "stats": _decompresser(session[1]),
+            "items": [_decompresser(donnees) for (donnees,) in lignes]
+        }
+
+    def items(self, session_id: str, log_ids: Iterable[str]) -> Optional[List[Dict]]:
+        """Items d'une session dont le log_id est demandé (ordre de la preview), None si expirée"""
+        log_ids = list(dict.fromkeys(log_ids))
+        with self._connexion() as connexion:
+            if self._session(connexion, session_id) is None:
+                return None
+
+            lignes = []
+            for debut in range(0, len(log_ids), TAILLE_LOT_IN):
+                lot = log_ids[debut:debut + TAILLE_LOT_IN]
+                marqueurs = ",".join("?" * len(lot))
+                lignes += connexion.execute(
+                    f"SELECT position, donnees FROM items WHERE session_id = ? AND log_id IN ({marqueurs})",
+                    [session_id] + lot
+                ).fetchall()
+
+        lignes.sort(key=lambda ligne: ligne[0])
+        return [_decompresser(donnees) for _, donnees in lignes]
+
+    def supprimer(self, session_id: str):
+        with self._lock, self._connexion() as connexion:
+            self._supprimer(connexion, [session_id])
+
+    def _purger(self, connexion: sqlite3.Connection, maintenant: float):
+        """Supprimer les sessions expirées"""
+        expirees = [ligne[0] for ligne in connexion.execute(
+            "SELECT id FROM sessions WHERE expire_le <= ?", (maintenant,)
+        )]
+        self._supprimer(connexion, expirees)
+
+    def _evincer(self, connexion: sqlite3.Connection, session_conservee: str):
+        """Supprimer les sessions les plus anciennes jusqu'à repasser sous la taille max"""
+        total = connexion.execute("SELECT COALESCE(SUM(taille), 0) FROM sessions").fetchone()[0]
+        if total <= self.taille_max:
+            return
+
+        a_supprimer = []
+        for session_id, taille in connexion.execute(
+            "SELECT id, taille FROM sessions WHERE id != ? ORDER BY cree_le", (session_conservee,)
+        ):
+            if total <= self.taille_max:
+                break
+            a_supprimer.append(session_id)
+            total -= taille
+        if a_supprimer:
+            logger.warning(f"{len(a_supprimer)} session(s) de preview évincée(s) (taille max atteinte)")
+        self._supprimer(connexion, a_supprimer)
+
+    def _supprimer(self, connexion: sqlite3.Connection, session_ids):
+        connexion.executemany("DELETE FROM items WHERE session_id = ?", [(s,) for s in session_ids])
+        connexion.executemany("DELETE FROM sessions WHERE id = ?", [(s,) for s in session_ids])
+
+
+preview_store = PreviewStore()
@@ -0,0 +1,149 @@
+"""
+Registre des crédits d'un mois (retenues sur salaire)
+
+Charge en 3 requêtes les crédits en cours, les prorogations du mois et les
+retenues déjà enregistrées pour le mois, puis résout les retenues en mémoire.
+Les nouvelles retenues (et la mise à jour montant_retenu / statut des
+crédits) sont seulement ajoutées à la session: elles partent au flush du
+commit de validation, sans requête par crédit.
+"""
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from models import Credit, RetenueCredit, ProrogationCredit, StatutCredit
+
+
+class RegistreCredits:
+    """Crédits en cours + prorogations + retenues d'un mois, indexés en mémoire"""
+
+    def __init__(
+        self,
+        db: Session,
+        annee: int,
+        mois: int,
+        credits: List[Credit],
+        prorogees: set,
+        retenues: Dict[int, RetenueCredit]
+    ):
+        self.db = db
+        self.annee = annee
+        self.mois = mois
+        self._credits_par_employe: Dict[int, List[Credit]] = defaultdict(list)
+        for credit in credits:
+            self._credits_par_employe[credit.employe_id].append(credit)
+        self._prorogees = prorogees
+        self._retenues = retenues
+
+    @classmethod
+    def charger(
+        cls,
+        db: Session,
+        annee: int,
+        mois: int,
+        employe_ids: Optional[List[int]] = None
+    ) -> "RegistreCredits":
+        """Charger le registre du mois (3 requêtes quel que soit le nombre de crédits)"""
+        query = db.query(Credit).filter(Credit.statut == StatutCredit.EN_COURS)
+        if employe_ids is not None:
+            query = query.filter(Credit.employe_id.in_(employe_ids))
+        credits = query.order_by(Credit.id).all()
+        credit_ids = [credit.id for credit in credits]
+
+        prorogees = set()
+        retenues = {}
+        if credit_ids:
+            prorogees = {
+                credit_id for (credit_id,) in db.query(ProrogationCredit.credit_id).filter(
+                    ProrogationCredit.credit_id.in_(credit_ids),
+                    ProrogationCredit.mois_initial == mois,
+                    ProrogationCredit.annee_initiale == annee
+                ).all()
+            }
+            retenues = {
+                retenue.credit_id: retenue for retenue in db.query(RetenueCredit).filter(
+                    RetenueCredit.credit_id.in_(credit_ids),
+                    RetenueCredit.mois == mois,
+                    RetenueCredit.annee == annee
+                ).all()
+            }
+
+        return cls(db, annee, mois, credits, prorogees, retenues)
+
+    def credits(self, employe_id: int) -> List[Credit]:
+        return self._credits_par_employe.get(employe_id, [])
+
+    def _retenues_prevues(
+        self,
+        employe_id: int,
+        respecter_prorogations: bool,
+        plafonner: bool
+    ) -> Iterator[Tuple[Credit, Decimal, Optional[RetenueCredit]]]:
+        """(crédit, montant, retenue déjà enregistrée) pour chaque crédit retenu ce mois"""
+        for credit in self.credits(employe_id):
+            if respecter_prorogations and credit.id in self._prorogees:
+                # Pas de retenue ce mois-ci, elle est prorogée
+                continue
+
+            existante = self._retenues.get(credit.id)
+            if existante is not None:
+                yield credit, Decimal(str(existante.montant)), existante
+                continue
+
+            montant = Decimal(str(credit.montant_mensualite))
+            if plafonner:
+                montant_restant = Decimal(str(credit.montant_total)) - Decimal(str(credit.montant_retenu or 0))
+                if montant_restant <= 0:
+                    continue
+                montant = min(montant, montant_restant)
+            yield credit, montant, None
+
+    def retenue_mois(self, employe_id: int) -> Decimal:
+        """
+        Retenue crédit du mois (prorogations respectées, dernière mensualité
+        plafonnée au restant dû); aucune écriture
+        """
+        return sum(
+            (montant for _, montant, _ in self._retenues_prevues(employe_id, True, True)),
+            Decimal(0)
+        )
+
+    def enregistrer_retenues(
+        self,
+        employe_id: int,
+        respecter_prorogations: bool = False,
+        plafonner: bool = False,
+        date_retenue: Optional[date] = None
+    ) -> Decimal:
+        """
+        Ajouter à la session les retenues du mois non encore enregistrées et
+        mettre à jour le cumul / statut des crédits (pas de flush ni de commit)
+
+        Par défaut, mensualité pleine de chaque crédit en cours, comme le
+        calcul de SalaireProcessor. Retourne le total des nouvelles retenues.
+        """
+        total = Decimal(0)
+        for credit, montant, existante in self._retenues_prevues(employe_id, respecter_prorogations, plafonner):
+            if existante is not None:
+                continue
+
+            retenue = RetenueCredit(
+                credit_id=credit.id,
+                mois=self.mois,
+                annee=self.annee,
+                montant=montant,
+                date_retenue=date_retenue or date.today()
+            )
+            self.db.add(retenue)
+            self._retenues[credit.id] = retenue
+
+            # Mettre à jour le cumul et vérifier si le crédit est soldé
+            credit.montant_retenu = Decimal(str(credit.montant_retenu or 0)) + montant
+            if credit.montant_retenu >= credit.montant_total:
+                credit.statut = StatutCredit.SOLDE
+            total += montant
+        return total
@@ -6,10 +6,11 @@ from typing import Dict, Optional
 import calendar
 
 from models import (
-    Employe, Pointage, Mission, Avance, Credit, RetenueCredit, 
-    ProrogationCredit, StatutCredit, ParametresSalaire, IRGBareme
+    Employe, Pointage, Mission, Avance, ParametresSalaire, IRGBareme
 )
 from .irg_calculator import get_irg_calculator
+from .registre_credits import RegistreCredits
+from utils.periodes import filtre_periode
 
 
 class SalaireCalculator:
@@ -18,6 +19,7 @@ class SalaireCalculator:
     def __init__(self, db: Session):
         self.db = db
         self.params = self._get_parametres_salaire()
+        self._registres_credits: Dict[tuple, RegistreCredits] = {}
 
     def _get_parametres_salaire(self) -> ParametresSalaire:
         """Récupérer les paramètres globaux ou créer les défauts"""
@@ -240,8 +242,7 @@ class SalaireCalculator:
         """Calculer le total des primes de déplacement du mois"""
         result = self.db.query(func.sum(Mission.prime_calculee)).filter(
             Mission.chauffeur_id == employe_id,
-            func.year(Mission.date_mission) == annee,
-            func.month(Mission.date_mission) == mois
+            filtre_periode(Mission.date_mission, annee, mois)
         ).scalar()
         
         return result or Decimal(0)
@@ -257,60 +258,19 @@ class SalaireCalculator:
         return result or Decimal(0)
     
     def _calculer_retenue_credit(self, employe_id: int, annee: int, mois: int) -> Decimal:
-        """Calculer la retenue de crédit pour le mois"""
-        # Trouver les crédits en cours de l'employé
-        credits = self.db.query(Credit).filter(
-            Credit.employe_id == employe_id,
-            Credit.statut == StatutCredit.EN_COURS
-        ).all()
-        
-        total_retenue = Decimal(0)
-        
-        for credit in credits:
-            # Vérifier s'il y a une prorogation pour ce mois
-            prorogation = self.db.query(ProrogationCredit).filter(
-                ProrogationCredit.credit_id == credit.id,
-                ProrogationCredit.mois_initial == mois,
-                ProrogationCredit.annee_initiale == annee
-            ).first()
-            
-            if prorogation:
-                # Pas de retenue ce mois-ci, elle est prorogée
-                continue
-            
-            # Vérifier si une retenue existe déjà pour ce mois
-            retenue_existante = self.db.query(RetenueCredit).filter(
-                RetenueCredit.credit_id == credit.id,
-                RetenueCredit.mois == mois,
-                RetenueCredit.annee == annee
-            ).first()
-            
-            if retenue_existante:
-                total_retenue += retenue_existante.montant
-            else:
-                # Calculer la retenue à effectuer
-                montant_restant = credit.montant_restant
-                if montant_restant > 0:
-                    montant_retenue = min(credit.montant_mensualite, montant_restant)
-                    total_retenue += montant_retenue
-                    
-                    # Enregistrer la retenue
-                    retenue = RetenueCredit(
-                        credit_id=credit.id,
-                        mois=mois,
-                        annee=annee,
-                        montant=montant_retenue,
-                        date_retenue=date.today()
-                    )
-                    self.db.add(retenue)
-                    
-                    # Mettre à jour le crédit
-                    credit.montant_retenu += montant_retenue
-                    if credit.montant_retenu >= credit.montant_total:
-                        credit.statut = StatutCredit.SOLDE
-        
-        self.db.commit()
-        return total_retenue
+        """
+        Calculer la retenue de crédit pour le mois
+        Registre des crédits chargé une fois par mois (3 requêtes pour tous les
+        employés); aucune écriture: les retenues sont enregistrées à la sauvegarde
+        """
+        return self.registre_credits(annee, mois).retenue_mois(employe_id)
+    
+    def registre_credits(self, annee: int, mois: int) -> RegistreCredits:
+        """Registre des crédits du mois (chargé au premier appel)"""
+        cle = (annee, mois)
+        if cle not in self._registres_credits:
+            self._registres_credits[cle] = RegistreCredits.charger(self.db, annee, mois)
+        return self._registres_credits[cle]
     
     def _calculer_irg(self, salaire_brut: Decimal) -> Decimal:
         """
@@ -5,6 +5,7 @@ from sqlalchemy import func
 from datetime import date
 
 from models import Employe, ParametresSalaire, Mission
+from utils.periodes import filtre_periode
 
 class BonusProvider:
     """
@@ -65,7 +66,6 @@ class BonusProvider:
         """Somme des primes de mission du mois"""
         total = self.db.query(func.sum(Mission.prime_calculee)).filter(
             Mission.chauffeur_id == employee_id,
-            func.year(Mission.date_mission) == year,
-            func.month(Mission.date_mission) == month
+            filtre_periode(Mission.date_mission, year, month)
         ).scalar()
         return total or Decimal(0)
@@ -4,17 +4,58 @@ Remplace salary_engine et salaire_calculator
 """
 
 from decimal import Decimal, ROUND_HALF_UP
+from collections import Counter, defaultdict
 from datetime import date, datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import and_, inspect, or_
 from typing import Dict, List, Optional, Tuple
 import calendar
+import hashlib
+import json
 
 from models import (
-    Employe, Pointage, Mission, Avance, Credit, StatutCredit,
-    ParametresSalaire, IRGBareme, ReportAvanceCredit, SituationFamiliale
+    Employe, Pointage, Mission, Avance, Credit, StatutCredit, RetenueCredit,
+    ParametresSalaire, IRGBareme, ReportAvanceCredit, SituationFamiliale, Salaire
 )
 from services.irg_calculator import get_irg_calculator
+from services.pointage_grille import GrillePointages
+from utils.periodes import filtre_periode
+
+# ⭐ Salaires persistés servis par les rapports
+STATUTS_SALAIRE_VALIDES = ("valide", "paye")
+
+# Provenance d'un résultat de resultats_mois()
+PROVENANCE_PERSISTE = "persiste"    # ligne validée, entrées inchangées depuis le calcul
+PROVENANCE_RECALCULE = "recalcule"  # ligne validée mais entrées modifiées depuis
+PROVENANCE_CALCULE = "calcule"      # aucune ligne validée pour l'employé
+
+# Montants recopiés tels quels depuis une ligne salaires
+MONTANTS_SALAIRE = (
+    "salaire_base_proratis", "heures_supplementaires",
+    "indemnite_nuisance", "ifsp", "iep", "prime_encouragement", "prime_chauffeur",
+    "prime_nuit_agent_securite", "prime_deplacement", "prime_objectif", "prime_variable",
+    "salaire_cotisable", "retenue_securite_sociale", "panier", "prime_transport",
+    "salaire_imposable", "irg", "total_avances", "retenue_credit",
+    "avances_reportees", "credits_reportes", "prime_femme_foyer", "salaire_net"
+)
+
+
+def _montant(valeur) -> str:
+    return str(Decimal(str(valeur or 0)).quantize(Decimal('0.01'), ROUND_HALF_UP))
+
+
+def resume_provenance(resultats: List[Dict]) -> Dict[str, int]:
+    """Nombre de résultats par provenance (persiste / recalcule / calcule)"""
+    compteur = Counter(r.get("provenance", PROVENANCE_CALCULE) for r in resultats)
+    return {
+        provenance: compteur.get(provenance, 0)
+        for provenance in (PROVENANCE_PERSISTE, PROVENANCE_RECALCULE, PROVENANCE_CALCULE)
+    }
+
+
+def entete_provenance(resultats: List[Dict]) -> str:
+    """Valeur de l'en-tête X-Provenance-Salaires des rapports fichiers"""
+    return "; ".join(f"{cle}={valeur}" for cle, valeur in resume_provenance(resultats).items())
 
 
 class SalaireProcessor:
@@ -27,6 +68,7 @@ class SalaireProcessor:
         self.db = db
         self.params = self._get_parametres_salaire()
         self.irg_calculator = get_irg_calculator(db)
+        self._empreinte_params: Optional[str] = None
     
     def _get_parametres_salaire(self) -> ParametresSalaire:
         """Récupérer paramètres globaux ou créer défauts"""
@@ -69,15 +111,244 @@ class SalaireProcessor:
             if not employe:
                 return self._erreur_response(employe_id, "Employé non trouvé")
             
-            # 2. Récupérer pointage
-            pointage = self.db.query(Pointage).filter(
-                Pointage.employe_id == employe_id,
-                Pointage.annee == annee,
-                Pointage.mois == mois
-            ).first()
+            # 2. Récupérer les données du mois (pointage, congés, missions, avances, crédits)
+            donnees = self._charger_donnees_employe(employe_id, annee, mois)
+            
+            return self._calculer_depuis_donnees(
+                employe, donnees, annee, mois, prime_objectif, prime_variable
+            )
+            
+        except Exception as e:
+            return self._erreur_response(employe_id, f"Erreur technique: {str(e)}")
+    
+    def _charger_donnees_employe(self, employe_id: int, annee: int, mois: int) -> Dict:
+        """Charger les données d'un employé pour le mois (une requête par table)"""
+        from models import DeductionConge
+        
+        pointage = self.db.query(Pointage).filter(
+            Pointage.employe_id == employe_id,
+            Pointage.annee == annee,
+            Pointage.mois == mois
+        ).first()
+        
+        deductions_conges = self.db.query(DeductionConge).filter(
+            DeductionConge.employe_id == employe_id,
+            DeductionConge.mois_deduction == mois,
+            DeductionConge.annee_deduction == annee
+        ).all()
+        
+        primes_missions = [
+            prime for (prime,) in self.db.query(Mission.prime_calculee).filter(
+                Mission.chauffeur_id == employe_id,
+                filtre_periode(Mission.date_mission, annee, mois)
+            ).all()
+        ]
+        
+        avances = self.db.query(Avance).filter(
+            Avance.employe_id == employe_id,
+            Avance.annee_deduction == annee,
+            Avance.mois_deduction == mois
+        ).all()
+        
+        credits = self.db.query(Credit).filter(
+            Credit.employe_id == employe_id,
+            self._filtre_credits_du_mois(annee, mois)
+        ).all()
+        
+        retenues_credits = self.db.query(RetenueCredit.credit_id, RetenueCredit.montant).join(
+            Credit, RetenueCredit.credit_id == Credit.id
+        ).filter(
+            Credit.employe_id == employe_id,
+            RetenueCredit.annee == annee,
+            RetenueCredit.mois == mois
+        ).all()
+        
+        return {
+            "pointage": pointage,
+            "deductions_conges": deductions_conges,
+            "primes_missions": primes_missions,
+            "avances": avances,
+            "credits": credits,
+            "retenues_credits": retenues_credits
+        }
+    
+    def _filtre_credits_du_mois(self, annee: int, mois: int):
+        """
+        Crédits pris en compte pour le mois: en cours, ou ayant une retenue
+        enregistrée pour le mois (dernière mensualité soldée par la validation)
+        """
+        return or_(
+            Credit.statut == StatutCredit.EN_COURS,
+            Credit.id.in_(
+                self.db.query(RetenueCredit.credit_id).filter(
+                    RetenueCredit.annee == annee,
+                    RetenueCredit.mois == mois
+                )
+            )
+        )
+    
+    @staticmethod
+    def _mensualites_credits(donnees: Dict) -> Dict[int, Decimal]:
+        """
+        Mensualité de chaque crédit du mois: retenue déjà enregistrée pour le
+        mois si elle existe, sinon mensualité du crédit
+        """
+        mensualites = {credit.id: credit.montant_mensualite for credit in donnees["credits"]}
+        mensualites.update(dict(donnees["retenues_credits"]))
+        return mensualites
+    
+    def _charger_donnees_mois(
+        self,
+        annee: int,
+        mois: int,
+        employe_ids: Optional[List[int]] = None
+    ) -> Dict[int, Dict]:
+        """
+        Charger en masse les données du mois pour tous les employés
+        
+        Une requête groupée par table (pointages, congés, missions, avances, crédits)
+        au lieu de ~6 requêtes par employé. Les lignes sont indexées par employe_id
+        avec la même structure que _charger_donnees_employe (les pointages sont des
+        LignePointage de la grille du mois, même interface que Pointage).
+        """
+        from models import DeductionConge
+        
+        donnees: Dict[int, Dict] = defaultdict(lambda: {
+            "pointage": None,
+            "deductions_conges": [],
+            "primes_missions": [],
+            "avances": [],
+            "credits": [],
+            "retenues_credits": []
+        })
+        
+        def _filtrer(query, colonne):
+            if employe_ids is not None:
+                query = query.filter(colonne.in_(employe_ids))
+            return query
+        
+        # Pointages: grille NumPy (colonnes brutes, pas d'objets ORM)
+        grille = GrillePointages.charger(self.db, annee, mois, employe_ids)
+        for ligne in grille:
+            donnees[ligne.employe_id]["pointage"] = ligne
+        
+        deductions_conges = _filtrer(self.db.query(DeductionConge).filter(
+            DeductionConge.mois_deduction == mois,
+            DeductionConge.annee_deduction == annee
+        ), DeductionConge.employe_id).all()
+        for deduction in deductions_conges:
+            donnees[deduction.employe_id]["deductions_conges"].append(deduction)
+        
+        missions = _filtrer(self.db.query(Mission.chauffeur_id, Mission.prime_calculee).filter(
+            filtre_periode(Mission.date_mission, annee, mois)
+        ), Mission.chauffeur_id).all()
+        for chauffeur_id, prime in missions:
+            donnees[chauffeur_id]["primes_missions"].append(prime)
+        
+        avances = _filtrer(self.db.query(Avance).filter(
+            Avance.annee_deduction == annee,
+            Avance.mois_deduction == mois
+        ), Avance.employe_id).all()
+        for avance in avances:
+            donnees[avance.employe_id]["avances"].append(avance)
+        
+        credits = _filtrer(self.db.query(Credit).filter(
+            self._filtre_credits_du_mois(annee, mois)
+        ), Credit.employe_id).all()
+        for credit in credits:
+            donnees[credit.employe_id]["credits"].append(credit)
+        
+        # Retenues de crédit déjà enregistrées pour le mois (empreinte des entrées)
+        retenues = _filtrer(self.db.query(Credit.employe_id, RetenueCredit.credit_id, RetenueCredit.montant).join(
+            Credit, RetenueCredit.credit_id == Credit.id
+        ).filter(
+            RetenueCredit.annee == annee,
+            RetenueCredit.mois == mois
+        ), Credit.employe_id).all()
+        for employe_id, credit_id, montant in retenues:
+            donnees[employe_id]["retenues_credits"].append((credit_id, montant))
+        
+        return donnees
+    
+    def _calculer_depuis_donnees(
+        self,
+        employe: Employe,
+        donnees: Dict,
+        annee: int,
+        mois: int,
+        prime_objectif: Decimal = Decimal(0),
+        prime_variable: Decimal = Decimal(0)
+    ) -> Dict:
+        """
+        Calculer le bulletin d'un employé à partir des données déjà chargées
+        Aucune requête SQL: partagé par le calcul unitaire et le calcul en masse
+        """
+        calcul, erreur = self._calculer_imposable(employe, donnees, annee, mois, prime_objectif, prime_variable)
+        if calcul is None:
+            return erreur
+        irg = self._calculer_irg_proratise(
+            calcul["salaire_imposable"],
+            calcul["jours_travailles"],
+            employe.situation_familiale
+        )
+        return self._finaliser_calcul(calcul, irg)
+    
+    def _calculer_lot(
+        self,
+        entrees: List[Tuple[Employe, Dict, Decimal, Decimal]],
+        annee: int,
+        mois: int
+    ) -> List[Dict]:
+        """
+        Calculer les bulletins d'une liste d'employés (employe, données, prime objectif, prime variable)
+        
+        Deux passes: salaires imposables de tous les employés, puis une seule
+        recherche IRG vectorisée (calculer_irg_batch) sur les salaires de
+        référence (extrapolés à 30 jours si l'IRG est proratisé).
+        """
+        calculs = [
+            self._calculer_imposable(employe, donnees, annee, mois, prime_objectif, prime_variable)
+            for employe, donnees, prime_objectif, prime_variable in entrees
+        ]
+        
+        references = {}
+        for indice, (calcul, _) in enumerate(calculs):
+            if calcul is not None:
+                reference = self._salaire_reference_irg(calcul["salaire_imposable"], calcul["jours_travailles"])
+                if reference is not None:
+                    references[indice] = reference
+        irg_bareme = dict(zip(
+            references,
+            (irg.quantize(Decimal('0.01'), ROUND_HALF_UP)
+             for irg in self.irg_calculator.calculer_irg_batch(references.values()))
+        ))
+        
+        return [
+            erreur if calcul is None else self._finaliser_calcul(
+                calcul, self._irg_depuis_bareme(irg_bareme.get(indice), calcul["jours_travailles"])
+            )
+            for indice, (calcul, erreur) in enumerate(calculs)
+        ]
+    
+    def _calculer_imposable(
+        self,
+        employe: Employe,
+        donnees: Dict,
+        annee: int,
+        mois: int,
+        prime_objectif: Decimal,
+        prime_variable: Decimal
+    ) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """
+        Première passe du calcul: du pointage au salaire imposable
+        Retourne (calcul, None) ou (None, réponse d'erreur)
+        """
+        employe_id = employe.id
+        try:
+            pointage = donnees["pointage"]
             
             if not pointage:
-                return self._erreur_response(
+                return None, self._erreur_response(
                     employe_id,
                     f"Aucun pointage pour {mois}/{annee}",
                     employe.nom,
@@ -93,14 +364,9 @@ class SalaireProcessor:
             heures_supplementaires_pointage = totaux.get("heures_supplementaires", 0)
             jours_ouvrables = 30  # v3.5.3: Base 30 jours au lieu de 26
             
-            # ⭐ v3.7.0: Récupérer les déductions de congés depuis deductions_conges
+            # ⭐ v3.7.0: Déductions de congés depuis deductions_conges
             # On somme les jours déduits pour CE mois/année de bulletin
-            from models import DeductionConge
-            deductions = self.db.query(DeductionConge).filter(
-                DeductionConge.employe_id == employe_id,
-                DeductionConge.mois_deduction == mois,
-                DeductionConge.annee_deduction == annee
-            ).all()
+            deductions = donnees["deductions_conges"]
             
             jours_conges = sum(float(d.jours_deduits or 0) for d in deductions)
             
@@ -133,7 +399,7 @@ class SalaireProcessor:
             prime_nuit = (Decimal(str(self.params.prime_nuit_agent_securite)) * facteur_proratisation).quantize(Decimal('0.01'), ROUND_HALF_UP) if employe.prime_nuit_agent_securite else Decimal(0)
             
             # Prime déplacement (missions du mois)
-            prime_deplacement = self._calculer_prime_missions(employe_id, annee, mois)
+            prime_deplacement = self._calculer_prime_missions(donnees["primes_missions"])
             
             # 8. Salaire cotisable
             salaire_cotisable = (
@@ -161,23 +427,56 @@ class SalaireProcessor:
             # 10. Salaire imposable
             salaire_imposable = salaire_cotisable - retenue_ss + panier + prime_transport
             
-            # 11. IRG (proratisé selon jours travaillés)
-            irg = self._calculer_irg_proratise(
-                salaire_imposable,
-                jours_travailles,
-                employe.situation_familiale
-            )
+            return {
+                "employe": employe,
+                "donnees": donnees,
+                "annee": annee,
+                "mois": mois,
+                "anciennete": anciennete,
+                "jours_travailles": jours_travailles,
+                "jours_conges": jours_conges,
+                "jours_ouvrables": jours_ouvrables,
+                "facteur_proratisation": facteur_proratisation,
+                "salaire_base": salaire_base,
+                "salaire_base_proratis": salaire_base_proratis,
+                "heures_supp": heures_supp,
+                "indemnite_nuisance": indemnite_nuisance,
+                "ifsp": ifsp,
+                "iep": iep,
+                "prime_encouragement": prime_encouragement,
+                "prime_chauffeur": prime_chauffeur,
+                "prime_nuit": prime_nuit,
+                "prime_deplacement": prime_deplacement,
+                "prime_objectif": prime_objectif,
+                "prime_variable": prime_variable,
+                "salaire_cotisable": salaire_cotisable,
+                "retenue_ss": retenue_ss,
+                "panier": panier,
+                "prime_transport": prime_transport,
+                "salaire_imposable": salaire_imposable,
+            }, None
+            
+        except Exception as e:
+            return None, self._erreur_response(employe_id, f"Erreur technique: {str(e)}")
+    
+    def _finaliser_calcul(self, calcul: Dict, irg: Decimal) -> Dict:
+        """Seconde passe du calcul: IRG connu → déductions, net et réponse complète"""
+        employe = calcul["employe"]
+        donnees = calcul["donnees"]
+        salaire_imposable = calcul["salaire_imposable"]
+        try:
+            # 11. IRG (proratisé selon jours travaillés): fourni par l'appelant
+            # (unitaire: _calculer_irg_proratise, en masse: recherche groupée de _calculer_lot)
             
             # 12. Déductions (avances + crédits) avec gestion insuffisance
             deductions_data = self._calculer_deductions(
-                employe_id,
-                annee,
-                mois,
+                donnees["avances"],
+                self._mensualites_credits(donnees),
                 salaire_imposable - irg
             )
             
             # 13. Prime femme foyer (proratisée base 30 jours)
-            prime_femme_foyer = (Decimal(str(self.params.prime_femme_foyer)) * facteur_proratisation).quantize(Decimal('0.01'), ROUND_HALF_UP) if employe.femme_au_foyer else Decimal(0)
+            prime_femme_foyer = (Decimal(str(self.params.prime_femme_foyer)) * calcul["facteur_proratisation"]).quantize(Decimal('0.01'), ROUND_HALF_UP) if employe.femme_au_foyer else Decimal(0)
             
             # 14. Salaire net final
             salaire_net = (
@@ -192,39 +491,40 @@ class SalaireProcessor:
                 "employe_id": employe.id,
                 "employe_nom": employe.nom,
                 "employe_prenom": employe.prenom,
-                "annee": annee,
-                "mois": mois,
+                "annee": calcul["annee"],
+                "mois": calcul["mois"],
                 
                 # Salaire de base
-                "salaire_base": str(salaire_base),
-                "salaire_base_proratis": str(salaire_base_proratis.quantize(Decimal('0.01'), ROUND_HALF_UP)),
-                "jours_travailles": jours_travailles,
-                "jours_conges": jours_conges,
-                "jours_ouvrables_travailles": jours_ouvrables,
-                "heures_supplementaires": str(heures_supp.quantize(Decimal('0.01'), ROUND_HALF_UP)),
+                "salaire_base": str(calcul["salaire_base"]),
+                "salaire_base_proratis": str(calcul["salaire_base_proratis"].quantize(Decimal('0.01'), ROUND_HALF_UP)),
+                "jours_travailles": calcul["jours_travailles"],
+                "jours_conges": calcul["jours_conges"],
+                "jours_ouvrables_travailles": calcul["jours_ouvrables"],
+                "heures_supplementaires": str(calcul["heures_supp"].quantize(Decimal('0.01'), ROUND_HALF_UP)),
                 
                 # Primes cotisables
-                "indemnite_nuisance": str(indemnite_nuisance),
-                "ifsp": str(ifsp),
-                "iep": str(iep),
-                "prime_encouragement": str(prime_encouragement),
-                "prime_chauffeur": str(prime_chauffeur),
-                "prime_nuit_agent_securite": str(prime_nuit),
-                "prime_deplacement": str(prime_deplacement),
-                "prime_objectif": str(prime_objectif),
-                "prime_variable": str(prime_variable),
+                "indemnite_nuisance": str(calcul["indemnite_nuisance"]),
+                "ifsp": str(calcul["ifsp"]),
+                "iep": str(calcul["iep"]),
+                "prime_encouragement": str(calcul["prime_encouragement"]),
+                "prime_chauffeur": str(calcul["prime_chauffeur"]),
+                "prime_nuit_agent_securite": str(calcul["prime_nuit"]),
+                "prime_deplacement": str(calcul["prime_deplacement"]),
+                "prime_objectif": str(calcul["prime_objectif"]),
+                "prime_variable": str(calcul["prime_variable"]),
                 
                 # Cotisations
-                "salaire_cotisable": str(salaire_cotisable.quantize(Decimal('0.01'), ROUND_HALF_UP)),
-                "retenue_securite_sociale": str(retenue_ss),
+                "salaire_cotisable": str(calcul["salaire_cotisable"].quantize(Decimal('0.01'), ROUND_HALF_UP)),
+                "retenue_securite_sociale": str(calcul["retenue_ss"]),
                 
                 # Primes non cotisables
-                "panier": str(panier),
-                "prime_transport": str(prime_transport),
+                "panier": str(calcul["panier"]),
+                "prime_transport": str(calcul["prime_transport"]),
                 
                 # Imposable et IRG
                 "salaire_imposable": str(salaire_imposable.quantize(Decimal('0.01'), ROUND_HALF_UP)),
                 "irg": str(irg),
+                "irg_bareme_version": self.irg_calculator.version_bareme,
                 
                 # Déductions
                 "total_avances": str(deductions_data['avances']),
@@ -243,9 +543,14 @@ class SalaireProcessor:
                 "error": None,
                 "alerte": deductions_data.get('alerte'),
                 
+                # ⭐ Noms des colonnes salaires (persistés à la validation)
+                "jours_ouvrables": calcul["jours_ouvrables"],
+                "alerte_insuffisance": deductions_data.get('alerte'),
+                "empreinte_entrees": self._empreinte_entrees(employe, donnees),
+                
                 # Détails calcul
                 "details_calcul": {
-                    "anciennete_annees": anciennete,
+                    "anciennete_annees": calcul["anciennete"],
                     "nombre_missions_mois": deductions_data.get('nb_missions', 0),
                     "nombre_avances_mois": deductions_data.get('nb_avances', 0),
                     "nombre_credits_actifs": deductions_data.get('nb_credits', 0)
@@ -253,17 +558,11 @@ class SalaireProcessor:
             }
             
         except Exception as e:
-            return self._erreur_response(employe_id, f"Erreur technique: {str(e)}")
+            return self._erreur_response(employe.id, f"Erreur technique: {str(e)}")
     
-    def _calculer_prime_missions(self, employe_id: int, annee: int, mois: int) -> Decimal:
+    def _calculer_prime_missions(self, primes_missions: List) -> Decimal:
         """Calculer prime de déplacement (missions du mois)"""
-        missions = self.db.query(Mission).filter(
-            Mission.chauffeur_id == employe_id,
-            func.year(Mission.date_mission) == annee,
-            func.month(Mission.date_mission) == mois
-        ).all()
-        
-        total = sum(Decimal(str(m.prime_calculee or 0)) for m in missions)
+        total = sum(Decimal(str(prime or 0)) for prime in primes_missions)
         return total
     
     def _calculer_irg_proratise(
@@ -286,22 +585,33 @@ class SalaireProcessor:
         - IRG pour 37,500 DA dans barème = 2,465 DA
         - IRG proratisé = (2,465 / 30) × 20 = 1,643 DA
         """
-        if jours_travailles == 0:
+        reference = self._salaire_reference_irg(salaire_imposable, jours_travailles)
+        if reference is None:
             return Decimal(0)
+        return self._irg_depuis_bareme(self._calculer_irg_simple(reference), jours_travailles)
+    
+    def _salaire_reference_irg(self, salaire_imposable: Decimal, jours_travailles: int) -> Optional[Decimal]:
+        """Salaire cherché dans le barème (None si aucun jour travaillé: IRG nul)"""
+        if jours_travailles == 0:
+            return None
         
         # Vérifier si proratisation activée dans paramètres
         if not self.params.activer_irg_proratise:
             # Mode simple: IRG direct sur salaire réel
-            return self._calculer_irg_simple(salaire_imposable)
+            return salaire_imposable
         
         # 1. Extrapoler à 30 jours
-        salaire_30j = (salaire_imposable / Decimal(jours_travailles)) * Decimal(30)
-        
-        # 2. Chercher IRG pour salaire 30j
-        irg_30j = self._calculer_irg_simple(salaire_30j)
+        return (salaire_imposable / Decimal(jours_travailles)) * Decimal(30)
+    
+    def _irg_depuis_bareme(self, irg_bareme: Optional[Decimal], jours_travailles: int) -> Decimal:
+        """IRG final à partir du montant du barème pour le salaire de référence"""
+        if irg_bareme is None:
+            return Decimal(0)
+        if not self.params.activer_irg_proratise:
+            return irg_bareme
         
-        # 3. Proratiser IRG selon jours réellement travaillés
-        irg_final = (irg_30j / Decimal(30)) * Decimal(jours_travailles)
+        # 2. IRG du barème pour le salaire 30j → 3. proratiser selon jours réellement travaillés
+        irg_final = (irg_bareme / Decimal(30)) * Decimal(jours_travailles)
         
         # Arrondir à l'entier (IRG sans décimales)
         return Decimal(int(irg_final.quantize(Decimal('1'), ROUND_HALF_UP)))
@@ -316,29 +626,17 @@ class SalaireProcessor:
     
     def _calculer_deductions(
         self,
-        employe_id: int,
-        annee: int,
-        mois: int,
+        avances: List[Avance],
+        mensualites_credits: Dict[int, Decimal],
         salaire_disponible: Decimal
     ) -> Dict:
         """
-        Calculer déductions (avances + crédits)
+        Calculer déductions (avances du mois + mensualités des crédits du mois)
         Gérer report si salaire insuffisant
         """
-        # Avances du mois
-        avances = self.db.query(Avance).filter(
-            Avance.employe_id == employe_id,
-            Avance.annee_deduction == annee,
-            Avance.mois_deduction == mois
-        ).all()
         total_avances = sum(Decimal(str(a.montant)) for a in avances)
         
-        # Crédits actifs
-        credits = self.db.query(Credit).filter(
-            Credit.employe_id == employe_id,
-            Credit.statut == StatutCredit.EN_COURS
-        ).all()
-        total_credits = sum(Decimal(str(c.montant_mensualite)) for c in credits)
+        total_credits = sum(Decimal(str(montant)) for montant in mensualites_credits.values())
         
         total_deductions = total_avances + total_credits
         
@@ -393,10 +691,52 @@ class SalaireProcessor:
             "credits_reportes": credits_reportes,
             "alerte": alerte,
             "nb_avances": len(avances),
-            "nb_credits": len(credits),
+            "nb_credits": len(mensualites_credits),
             "nb_missions": 0  # Sera calculé ailleurs si nécessaire
         }
     
+    def _empreinte_parametres(self) -> str:
+        """Empreinte des paramètres de paie et de la version du barème IRG"""
+        if self._empreinte_params is None:
+            valeurs = {
+                attr.key: getattr(self.params, attr.key)
+                for attr in inspect(self.params).mapper.column_attrs
+                if attr.key not in ("id", "date_modification")
+            }
+            valeurs["irg_bareme_version"] = self.irg_calculator.version_bareme
+            contenu = json.dumps(valeurs, sort_keys=True, default=str)
+            self._empreinte_params = hashlib.sha256(contenu.encode("utf-8")).hexdigest()
+        return self._empreinte_params
+    
+    def _empreinte_entrees(self, employe: Employe, donnees: Dict) -> str:
+        """
+        Empreinte (SHA-256) des entrées du calcul d'un employé pour le mois
+        
+        Enregistrée avec le salaire validé: tant qu'elle est identique, la ligne
+        persistée est servie telle quelle par les rapports. Les champs modifiés
+        par la validation elle-même (avance.deduit, credit.montant_retenu/statut)
+        n'en font pas partie: les mensualités sont celles du calcul
+        (_mensualites_credits: retenues déjà enregistrées pour le mois, sinon
+        mensualités des crédits en cours).
+        """
+        pointage = donnees["pointage"]
+        mensualites = self._mensualites_credits(donnees)
+        
+        entrees = {
+            "parametres": self._empreinte_parametres(),
+            "employe": [
+                _montant(employe.salaire_base), employe.date_recrutement, employe.poste_travail,
+                employe.situation_familiale, employe.prime_nuit_agent_securite, employe.femme_au_foyer
+            ],
+            "pointage": [pointage.get_jour(jour) for jour in range(1, 32)] if pointage else None,
+            "conges": sorted(_montant(d.jours_deduits) for d in donnees["deductions_conges"]),
+            "missions": sorted(_montant(prime) for prime in donnees["primes_missions"]),
+            "avances": sorted((a.id, _montant(a.montant)) for a in donnees["avances"]),
+            "credits": sorted((credit_id, _montant(montant)) for credit_id, montant in mensualites.items())
+        }
+        contenu = json.dumps(entrees, sort_keys=True, default=str)
+        return hashlib.sha256(contenu.encode("utf-8")).hexdigest()
+    
     def _erreur_response(
         self,
         employe_id: int,
@@ -414,19 +754,142 @@ class SalaireProcessor:
             "salaire_net": "0"
         }
     
-    def calculer_tous_salaires(self, annee: int, mois: int) -> List[Dict]:
+    def calculer_tous_salaires(self, annee: int, mois: int, bulk: bool = True) -> List[Dict]:
         """
         Calculer salaires de tous les employés actifs
         Retourne liste avec résultats ou erreurs
+        
+        bulk=True: données du mois chargées en quelques requêtes groupées puis
+        indexées par employé (nombre de requêtes constant).
+        bulk=False: ancien chemin, un calculer_salaire_employe par employé.
+        Les deux modes produisent des résultats identiques.
         """
         # Vider le cache SQLAlchemy pour forcer le rechargement des données
         self.db.expire_all()
         
         employes = self.db.query(Employe).filter(Employe.actif == True).all()
+        
+        if not bulk:
+            return [
+                self.calculer_salaire_employe(employe.id, annee, mois)
+                for employe in employes
+            ]
+        
+        try:
+            donnees_mois = self._charger_donnees_mois(annee, mois)
+        except Exception as e:
+            return [
+                self._erreur_response(employe.id, f"Erreur technique: {str(e)}")
+                for employe in employes
+            ]
+        
+        return self._calculer_lot(
+            [(employe, donnees_mois[employe.id], Decimal(0), Decimal(0)) for employe in employes],
+            annee, mois
+        )
+    
+    def resultats_mois(self, annee: int, mois: int) -> List[Dict]:
+        """
+        Résultats du mois pour les rapports, servis depuis la table salaires
+        
+        - ligne validée/payée dont l'empreinte des entrées est inchangée:
+          recopiée telle quelle (provenance "persiste")
+        - ligne validée mais entrées modifiées depuis la validation (ou ligne
+          antérieure aux empreintes): recalculée avec ses primes objectif/variable
+          (provenance "recalcule")
+        - pas de ligne validée: calculée comme calculer_tous_salaires (provenance "calcule")
+        
+        Les employés désactivés depuis la validation restent dans le rapport du mois.
+        """
+        self.db.expire_all()
+        
+        lignes = self.db.query(Employe, Salaire).outerjoin(
+            Salaire,
+            and_(
+                Salaire.employe_id == Employe.id,
+                Salaire.annee == annee,
+                Salaire.mois == mois,
+                Salaire.statut.in_(STATUTS_SALAIRE_VALIDES)
+            )
+        ).filter(
+            or_(Employe.actif == True, Salaire.id.isnot(None))
+        ).order_by(Employe.id).all()
+        
+        try:
+            donnees_mois = self._charger_donnees_mois(annee, mois, [employe.id for employe, _ in lignes])
+        except Exception as e:
+            return [
+                dict(self._erreur_response(employe.id, f"Erreur technique: {str(e)}"), provenance=PROVENANCE_CALCULE)
+                for employe, _ in lignes
+            ]
+        
         resultats = []
+        a_calculer = []  # (rang dans resultats, salaire validé ou None, entrée de _calculer_lot)
+        for employe, salaire in lignes:
+            donnees = donnees_mois[employe.id]
+            
+            if salaire is None:
+                a_calculer.append((len(resultats), None, (employe, donnees, Decimal(0), Decimal(0))))
+                resultats.append(None)
+            elif salaire.empreinte_entrees and salaire.empreinte_entrees == self._empreinte_entrees(employe, donnees):
+                resultats.append(self._resultat_depuis_salaire(employe, salaire, donnees, annee, mois))
+            else:
+                a_calculer.append((len(resultats), salaire, (
+                    employe, donnees,
+                    Decimal(str(salaire.prime_objectif or 0)),
+                    Decimal(str(salaire.prime_variable or 0))
+                )))
+                resultats.append(None)
         
-        for employe in employes:
-            resultat = self.calculer_salaire_employe(employe.id, annee, mois)
-            resultats.append(resultat)
+        # Calculés et recalculés: une seule recherche IRG groupée
+        calcules = self._calculer_lot([entree for _, _, entree in a_calculer], annee, mois)
+        for (rang, salaire, _), resultat in zip(a_calculer, calcules):
+            if salaire is None:
+                resultat["provenance"] = PROVENANCE_CALCULE
+            else:
+                resultat["provenance"] = PROVENANCE_RECALCULE
+                resultat["salaire_id"] = salaire.id
+            resultats[rang] = resultat
         
         return resultats
+    
+    def _resultat_depuis_salaire(
+        self,
+        employe: Employe,
+        salaire: Salaire,
+        donnees: Dict,
+        annee: int,
+        mois: int
+    ) -> Dict:
+        """Résultat au format de _calculer_depuis_donnees reconstruit depuis une ligne salaires"""
+        resultat = {
+            "employe_id": employe.id,
+            "employe_nom": employe.nom,
+            "employe_prenom": employe.prenom,
+            "annee": annee,
+            "mois": mois,
+            "salaire_base": str(Decimal(str(employe.salaire_base))),
+            "jours_travailles": salaire.jours_travailles or 0,
+            "jours_conges": float(salaire.jours_conges or 0),
+            "jours_ouvrables_travailles": salaire.jours_ouvrables,
+        }
+        resultat.update({cle: _montant(getattr(salaire, cle)) for cle in MONTANTS_SALAIRE})
+        resultat.update({
+            "irg_bareme_version": salaire.irg_bareme_version,
+            "status": "OK",
+            "error": None,
+            "alerte": salaire.alerte_insuffisance,
+            "jours_ouvrables": salaire.jours_ouvrables,
+            "alerte_insuffisance": salaire.alerte_insuffisance,
+            "empreinte_entrees": salaire.empreinte_entrees,
+            "details_calcul": {
+                "anciennete_annees": self.calculer_anciennete(employe.date_recrutement, annee, mois),
+                "nombre_missions_mois": 0,
+                "nombre_avances_mois": len(donnees["avances"]),
+                "nombre_credits_actifs": len(donnees["credits"])
+            },
+            "provenance": PROVENANCE_PERSISTE,
+            "salaire_id": salaire.id,
+            "calcule_le": salaire.calcule_le.isoformat() if salaire.calcule_le else None,
+        })
+        return resultat
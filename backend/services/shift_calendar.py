@@ -0,0 +1,130 @@
+"""
+Shift calendar for attendance imports
+
+Each poste (PosteTravail) may define a shift template (start, end, hours of
+a full day); employees without one use the default 08:00 - 17:00, 8h day.
+A shift whose end is not after its start crosses midnight (night shift):
+punches of the early morning belong to the work day of the evening before.
+
+Templates and employee postes are loaded once per import (two queries).
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from models import Employe
+from models.poste_travail import PosteTravail
+
+
+class ShiftTemplate(NamedTuple):
+    start: time = time(8, 0)
+    end: time = time(17, 0)
+    day_hours: int = 8
+
+    @property
+    def crosses_midnight(self) -> bool:
+        return self.end <= self.start
+
+    @property
+    def duration(self) -> timedelta:
+        span = datetime.combine(date.min, self.end) - datetime.combine(date.min, self.start)
+        return span + timedelta(days=1) if self.crosses_midnight else span
+
+    @property
+    def night_cutoff(self) -> Optional[int]:
+        """
+        Night shifts: minute of the day before which a punch belongs to the
+        previous work day (middle of the off-duty gap). None for day shifts.
+        """
+        if not self.crosses_midnight:
+            return None
+        end = self.end.hour * 60 + self.end.minute
+        start = self.start.hour * 60 + self.start.minute
+        return end + (start - end) // 2
+
+    def work_date(self, timestamp: datetime) -> date:
+        cutoff = self.night_cutoff
+        if cutoff is not None and timestamp.hour * 60 + timestamp.minute < cutoff:
+            return timestamp.date() - timedelta(days=1)
+        return timestamp.date()
+
+    def start_on(self, work_date: date) -> datetime:
+        return datetime.combine(work_date, self.start)
+
+    def end_on(self, work_date: date) -> datetime:
+        return self.start_on(work_date) + self.duration
+
+    def label(self, value: time) -> str:
+        """Rule label of a shift bound: "17h", "6h30" """
+        return f"{value.hour}h" if not value.minute else f"{value.hour}h{value.minute:02d}"
+
+
+DEFAULT_SHIFT = ShiftTemplate()
+
+
+class ShiftCalendar:
+    """Shift template of each employee (by poste)"""
+
+    def __init__(
+        self,
+        templates_by_poste: Optional[Dict[str, ShiftTemplate]] = None,
+        poste_by_employee: Optional[Dict[int, str]] = None
+    ):
+        self.templates_by_poste = templates_by_poste or {}
+        self.poste_by_employee = poste_by_employee or {}
+
+    @classmethod
+    def load(cls, db: Session) -> "ShiftCalendar":
+        """Postes with a template and employee postes, one query each"""
+        templates = {}
+        postes = db.query(
+            PosteTravail.libelle, PosteTravail.heure_debut, PosteTravail.heure_fin, PosteTravail.heures_journee
+        ).filter(PosteTravail.heure_debut.isnot(None), PosteTravail.heure_fin.isnot(None))
+        for libelle, start, end, day_hours in postes:
+            templates[libelle] = ShiftTemplate(start, end, day_hours or DEFAULT_SHIFT.day_hours)
+
+        employees = dict(db.query(Employe.id, Employe.poste_travail)) if templates else {}
+        return cls(templates, employees)
+
+    def for_employee(self, employee_id: Optional[int]) -> ShiftTemplate:
+        return self.templates_by_poste.get(self.poste_by_employee.get(employee_id), DEFAULT_SHIFT)
+
+
+def resolve_punches(punches: List[Tuple[datetime, str]]) -> Tuple[Optional[datetime], Optional[datetime], Optional[int], int]:
+    """
+    Pair the punches of one work day
+
+    Each ENTRY opens a period closed by the next EXIT; repeated ENTRY punches
+    keep the first, repeated EXIT punches extend the last closed period.
+
+    Returns:
+        (first entry, last exit, minutes of the paired periods or None if
+        no period was closed, number of punches left unpaired)
+    """
+    entry = exit = opened = closed = None
+    minutes = None
+    unpaired = 0
+
+    for timestamp, punch_type in sorted(punches):
+        if punch_type == 'ENTRY':
+            entry = entry or timestamp
+            if opened is None:
+                opened = timestamp
+            else:
+                unpaired += 1
+        else:
+            exit = timestamp
+            if opened is not None:
+                minutes = (minutes or 0) + int((timestamp - opened).total_seconds() // 60)
+                opened, closed = None, timestamp
+            elif closed is not None:
+                minutes += int((timestamp - closed).total_seconds() // 60)
+                closed = timestamp
+            else:
+                unpaired += 1
+
+    if opened is not None and minutes is not None:
+        unpaired += 1
+    return entry, exit, minutes, unpaired
@@ -0,0 +1,155 @@
+"""
+Soldes logistiques matérialisés (table client_logistics_balance)
+
+Les soldes par (client, type) ne sont plus recalculés sur tout l'historique
+des mouvements à chaque lecture: MissionService y reporte l'écart de chaque
+création / modification / suppression de mission.
+
+- EcartsLogistiques: écarts accumulés en mémoire (mouvements saisis en plus,
+  mouvements en base d'une mission en moins), écrits en un upsert
+  incrémental (total = total + écart), sans commit
+- reconstruire_soldes_logistiques(): recalcul complet depuis les mouvements
+  (INSERT ... SELECT groupé), pour le remplissage initial ou une correction
+- lire_soldes(): lecture des soldes d'un client ou de tous les clients
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from models import Client, ClientLogisticsBalance, LogisticsType, MissionClientDetail, MissionLogisticsMovement
+
+# (client_id, logistics_type_id)
+CleSolde = Tuple[int, int]
+
+# Lignes par upsert
+TAILLE_LOT = 500
+
+
+class EcartsLogistiques:
+    """Écarts de soldes logistiques de plusieurs clients, écrits en un upsert"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._ecarts: Dict[CleSolde, List[int]] = defaultdict(lambda: [0, 0])
+
+    def ajouter_saisie(self, clients: Iterable):
+        """Ajouter les mouvements saisis (MissionClientDetailCreate) d'une mission"""
+        for client in clients:
+            for mouvement in client.logistics:
+                ecart = self._ecarts[(client.client_id, mouvement.logistics_type_id)]
+                ecart[0] += mouvement.quantity_out or 0
+                ecart[1] += mouvement.quantity_in or 0
+
+    def retirer_missions(self, mission_ids: Iterable[int]):
+        """Retirer les mouvements actuellement en base de ces missions (une requête groupée)"""
+        mission_ids = list(mission_ids)
+        if not mission_ids:
+            return
+        lignes = self.db.query(
+            MissionClientDetail.client_id,
+            MissionLogisticsMovement.logistics_type_id,
+            func.sum(MissionLogisticsMovement.quantity_out),
+            func.sum(MissionLogisticsMovement.quantity_in)
+        ).join(
+            MissionLogisticsMovement,
+            MissionLogisticsMovement.mission_client_detail_id == MissionClientDetail.id
+        ).filter(
+            MissionClientDetail.mission_id.in_(mission_ids)
+        ).group_by(
+            MissionClientDetail.client_id,
+            MissionLogisticsMovement.logistics_type_id
+        )
+        for client_id, type_id, total_out, total_in in lignes:
+            ecart = self._ecarts[(client_id, type_id)]
+            ecart[0] -= total_out or 0
+            ecart[1] -= total_in or 0
+
+    def ecrire(self) -> int:
+        """Upsert incrémental des écarts non nuls (sans commit); retourne le nombre de lignes"""
+        valeurs = [
+            {"client_id": client_id, "logistics_type_id": type_id, "total_out": ecart_out, "total_in": ecart_in}
+            for (client_id, type_id), (ecart_out, ecart_in) in sorted(self._ecarts.items())
+            if ecart_out or ecart_in
+        ]
+        for debut in range(0, len(valeurs), TAILLE_LOT):
+            self.db.execute(self._upsert(valeurs[debut:debut + TAILLE_LOT]))
+        self._ecarts.clear()
+        return len(valeurs)
+
+    def _upsert(self, valeurs: List[Dict]):
+        table = ClientLogisticsBalance.__table__
+        if self.db.get_bind().dialect.name == "mysql":
+            from sqlalchemy.dialects.mysql import insert as insert_mysql
+            instruction = insert_mysql(table).values(valeurs)
+            return instruction.on_duplicate_key_update({
+                "total_out": table.c.total_out + instruction.inserted.total_out,
+                "total_in": table.c.total_in + instruction.inserted.total_in
+            })
+
+        from sqlalchemy.dialects.sqlite import insert as insert_sqlite
+        instruction = insert_sqlite(table).values(valeurs)
+        return instruction.on_conflict_do_update(
+            index_elements=[table.c.client_id, table.c.logistics_type_id],
+            set_={
+                "total_out": table.c.total_out + instruction.excluded.total_out,
+                "total_in": table.c.total_in + instruction.excluded.total_in
+            }
+        )
+
+
+def reconstruire_soldes_logistiques(db: Session) -> int:
+    """
+    Recalculer toute la table depuis les mouvements des missions (sans commit)
+
+    Returns:
+        Nombre de soldes (client, type) écrits
+    """
+    db.query(ClientLogisticsBalance).delete(synchronize_session=False)
+    mouvements = select(
+        MissionClientDetail.client_id,
+        MissionLogisticsMovement.logistics_type_id,
+        func.coalesce(func.sum(MissionLogisticsMovement.quantity_out), 0),
+        func.coalesce(func.sum(MissionLogisticsMovement.quantity_in), 0)
+    ).join(
+        MissionLogisticsMovement,
+        MissionLogisticsMovement.mission_client_detail_id == MissionClientDetail.id
+    ).group_by(
+        MissionClientDetail.client_id,
+        MissionLogisticsMovement.logistics_type_id
+    )
+    resultat = db.execute(insert(ClientLogisticsBalance.__table__).from_select(
+        ["client_id", "logistics_type_id", "total_out", "total_in"], mouvements
+    ))
+    return resultat.rowcount
+
+
+def lire_soldes(db: Session, client_id: Optional[int] = None):
+    """
+    Soldes non nuls des types logistiques actifs, depuis la table matérialisée
+
+    Une requête sur la clé primaire (client_id, logistics_type_id); lignes
+    (client_id, client_nom, client_prenom, type_id, type_name, total_out, total_in)
+    triées par client puis type.
+    """
+    query = db.query(
+        ClientLogisticsBalance.client_id,
+        Client.nom.label("client_nom"),
+        Client.prenom.label("client_prenom"),
+        LogisticsType.id.label("type_id"),
+        LogisticsType.name.label("type_name"),
+        ClientLogisticsBalance.total_out,
+        ClientLogisticsBalance.total_in
+    ).join(
+        Client, Client.id == ClientLogisticsBalance.client_id
+    ).join(
+        LogisticsType, LogisticsType.id == ClientLogisticsBalance.logistics_type_id
+    ).filter(
+        LogisticsType.is_active == True,
+        or_(ClientLogisticsBalance.total_out != 0, ClientLogisticsBalance.total_in != 0)
+    )
+    if client_id is not None:
+        query = query.filter(ClientLogisticsBalance.client_id == client_id)
+    return query.order_by(ClientLogisticsBalance.client_id, LogisticsType.id).all()
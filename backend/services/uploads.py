@@ -0,0 +1,34 @@
+"""
+Fichiers importés (Excel / CSV)
+
+Starlette reçoit les fichiers multipart dans un fichier temporaire
+(SpooledTemporaryFile, sur disque au-delà de 1 Mo). fichier_upload() contrôle
+l'extension et la taille puis retourne ce fichier rembobiné: les imports le
+lisent en flux (openpyxl read_only, CSV par blocs) au lieu de charger tout
+le contenu avec await file.read().
+"""
+
+import os
+from typing import BinaryIO, Tuple
+
+from fastapi import HTTPException, UploadFile
+
+from config import settings
+
+
+def fichier_upload(file: UploadFile, extensions: Tuple[str, ...], message_format: str) -> BinaryIO:
+    """Fichier temporaire de l'upload, après contrôle de l'extension et de la taille (UPLOAD_MAX_MO)"""
+    if not file.filename or not file.filename.lower().endswith(extensions):
+        raise HTTPException(400, message_format)
+
+    flux = file.file
+    flux.seek(0, os.SEEK_END)
+    taille = flux.tell()
+    flux.seek(0)
+
+    if taille > settings.UPLOAD_MAX_MO * 1024 * 1024:
+        raise HTTPException(
+            413,
+            f"Fichier trop volumineux ({taille / (1024 * 1024):.1f} Mo, maximum {settings.UPLOAD_MAX_MO} Mo)"
+        )
+    return flux
@@ -0,0 +1,6 @@
+import os
+
+# Configuration minimale pour importer database/config sans fichier .env
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DEBUG", "false")
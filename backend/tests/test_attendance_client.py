@@ -0,0 +1,151 @@
+import sys
+import os
+import json
+import threading
+import unittest
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import requests
+
+from models import AttendanceEmployeeMapping, AttendanceSyncState, Pointage
+from services.attendance_client import AttendanceClient
+from services.attendance_service import AttendanceService
+from tests.test_salary_processor_bulk import creer_session, creer_employe
+
+
+class FauxAttendance(ThreadingHTTPServer):
+    """Serveur Attendance local: annuaire + logs paginés (skip/limit, filtre de dates)"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), GestionnaireAttendance)
+        self.employes = [{"id": 501, "name": "NOM1 PRENOM1"}, {"id": 502, "name": "Nom2 Prenom2"}]
+        self.logs = []
+        self.requetes = []
+        self.logs_transferes = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/api"
+
+
+class GestionnaireAttendance(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _repondre(self, donnees):
+        corps = json.dumps(donnees).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.server.requetes.append(("GET", url.path))
+        if url.path == "/api/employees/":
+            return self._repondre(self.server.employes)
+
+        params = {cle: valeurs[0] for cle, valeurs in parse_qs(url.query).items()}
+        logs = [
+            log for log in self.server.logs
+            if params["start_date"] <= log["timestamp"][:10] <= params["end_date"]
+        ]
+        skip, limit = int(params.get("skip", 0)), int(params["limit"])
+        page = logs[skip:skip + limit]
+        self.server.logs_transferes += len(page)
+        self._repondre(page)
+
+    def do_PUT(self):
+        self.server.requetes.append(("PUT", self.path))
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._repondre({})
+
+
+def log(log_id, jour, mois=3):
+    return {"id": log_id, "employee_id": 501, "timestamp": f"2025-{mois:02d}-{jour:02d}T17:00:00",
+            "type": "EXIT", "worked_minutes": 480}
+
+
+class TestAttendanceClient(unittest.TestCase):
+    def setUp(self):
+        self.serveur = FauxAttendance()
+        threading.Thread(target=self.serveur.serve_forever, daemon=True).start()
+        self.session_http = requests.Session()
+        self.db = creer_session()
+        self.employes = [creer_employe(self.db, idx) for idx in range(1, 4)]
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        self.session_http.close()
+        self.serveur.shutdown()
+        self.serveur.server_close()
+
+    def _service(self, page_size=2):
+        client = AttendanceClient(self.serveur.url, timeout=5, session=self.session_http, page_size=page_size)
+        return AttendanceService(self.db, client=client)
+
+    def test_annuaire_telecharge_une_fois_par_synchronisation(self):
+        service = self._service()
+        resultats = [service.sync_employee_to_attendance(employe.id) for employe in self.employes]
+
+        self.assertEqual([m.attendance_employee_id if m else None for m in resultats], [501, 502, None])
+        self.assertEqual(self.serveur.requetes.count(("GET", "/api/employees/")), 1)
+        self.assertEqual(self.serveur.requetes.count(("PUT", "/api/employees/501")), 1)
+
+    def test_synchronisation_incrementale(self):
+        self.db.add(AttendanceEmployeeMapping(hr_employee_id=self.employes[0].id, attendance_employee_id=501))
+        self.db.commit()
+        self.serveur.logs = [log(i, i) for i in range(1, 6)]
+
+        summary = self._service().import_attendance_logs(date(2025, 3, 1), date(2025, 3, 31))
+        self.assertEqual(summary["imported"], 5)
+        self.assertEqual(self.serveur.logs_transferes, 5)  # 3 pages de 2
+        etat = self.db.query(AttendanceSyncState).filter_by(scope="logs").one()
+        self.assertEqual((etat.last_log_id, etat.last_log_timestamp.day), (5, 5))
+
+        # Nouvelle synchronisation: seuls les logs depuis le jour du dernier log importé transitent
+        self.serveur.logs += [log(6, 6), log(7, 7)]
+        self.serveur.logs_transferes = 0
+        summary = self._service().import_attendance_logs(date(2025, 3, 1), date(2025, 3, 31))
+        self.assertEqual(self.serveur.logs_transferes, 3)  # log 5 (même jour, ignoré) + 6 + 7
+        self.assertEqual((summary["total_logs"], summary["imported"]), (2, 2))
+        self.db.refresh(etat)
+        self.assertEqual(etat.last_log_id, 7)
+
+        pointage = self.db.query(Pointage).filter_by(employe_id=self.employes[0].id).one()
+        self.assertEqual([pointage.get_jour(j) for j in range(1, 9)], [1] * 7 + [None])
+
+        # Resynchronisation complète: tout est retransféré, rien n'est réimporté
+        summary = self._service().import_attendance_logs(date(2025, 3, 1), date(2025, 3, 31), full_resync=True)
+        self.assertEqual((summary["total_logs"], summary["skipped_duplicate"]), (7, 7))
+
+    def test_periode_anterieure_apres_synchronisation(self):
+        self.db.add(AttendanceEmployeeMapping(hr_employee_id=self.employes[0].id, attendance_employee_id=501))
+        self.db.commit()
+        self.serveur.logs = [log(i, i) for i in range(1, 4)]
+        self._service().import_attendance_logs(date(2025, 3, 1), date(2025, 3, 31))
+
+        # Février synchronisé après mars: logs téléversés tardivement (ids au-delà de la marque)
+        self.serveur.logs = [log(10, 3, mois=2), log(11, 4, mois=2)] + self.serveur.logs
+        summary = self._service().import_attendance_logs(date(2025, 2, 1), date(2025, 2, 28))
+        self.assertEqual((summary["total_logs"], summary["imported"]), (2, 2))
+        etat = self.db.query(AttendanceSyncState).filter_by(scope="logs").one()
+        self.assertEqual((etat.last_log_id, etat.last_log_timestamp.month), (3, 3))  # marque inchangée
+
+        pointage = self.db.query(Pointage).filter_by(employe_id=self.employes[0].id, mois=2).one()
+        self.assertEqual([pointage.get_jour(j) for j in (3, 4)], [1, 1])
+
+        # Nouvelle synchronisation de février: rien n'est réimporté
+        summary = self._service().import_attendance_logs(date(2025, 2, 1), date(2025, 2, 28))
+        self.assertEqual((summary["total_logs"], summary["skipped_duplicate"]), (2, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import sys
+import os
+import unittest
+from datetime import date
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event
+
+from models import Pointage, Conge, AttendanceSyncLog, AttendanceImportConflict, ConflictStatus, LogType
+from services.attendance_service import AttendanceService
+from tests.test_salary_processor_bulk import creer_session, creer_employe
+
+
+class TestConflitsEnMasse(unittest.TestCase):
+    def setUp(self):
+        self.db = creer_session()
+        self.employes = [creer_employe(self.db, idx) for idx in range(1, 4)]
+        self.ids = [employe.id for employe in self.employes]
+        log_id = 1000
+        for employe_id in self.ids:
+            pointage = Pointage(employe_id=employe_id, annee=2025, mois=3)
+            for jour in range(1, 11):
+                pointage.set_jour(jour, 1)
+                log_id += 1
+                self.db.add(AttendanceSyncLog(attendance_log_id=log_id, hr_employee_id=employe_id,
+                                              sync_date=date(2025, 3, jour), worked_minutes=480,
+                                              log_type=LogType.EXIT))
+            self.db.add(pointage)
+        self.db.commit()
+
+        # Saisies RH postérieures à l'import: jours 2 et 3 de l'employé 1, jour 5 de l'employé 2
+        for employe_id, jour, valeur in [(self.ids[0], 2, 0), (self.ids[0], 3, None), (self.ids[1], 5, 0)]:
+            pointage = self.db.query(Pointage).filter_by(employe_id=employe_id, mois=3).one()
+            pointage.set_jour(jour, valeur)
+        self.db.add(AttendanceImportConflict(hr_employee_id=self.ids[1], attendance_log_id=1, status=ConflictStatus.PENDING,
+                                             conflict_date=date(2025, 3, 5), hr_existing_value=0,
+                                             attendance_worked_minutes=480))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_detection_par_difference(self):
+        requetes = []
+        event.listen(self.db.get_bind(), "before_cursor_execute", lambda *args: requetes.append(args[2]))
+
+        resultat = AttendanceService(self.db).detect_conflicts(2025, 3)
+        # logs agrégés, grille, conflits en attente
+        self.assertEqual(len([requete for requete in requetes if requete.startswith("SELECT")]), 3)
+        self.assertEqual(resultat["days_compared"], 30)
+        self.assertEqual((resultat["mismatches"], resultat["conflicts_created"]), (3, 2))
+
+        nouveaux = self.db.query(AttendanceImportConflict).filter_by(hr_employee_id=self.ids[0]).order_by(
+            AttendanceImportConflict.conflict_date).all()
+        self.assertEqual([(c.conflict_date.day, c.hr_existing_value) for c in nouveaux], [(2, 0), (3, None)])
+
+        # Deuxième passage: rien de nouveau
+        self.assertEqual(AttendanceService(self.db).detect_conflicts(2025, 3)["conflicts_created"], 0)
+
+    def test_resolution_par_lot(self):
+        service = AttendanceService(self.db)
+        service.detect_conflicts(2025, 3)
+
+        resultat = service.resolve_conflicts("keep_hr", "rh", employee_id=self.ids[1])
+        self.assertEqual(resultat["resolved"], 1)
+
+        resultat = service.resolve_conflicts("use_attendance", "rh", start_date=date(2025, 3, 1), end_date=date(2025, 3, 31))
+        self.assertEqual((resultat["resolved"], resultat["pointages_updated"]), (2, 1))
+
+        pointage = self.db.query(Pointage).filter_by(employe_id=self.ids[0], mois=3).one()
+        self.assertEqual((pointage.get_jour(2), pointage.get_jour(3)), (1, 1))
+        autre = self.db.query(Pointage).filter_by(employe_id=self.ids[1], mois=3).one()
+        self.assertEqual(autre.get_jour(5), 0)
+        self.assertEqual(self.db.query(AttendanceImportConflict).filter_by(status=ConflictStatus.PENDING).count(), 0)
+        self.assertEqual(self.db.query(Conge).filter_by(employe_id=self.ids[0], mois=3).one().jours_travailles, 10)
+
+        with self.assertRaises(ValueError):
+            service.resolve_conflicts("autre", "rh")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import sys
+import os
+import re
+import unittest
+from io import BytesIO
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from PyPDF2 import PdfReader
+
+from services.pdf_generator import PDFGenerator
+
+
+def employes_data(nombre):
+    return [
+        {
+            "employe_data": {
+                "id": i,
+                "nom": f"Nom{i:03d}",
+                "prenom": f"Prenom{i:03d}",
+                "poste_travail": "Agent",
+                "numero_secu_sociale": f"SS{i}",
+                "date_recrutement": "01/01/2020",
+                "salaire_base": 30000 + i,
+            },
+            "salaire_data": {
+                "jours_travailles": 26,
+                "jours_ouvrables": 26,
+                "salaire_base_proratis": 30000 + i,
+                "salaire_cotisable": 33000 + i,
+                "retenue_securite_sociale": 2970,
+                "salaire_imposable": 30030 + i,
+                "irg": 100,
+                "salaire_net": 29930 + i,
+            },
+        }
+        for i in range(1, nombre + 1)
+    ]
+
+
+def pages_texte(buffer):
+    """Texte de chaque page, sans les horodatages de génération"""
+    reader = PdfReader(BytesIO(buffer.getvalue()))
+    return [
+        re.sub(r"\d{2}/\d{2}/\d{4} à \d{2}:\d{2}|Généré le: \d{2}/\d{2}/\d{4}", "", page.extract_text())
+        for page in reader.pages
+    ]
+
+
+class TestBulletinsCombines(unittest.TestCase):
+    def test_parallele_identique_au_sequentiel(self):
+        donnees = employes_data(23)
+        periode = {"annee": 2025, "mois": 3}
+        generator = PDFGenerator()
+
+        sequentiel = pages_texte(generator.generate_tous_bulletins_combines(donnees, periode, parallele=False))
+        parallele = pages_texte(generator.generate_tous_bulletins_combines(donnees, periode, parallele=True, max_workers=2))
+
+        self.assertEqual(len(sequentiel), len(parallele))
+        self.assertEqual(sequentiel, parallele)
+
+        # Page de garde, un bulletin par page dans l'ordre des employés, récapitulatif
+        self.assertIn("BULLETINS DE PAIE", parallele[0])
+        for i in range(1, 24):
+            self.assertIn(f"Prenom{i:03d} Nom{i:03d}", parallele[i])
+        self.assertIn("RÉCAPITULATIF GÉNÉRAL", parallele[-1])
+
+    def test_progression_et_annulation_du_rendu(self):
+        donnees = employes_data(23)
+        periode = {"annee": 2025, "mois": 3}
+        generator = PDFGenerator()
+
+        for parallele in (False, True):
+            appels = []
+            generator.generate_tous_bulletins_combines(donnees, periode, parallele=parallele, max_workers=2,
+                                                       progression=lambda fait, total: appels.append((fait, total)))
+            self.assertEqual(appels, [(10, 23), (20, 23), (23, 23)])
+
+            # Une exception levée par progression (job annulé) interrompt le rendu
+            class Annule(Exception):
+                pass
+
+            def annuler(fait, total):
+                raise Annule()
+
+            with self.assertRaises(Annule):
+                generator.generate_tous_bulletins_combines(donnees, periode, parallele=parallele, max_workers=2,
+                                                           progression=annuler)
+
+
+if __name__ == '__main__':
+    unittest.main()
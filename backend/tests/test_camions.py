@@ -0,0 +1,65 @@
+import sys
+import os
+import unittest
+from datetime import date
+from decimal import Decimal
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event
+
+from models import Camion, Client, Mission
+from routers.camions import get_camions, get_camion_utilisation
+from tests.test_salary_processor_bulk import creer_session, creer_employe
+
+
+class TestStatistiquesFlotte(unittest.TestCase):
+    def setUp(self):
+        self.db = creer_session()
+        chauffeur = creer_employe(self.db, 1, poste_travail="Chauffeur")
+        client = Client(nom="Client", prenom="Test", distance=Decimal(50), telephone="0550000000")
+        self.camions = [
+            Camion(marque="HYUNDAI", modele="HD35", immatriculation="111-01"),
+            Camion(marque="ISUZU", modele="NPR", immatriculation="222-02"),
+            Camion(marque="RENAULT", modele="Master", immatriculation="333-03", actif=False),
+        ]
+        self.db.add_all(self.camions + [client])
+        self.db.flush()
+
+        for jour, camion, distance in [(date(2025, 1, 10), 0, 40), (date(2025, 3, 5), 0, 60),
+                                       (date(2025, 3, 20), 0, 100), (date(2025, 2, 1), 1, 30)]:
+            self.db.add(Mission(date_mission=jour, chauffeur_id=chauffeur.id, client_id=client.id,
+                                camion_id=self.camions[camion].id, distance=Decimal(distance),
+                                tarif_km=Decimal(3), prime_calculee=Decimal(distance * 3)))
+        self.db.commit()
+        self.ids = [camion.id for camion in self.camions]
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_liste_en_deux_requetes(self):
+        requetes = []
+        event.listen(self.db.get_bind(), "before_cursor_execute", lambda *args: requetes.append(args[2]))
+        liste = get_camions(actif=None, skip=0, limit=100, db=self.db)
+
+        # camions + statistiques jointes, répartition actifs / inactifs
+        self.assertEqual(len(requetes), 2)
+        self.assertEqual((liste.total, liste.actifs, liste.inactifs), (3, 2, 1))
+        self.assertEqual(
+            [(c.nombre_missions, c.derniere_mission, c.km_total) for c in liste.camions],
+            [(3, date(2025, 3, 20), 200.0), (1, date(2025, 2, 1), 30.0), (0, None, 0.0)]
+        )
+        self.assertEqual(get_camions(actif=False, skip=0, limit=100, db=self.db).total, 1)
+
+    def test_utilisation_mensuelle(self):
+        resultat = get_camion_utilisation(self.ids[0], date(2024, 12, 15), date(2025, 3, 10), db=self.db)
+        self.assertEqual(
+            [(u["annee"], u["mois"], u["nombre_missions"], u["km"]) for u in resultat["utilisation"]],
+            [(2024, 12, 0, 0.0), (2025, 1, 1, 40.0), (2025, 2, 0, 0.0), (2025, 3, 1, 60.0)]
+        )
+        self.assertEqual(resultat["totaux"], {"nombre_missions": 2, "km": 100.0, "primes": 300.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import sys
+import os
+import unittest
+from decimal import Decimal
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event
+
+from models import Conge
+from services.conges_allocation import AllocateurConges, SoldeInsuffisant
+from tests.test_salary_processor_bulk import creer_session, creer_employe
+
+
+class TestAllocateurConges(unittest.TestCase):
+    def setUp(self):
+        self.db = creer_session()
+        self.employes = [creer_employe(self.db, idx) for idx in range(1, 4)]
+        self.db.commit()
+        self.ids = [employe.id for employe in self.employes]
+        for employe_id in self.ids:
+            for mois in (1, 2, 3):
+                self.db.add(Conge(employe_id=employe_id, annee=2025, mois=mois, jours_conges_acquis=Decimal("2.5"),
+                                  jours_conges_pris=Decimal("1") if mois == 1 else 0, jours_conges_restants=0))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def _periodes(self, employe_id):
+        conges = self.db.query(Conge).filter_by(employe_id=employe_id).order_by(Conge.mois).all()
+        return [(Decimal(c.jours_conges_pris), Decimal(c.jours_conges_restants), c.mois_deduction) for c in conges]
+
+    def test_repartition_fifo_en_decimal(self):
+        allocateur = AllocateurConges(self.db)
+        self.assertEqual(allocateur.solde(self.ids[0]), Decimal("6.5"))
+
+        repartition = allocateur.repartir(self.ids[0], "2.6", 7, 2025)
+        self.assertEqual([(r["periode"], r["jours_a_deduire"]) for r in repartition], [("1/2025", 1.5), ("2/2025", 1.1)])
+        self.assertEqual(allocateur.solde(self.ids[0]), Decimal("3.9"))
+
+        with self.assertRaises(SoldeInsuffisant) as ctx:
+            allocateur.repartir(self.ids[0], 4, 7, 2025)
+        self.assertIn("Manque: 0.10j", str(ctx.exception))
+        self.assertEqual(allocateur.solde(self.ids[0]), Decimal("3.9"))
+
+        allocateur.ecrire()
+        self.db.commit()
+        self.assertEqual(self._periodes(self.ids[0]), [
+            (Decimal("2.5"), Decimal("0"), 7), (Decimal("1.1"), Decimal("1.4"), 7), (Decimal("0"), Decimal("3.9"), None)
+        ])
+
+    def test_remplacement_du_total(self):
+        allocateur = AllocateurConges(self.db)
+        allocateur.repartir(self.ids[0], 3, 8, 2025, remplacer=True)
+        self.assertEqual(allocateur.total_pris(self.ids[0]), Decimal("3"))
+        allocateur.ecrire()
+        self.db.commit()
+        self.assertEqual([p[0] for p in self._periodes(self.ids[0])], [Decimal("2.5"), Decimal("0.5"), Decimal("0")])
+
+    def test_lot_en_requetes_groupees(self):
+        # Le troisième employé n'a plus que 1.5j disponibles
+        for conge in self.db.query(Conge).filter(Conge.employe_id == self.ids[2], Conge.mois > 1):
+            conge.jours_conges_pris = Decimal("2.5")
+        self.db.commit()
+
+        requetes = []
+        event.listen(self.db.get_bind(), "before_cursor_execute", lambda *args: requetes.append(args[2]))
+        allocateur = AllocateurConges(self.db)
+        resultat = allocateur.repartir_lot(dict.fromkeys(self.ids, 3), 8, 2025)
+        allocateur.ecrire()
+        self.db.commit()
+
+        self.assertEqual(sorted(resultat["repartitions"]), self.ids[:2])
+        self.assertIn("Disponible: 1.50j", resultat["erreurs"][self.ids[2]])
+        # lecture des périodes + UPDATE groupé + relecture ordonnée des soldes + UPDATE groupé
+        self.assertEqual(len([r for r in requetes if r.lstrip().upper().startswith(("SELECT", "UPDATE"))]), 4)
+        self.assertEqual(self._periodes(self.ids[1])[1], (Decimal("1.5"), Decimal("1"), 8))
+
+        allocateur = AllocateurConges(self.db)
+        resultat = allocateur.liberer_lot({self.ids[0]: 2, self.ids[2]: 10})
+        allocateur.ecrire()
+        self.db.commit()
+        # Les plus récentes d'abord: 1.5j en février puis 0.5j en janvier
+        self.assertEqual(self._periodes(self.ids[0]), [
+            (Decimal("2"), Decimal("0.5"), 8), (Decimal("0"), Decimal("3"), None), (Decimal("0"), Decimal("5.5"), None)
+        ])
+        self.assertIn("Annulation impossible", resultat["erreurs"][self.ids[2]])
+
+
+if __name__ == '__main__':
+    unittest.main()
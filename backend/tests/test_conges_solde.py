@@ -0,0 +1,107 @@
+import sys
+import os
+import unittest
+from decimal import Decimal
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event
+
+from models import Conge, Pointage
+from services.conges_calculator import (
+    calculer_et_enregistrer_conges, recalculer_conges_periode, reconstruire_soldes
+)
+from tests.test_salary_processor_bulk import creer_session, creer_employe
+
+
+class TestSoldeCumuleConges(unittest.TestCase):
+    def setUp(self):
+        self.db = creer_session()
+        self.employe = creer_employe(self.db, 1)
+        self.autre = creer_employe(self.db, 2)
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def _soldes(self, employe_id=None):
+        conges = self.db.query(Conge).filter_by(employe_id=employe_id or self.employe.id).order_by(Conge.mois).all()
+        return [Decimal(c.jours_conges_restants) for c in conges]
+
+    def _enregistrer(self, mois, jours):
+        return calculer_et_enregistrer_conges(self.db, self.employe.id, 2025, mois, totaux={"jours_travailles": jours})
+
+    def test_ecart_reporte_sur_les_mois_suivants(self):
+        for mois in (1, 2, 4):
+            self._enregistrer(mois, 30)  # 2.5j / mois
+        conge = self.db.query(Conge).filter_by(employe_id=self.employe.id, mois=2).one()
+        conge.jours_conges_pris = 1
+        self.db.commit()
+        reconstruire_soldes(self.db)
+        self.db.commit()
+        self.assertEqual(self._soldes(), [Decimal("2.5"), Decimal("4"), Decimal("6.5")])
+
+        requetes = []
+        event.listen(self.db.get_bind(), "before_cursor_execute", lambda *args: requetes.append(args[2]))
+        self._enregistrer(2, 12)   # 12 - 1 pris = 11j -> 0.92j
+        self.assertFalse([r for r in requetes if "sum(" in r.lower()])
+        self.assertEqual(self._soldes(), [Decimal("2.5"), Decimal("2.42"), Decimal("4.92")])
+
+        # Mois intercalé: les mois suivants l'incluent
+        self._enregistrer(3, 30)
+        self.assertEqual(self._soldes(), [Decimal("2.5"), Decimal("2.42"), Decimal("4.92"), Decimal("7.42")])
+
+    def test_conge_depuis_dates_reporte_sur_les_mois_suivants(self):
+        from datetime import date
+        from routers.conges import CongeCreateFromDates, creer_conge_depuis_dates
+
+        for mois in (1, 2, 3):
+            self._enregistrer(mois, 30)  # 2.5j / mois
+        # Lundi 3 au vendredi 7 février: 4 jours ouvrables (vendredi exclu)
+        creer_conge_depuis_dates(
+            CongeCreateFromDates(employe_id=self.employe.id, date_debut=date(2025, 2, 3), date_fin=date(2025, 2, 7)),
+            db=self.db
+        )
+        self.assertEqual(self._soldes(), [Decimal("2.5"), Decimal("1"), Decimal("3.5")])
+
+        # Le mois suivant, réenregistré, part du solde cumulé correct
+        self._enregistrer(3, 30)
+        self.assertEqual(self._soldes(), [Decimal("2.5"), Decimal("1"), Decimal("3.5")])
+
+    def test_reconstruction_en_une_passe(self):
+        for mois in range(1, 7):
+            for employe in (self.employe, self.autre):
+                self.db.add(Conge(employe_id=employe.id, annee=2025, mois=mois, jours_conges_acquis=2.5,
+                                  jours_conges_pris=1 if mois == 3 else 0, jours_conges_restants=0))
+        self.db.commit()
+
+        employe_id = self.employe.id
+        requetes = []
+        event.listen(self.db.get_bind(), "before_cursor_execute", lambda *args: requetes.append(args[2]))
+        self.assertEqual(reconstruire_soldes(self.db, [employe_id]), 6)
+        self.assertEqual(len(requetes), 2)  # lecture ordonnée + UPDATE groupé
+        self.db.commit()
+
+        self.assertEqual(self._soldes(), [Decimal(x) for x in ("2.5", "5", "6.5", "9", "11.5", "14")])
+        self.assertEqual(self._soldes(self.autre.id), [Decimal(0)] * 6)
+        self.assertEqual(reconstruire_soldes(self.db), 6)   # seulement l'autre employé
+        self.assertEqual(reconstruire_soldes(self.db), 0)
+
+    def test_recalcul_periode(self):
+        self._enregistrer(1, 30)
+        for employe in (self.employe, self.autre):
+            pointage = Pointage(employe_id=employe.id, annee=2025, mois=2)
+            for jour in range(1, 13):
+                pointage.set_jour(jour, 1)
+            self.db.add(pointage)
+        self.db.commit()
+
+        resultat = recalculer_conges_periode(self.db, 2025, 2)
+        self.assertEqual((resultat["recalcules"], resultat["erreurs"]), (2, 0))
+        self.assertEqual(self._soldes(), [Decimal("2.5"), Decimal("3.5")])
+        self.assertEqual(self._soldes(self.autre.id), [Decimal("1")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import sys
+import os
+import unittest
+from decimal import Decimal
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event
+
+from models import Salaire
+from schemas.salaire import G29DataEmploye, G29DataRecap
+from services.g29 import AgregatG29
+from tests.test_salary_processor_bulk import creer_session, creer_employe
+
+
+class TestAgregatG29(unittest.TestCase):
+    def setUp(self):
+        self.db = creer_session()
+        self.actif = creer_employe(self.db, 1)
+        self.parti = creer_employe(self.db, 2, actif=False)
+        self.sans_salaire = creer_employe(self.db, 3)
+        self.ancien = creer_employe(self.db, 4, actif=False)
+
+        for employe, mois, statut in (
+            (self.actif, 1, "paye"), (self.actif, 2, "valide"), (self.actif, 3, "brouillon"),
+            (self.parti, 1, "paye"),
+        ):
+            self.db.add(Salaire(
+                employe_id=employe.id, annee=2025, mois=mois, statut=statut,
+                salaire_cotisable=Decimal("30000.00") + mois, salaire_imposable=Decimal("27000.00") + mois,
+                irg=Decimal("1500.00") + mois, retenue_securite_sociale=Decimal("2700.00")
+            ))
+        self.db.add(Salaire(employe_id=self.ancien.id, annee=2024, mois=12, statut="paye",
+                            salaire_cotisable=Decimal(1), salaire_imposable=Decimal(1), irg=Decimal(1)))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_annuel_deux_requetes(self):
+        requetes = []
+        event.listen(self.db.get_bind(), "before_cursor_execute",
+                     lambda *args: requetes.append(args[2]))
+
+        agregat = AgregatG29.charger(self.db, 2025)
+
+        self.assertEqual(len(requetes), 2)
+        self.assertEqual([ligne.employe_id for ligne in agregat],
+                         [self.actif.id, self.parti.id, self.sans_salaire.id])
+
+        employe = G29DataEmploye(**agregat.ligne(self.actif.id).to_dict())
+        self.assertEqual(employe.fevrier_net, Decimal("27002.00"))
+        self.assertEqual(employe.mars_irg, Decimal("1503.00"))
+        self.assertEqual(employe.avril_net, Decimal(0))
+        self.assertEqual(employe.total_imposable, Decimal("81006.00"))
+
+        recap = G29DataRecap(**agregat.recap_dict())
+        self.assertEqual(recap.janvier_brut, Decimal("60002.00"))
+        self.assertEqual(recap.total_irg, Decimal("6007.00"))
+
+    def test_mensuel_salaires_valides(self):
+        agregat = AgregatG29.charger(self.db, 2025, mois=3, statuts=("valide", "paye"))
+        self.assertEqual(agregat.lignes_mois(3), [])
+
+        agregat = AgregatG29.charger(self.db, 2025, mois=2, statuts=("valide", "paye"))
+        lignes = agregat.lignes_mois(2)
+        self.assertEqual([ligne.employe_id for ligne in lignes], [self.actif.id])
+        self.assertEqual(lignes[0].securite_sociale[1], Decimal("2700.00"))
+        self.assertEqual(lignes[0].numero_secu_sociale, "SS1")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import sys
+import os
+import unittest
+from datetime import datetime, time
+from io import BytesIO
+from unittest.mock import patch
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import pandas as pd
+
+from services import import_service as module_import
+from services.import_service import ImportService
+from services.calculation_service import AttendanceCalculationService
+from services.shift_calendar import ShiftCalendar
+
+
+def fichier_badges():
+    return pd.DataFrame({
+        "Date": [datetime(2025, 3, 1), "02/03/2025", "2025-03-03", None, "31/02/2025"],
+        "Time": [time(8, 0), "08:15", "17:30:00", "08:00", "08:00"],
+        "Employee": [" Ali ", "Omar", "Sami", "Vide", "Invalide"],
+        "Type": ["Entrée", "OUT", None, "IN", "IN"],
+        "Photo": ["p.jpg", None, "q.jpg", None, None],
+    })
+
+
+class TestImportService(unittest.TestCase):
+    def setUp(self):
+        self.service = ImportService()
+
+    def _attendus(self):
+        return [
+            {"id": "excel_20250301080000_0", "employee_name": "Ali", "timestamp": "2025-03-01T08:00:00",
+             "type": "ENTRY", "source": "excel", "has_photo": "p.jpg"},
+            {"id": "excel_20250302081500_1", "employee_name": "Omar", "timestamp": "2025-03-02T08:15:00",
+             "type": "EXIT", "source": "excel", "has_photo": None},
+            {"id": "excel_20250303173000_2", "employee_name": "Sami", "timestamp": "2025-03-03T17:30:00",
+             "type": "EXIT", "source": "excel", "has_photo": "q.jpg"},
+        ]
+
+    def test_excel(self):
+        buffer = BytesIO()
+        fichier_badges().to_excel(buffer, index=False)
+
+        self.assertEqual(self.service.parse_excel(buffer.getvalue()), self._attendus())
+
+        parsed = self.service.parse_frame(buffer.getvalue())
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(parsed.logs["timestamp"]))
+        # Ligne vide ignorée, date impossible signalée
+        self.assertEqual(parsed.errors["row"].tolist(), [4])
+
+    def test_csv_par_blocs(self):
+        contenu = fichier_badges().to_csv(index=False).encode("utf-8")
+        self.assertEqual(self.service.parse_excel(contenu, "badges.csv"), self._attendus())
+
+    def test_xlsx_par_blocs(self):
+        buffer = BytesIO()
+        fichier_badges().to_excel(buffer, index=False)
+        buffer.seek(0)
+
+        with patch.object(module_import, "CSV_CHUNK_SIZE", 2):
+            blocs = list(self.service.iter_chunks(buffer, "badges.xlsx"))
+        self.assertEqual(len(blocs), 3)
+        logs = [log for bloc in blocs for log in bloc.logs.assign(
+            timestamp=bloc.logs["timestamp"].dt.strftime("%Y-%m-%dT%H:%M:%S")).to_dict("records")]
+        self.assertEqual(logs, self._attendus())
+        self.assertEqual([bloc.errors["row"].tolist() for bloc in blocs], [[], [], [4]])
+
+    def test_agregation_par_jour_entre_blocs(self):
+        contenu = pd.DataFrame({
+            "Date": ["03/03/2025"] * 5 + ["04/03/2025"],
+            "Time": ["08:30", "08:00", "16:00", "17:00", "12:00", "09:00"],
+            "Employee": ["Ali", "ALI", "Ali", "Ali", "Inconnu", "Ali"],
+            "Type": ["IN", "IN", "OUT", "OUT", "IN", "IN"],
+            "Photo": [None, "p.jpg", "Verifier", "q.jpg", None, None],
+        }).to_csv(index=False).encode("utf-8")
+
+        jours = {}
+        calcul = AttendanceCalculationService(db=None, shifts=ShiftCalendar())
+        with patch.object(module_import, "CSV_CHUNK_SIZE", 2):
+            for bloc in self.service.iter_chunks(contenu, "badges.csv"):
+                ids = bloc.logs["employee_name"].str.upper().map({"ALI": 7})
+                calcul.aggregate_daily_logs(bloc.logs, ids, jours)
+
+        self.assertEqual(list(jours), [(7, datetime(2025, 3, 3).date()), (7, datetime(2025, 3, 4).date())])
+        lundi = jours[(7, datetime(2025, 3, 3).date())]
+        self.assertEqual((lundi["employee_name"], lundi["photo"]), ("Ali", "Verifier"))
+        self.assertEqual(sorted(lundi["punches"]), [
+            (datetime(2025, 3, 3, 8, 0), "ENTRY"), (datetime(2025, 3, 3, 8, 30), "ENTRY"),
+            (datetime(2025, 3, 3, 16, 0), "EXIT"), (datetime(2025, 3, 3, 17, 0), "EXIT"),
+        ])
+        self.assertEqual(jours[(7, datetime(2025, 3, 4).date())]["punches"], [(datetime(2025, 3, 4, 9, 0), "ENTRY")])
+
+    def test_colonnes_manquantes(self):
+        contenu = pd.DataFrame({"Date": ["01/03/2025"]}).to_csv(index=False).encode("utf-8")
+        with self.assertRaises(ValueError) as ctx:
+            self.service.parse_excel(contenu, "badges.csv")
+        self.assertIn("Colonnes manquantes", str(ctx.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+import sys
+import os
+import random
+import tempfile
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import openpyxl
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import IRGBareme
+from services import irg_calculator
+from services.irg_calculator import IRGCalculator, BaremeIndex, get_irg_calculator
+
+
+def calculateur_avec_bareme(bareme):
+    """Instance hors singleton avec un barème en mémoire"""
+    calc = object.__new__(IRGCalculator)
+    calc._index = BaremeIndex.depuis_bareme(bareme)
+    return calc
+
+
+def irg_lineaire(bareme, salaire):
+    """Recherche linéaire de référence (ancienne implémentation)"""
+    montant_trouve = Decimal(0)
+    for seuil, montant in sorted(bareme, key=lambda x: x[0]):
+        if seuil <= salaire:
+            montant_trouve = montant
+        else:
+            break
+    return montant_trouve
+
+
+class TestIRGCalculator(unittest.TestCase):
+    def setUp(self):
+        # Barème régulier par pas de 10 DA (format irg.xlsx)
+        self.bareme_regulier = [
+            (Decimal(30000 + 10 * i), Decimal(max(0, i - 100) * 2)) for i in range(2000)
+        ]
+        # Barème irrégulier (tranches)
+        self.bareme_tranches = [
+            (Decimal(30000), Decimal(0)),
+            (Decimal(35000), Decimal(1000)),
+            (Decimal("40000.50"), Decimal("2500.75")),
+            (Decimal(80000), Decimal(12000)),
+        ]
+        self.salaires = [
+            Decimal(0), Decimal(29999), Decimal("29999.99"), Decimal(30000), Decimal("30009.99"),
+            Decimal(35000), Decimal(38000), Decimal("40000.49"), Decimal("40000.50"),
+            Decimal(49990), Decimal(1000000), Decimal(37500) / Decimal(3) * Decimal(3),
+        ] + [Decimal(random.randint(0, 10000000)) / 100 for _ in range(200)]
+
+    def test_index_direct_pas_fixe(self):
+        calc = calculateur_avec_bareme(self.bareme_regulier)
+        self.assertEqual(calc._index.pas_centimes, 1000)
+        for salaire in self.salaires:
+            self.assertEqual(calc.calculer_irg(salaire), irg_lineaire(self.bareme_regulier, salaire), salaire)
+
+    def test_dichotomie_bareme_irregulier(self):
+        calc = calculateur_avec_bareme(self.bareme_tranches)
+        self.assertIsNone(calc._index.pas_centimes)
+        self.assertEqual(calc.calculer_irg(Decimal(29000)), 0)
+        self.assertEqual(calc.calculer_irg(Decimal(35000)), 1000)
+        self.assertEqual(calc.calculer_irg(Decimal(38000)), 1000)
+        for salaire in self.salaires:
+            self.assertEqual(calc.calculer_irg(salaire), irg_lineaire(self.bareme_tranches, salaire), salaire)
+
+    def test_batch_identique_au_calcul_unitaire(self):
+        for bareme in (self.bareme_regulier, self.bareme_tranches, []):
+            calc = calculateur_avec_bareme(bareme)
+            self.assertEqual(
+                calc.calculer_irg_batch(self.salaires),
+                [calc.calculer_irg(salaire) for salaire in self.salaires]
+            )
+        self.assertEqual(calc.calculer_irg_batch([]), [])
+
+    def test_seuils_et_montants_au_centime_le_plus_proche(self):
+        bareme = [(Decimal(30000), Decimal(0)), (Decimal("30009.995"), Decimal("10.005"))]
+        calc = calculateur_avec_bareme(bareme)
+        self.assertEqual(calc.calculer_irg(Decimal("30009.99")), 0)
+        self.assertEqual(calc.calculer_irg(Decimal("30010.00")), Decimal("10.01"))
+        self.assertEqual(calc.calculer_irg_batch([Decimal("30009.99"), Decimal("30010.00")]), [0, Decimal("10.01")])
+
+
+class TestIRGCalculatorVersion(unittest.TestCase):
+    def setUp(self):
+        self._index = IRGCalculator._index
+        self._empreinte = IRGCalculator._empreinte_fichier
+        self.tmp = tempfile.TemporaryDirectory()
+        self.fichier = os.path.join(self.tmp.name, 'irg.xlsx')
+        self.cache = os.path.join(self.tmp.name, 'irg_bareme.cache.npz')
+        self.patches = [
+            patch.object(irg_calculator, 'FICHIER_IRG', self.fichier),
+            patch.object(irg_calculator, 'FICHIER_CACHE_IRG', self.cache),
+            patch.object(IRGCalculator, 'INTERVALLE_VERIFICATION', 0),
+        ]
+        for p in self.patches:
+            p.start()
+
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.db.close()
+        self.tmp.cleanup()
+        IRGCalculator._index = self._index
+        IRGCalculator._empreinte_fichier = self._empreinte
+
+    def _ecrire_fichier(self, lignes):
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.append(["MONTANT", "IRG"])
+        for ligne in lignes:
+            ws.append(list(ligne))
+        wb.save(self.fichier)
+
+    def test_fichier_puis_cache_binaire(self):
+        self._ecrire_fichier([(30000, 0), (30010, 10), (30020, 20)])
+        calc = get_irg_calculator(self.db)
+
+        self.assertTrue(calc.version_bareme.startswith("xlsx:"))
+        self.assertEqual(calc.calculer_irg(Decimal(30015)), 10)
+        self.assertTrue(os.path.exists(self.cache))
+
+        # Nouveau worker: la copie binaire suffit, pas de parse openpyxl
+        IRGCalculator._index = BaremeIndex([], [])
+        IRGCalculator._empreinte_fichier = (None, None)
+        with patch.object(irg_calculator.openpyxl, 'load_workbook', side_effect=AssertionError):
+            calc = get_irg_calculator(self.db)
+        self.assertEqual(calc.calculer_irg(Decimal(30025)), 20)
+
+    def test_rechargement_apres_import_db(self):
+        self._ecrire_fichier([(30000, 0), (30010, 10)])
+        calc = get_irg_calculator(self.db)
+        version_fichier = calc.version_bareme
+
+        # Import d'un barème dans la table: pris en compte sans redémarrage
+        self.db.add_all([
+            IRGBareme(salaire=Decimal(30000), montant_irg=Decimal(0), actif=True),
+            IRGBareme(salaire=Decimal(35000), montant_irg=Decimal(1000), actif=True),
+        ])
+        self.db.commit()
+        calc = get_irg_calculator(self.db)
+        version_db = calc.version_bareme
+
+        self.assertNotEqual(version_db, version_fichier)
+        self.assertTrue(version_db.startswith("db:"))
+        self.assertEqual(calc.calculer_irg(Decimal(38000)), 1000)
+
+        # Désactivation: retour au fichier
+        self.db.query(IRGBareme).update({"actif": False})
+        self.db.commit()
+        calc = get_irg_calculator(self.db)
+        self.assertEqual(calc.version_bareme, version_fichier)
+        self.assertEqual(calc.calculer_irg(Decimal(38000)), 10)
+
+    def test_erreur_lecture_table(self):
+        self._ecrire_fichier([(30000, 0), (30010, 10)])
+        self.db.add(IRGBareme(salaire=Decimal(30000), montant_irg=Decimal(500), actif=True))
+        self.db.commit()
+        calc = get_irg_calculator(self.db)
+        version_db = calc.version_bareme
+
+        # Table illisible: le barème de la base déjà chargé est conservé, avec un avertissement
+        with patch.object(IRGCalculator, '_version_db', side_effect=RuntimeError("connexion perdue")):
+            with self.assertLogs(irg_calculator.logger, level="WARNING") as logs:
+                calc = get_irg_calculator(self.db)
+        self.assertEqual(calc.version_bareme, version_db)
+        self.assertIn("barème de la base conservé", logs.output[0])
+
+        # Sans barème de la base en mémoire: repli signalé sur le fichier
+        IRGCalculator._index = BaremeIndex([], [])
+        with patch.object(IRGCalculator, '_version_db', side_effect=RuntimeError("connexion perdue")):
+            with self.assertLogs(irg_calculator.logger, level="WARNING") as logs:
+                calc = get_irg_calculator(self.db)
+        self.assertTrue(calc.version_bareme.startswith("xlsx:"))
+        self.assertIn("repli sur", logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
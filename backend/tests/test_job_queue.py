@@ -0,0 +1,131 @@
+import sys
+import os
+import tempfile
+import threading
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import Job, StatutJob
+from routers.jobs import lister_jobs, get_job
+from services.job_queue import JobQueue, traitement_job
+
+# Traitement de test: N "employés", bloqué après le premier si demandé
+DEMARRE = threading.Event()
+CONTINUER = threading.Event()
+
+
+@traitement_job("test.employes")
+def _traitement_test(db, parametres, contexte):
+    total = parametres["total"]
+    for index in range(1, total + 1):
+        contexte.progression(index, total)
+        if parametres.get("bloquer") and index == 1:
+            DEMARRE.set()
+            CONTINUER.wait(5)
+            contexte.progression(index, total)
+    if parametres.get("erreur"):
+        raise HTTPException(status_code=404, detail="Aucun bulletin généré")
+    return {"contenu": b"resultat", "nom_fichier": "resultat.txt", "media_type": "text/plain"}
+
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        engine = create_engine(f"sqlite:///{os.path.join(self.tmp.name, 'jobs.db')}")
+        Base.metadata.create_all(engine)
+        self.session_factory = sessionmaker(bind=engine)
+        self.db = self.session_factory()
+        self.queue = JobQueue(max_workers=1, session_factory=self.session_factory, dossier=self.tmp.name)
+        DEMARRE.clear()
+        CONTINUER.clear()
+
+    def tearDown(self):
+        CONTINUER.set()
+        self.queue.arreter()
+        self.db.close()
+        self.tmp.cleanup()
+
+    def _attendre(self, job_id):
+        self.queue._executor.shutdown(wait=True)
+        self.queue._executor = None
+        self.db.expire_all()
+        return self.db.get(Job, job_id)
+
+    def test_resultat_ecrit_sur_disque(self):
+        job = self.queue.soumettre(self.db, "test.employes", {"total": 4})
+        self.assertEqual(job.statut, StatutJob.EN_ATTENTE)
+
+        job = self._attendre(job.id)
+        self.assertEqual(job.statut, StatutJob.TERMINE)
+        self.assertEqual((job.progression, job.total, job.pourcentage), (4, 4, 100))
+        with open(self.queue.chemin_resultat(job), 'rb') as f:
+            self.assertEqual(f.read(), b"resultat")
+
+        # Un second passage (autre worker) ne ré-exécute pas le job
+        self.queue.executer(job.id)
+        self.db.expire_all()
+        self.assertEqual(self.db.get(Job, job.id).finished_at, job.finished_at)
+
+    def test_erreur_http(self):
+        job = self.queue.soumettre(self.db, "test.employes", {"total": 2, "erreur": True})
+        job = self._attendre(job.id)
+        self.assertEqual(job.statut, StatutJob.ERREUR)
+        self.assertEqual(job.erreur, "Aucun bulletin généré")
+        self.assertIsNone(self.queue.chemin_resultat(job))
+
+    def test_annulation_en_cours(self):
+        job = self.queue.soumettre(self.db, "test.employes", {"total": 3, "bloquer": True})
+        self.assertTrue(DEMARRE.wait(5))
+
+        self.db.expire_all()
+        self.queue.annuler(self.db, self.db.get(Job, job.id))
+        CONTINUER.set()
+
+        job = self._attendre(job.id)
+        self.assertEqual(job.statut, StatutJob.ANNULE)
+        self.assertIsNone(job.fichier_resultat)
+
+    def test_annulation_en_attente(self):
+        job = Job(id="attente", type_job="test.employes", statut=StatutJob.EN_ATTENTE, parametres={"total": 1})
+        self.db.add(job)
+        self.db.commit()
+
+        self.queue.annuler(self.db, job)
+        self.queue.executer(job.id)
+
+        self.db.expire_all()
+        job = self.db.get(Job, "attente")
+        self.assertEqual(job.statut, StatutJob.ANNULE)
+        self.assertIsNone(job.started_at)
+
+    def test_jobs_visibles_par_leur_auteur(self):
+        class Utilisateur:
+            def __init__(self, id):
+                self.id = id
+
+        for job_id, user_id in (("a", 1), ("b", 2)):
+            self.db.add(Job(id=job_id, type_job="test.employes", statut=StatutJob.TERMINE, user_id=user_id))
+        self.db.commit()
+
+        lister = lambda user: [j["id"] for j in lister_jobs(type_job=None, statut=None, limit=50,
+                                                            db=self.db, current_user=user)]
+        self.assertEqual(lister(Utilisateur(1)), ["a"])
+        self.assertEqual(get_job("b", db=self.db, current_user=Utilisateur(2))["id"], "b")
+        with self.assertRaises(HTTPException) as erreur:
+            get_job("b", db=self.db, current_user=Utilisateur(1))
+        self.assertEqual(erreur.exception.status_code, 404)
+
+    def test_type_inconnu(self):
+        with self.assertRaises(ValueError):
+            self.queue.soumettre(self.db, "test.inconnu", {})
+
+
+if __name__ == '__main__':
+    unittest.main()
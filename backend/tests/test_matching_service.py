@@ -0,0 +1,89 @@
+import sys
+import os
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event
+
+from models import AttendanceEmployeeMapping
+from services.matching_service import EmployeeMatchingService, normalize_name
+from tests.test_salary_processor_bulk import creer_session, creer_employe
+
+
+class TestEmployeeMatchingService(unittest.TestCase):
+    def setUp(self):
+        self.db = creer_session()
+        self.hamidi = creer_employe(self.db, 1, nom="Hamidi", prenom="Hélène", poste_travail="Chauffeur")
+        self.benali = creer_employe(self.db, 2, nom="Benali", prenom="Mohamed")
+        self.ancien = creer_employe(self.db, 3, nom="Benalia", prenom="Mohamed", actif=False)
+        for idx in range(4, 60):
+            creer_employe(self.db, idx)
+        self.db.add(AttendanceEmployeeMapping(hr_employee_id=self.benali.id, attendance_employee_id=77))
+        self.db.commit()
+        self.ids = {"hamidi": self.hamidi.id, "benali": self.benali.id, "ancien": self.ancien.id}
+
+    def tearDown(self):
+        self.db.close()
+
+    def _compter_requetes(self):
+        requetes = []
+        event.listen(self.db.get_bind(), "before_cursor_execute",
+                     lambda *args: requetes.append(args[2]))
+        return requetes
+
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name("  Hélène   Ben-Ali "), "HELENE BEN-ALI")
+
+    def test_cascade(self):
+        service = EmployeeMatchingService(self.db)
+
+        self.assertEqual(service.match_employee("x", 77), (self.ids["benali"], "mapping", 100, []))
+        # Exact: accents, case, spacing and name order do not matter; inactive employees included
+        self.assertEqual(service.match_employee("helene  HAMIDI"), (self.ids["hamidi"], "exact_name", 95, []))
+        self.assertEqual(service.match_employee("Benalia Mohamed"), (self.ids["ancien"], "exact_name", 95, []))
+
+        # Fuzzy: active employees only
+        employe_id, methode, confiance, alternatives = service.match_employee("Benali Mohamd")
+        self.assertEqual((employe_id, methode), (self.ids["benali"], "fuzzy"))
+        self.assertGreaterEqual(confiance, 85)
+        self.assertNotIn(self.ids["ancien"], [alt["id"] for alt in alternatives])
+
+        self.assertEqual(service.match_employee("Inconnu Total"), (None, "none", 0, []))
+
+    def test_index_charge_une_seule_fois(self):
+        service = EmployeeMatchingService(self.db)
+        requetes = self._compter_requetes()
+
+        for _ in range(3):
+            service.match_employee("Hamidi Helene")
+            service.match_employee("Benali Mohamd")
+            service.match_employee("Nom12 Prenom1", 5)
+            service.get_employee_details(self.ids["hamidi"])
+        self.assertEqual(len(requetes), 2)
+
+        self.assertEqual(service.get_employee_details(self.ids["hamidi"]), {
+            "id": self.ids["hamidi"], "name": "Hamidi Hélène", "poste": "Chauffeur", "actif": True
+        })
+        self.assertIsNone(service.get_employee_details(-1))
+
+    def test_memo_retourne_des_copies(self):
+        service = EmployeeMatchingService(self.db)
+        _, _, _, alternatives = service.match_employee("Nom1 Prenom")
+        alternatives.clear()
+        self.assertTrue(service.match_employee("Nom1 Prenom")[3])
+
+    def test_prefiltre_identique_au_score_complet(self):
+        service = EmployeeMatchingService(self.db)
+        service._build_index()
+        for nom in ("Nom1 Prenom", "Prenom7 Nom", "Nom12 Prenom13", "Benali Mohamd", "N P"):
+            tous = [service._employees[i] for _, i in service._by_length]
+            service_complet = EmployeeMatchingService(self.db)
+            service_complet._build_index()
+            service_complet._candidates = lambda *args: tous
+            self.assertEqual(service._fuzzy_match(nom), service_complet._fuzzy_match(nom), nom)
+
+
+if __name__ == '__main__':
+    unittest.main()
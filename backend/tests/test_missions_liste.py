@@ -0,0 +1,79 @@
+import sys
+import os
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event
+
+from models import Client, LogisticsType, Mission, MissionClientDetail, MissionLogisticsMovement
+from routers.missions import list_missions
+from tests.test_salary_processor_bulk import creer_session, creer_employe
+
+
+def lister(db, **filtres):
+    parametres = dict(skip=0, limit=100, curseur=None, chauffeur_id=None, client_id=None,
+                      date_debut=None, date_fin=None, annee=None, mois=None)
+    parametres.update(filtres)
+    return list_missions(db=db, **parametres)
+
+
+class TestListeMissions(unittest.TestCase):
+    def setUp(self):
+        self.db = creer_session()
+        chauffeur = creer_employe(self.db, 1, poste_travail="Chauffeur")
+        clients = [Client(nom=f"Client{i}", prenom="Test", distance=Decimal(50), telephone="0550000000") for i in (1, 2)]
+        palette = LogisticsType(name="Palette")
+        self.db.add_all(clients + [palette])
+        self.db.flush()
+
+        # 7 missions sur 5 jours (plusieurs par jour), 2 clients et 1 mouvement chacune
+        for i in range(7):
+            mission = Mission(date_mission=date(2025, 3, 1) + timedelta(days=i // 2), chauffeur_id=chauffeur.id,
+                              client_id=clients[0].id, distance=Decimal(50), tarif_km=Decimal(3),
+                              prime_calculee=Decimal("150.00"))
+            for client in clients:
+                detail = MissionClientDetail(client=client)
+                detail.logistics_movements.append(MissionLogisticsMovement(logistics_type=palette, quantity_out=2))
+                mission.client_details.append(detail)
+            self.db.add(mission)
+        self.db.commit()
+        self.db.expunge_all()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_requetes_independantes_du_nombre_de_missions(self):
+        requetes = []
+        event.listen(self.db.get_bind(), "before_cursor_execute", lambda *args: requetes.append(args[2]))
+        page = lister(self.db)
+        page.model_dump()
+
+        # COUNT, missions, détails (+ clients), mouvements (+ types)
+        self.assertEqual(len(requetes), 4)
+        self.assertEqual(page.total, 7)
+        detail = page.missions[0].client_details[0]
+        self.assertEqual((detail.client_name, detail.logistics_movements[0].logistics_type_name), ("Client1 Test", "Palette"))
+
+    def test_pagination_par_curseur(self):
+        ids, curseur, pages = [], None, 0
+        while True:
+            page = lister(self.db, limit=3, curseur=curseur)
+            pages += 1
+            ids += [(m.date_mission, m.id) for m in page.missions]
+            if curseur:
+                self.assertIsNone(page.total)
+            curseur = page.curseur_suivant
+            if not curseur:
+                break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(set(ids)), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import sys
+import os
+import tempfile
+import unittest
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import Pointage
+from services import pdf_cache as module_cache
+from services.pdf_cache import PDFCache, cle_cache
+
+
+class TestPDFCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = PDFCache(dossier=self.tmp.name, taille_max=250)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cle_stable_et_sensible_aux_donnees(self):
+        donnees = {"salaire": Decimal("100.50"), "date": date(2025, 3, 1), "b": 1, "a": [1, 2]}
+        self.assertEqual(cle_cache("doc", donnees), cle_cache("doc", dict(reversed(list(donnees.items())))))
+        self.assertNotEqual(cle_cache("doc", donnees), cle_cache("doc", {**donnees, "salaire": Decimal("100.51")}))
+        self.assertNotEqual(cle_cache("doc", donnees), cle_cache("autre", donnees))
+
+    def test_eviction_lru(self):
+        for cle in ("a1", "b2", "c3"):
+            self.cache.ecrire(cle, b"x" * 100)
+            # "a1" relu: devient plus récent que "b2"
+            self.cache.lire("a1")
+
+        self.assertIsNotNone(self.cache.lire("a1"))
+        self.assertIsNone(self.cache.lire("b2"))
+        self.assertIsNotNone(self.cache.lire("c3"))
+
+    def test_invalidation_au_commit(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        self.cache.ecrire("mars", b"pdf", tags=["periode:2025:3"])
+        self.cache.ecrire("avril", b"pdf", tags=["periode:2025:4"])
+
+        with patch.object(module_cache, "pdf_cache", self.cache):
+            db.add(Pointage(employe_id=1, annee=2025, mois=3))
+            db.flush()
+            db.rollback()
+            self.assertIsNotNone(self.cache.lire("mars"))
+
+            db.add(Pointage(employe_id=1, annee=2025, mois=3))
+            db.commit()
+
+        self.assertIsNone(self.cache.lire("mars"))
+        self.assertIsNotNone(self.cache.lire("avril"))
+        db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
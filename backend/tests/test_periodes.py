@@ -0,0 +1,36 @@
+import sys
+import os
+import unittest
+from datetime import date
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import func, text
+
+from models import Mission
+from utils.periodes import bornes_periode, filtre_periode
+from tests.test_salary_processor_bulk import creer_session
+
+
+class TestPeriodes(unittest.TestCase):
+    def test_bornes(self):
+        self.assertEqual(bornes_periode(2025, 3), (date(2025, 3, 1), date(2025, 4, 1)))
+        self.assertEqual(bornes_periode(2025, 12), (date(2025, 12, 1), date(2026, 1, 1)))
+        self.assertEqual(bornes_periode(2025), (date(2025, 1, 1), date(2026, 1, 1)))
+
+    def test_primes_lues_dans_l_index(self):
+        db = creer_session()
+        try:
+            requete = db.query(func.sum(Mission.prime_calculee)).filter(
+                Mission.chauffeur_id == 1,
+                filtre_periode(Mission.date_mission, 2025, 3)
+            ).statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+            plan = " ".join(str(ligne[-1]) for ligne in db.execute(text(f"EXPLAIN QUERY PLAN {requete}")))
+            self.assertIn("COVERING INDEX idx_missions_chauffeur_date_prime", plan)
+        finally:
+            db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
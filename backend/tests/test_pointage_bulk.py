@@ -0,0 +1,168 @@
+import sys
+import os
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event
+
+from models import (
+    Pointage, Conge, AttendanceEmployeeMapping, AttendanceSyncLog,
+    AttendanceImportConflict, IncompleteAttendanceLog, LogType
+)
+from services.attendance_service import AttendanceService
+from services.pointage_bulk import LotPointages
+from tests.test_salary_processor_bulk import creer_session, creer_employe
+
+
+class TestLotPointages(unittest.TestCase):
+    def setUp(self):
+        self.db = creer_session()
+        self.employes = [creer_employe(self.db, idx) for idx in range(1, 4)]
+        self.ids = [employe.id for employe in self.employes]
+        existant = Pointage(employe_id=self.ids[0], annee=2025, mois=3, verrouille=1)
+        existant.set_jour(1, 1)
+        self.db.add(existant)
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def _compter_requetes(self):
+        requetes = []
+        event.listen(self.db.get_bind(), "before_cursor_execute",
+                     lambda *args: requetes.append(args[2]))
+        return requetes
+
+    def test_charger_puis_upsert(self):
+        requetes = self._compter_requetes()
+        lot = LotPointages(self.db)
+        lot.charger([(employe_id, 2025, 3) for employe_id in self.ids] + [(self.ids[0], 2025, 4)])
+        self.assertEqual(len(requetes), 2)  # une requête par période
+
+        self.assertEqual(lot.get_jour(self.ids[0], 2025, 3, 1), 1)
+        self.assertIsNone(lot.get_jour(self.ids[1], 2025, 3, 1))
+        lot.set_jour(self.ids[0], 2025, 3, 2, 0)
+        lot.set_jour(self.ids[1], 2025, 3, 2, 1)
+        lot.set_jour(self.ids[1], 2025, 4, 30, 1)
+
+        requetes.clear()
+        self.assertEqual(lot.ecrire(), 3)
+        self.assertEqual(len(requetes), 1)  # un seul INSERT ... ON CONFLICT
+        self.assertEqual(self.db.info["pdf_cache_tags"], {"periode:2025:3", "periode:2025:4"})
+        self.db.commit()
+
+        existant = self.db.query(Pointage).filter_by(employe_id=self.ids[0], mois=3).one()
+        self.assertEqual((existant.jour_01, existant.jour_02, existant.verrouille), (1, 0, 1))
+        nouveau = self.db.query(Pointage).filter_by(employe_id=self.ids[1], mois=4).one()
+        self.assertEqual((nouveau.jour_30, nouveau.jour_01), (1, None))
+        self.assertEqual(self.db.query(Pointage).count(), 3)
+
+
+class TestProcessAttendanceLogs(unittest.TestCase):
+    def setUp(self):
+        self.db = creer_session()
+        self.employes = [creer_employe(self.db, idx) for idx in range(1, 4)]
+        self.ids = [employe.id for employe in self.employes]
+        self.db.add(AttendanceEmployeeMapping(hr_employee_id=self.ids[0], attendance_employee_id=501))
+        self.db.add(AttendanceSyncLog(attendance_log_id=9000, hr_employee_id=self.ids[0],
+                                      sync_date=datetime(2025, 3, 1).date(), log_type=LogType.EXIT))
+        pointage = Pointage(employe_id=self.ids[2], annee=2025, mois=3)
+        pointage.set_jour(5, 0)
+        self.db.add(pointage)
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def _logs(self, nombre_jours):
+        logs = [
+            {"id": 9000, "employee_id": 501, "timestamp": "2025-03-01T17:00:00", "type": "EXIT", "worked_minutes": 480},
+            {"id": 9001, "employee_id": 501, "timestamp": "2025-03-02T17:00:00", "type": "EXIT", "worked_minutes": 480},
+            {"id": 9001, "employee_id": 501, "timestamp": "2025-03-02T17:00:00", "type": "EXIT", "worked_minutes": 480},
+            {"id": "excel_1", "employee_name": "prenom3 nom3", "timestamp": "2025-03-05 10:00:00", "type": "EXIT"},
+            {"id": "excel_2", "employee_name": "Inconnu", "timestamp": "2025-03-05T10:00:00"},
+            {"id": "excel_3", "employee_name": "Nom2 Prenom2", "timestamp": "pas une date"},
+        ]
+        for jour in range(1, nombre_jours + 1):
+            logs.append({"employee_name": "NOM2 PRENOM2", "type": "ENTRY",
+                         "timestamp": datetime(2025, 4, jour, 9, 0)})
+        return logs
+
+    def test_resume_et_ecritures(self):
+        summary = AttendanceService(self.db).process_attendance_logs(self._logs(3))
+
+        self.assertEqual(summary["total_logs"], 9)
+        self.assertEqual(summary["skipped_duplicate"], 2)   # 9000 déjà synchronisé, 9001 en double
+        self.assertEqual(summary["skipped_no_mapping"], 1)
+        self.assertEqual(summary["conflicts"], 1)           # jour 5 déjà saisi pour l'employé 3
+        self.assertEqual(summary["errors"], 1)
+        erreur, = [detail for detail in summary["details"] if detail["status"] == "error"]
+        self.assertIn("Format timestamp invalide", erreur["message"])
+        self.assertEqual(summary["imported"], 4)
+        self.assertEqual(summary["incomplete_pending_validation"], 3)
+
+        mars = self.db.query(Pointage).filter_by(employe_id=self.ids[0], mois=3).one()
+        self.assertEqual((mars.jour_01, mars.jour_02), (None, 1))
+        avril = self.db.query(Pointage).filter_by(employe_id=self.ids[1], mois=4).one()
+        self.assertEqual([avril.get_jour(j) for j in range(1, 5)], [1, 1, 1, None])
+
+        self.assertEqual(self.db.query(AttendanceImportConflict).count(), 1)
+        incomplets = self.db.query(IncompleteAttendanceLog).all()
+        self.assertEqual(len(incomplets), 3)
+        self.assertTrue(all(log.attendance_sync_log_id for log in incomplets))
+
+        # Congés recalculés une fois par (employé, mois) modifié
+        conges = {(c.employe_id, c.mois): c.jours_travailles for c in self.db.query(Conge).all()}
+        self.assertEqual(conges, {(self.ids[0], 3): 1, (self.ids[1], 4): 3})
+
+    def test_logs_sans_id_meme_seconde(self):
+        # Même identifiant de suivi (timestamp) pour deux employés: un seul sync log, pas d'erreur
+        summary = AttendanceService(self.db).process_attendance_logs([
+            {"employee_name": "Nom2 Prenom2", "timestamp": "2025-03-06T17:00:00", "type": "EXIT", "worked_minutes": 480},
+            {"employee_name": "Nom3 Prenom3", "timestamp": "2025-03-06T17:00:00", "type": "EXIT", "worked_minutes": 480},
+        ])
+        self.assertEqual((summary["imported"], summary["errors"]), (2, 0))
+        self.assertEqual(self.db.query(AttendanceSyncLog).count(), 2)
+        for employe_id in self.ids[1:]:
+            self.assertEqual(self.db.query(Pointage).filter_by(employe_id=employe_id, mois=3).one().jour_06, 1)
+
+    def test_echec_ecriture_du_lot(self):
+        # Sync log 9000 inséré entre la lecture et l'écriture (import concurrent)
+        service = AttendanceService(self.db)
+        with patch.object(service, "_sync_log_ids_by_attendance_id", return_value={}):
+            summary = service.process_attendance_logs(self._logs(3))
+
+        self.assertEqual((summary["imported"], summary["conflicts"], summary["incomplete_pending_validation"]), (0, 0, 0))
+        self.assertEqual(summary["errors"], 1 + 6)  # timestamp invalide + 5 importés et 1 conflit annulés
+        self.assertIn("Écriture du lot annulée", summary["details"][-1]["message"])
+        self.assertFalse([detail for detail in summary["details"] if detail["status"] in ("conflict", "incomplete")])
+
+        self.assertEqual(self.db.query(AttendanceSyncLog).count(), 1)
+        self.assertEqual(self.db.query(Pointage).count(), 1)
+        self.assertEqual(self.db.query(Conge).count(), 0)
+
+    def test_requetes_independantes_du_nombre_de_logs(self):
+        requetes = []
+        event.listen(self.db.get_bind(), "before_cursor_execute",
+                     lambda *args: requetes.append(args[2]))
+        AttendanceService(self.db).process_attendance_logs(self._logs(3))
+        petit = len([r for r in requetes if "attendance_sync_log" in r or "pointages" in r])
+
+        self.db.query(Conge).delete()
+        self.db.query(IncompleteAttendanceLog).delete()
+        self.db.query(AttendanceSyncLog).filter(AttendanceSyncLog.attendance_log_id != 9000).delete()
+        self.db.query(Pointage).filter(Pointage.employe_id != self.ids[2]).delete()
+        self.db.commit()
+
+        requetes.clear()
+        AttendanceService(self.db).process_attendance_logs(self._logs(28))
+        grand = len([r for r in requetes if "attendance_sync_log" in r or "pointages" in r])
+        self.assertEqual(petit, grand)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import sys
+import os
+import random
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import Pointage
+from services.pointage_grille import GrillePointages
+
+
+class TestGrillePointages(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+
+        random.seed(4)
+        for employe_id in range(1, 41):
+            pointage = Pointage(employe_id=employe_id, annee=2025, mois=2, verrouille=employe_id % 2)
+            for jour in range(1, 32):
+                pointage.set_jour(jour, random.choice([0, 1, None]))
+            self.db.add(pointage)
+        # Autre mois, ne doit pas être chargé
+        self.db.add(Pointage(employe_id=1, annee=2025, mois=3, jour_01=1))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_totaux_identiques_au_modele(self):
+        grille = GrillePointages.charger(self.db, 2025, 2)
+        pointages = self.db.query(Pointage).filter(Pointage.annee == 2025, Pointage.mois == 2).all()
+
+        self.assertEqual(len(grille), 40)
+        totaux = grille.totaux_par_employe()
+        for pointage in pointages:
+            self.assertEqual(totaux[pointage.employe_id], pointage.calculer_totaux())
+            self.assertEqual(grille.ligne(pointage.employe_id).calculer_totaux(), pointage.calculer_totaux())
+
+        compteurs = grille.totaux_vectorises()
+        self.assertTrue(all(
+            compteurs["jours_travailles"] + compteurs["jours_absences"] + compteurs["jours_non_definis"] == 31
+        ))
+
+    def test_adaptateur_get_set_jour(self):
+        grille = GrillePointages.charger(self.db, 2025, 2, employe_ids=[3])
+        pointage = self.db.query(Pointage).filter(Pointage.employe_id == 3, Pointage.mois == 2).first()
+        ligne = grille.ligne(3)
+
+        self.assertIsNone(grille.ligne(4))
+        self.assertEqual(ligne.id, pointage.id)
+        self.assertEqual(ligne.verrouille, pointage.verrouille)
+        for jour in range(1, 32):
+            self.assertEqual(ligne.get_jour(jour), pointage.get_jour(jour))
+
+        ligne.set_jour(5, None)
+        ligne.set_jour(6, 1)
+        self.assertIsNone(ligne.get_jour(5))
+        self.assertEqual(ligne.get_jour(6), 1)
+
+    def test_une_seule_requete(self):
+        requetes = []
+        event.listen(self.db.get_bind(), "before_cursor_execute", lambda *args: requetes.append(args[2]))
+
+        GrillePointages.charger(self.db, 2025, 2).totaux_par_employe()
+
+        self.assertEqual(len(requetes), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from services import preview_store as module_store
+from services.preview_store import PreviewStore
+
+
+def items_preview(nombre, prefixe="e"):
+    return [
+        {"log_id": f"{prefixe}{i}", "status": "error" if i % 3 == 0 else "ok",
+         "employee_name": f"Employé {i}", "alternative_matches": [{"id": i}]}
+        for i in range(nombre)
+    ]
+
+
+class TestPreviewStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = PreviewStore(dossier=self.tmp.name, ttl_minutes=60, taille_max=10_000_000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_partage_entre_workers(self):
+        session_id = self.store.creer(items_preview(10), {"total_logs": 10})
+        # Autre instance sur le même dossier = autre worker
+        autre = PreviewStore(dossier=self.tmp.name, ttl_minutes=60, taille_max=10_000_000)
+
+        self.assertEqual(autre.stats(session_id), {"total_logs": 10})
+        self.assertEqual(autre.items(session_id, ["e7", "e2", "inconnu", "e2"]),
+                         [items_preview(10)[2], items_preview(10)[7]])
+
+        autre.supprimer(session_id)
+        self.assertIsNone(self.store.page(session_id))
+
+    def test_pagination_et_filtre(self):
+        session_id = self.store.creer(items_preview(10), {})
+
+        page = self.store.page(session_id, skip=4, limit=3)
+        self.assertEqual(page["total"], 10)
+        self.assertEqual([item["log_id"] for item in page["items"]], ["e4", "e5", "e6"])
+
+        erreurs = self.store.page(session_id, skip=1, statut="error")
+        self.assertEqual(erreurs["total"], 4)
+        self.assertEqual([item["log_id"] for item in erreurs["items"]], ["e3", "e6", "e9"])
+
+    def test_expiration(self):
+        with patch.object(module_store.time, "time", return_value=1000.0):
+            ancienne = self.store.creer(items_preview(2), {})
+        with patch.object(module_store.time, "time", return_value=1000.0 + 3601):
+            self.assertIsNone(self.store.page(ancienne))
+            self.assertIsNone(self.store.items(ancienne, ["e0"]))
+            recente = self.store.creer(items_preview(2), {})
+            self.assertIsNotNone(self.store.page(recente))
+
+        # Purgée à la création suivante
+        with self.store._connexion() as connexion:
+            self.assertEqual(connexion.execute("SELECT id FROM sessions").fetchall(), [(recente,)])
+            self.assertEqual(connexion.execute("SELECT COUNT(*) FROM items").fetchone()[0], 2)
+
+    def test_eviction_taille_max(self):
+        self.store.taille_max = 1
+        premiere = self.store.creer(items_preview(5, "a"), {})
+        seconde = self.store.creer(items_preview(5, "b"), {})
+
+        # La session la plus ancienne est évincée, la nouvelle toujours conservée
+        self.assertIsNone(self.store.page(premiere))
+        self.assertEqual(self.store.page(seconde)["total"], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
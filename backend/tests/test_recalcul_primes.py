@@ -0,0 +1,86 @@
+import sys
+import os
+import unittest
+from datetime import date
+from decimal import Decimal
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event
+
+from models import Client, Mission, MissionClientDetail, ParametresSalaire
+from services.mission_km_calculator import recalculer_primes_missions
+from tests.test_salary_processor_bulk import creer_session, creer_employe
+
+
+class TestRecalculPrimes(unittest.TestCase):
+    def setUp(self):
+        self.db = creer_session()
+        self.chauffeurs = [creer_employe(self.db, i, poste_travail="Chauffeur") for i in (1, 2)]
+        self.clients = [Client(nom=f"Client{i}", prenom="Test", distance=Decimal(50), telephone="0550000000",
+                               tarif_km=Decimal(3)) for i in (1, 2)]
+        self.parametres = ParametresSalaire(km_supplementaire_par_client=10)
+        self.db.add_all(self.clients + [self.parametres])
+        self.db.flush()
+
+        def mission(jour, chauffeur, distances):
+            # Missions saisies avec km_supplementaire = 10 et tarif 3 DA/km
+            distance = Decimal(max(distances) + 10 * (len(distances) - 1)) if distances else Decimal(50)
+            m = Mission(date_mission=jour, chauffeur_id=self.chauffeurs[chauffeur].id, client_id=self.clients[0].id,
+                        distance=distance, tarif_km=Decimal(3), prime_calculee=distance * 3)
+            for i, km in enumerate(distances):
+                m.client_details.append(MissionClientDetail(client_id=self.clients[i].id, distance_km=Decimal(km)))
+            self.db.add(m)
+            return m
+
+        self.missions = [
+            mission(date(2025, 3, 3), 0, [40, 25]),   # multi-clients: 40 + 10 = 50 km
+            mission(date(2025, 3, 10), 0, [30]),      # un client: 30 km
+            mission(date(2025, 3, 12), 1, []),        # ancien système: distance de la mission
+            mission(date(2025, 4, 2), 0, [40, 25]),   # hors période
+        ]
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_sans_changement(self):
+        resultat = recalculer_primes_missions(self.db, date(2025, 3, 1), date(2025, 3, 31))
+        self.assertEqual((resultat["missions_analysees"], resultat["missions_modifiees"]), (3, 0))
+        self.assertEqual(resultat["total_avant"], resultat["total_apres"])
+
+    def test_recalcul_en_lot(self):
+        self.parametres.km_supplementaire_par_client = 20
+        self.clients[0].tarif_km = Decimal("3.50")
+        self.db.commit()
+
+        simulation = recalculer_primes_missions(self.db, date(2025, 3, 1), date(2025, 3, 31), simulation=True)
+        self.db.expire_all()
+        self.assertEqual(self.db.get(Mission, self.missions[0].id).prime_calculee, Decimal("150.00"))
+
+        requetes = []
+        event.listen(self.db.get_bind(), "before_cursor_execute", lambda *args: requetes.append(args[2]))
+        resultat = recalculer_primes_missions(self.db, date(2025, 3, 1), date(2025, 3, 31))
+        self.db.commit()
+
+        # paramètres, missions (+ tarif client), distances clients, UPDATE groupé
+        self.assertEqual(len(requetes), 4)
+        self.assertEqual(resultat, simulation)
+        self.assertEqual(
+            [(m["distance_apres"], m["prime_apres"]) for m in resultat["modifications"]],
+            [(60.0, 210.0), (30.0, 105.0), (50.0, 175.0)]
+        )
+        self.assertEqual((resultat["total_avant"], resultat["total_apres"], resultat["ecart"]), (390.0, 490.0, 100.0))
+
+        self.db.expire_all()
+        self.assertEqual(
+            [(m.distance, m.tarif_km, m.prime_calculee) for m in self.db.query(Mission).order_by(Mission.date_mission)],
+            [(Decimal("60.00"), Decimal("3.50"), Decimal("210.00")), (Decimal("30.00"), Decimal("3.50"), Decimal("105.00")),
+             (Decimal("50.00"), Decimal("3.50"), Decimal("175.00")), (Decimal("50.00"), Decimal("3.00"), Decimal("150.00"))]
+        )
+        self.assertEqual(recalculer_primes_missions(self.db, chauffeur_id=self.chauffeurs[1].id)["missions_modifiees"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import sys
+import os
+import unittest
+from datetime import date
+from decimal import Decimal
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event
+
+from models import Credit, RetenueCredit, ProrogationCredit, StatutCredit
+from services.registre_credits import RegistreCredits
+from tests.test_salary_processor_bulk import creer_session, creer_employe
+
+
+def creer_credit(db, employe, total, mensualite, retenu=0):
+    credit = Credit(employe_id=employe.id, date_octroi=date(2025, 1, 1), montant_total=Decimal(total),
+                    nombre_mensualites=3, montant_mensualite=Decimal(mensualite),
+                    montant_retenu=Decimal(retenu), statut=StatutCredit.EN_COURS)
+    db.add(credit)
+    db.flush()
+    return credit
+
+
+class TestRegistreCredits(unittest.TestCase):
+    def setUp(self):
+        self.db = creer_session()
+        self.employes = [creer_employe(self.db, idx) for idx in range(1, 4)]
+        self.normal = creer_credit(self.db, self.employes[0], "6000", "2000")
+        self.fin = creer_credit(self.db, self.employes[0], "6000", "2000", retenu="5000")
+        self.proroge = creer_credit(self.db, self.employes[1], "3000", "1000")
+        self.deja_retenu = creer_credit(self.db, self.employes[2], "3000", "1000", retenu="1000")
+        self.db.add(ProrogationCredit(credit_id=self.proroge.id, date_prorogation=date(2025, 3, 1),
+                                      mois_initial=3, annee_initiale=2025, mois_reporte=4,
+                                      annee_reportee=2025, motif="Congé"))
+        self.db.add(RetenueCredit(credit_id=self.deja_retenu.id, mois=3, annee=2025,
+                                  montant=Decimal("1000"), date_retenue=date(2025, 3, 31)))
+        self.db.commit()
+        self.employe_ids = [employe.id for employe in self.employes]
+
+    def tearDown(self):
+        self.db.close()
+
+    def _compter_requetes(self):
+        requetes = []
+        event.listen(self.db.get_bind(), "before_cursor_execute",
+                     lambda *args: requetes.append(args[2]))
+        return requetes
+
+    def test_retenues_resolues_en_memoire(self):
+        requetes = self._compter_requetes()
+        registre = RegistreCredits.charger(self.db, 2025, 3)
+        self.assertEqual(len(requetes), 3)
+
+        self.assertEqual(registre.retenue_mois(self.employe_ids[0]), Decimal("3000"))  # 2000 + reste 1000
+        self.assertEqual(registre.retenue_mois(self.employe_ids[1]), Decimal(0))       # prorogé
+        self.assertEqual(registre.retenue_mois(self.employe_ids[2]), Decimal("1000"))  # déjà enregistrée
+        self.assertEqual(len(requetes), 3)
+
+    def test_ecritures_differees_au_commit(self):
+        registre = RegistreCredits.charger(self.db, 2025, 3)
+        requetes = self._compter_requetes()
+
+        for employe_id in self.employe_ids:
+            registre.enregistrer_retenues(employe_id)
+        self.assertEqual(requetes, [])
+        # Deux appels pour le même mois n'enregistrent pas de doublon
+        self.assertEqual(registre.enregistrer_retenues(self.employe_ids[0]), Decimal(0))
+        self.db.commit()
+
+        retenues = self.db.query(RetenueCredit).filter(RetenueCredit.mois == 3).count()
+        self.assertEqual(retenues, 4)  # 3 nouvelles (mensualité pleine) + 1 existante
+        self.db.refresh(self.fin)
+        self.assertEqual(self.fin.montant_retenu, Decimal("7000"))
+        self.assertEqual(self.fin.statut, StatutCredit.SOLDE)
+
+    def test_enregistrement_plafonne_avec_prorogations(self):
+        registre = RegistreCredits.charger(self.db, 2025, 3)
+        for employe_id in self.employe_ids:
+            registre.enregistrer_retenues(employe_id, respecter_prorogations=True, plafonner=True)
+        self.db.commit()
+
+        self.db.refresh(self.fin)
+        self.db.refresh(self.proroge)
+        self.assertEqual(self.fin.montant_retenu, Decimal("6000"))
+        self.assertEqual(self.proroge.montant_retenu, Decimal(0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+import asyncio
+import sys
+import os
+import unittest
+from datetime import date, datetime
+from decimal import Decimal
+from io import BytesIO
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event
+
+from models import Pointage, Avance, Credit, StatutCredit, Salaire, ParametresSalaire
+from services.salary_processor import (
+    SalaireProcessor, PROVENANCE_PERSISTE, PROVENANCE_RECALCULE, PROVENANCE_CALCULE, resume_provenance
+)
+from tests.test_salary_processor_bulk import creer_session, creer_employe
+
+
+class TestSalairesPersistes(unittest.TestCase):
+    def setUp(self):
+        self.db = creer_session()
+        self.db.add(ParametresSalaire())
+        self.employes = [creer_employe(self.db, idx) for idx in range(1, 4)]
+        for employe in self.employes:
+            pointage = Pointage(employe_id=employe.id, annee=2025, mois=3)
+            for jour in range(1, 31):
+                pointage.set_jour(jour, 1 if jour <= 25 else 0)
+            self.db.add(pointage)
+        self.db.add(Avance(employe_id=self.employes[0].id, date_avance=date(2025, 3, 1),
+                           montant=Decimal("3000.00"), mois_deduction=3, annee_deduction=2025))
+        self.db.add(Credit(employe_id=self.employes[0].id, date_octroi=date(2025, 1, 1),
+                           montant_total=Decimal("2000.00"), nombre_mensualites=1,
+                           montant_mensualite=Decimal("2000.00"), montant_retenu=Decimal(0),
+                           statut=StatutCredit.EN_COURS))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def _valider(self, employe_ids):
+        """Même enregistrement que /traitement-salaires/valider-tous (sans le routeur)"""
+        from routers.traitement_salaires import (
+            SALAIRE_COLUMNS, _enregistrer_retenues_credits, _marquer_avances_deduites
+        )
+        for resultat in SalaireProcessor(self.db).calculer_tous_salaires(2025, 3):
+            if resultat["employe_id"] not in employe_ids:
+                continue
+            salaire = Salaire(**{k: v for k, v in resultat.items() if k in SALAIRE_COLUMNS})
+            salaire.statut = "valide"
+            salaire.calcule_le = datetime.now()
+            self.db.add(salaire)
+            _enregistrer_retenues_credits(self.db, resultat["employe_id"], 2025, 3, resultat)
+            _marquer_avances_deduites(self.db, resultat["employe_id"], 2025, 3)
+        self.db.commit()
+
+    def test_lignes_validees_servies_sans_recalcul(self):
+        calcules = SalaireProcessor(self.db).calculer_tous_salaires(2025, 3)
+        self._valider({e.id for e in self.employes[:2]})
+
+        resultats = SalaireProcessor(self.db).resultats_mois(2025, 3)
+
+        provenances = {r["employe_id"]: r["provenance"] for r in resultats}
+        self.assertEqual(provenances, {
+            self.employes[0].id: PROVENANCE_PERSISTE,   # crédit soldé et avance déduite par la validation
+            self.employes[1].id: PROVENANCE_PERSISTE,
+            self.employes[2].id: PROVENANCE_CALCULE,
+        })
+        for calcule, resultat in zip(calcules, resultats):
+            for cle in ("salaire_cotisable", "irg", "total_avances", "retenue_credit", "salaire_net"):
+                self.assertEqual(Decimal(calcule[cle]), Decimal(resultat[cle]), cle)
+        self.assertEqual(resume_provenance(resultats), {"persiste": 2, "recalcule": 0, "calcule": 1})
+
+    def test_entrees_modifiees_recalculees(self):
+        self._valider({e.id for e in self.employes})
+
+        pointage = self.db.query(Pointage).filter(Pointage.employe_id == self.employes[1].id).one()
+        pointage.set_jour(30, 1)
+        self.db.commit()
+
+        resultats = SalaireProcessor(self.db).resultats_mois(2025, 3)
+
+        provenances = [r["provenance"] for r in resultats]
+        self.assertEqual(provenances, [PROVENANCE_PERSISTE, PROVENANCE_RECALCULE, PROVENANCE_PERSISTE])
+        self.assertEqual(resultats[1]["jours_travailles"], 26)
+
+    def test_derniere_mensualite_soldee_puis_pointage_modifie(self):
+        self._valider({e.id for e in self.employes})
+        credit = self.db.query(Credit).filter(Credit.employe_id == self.employes[0].id).one()
+        self.assertEqual(credit.statut, StatutCredit.SOLDE)
+
+        pointage = self.db.query(Pointage).filter(Pointage.employe_id == self.employes[0].id).one()
+        pointage.set_jour(30, 1)
+        self.db.commit()
+
+        resultat = SalaireProcessor(self.db).resultats_mois(2025, 3)[0]
+        self.assertEqual(resultat["provenance"], PROVENANCE_RECALCULE)
+        self.assertEqual(Decimal(resultat["retenue_credit"]), Decimal("2000.00"))
+        self.assertEqual(
+            Decimal(resultat["salaire_net"]),
+            Decimal(resultat["salaire_imposable"]) - Decimal(resultat["irg"])
+            - Decimal(resultat["total_avances"]) - Decimal("2000.00")
+        )
+
+        # Le mois suivant, le crédit soldé n'est plus déduit
+        suivant = SalaireProcessor(self.db)._charger_donnees_mois(2025, 4)
+        self.assertEqual(suivant[self.employes[0].id]["credits"], [])
+
+    def test_employe_desactive_reste_dans_le_mois_valide(self):
+        self._valider({e.id for e in self.employes})
+        self.employes[2].actif = False
+        self.db.commit()
+
+        processor = SalaireProcessor(self.db)
+        requetes = []
+        event.listen(self.db.get_bind(), "before_cursor_execute",
+                     lambda *args: requetes.append(args[2]))
+        resultats = processor.resultats_mois(2025, 3)
+
+        self.assertEqual(len(resultats), 3)
+        # employés/salaires (une jointure) + 6 requêtes groupées + rechargement paramètres
+        self.assertEqual(len(requetes), 8)
+
+    def test_g29_mois_partiellement_valide(self):
+        import openpyxl
+        from routers.traitement_salaires import generer_g29
+
+        self._valider({self.employes[0].id})
+        pointage = self.db.query(Pointage).filter(Pointage.employe_id == self.employes[0].id).one()
+        pointage.set_jour(30, 1)
+        self.db.commit()
+
+        reponse = generer_g29(annee=2025, mois=3, db=self.db)
+        self.assertEqual(reponse.headers["X-Provenance-Salaires"], "persiste=0; recalcule=1; calcule=2")
+        async def lire():
+            return b"".join([morceau async for morceau in reponse.body_iterator])
+        feuille = openpyxl.load_workbook(BytesIO(asyncio.run(lire()))).active
+
+        # Tous les employés du mois, validés ou non, avec leur n° de sécurité sociale
+        lignes = list(feuille.iter_rows(min_row=2, max_row=4, values_only=True))
+        self.assertEqual([ligne[1] for ligne in lignes], ["SS1", "SS2", "SS3"])
+        self.assertEqual(feuille.cell(row=5, column=4).value, "TOTAUX")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import sys
+import os
+import unittest
+from decimal import Decimal
+from datetime import date
+from unittest.mock import patch
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import (
+    Employe, Pointage, Mission, Client, Avance, Credit, StatutCredit,
+    DeductionConge, ParametresSalaire, SituationFamiliale
+)
+from services.irg_calculator import BaremeIndex, IRGCalculator
+from services.salary_processor import SalaireProcessor
+
+
+def creer_session():
+    """Base SQLite en mémoire"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def creer_employe(db, idx, **kwargs):
+    valeurs = dict(
+        nom=f"Nom{idx}",
+        prenom=f"Prenom{idx}",
+        date_naissance=date(1990, 1, 1),
+        lieu_naissance="Alger",
+        adresse="Adresse",
+        mobile="0550000000",
+        numero_secu_sociale=f"SS{idx}",
+        numero_compte_bancaire=f"CB{idx}",
+        situation_familiale=SituationFamiliale.CELIBATAIRE,
+        date_recrutement=date(2020, 1, 1),
+        poste_travail="Agent",
+        salaire_base=Decimal("30000.00"),
+    )
+    valeurs.update(kwargs)
+    employe = Employe(**valeurs)
+    db.add(employe)
+    db.flush()
+    return employe
+
+
+class TestSalaireProcessorBulk(unittest.TestCase):
+    def setUp(self):
+        self.db = creer_session()
+        self.db.add(ParametresSalaire())
+        client = Client(nom="Client", prenom="Test", distance=Decimal(50), telephone="0550000000")
+        self.db.add(client)
+        self.db.flush()
+
+        chauffeur = creer_employe(self.db, 1, poste_travail="Chauffeur")
+        agent = creer_employe(self.db, 2, femme_au_foyer=True, prime_nuit_agent_securite=True)
+        nouveau = creer_employe(self.db, 3, date_recrutement=date(2025, 1, 1))
+        creer_employe(self.db, 4)  # Sans pointage
+        creer_employe(self.db, 5, actif=False)
+
+        for employe, jours in ((chauffeur, 22), (agent, 30), (nouveau, 10)):
+            pointage = Pointage(employe_id=employe.id, annee=2025, mois=3)
+            for jour in range(1, 31):
+                pointage.set_jour(jour, 1 if jour <= jours else 0)
+            self.db.add(pointage)
+
+        self.db.add_all([
+            Mission(date_mission=date(2025, 3, 5), chauffeur_id=chauffeur.id, client_id=client.id,
+                    distance=Decimal(50), tarif_km=Decimal(3), prime_calculee=Decimal("150.00")),
+            Mission(date_mission=date(2025, 3, 20), chauffeur_id=chauffeur.id, client_id=client.id,
+                    distance=Decimal(60), tarif_km=Decimal(3), prime_calculee=Decimal("180.00")),
+            Mission(date_mission=date(2025, 4, 1), chauffeur_id=chauffeur.id, client_id=client.id,
+                    distance=Decimal(60), tarif_km=Decimal(3), prime_calculee=Decimal("999.00")),
+            Avance(employe_id=agent.id, date_avance=date(2025, 3, 1), montant=Decimal("5000.00"),
+                   mois_deduction=3, annee_deduction=2025),
+            Avance(employe_id=nouveau.id, date_avance=date(2025, 3, 1), montant=Decimal("20000.00"),
+                   mois_deduction=3, annee_deduction=2025),
+            Credit(employe_id=agent.id, date_octroi=date(2025, 1, 1), montant_total=Decimal("12000.00"),
+                   nombre_mensualites=6, montant_mensualite=Decimal("2000.00"), montant_retenu=Decimal(0),
+                   statut=StatutCredit.EN_COURS),
+            Credit(employe_id=nouveau.id, date_octroi=date(2025, 1, 1), montant_total=Decimal("6000.00"),
+                   nombre_mensualites=3, montant_mensualite=Decimal("2000.00"), montant_retenu=Decimal(0),
+                   statut=StatutCredit.EN_COURS),
+            DeductionConge(employe_id=nouveau.id, jours_deduits=Decimal("2.5"),
+                           mois_deduction=3, annee_deduction=2025),
+        ])
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_bulk_identique_au_calcul_unitaire(self):
+        processor = SalaireProcessor(self.db)
+        unitaire = processor.calculer_tous_salaires(2025, 3, bulk=False)
+        bulk = processor.calculer_tous_salaires(2025, 3)
+
+        self.assertEqual(len(unitaire), 4)
+        self.assertEqual(unitaire, bulk)
+
+    def test_bulk_une_recherche_irg_groupee(self):
+        bareme = BaremeIndex.depuis_bareme([(Decimal(salaire), Decimal(salaire - 20000) / 10)
+                                            for salaire in range(20000, 60000, 10)])
+        parametres = self.db.query(ParametresSalaire).one()
+        with patch.object(IRGCalculator, "_index", bareme), \
+                patch.object(IRGCalculator, "verifier_version"):
+            for proratise in (True, False):
+                parametres.activer_irg_proratise = proratise
+                self.db.commit()
+                processor = SalaireProcessor(self.db)
+                unitaire = processor.calculer_tous_salaires(2025, 3, bulk=False)
+
+                with patch.object(IRGCalculator, "calculer_irg", side_effect=AssertionError), \
+                        patch.object(IRGCalculator, "calculer_irg_batch",
+                                     autospec=True, side_effect=IRGCalculator.calculer_irg_batch) as batch:
+                    bulk = processor.calculer_tous_salaires(2025, 3)
+
+                self.assertEqual(batch.call_count, 1)
+                self.assertEqual(unitaire, bulk)
+                self.assertTrue(all(Decimal(r["irg"]) > 0 for r in bulk if r["status"] == "OK"))
+
+    def test_bulk_nombre_de_requetes_constant(self):
+        processor = SalaireProcessor(self.db)
+        requetes = []
+        event.listen(self.db.get_bind(), "before_cursor_execute",
+                     lambda *args: requetes.append(args[2]))
+
+        resultats = processor.calculer_tous_salaires(2025, 3)
+
+        # employés + rechargement paramètres (expire_all) + 6 requêtes groupées
+        self.assertEqual(len(requetes), 8)
+        statuts = {r["employe_id"]: r["status"] for r in resultats}
+        self.assertEqual(statuts, {1: "OK", 2: "OK", 3: "OK", 4: "ERROR"})
+        chauffeur = next(r for r in resultats if r["employe_id"] == 1)
+        self.assertEqual(Decimal(chauffeur["prime_deplacement"]), Decimal("330.00"))
+
+
+if __name__ == '__main__':
+    unittest.main()
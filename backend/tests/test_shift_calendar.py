@@ -0,0 +1,105 @@
+import sys
+import os
+import unittest
+from datetime import date, datetime, time
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import pandas as pd
+from sqlalchemy import event
+
+from models import Pointage
+from models.poste_travail import PosteTravail
+from services.attendance_service import AttendanceService
+from services.calculation_service import AttendanceCalculationService
+from services.shift_calendar import DEFAULT_SHIFT, ShiftCalendar, ShiftTemplate, resolve_punches
+from tests.test_salary_processor_bulk import creer_session, creer_employe
+
+NUIT = ShiftTemplate(time(22, 0), time(6, 0), 8)
+
+
+def logs(*lignes):
+    return pd.DataFrame(
+        [{"employee_name": nom, "timestamp": pd.Timestamp(ts), "type": type_, "has_photo": None}
+         for nom, ts, type_ in lignes]
+    )
+
+
+class TestShiftTemplate(unittest.TestCase):
+    def test_poste_de_nuit(self):
+        self.assertTrue(NUIT.crosses_midnight)
+        self.assertEqual(NUIT.end_on(date(2025, 3, 3)), datetime(2025, 3, 4, 6, 0))
+        self.assertEqual(NUIT.work_date(datetime(2025, 3, 4, 6, 10)), date(2025, 3, 3))
+        self.assertEqual(NUIT.work_date(datetime(2025, 3, 4, 21, 55)), date(2025, 3, 4))
+        self.assertEqual(DEFAULT_SHIFT.work_date(datetime(2025, 3, 4, 6, 10)), date(2025, 3, 4))
+
+    def test_pointages_multiples(self):
+        jour = [(datetime(2025, 3, 3, h, m), t) for h, m, t in [
+            (13, 0, "ENTRY"), (8, 0, "ENTRY"), (12, 0, "EXIT"), (17, 0, "EXIT"), (17, 5, "EXIT"), (18, 0, "ENTRY")
+        ]]
+        entree, sortie, minutes, non_apparies = resolve_punches(jour)
+        self.assertEqual((entree.hour, sortie.time()), (8, time(17, 5)))
+        self.assertEqual(minutes, 4 * 60 + 4 * 60 + 5)
+        self.assertEqual(non_apparies, 1)  # entrée de 18h sans sortie
+
+
+class TestAgregationJournaliere(unittest.TestCase):
+    def setUp(self):
+        self.db = creer_session()
+        self.db.add(PosteTravail(libelle="Gardien", heure_debut=time(22, 0), heure_fin=time(6, 0), heures_journee=8))
+        self.gardien = creer_employe(self.db, 1, poste_travail="Gardien")
+        self.agent = creer_employe(self.db, 2)
+        existant = Pointage(employe_id=self.agent.id, annee=2025, mois=3)
+        existant.set_jour(4, 1)
+        self.db.add(existant)
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_import_complet_sans_requete_par_jour(self):
+        service = AttendanceCalculationService(self.db)
+        fichier = logs(
+            ("G", "2025-03-03 21:58", "ENTRY"), ("G", "2025-03-04 06:02", "EXIT"),
+            ("G", "2025-03-04 22:00", "ENTRY"),
+            ("A", "2025-03-04 08:00", "ENTRY"), ("A", "2025-03-04 12:00", "EXIT"),
+            ("A", "2025-03-04 13:00", "ENTRY"), ("A", "2025-03-04 17:00", "EXIT"),
+            ("A", "2025-03-05 14:00", "EXIT"),
+        )
+        jours = service.aggregate_daily_logs(fichier, fichier["employee_name"].map({"G": self.gardien.id, "A": self.agent.id}), {})
+        self.assertEqual(sorted(jours), [
+            (self.gardien.id, date(2025, 3, 3)), (self.gardien.id, date(2025, 3, 4)),
+            (self.agent.id, date(2025, 3, 4)), (self.agent.id, date(2025, 3, 5)),
+        ])
+
+        requetes = []
+        event.listen(self.db.get_bind(), "before_cursor_execute", lambda *args: requetes.append(args[2]))
+        service.prefetch_existing_pointages(jours.keys())
+        calculs = {cle: service.calculate_day(*cle, jour) for cle, jour in jours.items()}
+        self.assertEqual(len(requetes), 1)  # une requête pour le mois de mars
+
+        nuit = calculs[(self.gardien.id, date(2025, 3, 3))]
+        self.assertEqual((nuit["worked_minutes"], nuit["day_value"]), (484, 1))
+        sans_sortie = calculs[(self.gardien.id, date(2025, 3, 4))]
+        self.assertEqual(sans_sortie["exit_time"], datetime(2025, 3, 5, 6, 0))
+        self.assertIn("Sortie estimée à 06:00", sans_sortie["warnings"][0])
+
+        pauses = calculs[(self.agent.id, date(2025, 3, 4))]
+        self.assertEqual(pauses["worked_minutes"], 480)
+        self.assertIn("Conflit: Pointage déjà existant (valeur: 1)", pauses["warnings"])
+        self.assertEqual(calculs[(self.agent.id, date(2025, 3, 5))]["entry_time"], datetime(2025, 3, 5, 8, 0))
+
+    def test_synchronisation_poste_de_nuit(self):
+        summary = AttendanceService(self.db).process_attendance_logs([
+            {"employee_name": "Nom1 Prenom1", "timestamp": "2025-03-04T06:00:00", "type": "EXIT"},
+        ])
+        self.assertEqual(summary["imported"], 1)
+        pointage = self.db.query(Pointage).filter_by(employe_id=self.gardien.id).one()
+        self.assertEqual((pointage.get_jour(3), pointage.get_jour(4)), (1, None))
+        detail, = summary["details"]
+        self.assertIn("exit_assume_entry_22h", detail["message"])
+
+
+if __name__ == '__main__':
+    unittest.main()
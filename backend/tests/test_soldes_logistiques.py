@@ -0,0 +1,74 @@
+import sys
+import os
+import unittest
+from datetime import date
+from decimal import Decimal
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from models import Client, ClientLogisticsBalance, LogisticsType
+from schemas.mission import MissionCreate
+from services.mission_service import MissionService
+from services.soldes_logistiques import lire_soldes, reconstruire_soldes_logistiques
+from tests.test_salary_processor_bulk import creer_session, creer_employe
+
+
+class TestSoldesLogistiques(unittest.TestCase):
+    def setUp(self):
+        self.db = creer_session()
+        self.chauffeur = creer_employe(self.db, 1, poste_travail="Chauffeur")
+        self.clients = [Client(nom=f"Client{i}", prenom="Test", distance=Decimal(50), telephone="0550000000")
+                        for i in (1, 2)]
+        self.types = [LogisticsType(name="Palette"), LogisticsType(name="Caisse")]
+        self.db.add_all(self.clients + self.types)
+        self.db.commit()
+        self.service = MissionService(self.db)
+
+    def tearDown(self):
+        self.db.close()
+
+    def _mission(self, *clients):
+        return MissionCreate(date_mission=date(2025, 3, 1), chauffeur_id=self.chauffeur.id, clients=[
+            {"client_id": self.clients[c].id,
+             "logistics": [{"logistics_type_id": self.types[t].id, "quantity_out": sortie, "quantity_in": retour}
+                           for t, sortie, retour in mouvements]}
+            for c, mouvements in clients
+        ])
+
+    def _soldes(self):
+        return sorted(
+            (solde.client_id, solde.logistics_type_id, solde.total_out, solde.total_in)
+            for solde in self.db.query(ClientLogisticsBalance)
+            if solde.total_out or solde.total_in
+        )
+
+    def test_maintenance_incrementale(self):
+        premiere = self.service.create_mission(self._mission((0, [(0, 10, 2), (1, 5, 0)]), (1, [(0, 3, 0)])))
+        seconde = self.service.create_mission(self._mission((0, [(0, 4, 6)])))
+        self.service.update_mission(premiere.id, self._mission((0, [(0, 8, 1)]), (1, [(1, 2, 2)])))
+        self.service.delete_mission(seconde.id)
+        self.service.create_mission(self._mission((1, [(0, 1, 0)])))
+
+        client1, client2 = (c.id for c in self.clients)
+        palette, caisse = (t.id for t in self.types)
+        attendus = [(client1, palette, 8, 1), (client2, palette, 1, 0), (client2, caisse, 2, 2)]
+        self.assertEqual(self._soldes(), sorted(attendus))
+
+        # La reconstruction complète retrouve les mêmes soldes
+        self.assertEqual(reconstruire_soldes_logistiques(self.db), 3)
+        self.db.commit()
+        self.assertEqual(self._soldes(), sorted(attendus))
+
+        # Lecture: types actifs, soldes non nuls, triés par client puis type
+        self.types[1].is_active = False
+        self.db.commit()
+        self.assertEqual(
+            [(ligne.client_id, ligne.type_name, ligne.total_out - ligne.total_in) for ligne in lire_soldes(self.db)],
+            [(client1, "Palette", 7), (client2, "Palette", 1)]
+        )
+        self.assertEqual(len(lire_soldes(self.db, client2)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
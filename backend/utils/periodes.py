@@ -0,0 +1,31 @@
+"""
+Filtres de période sur des colonnes Date
+
+(annee, mois) est converti en intervalle semi-ouvert [1er du mois, 1er du
+mois suivant[ : la comparaison porte directement sur la colonne, ce qui
+permet d'utiliser ses index (contrairement à YEAR()/MONTH()) et fonctionne
+sur tous les moteurs (MySQL, SQLite des tests).
+"""
+from datetime import date
+from typing import Optional, Tuple
+
+from sqlalchemy import and_
+
+
+def bornes_periode(annee: int, mois: Optional[int] = None) -> Tuple[date, date]:
+    """
+    Bornes [debut, fin[ d'un mois, ou de l'année entière si mois est None
+
+    Exemple: bornes_periode(2025, 12) -> (2025-12-01, 2026-01-01)
+    """
+    if mois is None:
+        return date(annee, 1, 1), date(annee + 1, 1, 1)
+    if mois == 12:
+        return date(annee, 12, 1), date(annee + 1, 1, 1)
+    return date(annee, mois, 1), date(annee, mois + 1, 1)
+
+
+def filtre_periode(colonne, annee: int, mois: Optional[int] = None):
+    """Condition colonne ∈ [debut, fin[ pour un mois (ou une année si mois est None)"""
+    debut, fin = bornes_periode(annee, mois)
+    return and_(colonne >= debut, colonne < fin)
@@ -0,0 +1,11 @@
+-- Migration: Point de reprise de la synchronisation Attendance
+-- Date: 2026-10-18
+-- Description: Dernier log Attendance importé (id + horodatage) par périmètre de synchronisation:
+--              les synchronisations suivantes ne transfèrent que les nouveaux logs.
+
+CREATE TABLE IF NOT EXISTS attendance_sync_state (
+    scope VARCHAR(50) NOT NULL PRIMARY KEY COMMENT '"logs" ou "logs:employee:<id Attendance>"',
+    last_log_id INT NULL,
+    last_log_timestamp DATETIME NULL,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,17 @@
+-- Migration: Soldes logistiques matérialisés par client
+-- Date: 2026-10-18
+-- Description: Somme des mouvements logistiques (livré / récupéré) par client et type,
+--              tenue à jour à chaque création / modification / suppression de mission.
+--              Les lectures de solde (écran client, PDF tous clients) ne reparcourent plus
+--              tout l'historique des mouvements.
+--              Remplissage initial: python scripts/reconstruire_soldes_logistiques.py
+
+CREATE TABLE IF NOT EXISTS client_logistics_balance (
+    client_id INT NOT NULL,
+    logistics_type_id INT NOT NULL,
+    total_out INT NOT NULL DEFAULT 0 COMMENT 'Total livré (prises)',
+    total_in INT NOT NULL DEFAULT 0 COMMENT 'Total récupéré (retournées)',
+    PRIMARY KEY (client_id, logistics_type_id),
+    CONSTRAINT fk_clb_client FOREIGN KEY (client_id) REFERENCES clients(id) ON DELETE CASCADE,
+    CONSTRAINT fk_clb_logistics_type FOREIGN KEY (logistics_type_id) REFERENCES logistics_types(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
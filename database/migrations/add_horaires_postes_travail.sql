@@ -0,0 +1,10 @@
+-- Migration: Horaires types par poste de travail
+-- Date: 2026-10-18
+-- Description: Début / fin de l'horaire type et durée d'une journée complète par poste,
+--              utilisés par les imports de pointeuse (estimation des entrées/sorties manquantes,
+--              postes de nuit à cheval sur minuit). NULL = horaire par défaut 08:00 - 17:00, 8h.
+
+ALTER TABLE postes_travail
+ADD COLUMN IF NOT EXISTS heure_debut TIME NULL COMMENT 'Début de l''horaire type',
+ADD COLUMN IF NOT EXISTS heure_fin TIME NULL COMMENT 'Fin de l''horaire type (<= début: poste de nuit)',
+ADD COLUMN IF NOT EXISTS heures_journee INT NULL COMMENT 'Heures d''une journée complète';
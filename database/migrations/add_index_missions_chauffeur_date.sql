@@ -0,0 +1,8 @@
+-- Migration: Index couvrant des missions par chauffeur et date
+-- Date: 2026-10-18
+-- Description: Les primes de déplacement d'un chauffeur pour un mois sont filtrées par
+--              intervalle de dates (date_mission >= 1er du mois AND < 1er du mois suivant).
+--              L'index (chauffeur_id, date_mission, prime_calculee) permet de les sommer
+--              sans lire la table.
+
+CREATE INDEX idx_missions_chauffeur_date_prime ON missions(chauffeur_id, date_mission, prime_calculee);
@@ -0,0 +1,9 @@
+-- Migration: Ajouter la version du barème IRG aux salaires
+-- Date: 2026-10-18
+-- Description: Trace la version du barème IRG (révision irg_bareme ou empreinte irg.xlsx)
+--              utilisée pour calculer chaque bulletin
+
+ALTER TABLE salaires
+ADD COLUMN irg_bareme_version VARCHAR(64) NULL
+COMMENT 'Version du barème IRG utilisé pour le calcul'
+AFTER irg_base_30j;
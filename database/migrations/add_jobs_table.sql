@@ -0,0 +1,28 @@
+-- Migration: Table des jobs en arrière-plan
+-- Date: 2026-10-18
+-- Description: Suivi des traitements longs (bulletins de paie, sauvegarde batch des salaires)
+--              exécutés hors requête HTTP. Le fichier résultat est stocké dans backend/data/jobs/<id>/
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id VARCHAR(36) NOT NULL PRIMARY KEY,
+    type_job VARCHAR(100) NOT NULL,
+    statut ENUM('EN_ATTENTE', 'EN_COURS', 'TERMINE', 'ERREUR', 'ANNULE') NOT NULL DEFAULT 'EN_ATTENTE',
+    parametres JSON NULL,
+    progression INT NOT NULL DEFAULT 0,
+    total INT NOT NULL DEFAULT 0,
+    message VARCHAR(255) NULL,
+    erreur TEXT NULL,
+    annulation_demandee BOOLEAN NOT NULL DEFAULT FALSE,
+    fichier_resultat VARCHAR(500) NULL,
+    nom_fichier VARCHAR(255) NULL,
+    media_type VARCHAR(100) NULL,
+    worker VARCHAR(100) NULL COMMENT 'hôte:pid du processus qui exécute le job',
+    user_id INT NULL,
+    created_at DATETIME NOT NULL,
+    started_at DATETIME NULL,
+    finished_at DATETIME NULL,
+    INDEX idx_jobs_type_job (type_job),
+    INDEX idx_jobs_statut (statut),
+    INDEX idx_jobs_user_id (user_id),
+    INDEX idx_jobs_created_at (created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
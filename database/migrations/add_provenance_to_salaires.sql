@@ -0,0 +1,12 @@
+-- Migration: Provenance des salaires enregistrés
+-- Date: 2026-10-18
+-- Description: Empreinte des entrées du calcul et horodatage précis (updated_at est une DATE)
+--              Les rapports servent la ligne validée tant que l'empreinte est inchangée
+
+ALTER TABLE salaires
+ADD COLUMN empreinte_entrees VARCHAR(64) NULL
+COMMENT 'SHA-256 des entrées du calcul'
+AFTER date_paiement_effective,
+ADD COLUMN calcule_le DATETIME NULL
+COMMENT 'Date/heure du calcul enregistré'
+AFTER empreinte_entrees;